@@ -0,0 +1,325 @@
+"""
+Admission control for the LLM-bound report endpoints.
+
+Each report request holds a worker for as long as the upstream model takes
+(up to a minute), so an unbounded burst can tie up every worker and stall the
+rest of the API. ``AdmissionController`` caps how many report requests run at
+once, overall (``REPORT_MAX_CONCURRENT``) and per client
+(``REPORT_MAX_CONCURRENT_PER_CLIENT``). Requests over the global limit wait in
+a short bounded queue (``REPORT_ADMISSION_QUEUE`` slots, at most
+``REPORT_ADMISSION_QUEUE_TIMEOUT`` seconds); anything else is rejected at once
+with 429 and a ``Retry-After`` estimate.
+
+Limits are per process: with several server processes the effective global
+limit is ``REPORT_MAX_CONCURRENT`` times the number of processes.
+
+The async endpoint holds no thread while it waits on the upstream, so it has
+its own, much larger limit (``REPORT_ASYNC_MAX_CONCURRENT``) and admits
+requests without blocking the event loop (``async_report_admission``).
+"""
+import asyncio
+import logging
+import math
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from ninja.errors import HttpError
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(HttpError):
+    """429 raised when a report request is not admitted; carries a ``Retry-After`` in seconds"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(429, message)
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Global and per-client concurrency limit with a bounded wait queue"""
+
+    def __init__(
+        self,
+        max_concurrent: int,
+        max_per_client: int = 0,
+        queue_size: int = 0,
+        queue_timeout: float = 0.0,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_per_client = max_per_client
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self._cond = threading.Condition()
+        self._active = 0
+        self._per_client = {}
+        self._waiting = 0
+        self._avg_hold_s = None  # Moving average of how long an admitted request runs
+        self._stats = {
+            'admitted': 0,
+            'queued': 0,
+            'max_queue_depth': 0,
+            'rejected_client_limit': 0,
+            'rejected_queue_full': 0,
+            'rejected_queue_timeout': 0,
+            'total_wait_ms': 0.0,
+        }
+
+    @contextmanager
+    def slot(self, client: str):
+        """Hold a slot for the duration of the block, or raise ``AdmissionRejected``"""
+        self.acquire(client)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(client, time.monotonic() - start)
+
+    def acquire(self, client: str, wait: bool = True) -> bool:
+        """
+        Claim a slot for ``client``, waiting in the queue if the global limit is reached.
+
+        Args:
+            client: Caller key (see ``admission_client_key``)
+            wait: With False, return False instead of queueing when no slot is free
+
+        Returns:
+            True once the slot is held
+
+        Raises:
+            AdmissionRejected: Client already at its limit, queue full, or no slot freed in time
+        """
+        with self._cond:
+            if self.max_per_client and self._per_client.get(client, 0) >= self.max_per_client:
+                self._reject('rejected_client_limit', client)
+                raise AdmissionRejected(
+                    "Too many report requests in progress for this client. Please wait for them to finish.",
+                    self._retry_after(),
+                )
+
+            if self._active >= self.max_concurrent:
+                if not wait:
+                    return False
+                if self._waiting >= self.queue_size:
+                    self._reject('rejected_queue_full', client)
+                    raise AdmissionRejected(
+                        "The report service is busy. Please try again shortly.",
+                        self._retry_after(),
+                    )
+                self._stats['queued'] += 1
+                self._waiting += 1
+                self._stats['max_queue_depth'] = max(self._stats['max_queue_depth'], self._waiting)
+                start = time.monotonic()
+                deadline = start + self.queue_timeout
+                try:
+                    while self._active >= self.max_concurrent:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._reject('rejected_queue_timeout', client)
+                            raise AdmissionRejected(
+                                "The report service is busy. Please try again shortly.",
+                                self._retry_after(),
+                            )
+                        self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+                    self._stats['total_wait_ms'] += (time.monotonic() - start) * 1000
+
+            self._active += 1
+            self._per_client[client] = self._per_client.get(client, 0) + 1
+            self._stats['admitted'] += 1
+            return True
+
+    def release(self, client: str, held_seconds: Optional[float] = None) -> None:
+        with self._cond:
+            self._active -= 1
+            remaining = self._per_client.get(client, 0) - 1
+            if remaining > 0:
+                self._per_client[client] = remaining
+            else:
+                self._per_client.pop(client, None)
+            if held_seconds is not None:
+                self._avg_hold_s = held_seconds if self._avg_hold_s is None else 0.8 * self._avg_hold_s + 0.2 * held_seconds
+            self._cond.notify()
+
+    def _reject(self, reason: str, client: str) -> None:
+        self._stats[reason] += 1
+        logger.warning(
+            "Report request rejected reason=%s client=%s active=%d waiting=%d",
+            reason.replace('rejected_', ''),
+            client,
+            self._active,
+            self._waiting,
+        )
+
+    def _retry_after(self) -> int:
+        """Seconds until a slot is likely free: average run time scaled by the backlog per slot"""
+        if self._avg_hold_s is None:
+            return 5
+        backlog = (self._waiting + 1) / max(self.max_concurrent, 1)
+        return max(1, min(60, math.ceil(self._avg_hold_s * backlog)))
+
+    def stats(self) -> dict:
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update({
+                'max_concurrent': self.max_concurrent,
+                'max_per_client': self.max_per_client,
+                'queue_size': self.queue_size,
+                'queue_timeout': self.queue_timeout,
+                'active': self._active,
+                'queue_depth': self._waiting,
+                'clients': len(self._per_client),
+                'avg_hold_ms': self._avg_hold_s * 1000 if self._avg_hold_s is not None else None,
+                'avg_wait_ms': stats['total_wait_ms'] / stats['queued'] if stats['queued'] else 0.0,
+            })
+            del stats['total_wait_ms']
+        return stats
+
+
+_controller = None
+_controller_lock = threading.Lock()
+
+
+def get_admission_controller() -> Optional[AdmissionController]:
+    """Return the process-wide controller, or None when admission control is disabled"""
+    global _controller
+    if settings.REPORT_MAX_CONCURRENT <= 0:
+        return None
+    if _controller is None:
+        with _controller_lock:
+            if _controller is None:
+                _controller = AdmissionController(
+                    settings.REPORT_MAX_CONCURRENT,
+                    max_per_client=settings.REPORT_MAX_CONCURRENT_PER_CLIENT,
+                    queue_size=settings.REPORT_ADMISSION_QUEUE,
+                    queue_timeout=settings.REPORT_ADMISSION_QUEUE_TIMEOUT,
+                )
+    return _controller
+
+
+def admission_client_key(request, user=None) -> str:
+    """Identify the caller: the authenticated user (``request.user`` unless given), else the client IP"""
+    if user is None:
+        user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f"user:{user.pk}"
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '') if settings.REPORT_ADMISSION_TRUST_FORWARDED_FOR else ''
+    ip = forwarded.split(',')[0].strip() or request.META.get('REMOTE_ADDR', '')
+    return f"ip:{ip}"
+
+
+@contextmanager
+def report_admission(request):
+    """Hold a report slot for the caller for the duration of the block (no-op when disabled)"""
+    controller = get_admission_controller()
+    if controller is None:
+        yield
+        return
+    with controller.slot(admission_client_key(request)):
+        yield
+
+
+class _AdmittedStream:
+    """Event iterator that gives its admission slot back once, when Django closes the response"""
+
+    def __init__(self, controller: AdmissionController, client: str, events):
+        self._controller = controller
+        self._client = client
+        self._events = events
+        self._start = time.monotonic()
+        self._released = False
+
+    def __iter__(self):
+        yield from self._events
+
+    def close(self):
+        try:
+            if hasattr(self._events, 'close'):
+                self._events.close()
+        finally:
+            if not self._released:
+                self._released = True
+                self._controller.release(self._client, time.monotonic() - self._start)
+
+
+def admit_stream(request, events):
+    """
+    Admit a streaming report before the response starts; the slot is held
+    until the response is closed (stream finished or client disconnected).
+    """
+    controller = get_admission_controller()
+    if controller is None:
+        return events
+    client = admission_client_key(request)
+    controller.acquire(client)
+    return _AdmittedStream(controller, client, events)
+
+
+_async_controller = None
+
+
+def get_async_admission_controller() -> Optional[AdmissionController]:
+    """Return the process-wide controller for the async endpoint, or None when disabled"""
+    global _async_controller
+    if settings.REPORT_ASYNC_MAX_CONCURRENT <= 0:
+        return None
+    if _async_controller is None:
+        with _controller_lock:
+            if _async_controller is None:
+                _async_controller = AdmissionController(
+                    settings.REPORT_ASYNC_MAX_CONCURRENT,
+                    max_per_client=settings.REPORT_MAX_CONCURRENT_PER_CLIENT,
+                    queue_size=settings.REPORT_ADMISSION_QUEUE,
+                    queue_timeout=settings.REPORT_ADMISSION_QUEUE_TIMEOUT,
+                )
+    return _async_controller
+
+
+@asynccontextmanager
+async def async_report_admission(request, user=None):
+    """
+    ``report_admission`` for async views. A free slot is taken on the event
+    loop; only a request that has to queue waits in a worker thread.
+
+    The thread cannot be interrupted, so when the awaiting request is
+    cancelled (client disconnected) the slot it goes on to take is released
+    as soon as it has it.
+    """
+    controller = get_async_admission_controller()
+    if controller is None:
+        yield
+        return
+    client = admission_client_key(request, user)
+    if not controller.acquire(client, wait=False):
+        waiting = asyncio.ensure_future(sync_to_async(controller.acquire, thread_sensitive=False)(client))
+        try:
+            await asyncio.shield(waiting)
+        except asyncio.CancelledError:
+            waiting.add_done_callback(lambda done: _release_abandoned(controller, client, done))
+            raise
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        controller.release(client, time.monotonic() - start)
+
+
+def _release_abandoned(controller: AdmissionController, client: str, done: asyncio.Future) -> None:
+    """Give back a slot acquired for a request that was cancelled while it queued"""
+    if not done.cancelled() and done.exception() is None:
+        controller.release(client)
+
+
+def async_admission_stats() -> dict:
+    controller = get_async_admission_controller()
+    return controller.stats() if controller is not None else {'enabled': False}
+
+
+def admission_stats() -> dict:
+    controller = get_admission_controller()
+    return controller.stats() if controller is not None else {'enabled': False}
@@ -5,3 +5,10 @@ class AiProviderConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.ai_provider'
 
+    def ready(self):
+        # Keeps the report search index current on save/delete
+        from apps.ai_provider import search  # noqa: F401
+        # Releases stored PDFs when their last report is deleted
+        from apps.ai_provider import storage  # noqa: F401
+        from apps.ai_provider.prompts import check_prompt_settings
+        check_prompt_settings()
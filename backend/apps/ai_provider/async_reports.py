@@ -0,0 +1,259 @@
+"""
+Async report pipeline behind POST /api/ai-provider/generate-report/async.
+
+The synchronous endpoint blocks a server thread on the upstream call for the
+whole completion. Here the completion goes through the event loop's
+``AsyncOpenRouterClient`` and the report row is written with the async ORM,
+so under ASGI one worker process can hold hundreds of upstream calls open.
+The remaining blocking steps run in threads, never on the one shared
+thread-sensitive thread the async ORM uses:
+
+- Joining a single flight can wait on an identical request for up to a
+  lease, so it gets ``REPORT_ASYNC_FLIGHT_THREADS`` threads of its own.
+  Waiting followers then cannot starve the leader they are waiting on, nor
+  stall ``asave``. Separate threads also give each leader its own
+  single-flight owner id.
+- PDF rendering gets ``PDF_OFFLOAD_THREADS`` threads, which only wait on the
+  PDF process pool.
+- Short cache, flight and usage bookkeeping runs on the default executor.
+
+Behaviour matches ``services.generate_report``: report cache, single flight,
+model fallback chain, lazy PDFs, stage timings and usage rows.
+"""
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from ninja.errors import HttpError
+
+from apps.ai_provider.cache import report_cache_key, store_cached_report
+from apps.ai_provider.client import get_async_openrouter_client
+from apps.ai_provider.instrumentation import StageTimer, record_timings, record_usage, stage
+from apps.ai_provider.model_routing import get_model_router
+from apps.ai_provider.schemas import ImmigrationProfileSchema
+from apps.ai_provider.services import (
+    as_http_error,
+    build_immigration_report,
+    build_openrouter_request,
+    ensure_api_key_configured,
+    extract_report_content,
+    finish_report_content,
+    is_model_failure,
+    join_report_flight,
+    render_report_pdf,
+)
+from apps.ai_provider.usage import record_report_usage
+from apps.core.models import ImmigrationReport
+
+logger = logging.getLogger(__name__)
+
+_pdf_executor = None
+_flight_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_pdf_executor() -> ThreadPoolExecutor:
+    """Threads that wait on PDF renders, kept apart from the default executor so renders cannot starve it"""
+    global _pdf_executor
+    if _pdf_executor is None:
+        with _executor_lock:
+            if _pdf_executor is None:
+                _pdf_executor = ThreadPoolExecutor(
+                    max_workers=settings.PDF_OFFLOAD_THREADS,
+                    thread_name_prefix='report-pdf',
+                )
+    return _pdf_executor
+
+
+def _get_flight_executor() -> ThreadPoolExecutor:
+    """Threads that join single flights; followers block here until their leader finishes"""
+    global _flight_executor
+    if _flight_executor is None:
+        with _executor_lock:
+            if _flight_executor is None:
+                _flight_executor = ThreadPoolExecutor(
+                    max_workers=settings.REPORT_ASYNC_FLIGHT_THREADS,
+                    thread_name_prefix='report-flight',
+                )
+    return _flight_executor
+
+
+def _in_thread(func, executor=None):
+    """``sync_to_async`` on ``executor`` (default: the loop's), not the shared thread-sensitive thread"""
+    def call(*args, **kwargs):
+        # Executor threads never see request_finished; recycle their connections like a request would
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+    return sync_to_async(call, thread_sensitive=False, executor=executor)
+
+
+async def request_report_completion_async(headers: dict, payload_data: dict) -> dict:
+    """
+    ``services.request_report_completion`` on the event loop's async client.
+
+    Raises:
+        requests.exceptions.RequestException: On transport or HTTP errors
+    """
+    with stage('upstream'):
+        client = await get_async_openrouter_client()
+        response_data, metrics = await client.post_json(payload_data, headers)
+    usage = response_data.get("usage") or {}
+    record_usage(usage)
+    logger.info(
+        "OpenRouter response model=%s status=%s connect_ms=%.0f reused=%s wait_ms=%.0f total_ms=%.0f "
+        "prompt_tokens=%s completion_tokens=%s",
+        response_data.get("model", payload_data["model"]),
+        metrics.status_code,
+        metrics.connect_ms,
+        metrics.reused_connection,
+        metrics.wait_ms,
+        metrics.total_ms,
+        usage.get("prompt_tokens"),
+        usage.get("completion_tokens"),
+    )
+    return response_data
+
+
+async def complete_report_with_fallback_async(headers: dict, payload_data: dict):
+    """
+    ``services.complete_report_with_fallback`` without blocking the event loop.
+
+    Returns:
+        A ``(report_content, model)`` tuple
+
+    Raises:
+        The last model's error, or HttpError 503 if every model's circuit is open
+    """
+    router = get_model_router()
+    last_error = None
+    for model in router.plan():
+        if not router.begin(model):
+            continue
+        start = time.perf_counter()
+        try:
+            response_data = await request_report_completion_async(headers, {**payload_data, "model": model})
+            report_content = extract_report_content(response_data)
+        except asyncio.CancelledError:
+            # Client disconnected; says nothing about the model
+            router.cancel(model)
+            raise
+        except Exception as e:
+            if not is_model_failure(e):
+                router.cancel(model)
+                raise
+            router.record_failure(model, (time.perf_counter() - start) * 1000)
+            last_error = e
+            logger.warning("Model failed, trying the next model model=%s error=%s", model, str(e))
+            continue
+        router.record_success(model, (time.perf_counter() - start) * 1000)
+        return report_content, model
+
+    if last_error is not None:
+        raise last_error
+    raise HttpError(503, "All report models are temporarily unavailable. Please try again shortly.")
+
+
+async def save_immigration_report_async(**fields) -> ImmigrationReport:
+    """``services.save_immigration_report`` with the async ORM"""
+    # Building the row hashes the stored PDF; keep that disk read off the event loop
+    report = await _in_thread(build_immigration_report)(**fields)
+    try:
+        with stage('db_insert'):
+            await report.asave(force_insert=True)
+    except Exception as e:
+        raise HttpError(
+            500,
+            f"Failed to save report to database: {str(e)}"
+        )
+    logger.info("Report saved report_id=%s cache_hit=%s", report.id, report.cache_hit)
+    return report
+
+
+async def generate_report_async(
+    profile: ImmigrationProfileSchema,
+    user=None,
+    referer: str = "",
+    pipeline: str = 'async',
+    timer: Optional[StageTimer] = None,
+) -> ImmigrationReport:
+    """
+    Run the full report pipeline without holding a thread during the upstream call.
+
+    Args:
+        profile: The immigration profile to report on
+        user: Authenticated user to attach the report to, if any
+        referer: Value for the ``HTTP-Referer`` header sent to OpenRouter
+        pipeline: Label for the recorded stage timings
+        timer: Timer to record stage durations into, e.g. to build a ``Server-Timing`` header
+
+    Returns:
+        The saved ``ImmigrationReport``
+
+    Raises:
+        HttpError: With the status code the API should surface
+    """
+    ensure_api_key_configured()
+    logger.info("Starting report generation pipeline=%s pathway=%s", pipeline, profile.path)
+
+    timer = timer or StageTimer()
+    outcome = 'error'
+    model = None
+    flight = None
+    report = None
+    with timer.activate():
+        try:
+            cache_key = report_cache_key(profile)
+            # Cache hits and followers of an identical in-flight request are served by the sync path
+            report, flight = await _in_thread(join_report_flight, _get_flight_executor())(profile, cache_key, user=user)
+            if report is not None:
+                outcome, model = 'cached', report.ai_model_used
+                return report
+
+            headers, payload_data = build_openrouter_request(profile, referer)
+            completion, model = await complete_report_with_fallback_async(headers, payload_data)
+            report_content = finish_report_content(profile, completion)
+
+            pdf_filename = pdf_path = pdf_url = None
+            if not settings.REPORT_PDF_LAZY:  # Otherwise rendered on the first download
+                pdf_filename, pdf_path, pdf_url = await _in_thread(render_report_pdf, _get_pdf_executor())(report_content)
+
+            report = await save_immigration_report_async(
+                profile=profile,
+                report_content=report_content,
+                pdf_filename=pdf_filename,
+                pdf_path=pdf_path,
+                pdf_url=pdf_url,
+                user=user,
+                cache_key=cache_key,
+                ai_model_used=model,
+            )
+            await _in_thread(store_cached_report)(cache_key, report)
+            await _in_thread(flight.complete)(report)
+            outcome = 'ok'
+            return report
+
+        except asyncio.CancelledError:
+            if flight is not None:
+                # Let a follower take over rather than wait out the lease
+                await _in_thread(flight.abandon)()
+            outcome = 'disconnected'
+            raise
+        except Exception as e:
+            error = as_http_error(e)
+            if flight is not None:
+                await _in_thread(flight.fail)(error)
+            logger.warning("Report generation failed pipeline=%s status=%s error=%s", pipeline, error.status_code, str(error))
+            raise error from e
+        finally:
+            record_timings(pipeline, timer, outcome, model=model)
+            if report is not None:
+                await _in_thread(record_report_usage)(report, timer, pipeline)
@@ -0,0 +1,539 @@
+"""
+Bulk report generation for stored profiles (campaigns, backfills).
+
+``BulkReportRun`` streams profiles from a source (completed
+``PathwayAdvisorSubmission`` rows, or a JSONL file of profiles), runs the LLM
+calls on ``llm_concurrency`` threads and the PDF renders on ``pdf_concurrency``
+threads, with bounded queues between the stages so memory stays flat however
+large the source is. Finished reports are written from the calling thread
+with ``bulk_create`` in batches; ``bulk_create`` sends no signals, so each
+batch is added to the search index explicitly.
+
+Progress is checkpointed to a JSON file after every batch write. Items finish
+out of order, so the checkpoint holds a watermark (every item before it is
+done, plus the source position to resume from) and the keys of items done past
+it. Re-running with the same checkpoint resumes after the watermark. Profiles
+that already have a report with the same cache key are skipped. A profile
+repeated within the run waits for its first occurrence: it is skipped if that
+one produced a report and fails with it otherwise. Failed items are appended to
+a JSONL file that can be fed back in as a source.
+"""
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Iterator, List, Optional
+
+from django.db import connection, transaction
+from django.db.models import Q
+from pydantic import ValidationError
+
+from apps.ai_provider.cache import report_cache_key, store_cached_report
+from apps.ai_provider.instrumentation import StageTimer, record_timings
+from apps.ai_provider.profiles import profile_from_submission
+from apps.ai_provider.report_html import get_report_html
+from apps.ai_provider.schemas import ImmigrationProfileSchema
+from apps.ai_provider.search import index_reports
+from apps.ai_provider.services import (
+    as_http_error,
+    build_immigration_report,
+    build_openrouter_request,
+    complete_report_with_fallback,
+    finish_report_content,
+    render_report_pdf,
+)
+from apps.ai_provider.usage import build_report_usage
+from apps.core.models import ImmigrationReport, PathwayAdvisorSubmission, ReportUsage
+
+logger = logging.getLogger(__name__)
+
+# Longest a finished report waits in the write buffer when batches fill slowly
+WRITE_INTERVAL = 10.0
+
+
+@dataclass
+class BulkItem:
+    """One profile moving through the pipeline"""
+    seq: int
+    key: str
+    cursor: object  # Source position to resume from once this item is done
+    profile: Optional[ImmigrationProfileSchema] = None
+    status: str = 'pending'  # created, skipped, failed or resumed once finished
+    error: Optional[str] = None
+    cache_key: Optional[str] = None
+    report_content: Optional[str] = None
+    model: Optional[str] = None
+    report_html: Optional[str] = None
+    pdf: tuple = (None, None, None)
+    timer: StageTimer = field(default_factory=StageTimer)
+
+
+class SubmissionSource:
+    """Pathway advisor submissions, oldest first; the cursor is ``[created_at, id]``"""
+
+    def __init__(self, include_incomplete: bool = False, chunk_size: int = 200):
+        self.include_incomplete = include_incomplete
+        self.chunk_size = chunk_size
+
+    @property
+    def name(self) -> str:
+        return 'submissions:all' if self.include_incomplete else 'submissions'
+
+    def _queryset(self, cursor):
+        queryset = PathwayAdvisorSubmission.objects.order_by('created_at', 'id')
+        if not self.include_incomplete:
+            queryset = queryset.filter(is_completed=True)
+        if cursor:
+            created_at, submission_id = datetime.fromisoformat(cursor[0]), cursor[1]
+            queryset = queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=submission_id))
+        return queryset
+
+    def count(self, cursor) -> int:
+        return self._queryset(cursor).count()
+
+    def items(self, start_seq: int, cursor) -> Iterator[BulkItem]:
+        # Keyset pages rather than one long-lived cursor, so no read stays open while batches are written
+        seq = start_seq
+        while True:
+            submissions = list(self._queryset(cursor)[:self.chunk_size])
+            if not submissions:
+                return
+            for submission in submissions:
+                cursor = [submission.created_at.isoformat(), str(submission.id)]
+                item = BulkItem(seq, str(submission.id), cursor)
+                seq += 1
+                try:
+                    item.profile = profile_from_submission(submission)
+                except ValidationError as e:
+                    item.error = f"Invalid profile: {e}"
+                yield item
+
+
+class JsonlSource:
+    """
+    A JSONL file with one profile per line, either bare or as ``{"id": ..., "profile": {...}}``
+    (the format of the failures file). The cursor is the last line number consumed.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    @property
+    def name(self) -> str:
+        return f"jsonl:{os.path.abspath(self.path)}"
+
+    def count(self, cursor) -> int:
+        with open(self.path, encoding='utf-8') as handle:
+            return sum(1 for line_number, line in enumerate(handle, 1) if line_number > (cursor or 0) and line.strip())
+
+    def items(self, start_seq: int, cursor) -> Iterator[BulkItem]:
+        seq = start_seq
+        with open(self.path, encoding='utf-8') as handle:
+            for line_number, line in enumerate(handle, 1):
+                if line_number <= (cursor or 0) or not line.strip():
+                    continue
+                item = BulkItem(seq, f"line:{line_number}", line_number)
+                seq += 1
+                try:
+                    data = json.loads(line)
+                    if 'profile' in data:
+                        item.key = str(data.get('id') or item.key)
+                        data = data['profile']
+                    item.profile = ImmigrationProfileSchema.model_validate(data)
+                except (ValueError, TypeError, ValidationError) as e:
+                    item.error = f"Invalid profile: {e}"
+                yield item
+
+
+class Checkpoint:
+    """Resumable progress of a bulk run, saved atomically to a JSON file"""
+
+    def __init__(self, path: Optional[str], source_name: str):
+        self.path = path
+        self.source_name = source_name
+        self.watermark = 0
+        self.cursor = None
+        self.done_after = set()  # Keys finished past the watermark in an earlier run
+        self.counts = {'created': 0, 'skipped': 0, 'failed': 0}
+        self._pending = {}  # seq -> (key, cursor) finished in this run, past the watermark
+
+    def load(self) -> bool:
+        """
+        Returns:
+            True if an earlier run was found
+
+        Raises:
+            ValueError: The checkpoint belongs to a different source
+        """
+        if not self.path or not os.path.exists(self.path):
+            return False
+        with open(self.path, encoding='utf-8') as handle:
+            data = json.load(handle)
+        if data.get('source') != self.source_name:
+            raise ValueError(f"Checkpoint {self.path} is for source {data.get('source')!r}, not {self.source_name!r}")
+        self.watermark = data['watermark']
+        self.cursor = data['cursor']
+        self.done_after = set(data.get('done_after', []))
+        self.counts.update(data.get('counts', {}))
+        return True
+
+    def is_done(self, key: str) -> bool:
+        return key in self.done_after
+
+    def mark(self, items: List[BulkItem]) -> None:
+        """Record finished items and advance the watermark over any contiguous run"""
+        for item in items:
+            if item.status in self.counts:
+                self.counts[item.status] += 1
+            self.done_after.discard(item.key)
+            self._pending[item.seq] = (item.key, item.cursor)
+        while self.watermark in self._pending:
+            _, self.cursor = self._pending.pop(self.watermark)
+            self.watermark += 1
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        data = {
+            'source': self.source_name,
+            'watermark': self.watermark,
+            'cursor': self.cursor,
+            'done_after': sorted(self.done_after | {key for key, _ in self._pending.values()}),
+            'counts': self.counts,
+            'updated_at': datetime.now().isoformat(timespec='seconds'),
+        }
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as handle:
+            json.dump(data, handle, indent=2)
+        os.replace(temp_path, self.path)
+
+
+@dataclass
+class BulkProgress:
+    total: Optional[int]
+    processed: int = 0
+    created: int = 0
+    skipped: int = 0
+    failed: int = 0
+    started: float = field(default_factory=time.monotonic)
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    @property
+    def rate(self) -> float:
+        """Generated (created or failed) reports per second"""
+        return (self.created + self.failed) / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def eta_seconds(self) -> Optional[float]:
+        """Remaining time, assuming every remaining item needs generating"""
+        if self.total is None or not self.rate:
+            return None
+        return max(self.total - self.processed, 0) / self.rate
+
+
+class BulkReportRun:
+    """Generate reports for every profile in a source with bounded LLM and PDF concurrency"""
+
+    def __init__(
+        self,
+        source,
+        checkpoint: Checkpoint,
+        llm_concurrency: int = 4,
+        pdf_concurrency: int = 2,
+        batch_size: int = 50,
+        render_pdfs: bool = True,
+        skip_existing: bool = True,
+        limit: Optional[int] = None,
+        failures_path: Optional[str] = None,
+        referer: str = '',
+        on_progress: Optional[Callable[[BulkProgress], None]] = None,
+        progress_interval: float = 5.0,
+    ):
+        self.source = source
+        self.checkpoint = checkpoint
+        self.llm_concurrency = llm_concurrency
+        self.pdf_concurrency = pdf_concurrency
+        self.batch_size = batch_size
+        self.render_pdfs = render_pdfs
+        self.skip_existing = skip_existing
+        self.limit = limit
+        self.failures_path = failures_path
+        self.referer = referer
+        self.on_progress = on_progress
+        self.progress_interval = progress_interval
+
+        self._llm_queue = queue.Queue(maxsize=llm_concurrency * 2)
+        self._pdf_queue = queue.Queue(maxsize=pdf_concurrency * 2)
+        self._results = queue.Queue()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._llm_alive = llm_concurrency
+        self._pdf_alive = pdf_concurrency
+        self._producer_error = None
+        self._first_by_cache_key = {}  # Cache key -> seq of the item generating it in this run
+        self._duplicates = {}  # Cache key -> items waiting for that first item to finish
+        self._finished_firsts = {}  # Cache key -> (key, status, error) of the first item, once finished
+        self._batch = []
+        self.progress = None
+
+    def stop(self) -> None:
+        """Stop taking new items; reports already generated are still rendered and saved"""
+        self._stop.set()
+
+    @property
+    def stopped(self) -> bool:
+        return self._stop.is_set()
+
+    def run(self) -> BulkProgress:
+        total = self.source.count(self.checkpoint.cursor)
+        if self.limit is not None:
+            total = min(total, self.limit)
+        self.progress = BulkProgress(total=total)
+
+        threads = [threading.Thread(target=self._produce, name='bulk-producer', daemon=True)]
+        threads += [threading.Thread(target=self._llm_worker, name=f'bulk-llm-{i}', daemon=True) for i in range(self.llm_concurrency)]
+        threads += [threading.Thread(target=self._pdf_worker, name=f'bulk-pdf-{i}', daemon=True) for i in range(self.pdf_concurrency)]
+        for thread in threads:
+            thread.start()
+
+        try:
+            self._drain()
+        except KeyboardInterrupt:
+            logger.warning("Bulk run interrupted; saving reports already generated")
+            self.stop()
+            self._drain()
+
+        if self._producer_error is not None:
+            raise self._producer_error
+        return self.progress
+
+    # Producer: source -> LLM queue (or straight to results when nothing needs generating)
+
+    def _put(self, target: queue.Queue, item) -> bool:
+        while not self._stop.is_set():
+            try:
+                target.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce(self) -> None:
+        try:
+            chunk = []
+            items = self.source.items(self.checkpoint.watermark, self.checkpoint.cursor)
+            for count, item in enumerate(items, 1):
+                if self._stop.is_set() or (self.limit is not None and count > self.limit):
+                    break
+                chunk.append(item)
+                if len(chunk) >= self.batch_size:
+                    self._dispatch(chunk)
+                    chunk = []
+            self._dispatch(chunk)
+        except Exception as e:
+            logger.exception("Bulk source failed")
+            self._producer_error = e
+            self.stop()
+        finally:
+            connection.close()  # This thread's connection
+            for _ in range(self.llm_concurrency):
+                self._llm_queue.put(None)
+
+    def _dispatch(self, items: List[BulkItem]) -> None:
+        to_generate = []
+        for item in items:
+            if self.checkpoint.is_done(item.key):
+                item.status = 'resumed'
+                self._results.put(item)
+            elif item.error:
+                item.status = 'failed'
+                self._results.put(item)
+            else:
+                item.cache_key = report_cache_key(item.profile)
+                with self._lock:
+                    first = self._finished_firsts.get(item.cache_key)
+                    is_first = item.cache_key not in self._first_by_cache_key
+                    if is_first:
+                        self._first_by_cache_key[item.cache_key] = item.seq
+                    elif first is None:
+                        # Same profile earlier in this run, still in progress
+                        self._duplicates.setdefault(item.cache_key, []).append(item)
+                if is_first:
+                    to_generate.append(item)
+                elif first is not None:
+                    self._results.put(self._settle_duplicate(item, first))
+
+        existing = set()
+        if self.skip_existing and to_generate:
+            existing = set(ImmigrationReport.objects.filter(
+                cache_key__in=[item.cache_key for item in to_generate]
+            ).values_list('cache_key', flat=True))
+        for item in to_generate:
+            if item.cache_key in existing:
+                item.status = 'skipped'
+                self._results.put(item)
+            elif not self._put(self._llm_queue, item):
+                return
+
+    @staticmethod
+    def _settle_duplicate(item: BulkItem, first: tuple) -> BulkItem:
+        """Finish a repeated profile the way its first occurrence finished"""
+        first_key, first_status, first_error = first
+        if first_status == 'failed':
+            item.status = 'failed'
+            item.error = f"Same profile as {first_key}, which failed: {first_error}"
+        else:
+            item.status = 'skipped'
+        return item
+
+    def _finished(self, item: BulkItem) -> List[BulkItem]:
+        """The item plus any repeats of its profile that were waiting for it"""
+        if item.cache_key is None:
+            return [item]
+        with self._lock:
+            if self._first_by_cache_key.get(item.cache_key) != item.seq:
+                return [item]
+            first = self._finished_firsts[item.cache_key] = (item.key, item.status, item.error)
+            waiting = self._duplicates.pop(item.cache_key, [])
+        return [item] + [self._settle_duplicate(duplicate, first) for duplicate in waiting]
+
+    # Workers
+
+    def _llm_worker(self) -> None:
+        try:
+            while True:
+                item = self._llm_queue.get()
+                if item is None:
+                    break
+                if self._stop.is_set():
+                    continue  # Not started: left for the next run
+                with item.timer.activate():
+                    try:
+                        headers, payload_data = build_openrouter_request(item.profile, self.referer)
+                        completion, item.model = complete_report_with_fallback(headers, payload_data)
+                        item.report_content = finish_report_content(item.profile, completion)
+                    except Exception as e:
+                        item.status = 'failed'
+                        item.error = str(as_http_error(e))
+                if item.status == 'failed':
+                    self._results.put(item)
+                else:
+                    self._pdf_queue.put(item)
+        finally:
+            with self._lock:
+                self._llm_alive -= 1
+                if not self._llm_alive:
+                    for _ in range(self.pdf_concurrency):
+                        self._pdf_queue.put(None)
+
+    def _pdf_worker(self) -> None:
+        try:
+            while True:
+                item = self._pdf_queue.get()
+                if item is None:
+                    break
+                with item.timer.activate():
+                    try:
+                        _, item.report_html = get_report_html(item.report_content)
+                        if self.render_pdfs:
+                            item.pdf = render_report_pdf(item.report_content, item.report_html)
+                    except Exception:
+                        # Saved without HTML/PDF; both are rendered on first view
+                        logger.exception("Bulk render failed key=%s", item.key)
+                item.status = 'created'
+                self._results.put(item)
+        finally:
+            with self._lock:
+                self._pdf_alive -= 1
+                if not self._pdf_alive:
+                    self._results.put(None)
+
+    # Writer (calling thread)
+
+    def _drain(self) -> None:
+        last_write = last_progress = time.monotonic()
+        while True:
+            try:
+                item = self._results.get(timeout=0.5)
+            except queue.Empty:
+                item = False
+            if item is None:
+                break
+            if item:
+                for finished in self._finished(item):
+                    self._batch.append(finished)
+                    self._count(finished)
+
+            now = time.monotonic()
+            if len(self._batch) >= self.batch_size or (self._batch and now - last_write >= WRITE_INTERVAL):
+                self._write(self._batch)
+                self._batch = []
+                last_write = now
+            if self.on_progress and now - last_progress >= self.progress_interval:
+                self.on_progress(self.progress)
+                last_progress = now
+
+        self._write(self._batch)
+        self._batch = []
+        if self.on_progress:
+            self.on_progress(self.progress)
+
+    def _write(self, items: List[BulkItem]) -> None:
+        if not items:
+            return
+        created = [item for item in items if item.status == 'created']
+        reports = [
+            build_immigration_report(
+                item.profile, item.report_content, *item.pdf,
+                cache_key=item.cache_key, ai_model_used=item.model, report_html=item.report_html,
+            )
+            for item in created
+        ]
+        if reports:
+            with transaction.atomic():
+                ImmigrationReport.objects.bulk_create(reports, batch_size=self.batch_size)
+            try:
+                with transaction.atomic():
+                    index_reports(reports)
+            except Exception:
+                logger.exception("Failed to index bulk reports for search; run rebuild_report_search_index")
+            try:
+                with transaction.atomic():
+                    ReportUsage.objects.bulk_create([
+                        build_report_usage(report, item.timer, 'bulk') for item, report in zip(created, reports)
+                    ])
+            except Exception:
+                logger.exception("Failed to record bulk report usage")
+            for item, report in zip(created, reports):
+                store_cached_report(item.cache_key, report)
+                record_timings('bulk', item.timer, 'ok', model=item.model)
+
+        failed = [item for item in items if item.status == 'failed']
+        for item in failed:
+            logger.warning("Bulk report failed key=%s error=%s", item.key, item.error)
+            if item.profile is not None:
+                record_timings('bulk', item.timer, 'error', model=item.model)
+        if failed and self.failures_path:
+            with open(self.failures_path, 'a', encoding='utf-8') as handle:
+                for item in failed:
+                    profile = item.profile.model_dump() if item.profile is not None else None
+                    handle.write(json.dumps({'id': item.key, 'error': item.error, 'profile': profile}) + '\n')
+
+        self.checkpoint.mark(items)
+        self.checkpoint.save()
+
+    def _count(self, item: BulkItem) -> None:
+        self.progress.processed += 1
+        if item.status in ('skipped', 'resumed'):
+            self.progress.skipped += 1
+        elif item.status == 'failed':
+            self.progress.failed += 1
+        else:
+            self.progress.created += 1
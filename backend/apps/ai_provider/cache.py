@@ -0,0 +1,185 @@
+"""
+Content-addressed cache for generated immigration reports.
+
+Reports are keyed by a hash of the normalized profile fields that reach the
+prompt, the configured model chain and the prompt version, so resubmitting
+the same profile (page reload, double click) reuses the stored Markdown and
+PDF instead of paying for another completion. Contact details never reach the
+prompt and are left out of the key.
+
+Because of that, one cached report is served to every requester with the same
+profile, so the cached Markdown must not contain identity (name, email or
+phone). ``store_cached_report`` and ``ReportFlight.complete`` check this with
+``report_contains_identity`` and refuse to share a report that does.
+
+Entries live in the ``reports`` Django cache alias; ``REPORT_CACHE_BACKEND``
+selects locmem (LRU), file or database storage.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import caches
+
+from apps.ai_provider.prompts import prompt_version
+from apps.ai_provider.schemas import ImmigrationProfileSchema
+from apps.core.models import ImmigrationReport
+
+# Profile fields that identify the user but are not sent to the model
+IDENTITY_FIELDS = {'user_name', 'user_email', 'user_phone'}
+
+CACHE_KEY_PREFIX = 'immigration-report'
+
+logger = logging.getLogger(__name__)
+
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'stores': 0, 'skipped': 0, 'skipped_identity': 0}
+
+
+def _count(name: str) -> None:
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def get_report_cache():
+    return caches['reports']
+
+
+def normalize_profile(profile: ImmigrationProfileSchema) -> dict:
+    """
+    Reduce a profile to the values that affect the generated report.
+
+    Strings are trimmed with internal whitespace collapsed, and empty values
+    become ``None`` because ``build_user_prompt`` renders them all as
+    "Not specified".
+    """
+    normalized = {}
+    for field, value in profile.model_dump().items():
+        if field in IDENTITY_FIELDS:
+            continue
+        if isinstance(value, str):
+            value = ' '.join(value.split())
+        normalized[field] = value if value else None
+    return normalized
+
+
+def report_cache_key(profile: ImmigrationProfileSchema, model: Optional[str] = None) -> str:
+    """Canonical SHA-256 key for a profile, model chain and prompt version"""
+    canonical = json.dumps(
+        {
+            'profile': normalize_profile(profile),
+            'model': model or ','.join(settings.OPENROUTER_MODELS),
+            'prompt_version': prompt_version(),
+        },
+        sort_keys=True,
+        separators=(',', ':'),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def report_contains_identity(report: ImmigrationReport) -> bool:
+    """
+    Whether the report's Markdown mentions its requester's name, email or phone.
+
+    Such a report is specific to one requester and must not be shared through
+    the cache or a single flight.
+    """
+    content = ' '.join((report.report_markdown or '').split())
+    for field in sorted(IDENTITY_FIELDS):
+        value = ' '.join((getattr(report, field, None) or '').split())
+        if len(value) < 2:
+            continue
+        if re.search(rf"(?<!\w){re.escape(value)}(?!\w)", content, re.IGNORECASE):
+            return True
+    return False
+
+
+def get_cached_report(cache_key: str) -> Optional[dict]:
+    """
+    Look up a cached report.
+
+    Returns:
+        An entry as built by ``cache_entry_for_report``, or ``None`` on a miss
+    """
+    entry = get_report_cache().get(f"{CACHE_KEY_PREFIX}:{cache_key}")
+    if not entry:
+        _count('misses')
+        return None
+    _count('hits')
+    return entry
+
+
+def cache_entry_for_report(report: ImmigrationReport) -> dict:
+    """The reusable parts of a generated report"""
+    return {
+        'report_id': str(report.id),
+        'report_markdown': report.report_markdown,
+        'pdf_filename': report.pdf_filename,
+        'pdf_path': report.pdf_path,
+        'pdf_url': report.pdf_url,
+        'ai_model_used': report.ai_model_used,
+    }
+
+
+def store_cached_report(cache_key: str, report: ImmigrationReport) -> bool:
+    """
+    Cache a freshly generated report.
+
+    Entries larger than ``REPORT_CACHE_MAX_ENTRY_BYTES`` are not cached, and
+    neither are reports that mention their requester (``report_contains_identity``).
+
+    Returns:
+        True if the report was stored
+    """
+    if len(report.report_markdown.encode('utf-8')) > settings.REPORT_CACHE_MAX_ENTRY_BYTES:
+        _count('skipped')
+        return False
+    if report_contains_identity(report):
+        _count('skipped_identity')
+        logger.warning("Not caching report that contains requester identity report_id=%s cache_key=%s", report.id, cache_key[:12])
+        return False
+    get_report_cache().set(f"{CACHE_KEY_PREFIX}:{cache_key}", cache_entry_for_report(report))
+    _count('stores')
+    return True
+
+
+def attach_cached_report_pdf(cache_key: str, report: ImmigrationReport) -> bool:
+    """
+    Share a PDF rendered after the report was cached with later cache hits.
+
+    Only updates the entry if it still holds the same Markdown and has no
+    PDF on disk.
+
+    Returns:
+        True if the entry was updated
+    """
+    cache = get_report_cache()
+    key = f"{CACHE_KEY_PREFIX}:{cache_key}"
+    entry = cache.get(key)
+    if not entry or entry['report_markdown'] != report.report_markdown:
+        return False
+    if entry['pdf_path'] and os.path.exists(entry['pdf_path']):
+        return False
+    entry.update(
+        pdf_filename=report.pdf_filename,
+        pdf_path=report.pdf_path,
+        pdf_url=report.pdf_url,
+    )
+    cache.set(key, entry)
+    return True
+
+
+def cache_stats() -> dict:
+    """Hit/miss counters for this process"""
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_ratio'] = stats['hits'] / lookups if lookups else None
+    stats['backend'] = settings.REPORT_CACHE_BACKEND
+    return stats
@@ -0,0 +1,466 @@
+"""
+Shared, pooled HTTP client for OpenRouter chat completions.
+
+One client per process keeps TCP/TLS connections alive between reports instead
+of paying DNS, connect and handshake costs on every call. The default backend
+is a ``requests.Session`` with a sized urllib3 pool; setting ``OPENROUTER_HTTP2``
+switches to ``httpx`` (with the optional ``h2`` package) when it is installed.
+
+Every call returns ``RequestMetrics`` separating connection setup from the time
+spent waiting on the model.
+
+``AsyncOpenRouterClient`` is the ``httpx.AsyncClient`` counterpart for the
+async (ASGI) endpoint: one per event loop, so a single worker process can hold
+many upstream calls open without a thread per call. Each is closed when its
+loop shuts down, which under WSGI is the end of the request. It raises the same
+``requests`` exceptions as the sync client, so error handling is shared.
+"""
+import asyncio
+import http.cookiejar
+import logging
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from typing import Optional
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import h2  # noqa: F401  (httpx needs it for http2=True)
+    HTTP2_AVAILABLE = httpx is not None
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RequestMetrics:
+    """Timing for a single upstream call, in milliseconds"""
+    connect_ms: float = 0.0  # DNS + TCP + TLS; 0 when a pooled connection was reused
+    wait_ms: float = 0.0  # Request sent until response headers arrived, minus connect
+    total_ms: float = 0.0  # Whole call including reading the body
+    reused_connection: bool = True
+    http_version: str = "HTTP/1.1"
+    status_code: Optional[int] = None
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+# Connection setup time for the request currently running on this thread.
+# urllib3 opens connections synchronously on the calling thread, so the
+# timed connection classes below can report back through a thread-local.
+_connect_timing = threading.local()
+
+
+def _record_connect(elapsed: float) -> None:
+    _connect_timing.seconds = getattr(_connect_timing, 'seconds', 0.0) + elapsed
+    _connect_timing.count = getattr(_connect_timing, 'count', 0) + 1
+
+
+def _reset_connect_timing() -> None:
+    _connect_timing.seconds = 0.0
+    _connect_timing.count = 0
+
+
+class _TimedHTTPConnection(HTTPConnection):
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            _record_connect(time.perf_counter() - start)
+
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            _record_connect(time.perf_counter() - start)
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class _TimedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose pools time new connections"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _TimedHTTPConnectionPool,
+            'https': _TimedHTTPSConnectionPool,
+        }
+
+
+class OpenRouterClient:
+    """
+    Thread-safe pooled client for the OpenRouter chat completions endpoint.
+
+    Args:
+        base_url: Chat completions URL
+        pool_size: Maximum pooled keep-alive connections to the upstream host
+        connect_timeout: Seconds allowed for DNS, TCP and TLS setup
+        read_timeout: Seconds allowed between bytes from the upstream
+        http2: Use HTTP/2 via httpx when available
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        pool_size: int = 10,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 60.0,
+        http2: bool = False,
+    ):
+        self.base_url = base_url
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.http2 = bool(http2 and HTTP2_AVAILABLE)
+        if http2 and not HTTP2_AVAILABLE:
+            logger.warning("OPENROUTER_HTTP2 is set but httpx[http2] is not installed; using HTTP/1.1")
+
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'requests': 0,
+            'new_connections': 0,
+            'connect_ms_total': 0.0,
+            'wait_ms_total': 0.0,
+            'total_ms_total': 0.0,
+        }
+
+        if self.http2:
+            self._httpx = httpx.Client(
+                http2=True,
+                limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+                timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            )
+            self._session = None
+        else:
+            self._httpx = None
+            self._session = requests.Session()
+            # Never share cookies between users' requests on the shared session
+            self._session.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+            adapter = _TimedHTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            self._session.mount('https://', adapter)
+            self._session.mount('http://', adapter)
+
+    def post_json(self, payload: dict, headers: dict):
+        """
+        POST a chat completion request and return the parsed JSON body.
+
+        Returns:
+            A ``(response_data, RequestMetrics)`` tuple
+
+        Raises:
+            requests.exceptions.RequestException: On transport or HTTP errors,
+                for either backend
+        """
+        with self._request(payload, headers, stream=False) as (response, metrics):
+            response_data = response.json()
+        return response_data, metrics
+
+    @contextmanager
+    def stream_lines(self, payload: dict, headers: dict):
+        """
+        POST a streaming request and yield an iterator over decoded response lines.
+
+        Usage::
+
+            with client.stream_lines(payload, headers) as (lines, metrics):
+                for line in lines:
+                    ...
+
+        ``metrics.total_ms`` is filled in when the block exits.
+        """
+        with self._request(payload, headers, stream=True) as (response, metrics):
+            if self._httpx is not None:
+                yield response.iter_lines(), metrics
+            else:
+                # requests assumes ISO-8859-1 for text/* without a charset; SSE is UTF-8
+                if 'charset' not in response.headers.get('Content-Type', ''):
+                    response.encoding = 'utf-8'
+                yield response.iter_lines(decode_unicode=True), metrics
+
+    @contextmanager
+    def _request(self, payload: dict, headers: dict, stream: bool):
+        metrics = RequestMetrics()
+        start = time.perf_counter()
+        try:
+            if self._httpx is not None:
+                with self._httpx_request(payload, headers, stream, metrics, start) as response:
+                    yield response, metrics
+            else:
+                with self._requests_request(payload, headers, stream, metrics, start) as response:
+                    yield response, metrics
+        finally:
+            metrics.total_ms = (time.perf_counter() - start) * 1000
+            self._record(metrics)
+
+    @contextmanager
+    def _requests_request(self, payload: dict, headers: dict, stream: bool, metrics: RequestMetrics, start: float):
+        _reset_connect_timing()
+        response = self._session.post(
+            self.base_url,
+            headers=headers,
+            json=payload,
+            stream=stream,
+            timeout=(self.connect_timeout, self.read_timeout),
+        )
+        try:
+            headers_ms = (time.perf_counter() - start) * 1000
+            metrics.connect_ms = getattr(_connect_timing, 'seconds', 0.0) * 1000
+            metrics.reused_connection = getattr(_connect_timing, 'count', 0) == 0
+            metrics.wait_ms = max(headers_ms - metrics.connect_ms, 0.0)
+            metrics.status_code = response.status_code
+            response.raise_for_status()
+            yield response
+        finally:
+            response.close()
+
+    @contextmanager
+    def _httpx_request(self, payload: dict, headers: dict, stream: bool, metrics: RequestMetrics, start: float):
+        connect_started = {}
+
+        def trace(event_name, info):
+            if event_name in ('connection.connect_tcp.started', 'connection.start_tls.started'):
+                connect_started.setdefault('start', time.perf_counter())
+            elif event_name in ('connection.connect_tcp.complete', 'connection.start_tls.complete'):
+                if 'start' in connect_started:
+                    metrics.connect_ms = (time.perf_counter() - connect_started['start']) * 1000
+                    metrics.reused_connection = False
+
+        try:
+            request = self._httpx.build_request(
+                'POST', self.base_url, headers=headers, json=payload, extensions={'trace': trace}
+            )
+            response = self._httpx.send(request, stream=stream)
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(str(e)) from e
+        except httpx.HTTPError as e:
+            raise requests.exceptions.ConnectionError(str(e)) from e
+
+        try:
+            headers_ms = (time.perf_counter() - start) * 1000
+            metrics.wait_ms = max(headers_ms - metrics.connect_ms, 0.0)
+            metrics.status_code = response.status_code
+            metrics.http_version = response.http_version
+            if response.is_error:
+                response.read()
+                error_response = requests.Response()
+                error_response.status_code = response.status_code
+                error_response.url = self.base_url
+                raise requests.exceptions.HTTPError(
+                    f"{response.status_code} Error: {response.reason_phrase} for url: {self.base_url}",
+                    response=error_response,
+                )
+            yield response
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(str(e)) from e
+        except httpx.HTTPError as e:
+            raise requests.exceptions.ConnectionError(str(e)) from e
+        finally:
+            response.close()
+
+    def _record(self, metrics: RequestMetrics) -> None:
+        with self._stats_lock:
+            self._stats['requests'] += 1
+            if not metrics.reused_connection:
+                self._stats['new_connections'] += 1
+            self._stats['connect_ms_total'] += metrics.connect_ms
+            self._stats['wait_ms_total'] += metrics.wait_ms
+            self._stats['total_ms_total'] += metrics.total_ms
+
+    def stats(self) -> dict:
+        """Aggregate pool and timing statistics since the client was created"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        count = stats['requests'] or 1
+        return {
+            'backend': 'httpx' if self._httpx is not None else 'requests',
+            'http2': self.http2,
+            'pool_size': self.pool_size,
+            'connect_timeout': self.connect_timeout,
+            'read_timeout': self.read_timeout,
+            'requests': stats['requests'],
+            'new_connections': stats['new_connections'],
+            'connection_reuse_ratio': (
+                1 - stats['new_connections'] / stats['requests'] if stats['requests'] else None
+            ),
+            'avg_connect_ms': stats['connect_ms_total'] / count,
+            'avg_wait_ms': stats['wait_ms_total'] / count,
+            'avg_total_ms': stats['total_ms_total'] / count,
+        }
+
+    def close(self) -> None:
+        if self._httpx is not None:
+            self._httpx.close()
+        if self._session is not None:
+            self._session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_openrouter_client() -> OpenRouterClient:
+    """Return the process-wide OpenRouter client, creating it on first use"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = OpenRouterClient(
+                    base_url=settings.OPENROUTER_BASE_URL,
+                    pool_size=settings.OPENROUTER_POOL_SIZE,
+                    connect_timeout=settings.OPENROUTER_CONNECT_TIMEOUT,
+                    read_timeout=settings.OPENROUTER_READ_TIMEOUT,
+                    http2=settings.OPENROUTER_HTTP2,
+                )
+    return _client
+
+
+class AsyncOpenRouterClient:
+    """
+    Pooled ``httpx.AsyncClient`` for OpenRouter chat completions, bound to one event loop.
+
+    Args:
+        base_url: Chat completions URL
+        pool_size: Maximum concurrent connections to the upstream host
+        connect_timeout: Seconds allowed for DNS, TCP and TLS setup
+        read_timeout: Seconds allowed between bytes from the upstream
+        http2: Use HTTP/2 (needs the optional ``h2`` package)
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        pool_size: int = 100,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 60.0,
+        http2: bool = False,
+    ):
+        if httpx is None:
+            raise RuntimeError("The async report endpoint needs the httpx package")
+        self.base_url = base_url
+        self.pool_size = pool_size
+        if http2 and not HTTP2_AVAILABLE:
+            logger.warning("OPENROUTER_HTTP2 is set but httpx[http2] is not installed; using HTTP/1.1")
+        self.http2 = bool(http2 and HTTP2_AVAILABLE)
+        self._client = httpx.AsyncClient(
+            http2=self.http2,
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+        )
+
+    async def post_json(self, payload: dict, headers: dict):
+        """
+        POST a chat completion request and return the parsed JSON body.
+
+        Returns:
+            A ``(response_data, RequestMetrics)`` tuple
+
+        Raises:
+            requests.exceptions.RequestException: On transport or HTTP errors
+        """
+        metrics = RequestMetrics()
+        connect_started = {}
+
+        async def trace(event_name, info):
+            if event_name in ('connection.connect_tcp.started', 'connection.start_tls.started'):
+                connect_started.setdefault('start', time.perf_counter())
+            elif event_name in ('connection.connect_tcp.complete', 'connection.start_tls.complete'):
+                if 'start' in connect_started:
+                    metrics.connect_ms = (time.perf_counter() - connect_started['start']) * 1000
+                    metrics.reused_connection = False
+
+        start = time.perf_counter()
+        try:
+            request = self._client.build_request(
+                'POST', self.base_url, headers=headers, json=payload, extensions={'trace': trace}
+            )
+            response = await self._client.send(request, stream=True)
+            try:
+                metrics.wait_ms = max((time.perf_counter() - start) * 1000 - metrics.connect_ms, 0.0)
+                metrics.status_code = response.status_code
+                metrics.http_version = response.http_version
+                await response.aread()
+            finally:
+                await response.aclose()
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(str(e)) from e
+        except httpx.HTTPError as e:
+            raise requests.exceptions.ConnectionError(str(e)) from e
+        finally:
+            metrics.total_ms = (time.perf_counter() - start) * 1000
+
+        if response.is_error:
+            error_response = requests.Response()
+            error_response.status_code = response.status_code
+            error_response.url = self.base_url
+            raise requests.exceptions.HTTPError(
+                f"{response.status_code} Error: {response.reason_phrase} for url: {self.base_url}",
+                response=error_response,
+            )
+        return response.json(), metrics
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+# httpx async clients cannot be shared between event loops (e.g. the per-request
+# loops async views get under WSGI), so there is one per running loop
+_async_clients = weakref.WeakKeyDictionary()
+# Loop -> the async generator that closes its client; held here because loops only keep weak references
+_async_client_closers = weakref.WeakKeyDictionary()
+
+
+async def _close_with_loop(client: AsyncOpenRouterClient):
+    """
+    Close ``client`` when its event loop shuts down.
+
+    A started async generator is finalized by ``loop.shutdown_asyncgens()``,
+    which ``asyncio.run`` (and so ``async_to_sync`` and uvicorn) awaits before
+    closing the loop. Without this, each WSGI request's loop would leave its
+    client and connections behind.
+    """
+    try:
+        yield
+    finally:
+        await client.aclose()
+
+
+async def get_async_openrouter_client() -> AsyncOpenRouterClient:
+    """Return the OpenRouter async client for the running event loop, creating it on first use"""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = AsyncOpenRouterClient(
+            base_url=settings.OPENROUTER_BASE_URL,
+            pool_size=settings.OPENROUTER_ASYNC_POOL_SIZE,
+            connect_timeout=settings.OPENROUTER_CONNECT_TIMEOUT,
+            read_timeout=settings.OPENROUTER_READ_TIMEOUT,
+            http2=settings.OPENROUTER_HTTP2,
+        )
+        closer = _async_client_closers[loop] = _close_with_loop(client)
+        await closer.__anext__()
+    return client
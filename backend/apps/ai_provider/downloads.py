@@ -0,0 +1,234 @@
+"""
+Serving report PDFs and counting downloads.
+
+``pdf_file_response`` hands the transfer to the front proxy when one is
+configured (``REPORT_PDF_SENDFILE``):
+
+- ``nginx``: ``X-Accel-Redirect`` to ``REPORT_PDF_ACCEL_REDIRECT_PREFIX`` plus
+  the file's path under MEDIA_ROOT. The prefix must be an ``internal``
+  location aliased to MEDIA_ROOT, e.g.::
+
+      location /protected-media/ { internal; alias /app/media/; }
+
+- ``apache``: ``X-Sendfile`` with the absolute path (mod_xsendfile).
+
+The proxy then handles Range, HEAD and the byte copy. Without one the file is
+streamed by ``FileResponse``, with single byte-range requests answered with
+206 so PDF viewers can fetch pages incrementally.
+
+Downloads are counted in process and written in batches
+(``REPORT_DOWNLOAD_FLUSH_SECONDS`` / ``REPORT_DOWNLOAD_FLUSH_SIZE``) as one
+``F()`` increment per report, so a burst of downloads does not become a burst
+of row updates. Counts buffered when a process dies are lost; the counter is
+for analytics, not billing.
+"""
+import atexit
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+
+from apps.core.models import ImmigrationReport
+
+logger = logging.getLogger(__name__)
+
+_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def parse_range(header: str, size: int):
+    """
+    Parse a ``Range`` header against a file of ``size`` bytes.
+
+    Returns:
+        ``(start, end)`` inclusive for a single satisfiable range, ``None`` to
+        serve the whole file (no header, several ranges or malformed), or
+        ``False`` when the range cannot be satisfied
+    """
+    if not header:
+        return None
+    match = _RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def _iter_range(path: str, start: int, length: int):
+    with open(path, 'rb') as handle:
+        handle.seek(start)
+        while length > 0:
+            chunk = handle.read(min(STREAM_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def _sendfile_response(path: str) -> Optional[HttpResponse]:
+    backend = settings.REPORT_PDF_SENDFILE
+    if not backend:
+        return None
+    response = HttpResponse(content_type='application/pdf')
+    if backend == 'nginx':
+        relative = os.path.relpath(path, settings.MEDIA_ROOT)
+        if relative.startswith('..'):
+            return None  # Outside MEDIA_ROOT: the proxy cannot reach it
+        response['X-Accel-Redirect'] = settings.REPORT_PDF_ACCEL_REDIRECT_PREFIX.rstrip('/') + '/' + relative.replace(os.sep, '/')
+    elif backend == 'apache':
+        response['X-Sendfile'] = os.path.abspath(path)
+    else:
+        logger.warning("Unknown REPORT_PDF_SENDFILE backend=%s; streaming from Django", backend)
+        return None
+    return response
+
+
+def pdf_file_response(request, path: str, filename: str, etag: str):
+    """
+    Response for a PDF on disk: a 416, offloaded to the proxy, a 206 partial
+    response, or the whole file. The caller adds caching headers (not to a 416).
+
+    Returns:
+        ``(response, counted)``; ``counted`` is False for responses that should
+        not count as a download (range requests past the first byte, 416)
+    """
+    size = os.path.getsize(path)
+    byte_range = parse_range(request.headers.get('Range', ''), size)
+    if_range = request.headers.get('If-Range')
+    if byte_range is not None and if_range and if_range != etag:
+        byte_range = None  # The client's copy is stale: send the whole file
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        response['Accept-Ranges'] = 'bytes'
+        return response, False
+
+    response = _sendfile_response(path)
+    if response is not None:
+        # The proxy serves Range itself; only the first byte of a download counts
+        counted = not byte_range or byte_range[0] == 0
+    elif byte_range:
+        start, end = byte_range
+        length = end - start + 1
+        response = StreamingHttpResponse(_iter_range(path, start, length), status=206, content_type='application/pdf')
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(length)
+        response['Accept-Ranges'] = 'bytes'
+        counted = start == 0
+    else:
+        response = FileResponse(open(path, 'rb'), content_type='application/pdf')
+        response['Accept-Ranges'] = 'bytes'
+        counted = True
+
+    response['Content-Disposition'] = f'inline; filename="{filename}"'
+    return response, counted
+
+
+class DownloadCounter:
+    """Per-report download counts buffered in memory and flushed in batches"""
+
+    def __init__(self, flush_seconds: float, flush_size: int):
+        self.flush_seconds = flush_seconds
+        self.flush_size = flush_size
+        self._pending = Counter()
+        self._pending_total = 0
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stats = {'recorded': 0, 'flushed': 0, 'flushes': 0, 'flush_errors': 0}
+
+    def record(self, report_id) -> None:
+        with self._lock:
+            self._pending[report_id] += 1
+            self._pending_total += 1
+            self._stats['recorded'] += 1
+            due = (
+                self._pending_total >= self.flush_size
+                or time.monotonic() - self._last_flush >= self.flush_seconds
+            )
+        if due:
+            self.flush()
+
+    def flush(self) -> int:
+        """Write buffered counts; returns how many downloads were written"""
+        # One flusher at a time; others keep buffering instead of waiting
+        if not self._flush_lock.acquire(blocking=False):
+            return 0
+        try:
+            with self._lock:
+                pending, self._pending = self._pending, Counter()
+                self._pending_total = 0
+                self._last_flush = time.monotonic()
+            if not pending:
+                return 0
+            now = timezone.now()
+            try:
+                with transaction.atomic():
+                    for report_id, count in pending.items():
+                        ImmigrationReport.objects.filter(id=report_id).update(
+                            download_count=F('download_count') + count,
+                            last_downloaded_at=now,
+                        )
+            except Exception:
+                logger.exception("Failed to write download counts; re-queued reports=%d", len(pending))
+                with self._lock:
+                    self._pending.update(pending)
+                    self._pending_total += sum(pending.values())
+                    self._stats['flush_errors'] += 1
+                return 0
+            written = sum(pending.values())
+            with self._lock:
+                self._stats['flushed'] += written
+                self._stats['flushes'] += 1
+            return written
+        finally:
+            self._flush_lock.release()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['pending'] = self._pending_total
+        return stats
+
+
+_counter = None
+_counter_lock = threading.Lock()
+
+
+def get_download_counter() -> DownloadCounter:
+    global _counter
+    if _counter is None:
+        with _counter_lock:
+            if _counter is None:
+                _counter = DownloadCounter(settings.REPORT_DOWNLOAD_FLUSH_SECONDS, settings.REPORT_DOWNLOAD_FLUSH_SIZE)
+                atexit.register(_counter.flush)
+    return _counter
+
+
+def record_download(report_id) -> None:
+    get_download_counter().record(report_id)
+
+
+def download_stats() -> dict:
+    return get_download_counter().stats()
@@ -0,0 +1,305 @@
+"""
+Local stand-in for the OpenRouter chat-completions endpoint.
+
+Serves OpenAI-style chat completions (plain JSON or SSE streaming) with a
+canned Markdown report, so report generation can be load-tested without
+calling or paying for the live API. Latency, token rate, error injection and
+empty responses are configurable; see ``FakeOpenRouterConfig`` and the
+``run_fake_openrouter`` management command. Prompt caching is simulated too:
+message parts marked with ``cache_control`` are reported as cached tokens
+(and skip the prefill delay) from the second time the server sees them.
+
+Point the backend at it with::
+
+    OPENROUTER_BASE_URL=http://127.0.0.1:8089/v1/chat/completions
+"""
+import hashlib
+import json
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+# Roughly four characters per token, as for English text
+CHARS_PER_TOKEN = 4
+
+REPORT_TEMPLATE = """# 🇨🇦 Immigration Eligibility Report
+
+## 1. Profile Summary
+
+| Factor | Your Profile | Estimated Points |
+|---|---|---|
+| Age | 29 | 105 |
+| Education | Master's degree | 135 |
+| First official language | CLB 9 | 124 |
+| Foreign work experience | 3 years | 50 |
+
+## 2. Eligibility by Pathway
+
+### Express Entry – Federal Skilled Worker
+
+- **Minimum requirements:** met (67/100 points on the FSW grid)
+- **Estimated CRS score:** 470–480
+- **Recent draw cut-offs:** 480–500 for general draws
+
+> Improving your French to NCLC 7 would add up to 50 points.
+
+### Provincial Nominee Program
+
+1. Ontario Human Capital Priorities stream
+2. Saskatchewan International Skilled Worker – Occupation In-Demand
+3. Alberta Express Entry stream
+
+## 3. Recommended Next Steps
+
+- Book an IELTS General Training test and aim for CLB 10
+- Order an Educational Credential Assessment from WES
+- Gather reference letters covering duties and hours for each job
+- Keep proof of settlement funds for at least six months
+
+---
+
+"""
+
+
+@dataclass
+class FakeOpenRouterConfig:
+    """Behaviour of the fake endpoint; all durations in milliseconds"""
+    latency_ms: float = 800.0  # Median time before the first token
+    latency_distribution: str = 'lognormal'  # fixed, uniform, normal or lognormal
+    latency_spread: float = 0.5  # +/- fraction (uniform), stddev fraction (normal) or sigma (lognormal)
+    tokens_per_second: float = 80.0  # Generation speed; 0 sends the whole report at once
+    prefill_tokens_per_second: float = 0.0  # Prompt processing speed for uncached tokens; 0 adds no delay
+    report_tokens: int = 1200  # Completion length
+    chunk_tokens: int = 8  # Tokens per streamed delta
+    error_rate: float = 0.0  # Fraction of requests answered with error_status
+    error_status: int = 500
+    empty_rate: float = 0.0  # Fraction of requests answered with empty content
+    failing_models: List[str] = field(default_factory=list)  # Models that always return error_status
+
+
+class FakeOpenRouterStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {'requests': 0, 'streamed': 0, 'errors': 0, 'empty': 0, 'in_flight': 0, 'max_in_flight': 0}
+
+    def add(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counts[name] += amount
+            if name == 'in_flight':
+                self.counts['max_in_flight'] = max(self.counts['max_in_flight'], self.counts['in_flight'])
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self.counts)
+
+
+def sample_latency_ms(config: FakeOpenRouterConfig) -> float:
+    """Draw a time-to-first-token from the configured distribution"""
+    median, spread = config.latency_ms, config.latency_spread
+    if config.latency_distribution == 'fixed':
+        return median
+    if config.latency_distribution == 'uniform':
+        return random.uniform(median * (1 - spread), median * (1 + spread))
+    if config.latency_distribution == 'normal':
+        return max(0.0, random.gauss(median, median * spread))
+    if config.latency_distribution == 'lognormal':
+        return random.lognormvariate(0, spread) * median
+    raise ValueError(f"Unknown latency distribution: {config.latency_distribution}")
+
+
+def build_report_text(tokens: int) -> str:
+    """Canned Markdown report of roughly ``tokens`` tokens"""
+    target_chars = tokens * CHARS_PER_TOKEN
+    repeats = target_chars // len(REPORT_TEMPLATE) + 1
+    return (REPORT_TEMPLATE * repeats)[:target_chars]
+
+
+class FakeOpenRouterHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive, like the real API
+    server_version = 'FakeOpenRouter/1.0'
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def config(self) -> FakeOpenRouterConfig:
+        return self.server.config
+
+    def do_GET(self):
+        if self.path.rstrip('/') == '/stats':
+            self._send_json(200, self.server.stats.snapshot())
+        else:
+            self._send_json(404, {"error": {"message": "Not found", "code": 404}})
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self._send_json(404, {"error": {"message": "Not found", "code": 404}})
+            return
+        try:
+            payload = json.loads(body or b'{}')
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": {"message": "Invalid JSON body", "code": 400}})
+            return
+
+        stats = self.server.stats
+        stats.add('requests')
+        stats.add('in_flight')
+        try:
+            self._complete(payload)
+        finally:
+            stats.add('in_flight', -1)
+
+    def _complete(self, payload: dict) -> None:
+        config, stats = self.config, self.server.stats
+        model = payload.get('model', 'fake/model')
+        stream = bool(payload.get('stream'))
+        latency_s = sample_latency_ms(config) / 1000
+
+        if model in config.failing_models or random.random() < config.error_rate:
+            stats.add('errors')
+            time.sleep(latency_s)
+            self._send_json(config.error_status, {
+                "error": {"message": f"Injected error for {model}", "code": config.error_status}
+            })
+            return
+
+        empty = random.random() < config.empty_rate
+        if empty:
+            stats.add('empty')
+        # Like the real API, completions stop at max_tokens
+        tokens = min(config.report_tokens, int(payload.get('max_tokens') or config.report_tokens))
+        text = '' if empty else build_report_text(tokens)
+        usage = self._usage(payload, text)
+        if config.prefill_tokens_per_second:
+            uncached = usage['prompt_tokens'] - usage['prompt_tokens_details']['cached_tokens']
+            latency_s += uncached / config.prefill_tokens_per_second
+        if stream:
+            stats.add('streamed')
+            include_usage = bool((payload.get('usage') or {}).get('include'))
+            self._stream(model, text, latency_s, usage if include_usage else None)
+        else:
+            time.sleep(latency_s + self._generation_seconds(text))
+            self._send_json(200, {
+                "id": f"gen-{uuid.uuid4().hex}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": text},
+                    "finish_reason": "stop",
+                }],
+                "usage": usage,
+            })
+
+    def _stream(self, model: str, text: str, latency_s: float, usage: Optional[dict] = None) -> None:
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        # OpenRouter sends keep-alive comments while the model is queued
+        deadline = time.monotonic() + latency_s
+        while time.monotonic() < deadline:
+            self._write_chunk(b': OPENROUTER PROCESSING\n\n')
+            time.sleep(min(1.0, max(deadline - time.monotonic(), 0)))
+
+        generation_id = f"gen-{uuid.uuid4().hex}"
+        chunk_chars = self.config.chunk_tokens * CHARS_PER_TOKEN
+        delay = self._generation_seconds(text[:chunk_chars])
+        for start in range(0, len(text), chunk_chars):
+            self._write_event({
+                "id": generation_id,
+                "object": "chat.completion.chunk",
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": text[start:start + chunk_chars]}}],
+            })
+            if delay:
+                time.sleep(delay)
+        self._write_event({
+            "id": generation_id,
+            "object": "chat.completion.chunk",
+            "model": model,
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+        })
+        if usage is not None:
+            # Requested with "usage": {"include": true}; sent as a final chunk with no choices
+            self._write_event({
+                "id": generation_id,
+                "object": "chat.completion.chunk",
+                "model": model,
+                "choices": [],
+                "usage": usage,
+            })
+        self._write_chunk(b'data: [DONE]\n\n')
+        self._write_chunk(b'')
+
+    def _generation_seconds(self, text: str) -> float:
+        if not self.config.tokens_per_second:
+            return 0.0
+        return len(text) / CHARS_PER_TOKEN / self.config.tokens_per_second
+
+    def _usage(self, payload: dict, text: str) -> dict:
+        prompt_chars = cached_chars = 0
+        for message in payload.get('messages', []):
+            content = message.get('content') or ''
+            # Plain string, or a list of text parts (optionally with cache_control breakpoints)
+            for part in ([{'text': content}] if isinstance(content, str) else content):
+                part_text = part.get('text') or ''
+                prompt_chars += len(part_text)
+                if part.get('cache_control') and self.server.seen_prompt_part(model=payload.get('model'), text=part_text):
+                    cached_chars += len(part_text)
+        prompt_tokens = prompt_chars // CHARS_PER_TOKEN
+        completion_tokens = len(text) // CHARS_PER_TOKEN
+        return {
+            "prompt_tokens": prompt_tokens,
+            "prompt_tokens_details": {"cached_tokens": cached_chars // CHARS_PER_TOKEN},
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+
+    def _write_event(self, data: dict) -> None:
+        self._write_chunk(f"data: {json.dumps(data, ensure_ascii=False)}\n\n".encode('utf-8'))
+
+    def _write_chunk(self, data: bytes) -> None:
+        self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+        self.wfile.flush()
+
+    def _send_json(self, status: int, data: dict) -> None:
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FakeOpenRouterServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, config: FakeOpenRouterConfig):
+        super().__init__(address, FakeOpenRouterHandler)
+        self.config = config
+        self.stats = FakeOpenRouterStats()
+        self._prompt_cache = set()  # (model, sha256) of cache-marked prompt parts seen so far
+        self._prompt_cache_lock = threading.Lock()
+
+    def seen_prompt_part(self, model: str, text: str) -> bool:
+        """Whether this cache-marked part was sent before (a cache hit); remembers it otherwise"""
+        key = (model, hashlib.sha256(text.encode('utf-8')).hexdigest())
+        with self._prompt_cache_lock:
+            if key in self._prompt_cache:
+                return True
+            self._prompt_cache.add(key)
+            return False
+
+
+def make_server(host: str = '127.0.0.1', port: int = 8089, config: FakeOpenRouterConfig = None) -> FakeOpenRouterServer:
+    """Create (but do not start) a fake OpenRouter server; call ``serve_forever()`` to run it"""
+    return FakeOpenRouterServer((host, port), config or FakeOpenRouterConfig())
@@ -0,0 +1,189 @@
+"""
+Per-stage timing for the report pipeline.
+
+A ``StageTimer`` collects how long each stage of one report took (prompt
+build, upstream wait, content extraction, Markdown to HTML, PDF write, DB
+insert, ...). Code deep in the pipeline records into the active timer with::
+
+    with stage('markdown_html'):
+        ...
+
+which is a no-op when no timer is active. Finished timers are passed to
+``record_timings``, which logs them, keeps rolling per-stage aggregates for
+the metrics endpoint and forwards them to the optional
+``AI_PROVIDER_METRICS_SINK`` callable. The sync endpoint also returns them as
+a ``Server-Timing`` header.
+
+The timer also accumulates the token usage the upstream reports
+(``record_usage``), summed over every model attempt, for persisting with the
+report (see ``usage``).
+"""
+import contextvars
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Optional
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+_current_timer = contextvars.ContextVar('report_stage_timer', default=None)
+
+# Rolling durations kept per pipeline/stage for percentiles on the metrics endpoint
+STATS_WINDOW = 500
+
+USAGE_FIELDS = ('prompt_tokens', 'completion_tokens', 'total_tokens', 'cost')
+
+
+class StageTimer:
+    """Wall-clock durations of the named stages of one report generation"""
+
+    def __init__(self):
+        self.timings = {}
+        self.usage = {}
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, (time.perf_counter() - start) * 1000)
+
+    def add(self, name: str, duration_ms: float) -> None:
+        """Add a duration measured elsewhere (e.g. in a PDF worker process)"""
+        self.timings[name] = self.timings.get(name, 0.0) + duration_ms
+
+    def merge(self, timings: dict) -> None:
+        for name, duration_ms in timings.items():
+            self.add(name, duration_ms)
+
+    def add_usage(self, usage: dict) -> None:
+        """Add an upstream ``usage`` object (tokens, and cost when the upstream reports it)"""
+        for name in USAGE_FIELDS:
+            value = usage.get(name)
+            if isinstance(value, (int, float)):
+                self.usage[name] = self.usage.get(name, 0) + value
+        # Prompt tokens served from the provider's prompt cache
+        cached = (usage.get('prompt_tokens_details') or {}).get('cached_tokens')
+        if isinstance(cached, (int, float)):
+            self.usage['cached_tokens'] = self.usage.get('cached_tokens', 0) + cached
+
+    @property
+    def total_ms(self) -> float:
+        return (time.perf_counter() - self._start) * 1000
+
+    @contextmanager
+    def activate(self):
+        """Make this the timer that ``stage()`` records into for the current context"""
+        token = _current_timer.set(self)
+        try:
+            yield self
+        finally:
+            _current_timer.reset(token)
+
+    def server_timing(self) -> str:
+        """The timings formatted as a ``Server-Timing`` header value"""
+        metrics = [f"{name};dur={duration_ms:.1f}" for name, duration_ms in self.timings.items()]
+        metrics.append(f"total;dur={self.total_ms:.1f}")
+        return ", ".join(metrics)
+
+
+def current_timer() -> Optional[StageTimer]:
+    return _current_timer.get()
+
+
+def record_usage(usage: Optional[dict]) -> None:
+    """Add upstream token usage to the active timer, if any"""
+    timer = _current_timer.get()
+    if timer is not None and usage:
+        timer.add_usage(usage)
+
+
+@contextmanager
+def stage(name: str):
+    """Time a stage into the active timer, if any"""
+    timer = _current_timer.get()
+    if timer is None:
+        yield
+        return
+    with timer.stage(name):
+        yield
+
+
+_stats_lock = threading.Lock()
+_stats = {}  # (pipeline, stage) -> {'count', 'total_ms', 'recent': deque}
+_sink = None
+_sink_loaded = False
+
+
+def _get_sink():
+    global _sink, _sink_loaded
+    if not _sink_loaded:
+        path = settings.AI_PROVIDER_METRICS_SINK
+        _sink = import_string(path) if path else None
+        _sink_loaded = True
+    return _sink
+
+
+def record_timings(pipeline: str, timer: StageTimer, outcome: str = 'ok', **tags) -> None:
+    """
+    Publish a finished timer: log it, add it to the in-process aggregates and
+    forward it to ``AI_PROVIDER_METRICS_SINK``.
+
+    Args:
+        pipeline: Which path produced the report (``sync``, ``stream``, ``job``, ...)
+        timer: The finished timer
+        outcome: ``ok``, ``cached``, ``error`` or ``disconnected``
+        tags: Extra dimensions passed through to the log record and sink (e.g. ``model``)
+    """
+    timings = dict(timer.timings)
+    timings['total'] = timer.total_ms
+
+    with _stats_lock:
+        for name, duration_ms in timings.items():
+            entry = _stats.setdefault((pipeline, name), {
+                'count': 0,
+                'total_ms': 0.0,
+                'recent': deque(maxlen=STATS_WINDOW),
+            })
+            entry['count'] += 1
+            entry['total_ms'] += duration_ms
+            entry['recent'].append(duration_ms)
+
+    logger.info(
+        "report_timings pipeline=%s outcome=%s %s %s",
+        pipeline,
+        outcome,
+        " ".join(f"{name}={value}" for name, value in tags.items()),
+        " ".join(f"{name}_ms={duration_ms:.1f}" for name, duration_ms in timings.items()),
+        extra={'pipeline': pipeline, 'outcome': outcome, 'timings': timings, 'tags': tags},
+    )
+
+    try:
+        sink = _get_sink()
+        if sink is not None:
+            sink(pipeline=pipeline, outcome=outcome, timings=timings, tags=tags)
+    except Exception:
+        logger.exception("Metrics sink failed")
+
+
+def stage_timing_stats() -> dict:
+    """Per-pipeline, per-stage count, mean and recent p50/p95 (ms) for this process"""
+    with _stats_lock:
+        snapshot = {key: (entry['count'], entry['total_ms'], sorted(entry['recent'])) for key, entry in _stats.items()}
+
+    stats = {}
+    for (pipeline, name), (count, total_ms, recent) in snapshot.items():
+        stats.setdefault(pipeline, {})[name] = {
+            'count': count,
+            'avg_ms': total_ms / count,
+            'p50_ms': recent[len(recent) // 2],
+            'p95_ms': recent[min(len(recent) - 1, int(len(recent) * 0.95))],
+        }
+    return stats
@@ -0,0 +1,265 @@
+"""
+DB-backed job queue and worker pool for asynchronous report generation.
+
+Jobs are rows in ``ReportJob``; workers claim them with a conditional UPDATE so
+several threads (or processes running ``run_report_workers``) can share the
+queue without an external broker.
+"""
+import logging
+import os
+import socket
+import threading
+import uuid
+from datetime import timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F
+from django.utils import timezone
+from ninja.errors import HttpError
+
+from apps.ai_provider.schemas import ImmigrationProfileSchema
+from apps.ai_provider.services import generate_report
+from apps.core.models import ReportJob
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_report_job(profile: ImmigrationProfileSchema, user=None, referer: str = "") -> ReportJob:
+    """
+    Queue a report for background generation.
+
+    Starts the embedded worker pool on first use when
+    ``REPORT_JOB_EMBEDDED_WORKERS`` is enabled.
+    """
+    job = ReportJob.objects.create(
+        user=user,
+        profile_data=profile.model_dump(),
+        referer=referer or None,
+    )
+    if settings.REPORT_JOB_EMBEDDED_WORKERS:
+        pool = get_embedded_pool()
+        pool.notify()
+    return job
+
+
+def claim_next_job(worker_id: str) -> Optional[ReportJob]:
+    """
+    Atomically claim the oldest queued job.
+
+    Uses a conditional UPDATE rather than ``select_for_update`` so claiming
+    works the same on SQLite and PostgreSQL.
+    """
+    candidates = ReportJob.objects.filter(status='queued').order_by('created_at').values_list('id', flat=True)[:5]
+    for job_id in candidates:
+        now = timezone.now()
+        claimed = ReportJob.objects.filter(id=job_id, status='queued').update(
+            status='running',
+            stage='llm',
+            progress=5,
+            worker_id=worker_id,
+            attempts=F('attempts') + 1,
+            started_at=now,
+            lease_expires_at=now + timedelta(seconds=settings.REPORT_JOB_LEASE_SECONDS),
+            updated_at=now,
+        )
+        if claimed:
+            return ReportJob.objects.get(id=job_id)
+    return None
+
+
+def requeue_expired_jobs() -> int:
+    """
+    Recover jobs whose worker died mid-run.
+
+    Running jobs past their lease go back to the queue, or fail once they have
+    used up ``REPORT_JOB_MAX_ATTEMPTS``.
+
+    Returns:
+        The number of jobs recovered
+    """
+    now = timezone.now()
+    expired = ReportJob.objects.filter(status='running', lease_expires_at__lt=now)
+    failed = expired.filter(attempts__gte=settings.REPORT_JOB_MAX_ATTEMPTS).update(
+        status='failed',
+        error_status=500,
+        error_message="Report generation was interrupted. Please try again.",
+        finished_at=now,
+        updated_at=now,
+    )
+    requeued = expired.filter(attempts__lt=settings.REPORT_JOB_MAX_ATTEMPTS).update(
+        status='queued',
+        stage='queued',
+        progress=0,
+        worker_id=None,
+        lease_expires_at=None,
+        updated_at=now,
+    )
+    return failed + requeued
+
+
+def _owned(job: ReportJob):
+    """The job's row, as long as this worker still holds it"""
+    return ReportJob.objects.filter(id=job.id, worker_id=job.worker_id, status='running')
+
+
+def _heartbeat(job: ReportJob, done: threading.Event) -> None:
+    """Keep extending the lease while the job runs (a fallback chain can outlast one lease)"""
+    interval = max(1.0, settings.REPORT_JOB_LEASE_SECONDS / 3)
+    try:
+        while not done.wait(interval):
+            now = timezone.now()
+            if not _owned(job).update(
+                lease_expires_at=now + timedelta(seconds=settings.REPORT_JOB_LEASE_SECONDS),
+                updated_at=now,
+            ):
+                return
+    except Exception:
+        logger.exception("Report job heartbeat failed job_id=%s", job.id)
+    finally:
+        close_old_connections()
+
+
+def run_job(job: ReportJob) -> None:
+    """Run a claimed job through the report pipeline and record the outcome"""
+    def on_stage(stage, progress):
+        now = timezone.now()
+        _owned(job).update(
+            stage=stage,
+            progress=progress,
+            lease_expires_at=now + timedelta(seconds=settings.REPORT_JOB_LEASE_SECONDS),
+            updated_at=now,
+        )
+
+    done = threading.Event()
+    heartbeat = threading.Thread(target=_heartbeat, args=(job, done), name=f"report-job-heartbeat-{job.id}", daemon=True)
+    heartbeat.start()
+    try:
+        profile = ImmigrationProfileSchema(**job.profile_data)
+        report = generate_report(
+            profile, user=job.user, referer=job.referer or "", on_stage=on_stage, pipeline='job'
+        )
+    except HttpError as e:
+        _fail_job(job, e.status_code, str(e))
+        return
+    except Exception as e:
+        logger.exception("Report job crashed job_id=%s", job.id)
+        _fail_job(job, 500, f"An unexpected error occurred: {str(e)}")
+        return
+    finally:
+        done.set()
+        heartbeat.join()
+
+    now = timezone.now()
+    updated = _owned(job).update(
+        status='completed',
+        stage='done',
+        progress=100,
+        report=report,
+        lease_expires_at=None,
+        finished_at=now,
+        updated_at=now,
+    )
+    if not updated:
+        logger.warning("Report job lost its lease before completing job_id=%s worker_id=%s", job.id, job.worker_id)
+
+
+def _fail_job(job: ReportJob, error_status: int, error_message: str) -> None:
+    now = timezone.now()
+    updated = _owned(job).update(
+        status='failed',
+        error_status=error_status,
+        error_message=error_message,
+        lease_expires_at=None,
+        finished_at=now,
+        updated_at=now,
+    )
+    if not updated:
+        logger.warning("Report job lost its lease before failing job_id=%s worker_id=%s", job.id, job.worker_id)
+
+
+class ReportWorkerPool:
+    """
+    A fixed set of threads that poll ``ReportJob`` and run claimed jobs.
+
+    Each thread handles one job at a time, so ``size`` bounds how many LLM calls
+    and PDF renders this process runs concurrently, independently of the
+    request workers serving the rest of the API.
+    """
+
+    def __init__(self, size: int, poll_interval: float = 1.0, name: str = "report-worker"):
+        self.size = size
+        self.poll_interval = poll_interval
+        self.name = name
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._threads = []
+        self._lock = threading.Lock()
+
+    @property
+    def is_running(self) -> bool:
+        return any(thread.is_alive() for thread in self._threads)
+
+    def start(self) -> None:
+        with self._lock:
+            if self.is_running:
+                return
+            self._stopping.clear()
+            base_id = f"{socket.gethostname()}:{os.getpid()}"
+            self._threads = [
+                threading.Thread(
+                    target=self._worker_loop,
+                    args=(f"{base_id}:{self.name}-{index}-{uuid.uuid4().hex[:6]}",),
+                    name=f"{self.name}-{index}",
+                    daemon=True,
+                )
+                for index in range(self.size)
+            ]
+            for thread in self._threads:
+                thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def notify(self) -> None:
+        """Wake idle workers immediately instead of waiting for the next poll"""
+        self._wakeup.set()
+
+    def _worker_loop(self, worker_id: str) -> None:
+        while not self._stopping.is_set():
+            job = None
+            try:
+                close_old_connections()
+                requeue_expired_jobs()
+                job = claim_next_job(worker_id)
+                if job:
+                    run_job(job)
+            except Exception:
+                logger.exception("Report worker error worker_id=%s", worker_id)
+            finally:
+                close_old_connections()
+
+            if job is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+
+
+_embedded_pool = None
+_embedded_pool_lock = threading.Lock()
+
+
+def get_embedded_pool() -> ReportWorkerPool:
+    """Return the in-process worker pool, starting it on first use"""
+    global _embedded_pool
+    with _embedded_pool_lock:
+        if _embedded_pool is None:
+            _embedded_pool = ReportWorkerPool(
+                size=settings.REPORT_JOB_WORKERS,
+                poll_interval=settings.REPORT_JOB_POLL_INTERVAL,
+            )
+        _embedded_pool.start()
+    return _embedded_pool
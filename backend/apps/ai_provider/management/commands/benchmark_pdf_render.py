@@ -0,0 +1,117 @@
+"""
+Compare per-render cost of inline report CSS against the precompiled stylesheets.
+"""
+import os
+import statistics
+import tempfile
+import time
+
+import markdown
+from django.core.management.base import BaseCommand, CommandError
+from weasyprint import HTML
+
+from apps.ai_provider.pdf_styles import DEFAULT_THEME, REPORT_CSS, available_themes, get_stylesheets
+from apps.ai_provider.utils import wrap_report_html, write_report_pdf
+
+SAMPLE_MARKDOWN = """# Immigration Eligibility Report
+
+## Profile Summary
+
+| Factor | Value | Points |
+|---|---|---|
+| Age | 29 | 105 |
+| Education | Master's degree | 135 |
+| First language | CLB 9 | 124 |
+| Work experience | 3 years | 40 |
+
+## Recommended Pathways
+
+1. **Express Entry (FSW)** - strong match given language and education.
+2. **Provincial Nominee Program** - consider Ontario Human Capital Priorities.
+3. **Study Permit** - optional route to Canadian experience.
+
+> Scores are estimates; verify with the official CRS calculator.
+
+### Next Steps
+
+- Book an IELTS General Training test
+- Request an Educational Credential Assessment (WES)
+- Prepare proof of funds for at least 6 months
+
+---
+
+*This report is informational and is not legal advice.*
+"""
+
+
+def _inline_document(html_content: str) -> str:
+    """The pre-compilation document: the full stylesheet embedded in every render"""
+    return f"""<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <style>{REPORT_CSS}</style>
+</head>
+<body>
+    {html_content}
+</body>
+</html>"""
+
+
+class Command(BaseCommand):
+    help = "Benchmark report PDF rendering with inline CSS vs. precompiled stylesheets"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20, help="Renders per variant")
+        parser.add_argument('--theme', default=DEFAULT_THEME, help="Theme for the precompiled variant")
+        parser.add_argument('--markdown-file', help="Render this Markdown file instead of the built-in sample")
+
+    def handle(self, *args, **options):
+        if options['theme'] not in available_themes():
+            raise CommandError(f"Unknown theme '{options['theme']}'. Available: {', '.join(available_themes())}")
+
+        markdown_text = SAMPLE_MARKDOWN
+        if options['markdown_file']:
+            with open(options['markdown_file'], encoding='utf-8') as f:
+                markdown_text = f.read()
+        html_content = markdown.markdown(markdown_text, extensions=['extra', 'tables', 'nl2br', 'sane_lists'])
+        iterations = options['iterations']
+
+        fd, output_path = tempfile.mkstemp(suffix='.pdf')
+        os.close(fd)
+        try:
+            # One untimed render of each variant so imports and font discovery are not counted
+            HTML(string=_inline_document(html_content)).write_pdf(output_path)
+            get_stylesheets(options['theme'])
+            write_report_pdf(wrap_report_html(html_content), output_path, options['theme'])
+
+            inline = self._time(iterations, lambda: HTML(string=_inline_document(html_content)).write_pdf(output_path))
+            compiled = self._time(
+                iterations,
+                lambda: write_report_pdf(wrap_report_html(html_content), output_path, options['theme']),
+            )
+        finally:
+            os.remove(output_path)
+
+        self.stdout.write(f"Renders per variant: {iterations}")
+        self._report('Inline CSS', inline)
+        self._report('Precompiled', compiled)
+        saving = statistics.mean(inline) - statistics.mean(compiled)
+        self.stdout.write(self.style.SUCCESS(
+            f"Saving per render: {saving:.1f} ms ({saving / statistics.mean(inline) * 100:.1f}%)"
+        ))
+
+    def _time(self, iterations, render):
+        timings = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            render()
+            timings.append((time.perf_counter() - start) * 1000)
+        return timings
+
+    def _report(self, label, timings):
+        self.stdout.write(
+            f"{label:<12} mean {statistics.mean(timings):7.1f} ms   "
+            f"median {statistics.median(timings):7.1f} ms   "
+            f"min {min(timings):7.1f} ms"
+        )
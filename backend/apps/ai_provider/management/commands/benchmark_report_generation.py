@@ -0,0 +1,253 @@
+"""
+Load-test POST /api/ai-provider/generate-report at increasing concurrency.
+
+Run the backend against the fake upstream for repeatable numbers::
+
+    python manage.py run_fake_openrouter --latency-ms 800 --tokens-per-second 80
+    OPENROUTER_BASE_URL=http://127.0.0.1:8089/v1/chat/completions python manage.py runserver 8001
+    python manage.py benchmark_report_generation --concurrency 1,4,16 --json bench.json
+
+To compare the sync endpoint with /generate-report/async, serve the backend
+under ASGI (both endpoints work there; the sync one runs in the thread pool)
+and raise the admission limits so they do not cap the measurement::
+
+    REPORT_MAX_CONCURRENT=1000 REPORT_MAX_CONCURRENT_PER_CLIENT=0 REPORT_ASYNC_MAX_CONCURRENT=1000 \
+        OPENROUTER_BASE_URL=http://127.0.0.1:8089/v1/chat/completions \
+        uvicorn config.asgi:application --port 8001
+    python manage.py benchmark_report_generation --paths sync,async --concurrency 16,64,256
+"""
+import json
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+ENDPOINT_PATHS = {
+    'sync': '/api/ai-provider/generate-report',
+    'async': '/api/ai-provider/generate-report/async',
+}
+
+SAMPLE_PROFILE = {
+    "path": "Express Entry",
+    "age": 29,
+    "marital_status": "Single",
+    "citizenship": "India",
+    "residence_country": "India",
+    "highest_degree": "Master's",
+    "field_of_study": "Computer Science",
+    "english_test": "IELTS",
+    "english_scores": "CLB 9",
+    "foreign_experience_years": 3,
+    "occupation_noc": "21231",
+    "funds": "25000",
+}
+
+
+def _percentile(values, percentile):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(percentile / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def parse_server_timing(header: str) -> dict:
+    """``name;dur=12.3, other;dur=4`` → ``{'name': 12.3, 'other': 4.0}``"""
+    timings = {}
+    for metric in filter(None, (part.strip() for part in header.split(','))):
+        name, _, params = metric.partition(';')
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'dur':
+                try:
+                    timings[name.strip()] = float(value)
+                except ValueError:
+                    pass
+    return timings
+
+
+class Command(BaseCommand):
+    help = "Benchmark report generation end to end: throughput, p50/p95/p99 latency and PDF stage cost"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8001', help="Backend base URL")
+        parser.add_argument(
+            '--concurrency',
+            default='1,4,16',
+            help="Comma-separated numbers of concurrent clients, one run per level",
+        )
+        parser.add_argument(
+            '--paths',
+            default='sync',
+            help=f"Comma-separated endpoints to benchmark one after the other: {', '.join(ENDPOINT_PATHS)}",
+        )
+        parser.add_argument('--requests', type=int, default=40, help="Requests per concurrency level")
+        parser.add_argument('--warmup', type=int, default=2, help="Untimed requests before the first level")
+        parser.add_argument(
+            '--repeat-profile',
+            action='store_true',
+            help="Send the same profile every time (measures the cached path); by default each request is unique",
+        )
+        parser.add_argument('--timeout', type=float, default=180, help="Per-request timeout in seconds")
+        parser.add_argument('--json', dest='json_path', help="Also write the results to this JSON file")
+
+    def handle(self, *args, **options):
+        try:
+            levels = [int(level) for level in options['concurrency'].split(',') if level.strip()]
+        except ValueError:
+            raise CommandError("--concurrency must be a comma-separated list of integers")
+        if not levels or min(levels) < 1:
+            raise CommandError("--concurrency levels must be positive")
+        paths = [path.strip() for path in options['paths'].split(',') if path.strip()]
+        unknown = [path for path in paths if path not in ENDPOINT_PATHS]
+        if not paths or unknown:
+            raise CommandError(f"--paths must be a comma-separated list of: {', '.join(ENDPOINT_PATHS)}")
+
+        self.timeout = options['timeout']
+        self.repeat_profile = options['repeat_profile']
+        self.run_id = uuid.uuid4().hex[:8]
+        self._local = threading.local()
+        self._counter = 0
+        self._counter_lock = threading.Lock()
+
+        runs = []
+        for path in paths:
+            self.endpoint = f"{options['url'].rstrip('/')}{ENDPOINT_PATHS[path]}"
+            for _ in range(options['warmup']):
+                self._send()
+
+            results = []
+            self.stdout.write(f"{path}: {self.endpoint}")
+            self.stdout.write(
+                f"{'conc':>5} {'ok':>5} {'err':>5} {'req/s':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+                f"{'upstream':>9} {'pdf ms':>8} {'pdf %':>6}"
+            )
+            for concurrency in levels:
+                result = self._run_level(concurrency, options['requests'])
+                results.append(result)
+                self._print_level(result)
+            runs.append({'path': path, 'endpoint': self.endpoint, 'levels': results})
+
+        if len(runs) > 1:
+            self._print_comparison(runs)
+
+        if options['json_path']:
+            with open(options['json_path'], 'w', encoding='utf-8') as f:
+                if len(runs) == 1:
+                    data = {'endpoint': runs[0]['endpoint'], 'repeat_profile': self.repeat_profile, 'levels': runs[0]['levels']}
+                else:
+                    data = {'repeat_profile': self.repeat_profile, 'runs': runs}
+                json.dump(data, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['json_path']}"))
+
+    def _session(self) -> requests.Session:
+        if not hasattr(self._local, 'session'):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def _profile(self) -> dict:
+        profile = dict(SAMPLE_PROFILE)
+        if not self.repeat_profile:
+            with self._counter_lock:
+                self._counter += 1
+                number = self._counter
+            # A distinct note per request keeps the report cache and single-flight out of the measurement
+            profile['user_notes'] = f"benchmark {self.run_id} request {number}"
+        return profile
+
+    def _send(self) -> dict:
+        start = time.perf_counter()
+        try:
+            response = self._session().post(self.endpoint, json=self._profile(), timeout=self.timeout)
+        except requests.RequestException as e:
+            return {'ok': False, 'status': None, 'error': str(e), 'latency_ms': (time.perf_counter() - start) * 1000}
+        latency_ms = (time.perf_counter() - start) * 1000
+        result = {
+            'ok': response.ok,
+            'status': response.status_code,
+            'latency_ms': latency_ms,
+            'timings': parse_server_timing(response.headers.get('Server-Timing', '')),
+        }
+        if response.ok:
+            result['cache_hit'] = response.json().get('cache_hit', False)
+        return result
+
+    def _run_level(self, concurrency: int, total: int) -> dict:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            samples = list(executor.map(lambda _: self._send(), range(total)))
+        elapsed = time.perf_counter() - start
+
+        ok = [sample for sample in samples if sample['ok']]
+        statuses = {}
+        for sample in samples:
+            if not sample['ok']:
+                key = str(sample['status'] or 'connection_error')
+                statuses[key] = statuses.get(key, 0) + 1
+
+        result = {
+            'concurrency': concurrency,
+            'requests': total,
+            'ok': len(ok),
+            'errors': total - len(ok),
+            'error_statuses': statuses,
+            'cache_hits': sum(1 for sample in ok if sample.get('cache_hit')),
+            'elapsed_s': elapsed,
+            'throughput_rps': len(ok) / elapsed if elapsed else 0.0,
+        }
+        if ok:
+            latencies = [sample['latency_ms'] for sample in ok]
+            mean_latency = statistics.mean(latencies)
+            stage_means = {}
+            for name in {name for sample in ok for name in sample['timings']}:
+                stage_means[name] = statistics.mean(sample['timings'].get(name, 0.0) for sample in ok)
+            result.update({
+                'latency_ms': {
+                    'mean': mean_latency,
+                    'p50': _percentile(latencies, 50),
+                    'p95': _percentile(latencies, 95),
+                    'p99': _percentile(latencies, 99),
+                    'max': max(latencies),
+                },
+                'stage_mean_ms': stage_means,
+                'pdf_share': stage_means.get('pdf', 0.0) / mean_latency if mean_latency else 0.0,
+            })
+        return result
+
+    def _print_level(self, result: dict) -> None:
+        if not result['ok']:
+            self.stdout.write(self.style.ERROR(
+                f"{result['concurrency']:>5} {0:>5} {result['errors']:>5}  all requests failed: {result['error_statuses']}"
+            ))
+            return
+        latency, stages = result['latency_ms'], result['stage_mean_ms']
+        line = (
+            f"{result['concurrency']:>5} {result['ok']:>5} {result['errors']:>5} {result['throughput_rps']:>7.2f} "
+            f"{latency['p50']:>9.1f} {latency['p95']:>9.1f} {latency['p99']:>9.1f} "
+            f"{stages.get('upstream', 0.0):>9.1f} {stages.get('pdf', 0.0):>8.1f} {result['pdf_share'] * 100:>5.1f}%"
+        )
+        if result['errors'] or result['cache_hits']:
+            line += f"  (errors: {result['error_statuses']}, cache hits: {result['cache_hits']})"
+        self.stdout.write(line)
+
+    def _print_comparison(self, runs: list) -> None:
+        """Throughput and p95 of every path against the first one, per concurrency level"""
+        baseline = runs[0]
+        self.stdout.write(f"\nCompared with {baseline['path']}:")
+        self.stdout.write(f"{'path':>6} {'conc':>5} {'req/s':>7} {'x req/s':>8} {'p95 ms':>9} {'x p95':>7}")
+        for run in runs[1:]:
+            for base, result in zip(baseline['levels'], run['levels']):
+                if not base['ok'] or not result['ok']:
+                    self.stdout.write(f"{run['path']:>6} {result['concurrency']:>5}  no successful requests to compare")
+                    continue
+                base_p95, p95 = base['latency_ms']['p95'], result['latency_ms']['p95']
+                self.stdout.write(
+                    f"{run['path']:>6} {result['concurrency']:>5} {result['throughput_rps']:>7.2f} "
+                    f"{_ratio(result['throughput_rps'], base['throughput_rps']):>8} {p95:>9.1f} {_ratio(p95, base_p95):>7}"
+                )
+
+
+def _ratio(value: float, baseline: float) -> str:
+    return f"{value / baseline:.2f}x" if baseline else '-'
@@ -0,0 +1,39 @@
+"""
+Delete stored report PDFs that no report references, in batches.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.ai_provider.storage import collect_garbage
+
+
+class Command(BaseCommand):
+    help = "Remove orphaned report PDFs (and stale temporary files) from media/reports"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help="Files checked against the database per query")
+        parser.add_argument(
+            '--min-age',
+            type=int,
+            default=settings.REPORT_STORAGE_GC_GRACE_SECONDS,
+            help="Only remove files not modified for this many seconds",
+        )
+        parser.add_argument('--dry-run', action='store_true', help="Report orphans without deleting them")
+
+    def handle(self, *args, **options):
+        stats = collect_garbage(
+            batch_size=options['batch_size'],
+            grace_seconds=options['min_age'],
+            dry_run=options['dry_run'],
+        )
+        if options['dry_run']:
+            self.stdout.write(
+                f"Scanned {stats['scanned']} files: {stats['orphans']} orphaned "
+                f"({stats['skipped_recent']} more too recent to collect). Nothing deleted (dry run)."
+            )
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"Scanned {stats['scanned']} files: deleted {stats['deleted']} orphans "
+            f"({stats['bytes_freed'] / 1024 / 1024:.2f} MB), skipped {stats['skipped_recent']} recent, "
+            f"removed {stats['empty_dirs_removed']} empty directories."
+        ))
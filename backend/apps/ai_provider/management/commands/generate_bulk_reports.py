@@ -0,0 +1,112 @@
+"""
+Generate reports in bulk for stored profiles, resumably.
+
+    python manage.py generate_bulk_reports --checkpoint campaign.json
+    python manage.py generate_bulk_reports --jsonl profiles.jsonl --checkpoint import.json --failures failed.jsonl
+"""
+import signal
+import sys
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from ninja.errors import HttpError
+
+from apps.ai_provider.bulk import BulkProgress, BulkReportRun, Checkpoint, JsonlSource, SubmissionSource
+from apps.ai_provider.services import ensure_api_key_configured
+
+
+def format_duration(seconds: float) -> str:
+    seconds = int(seconds)
+    hours, remainder = divmod(seconds, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    return f"{hours}h{minutes:02d}m" if hours else f"{minutes}m{seconds:02d}s"
+
+
+class Command(BaseCommand):
+    help = "Generate immigration reports for every completed pathway advisor submission (or a JSONL file of profiles)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--jsonl', help="Read profiles from this JSONL file instead of pathway advisor submissions")
+        parser.add_argument('--include-incomplete', action='store_true', help="Also use submissions not marked completed")
+        parser.add_argument('--checkpoint', help="Progress file; re-run with the same file to resume")
+        parser.add_argument('--failures', help="Append failed profiles to this JSONL file (usable as --jsonl)")
+        parser.add_argument('--llm-concurrency', type=int, default=4, help="Parallel LLM requests")
+        parser.add_argument(
+            '--pdf-concurrency',
+            type=int,
+            default=settings.PDF_RENDER_WORKERS,
+            help="Parallel PDF renders (default PDF_RENDER_WORKERS)",
+        )
+        parser.add_argument('--batch-size', type=int, default=50, help="Reports per bulk insert and checkpoint")
+        parser.add_argument('--no-pdf', action='store_true', help="Skip PDFs; they render on first download")
+        parser.add_argument('--regenerate', action='store_true', help="Generate even when a report with the same cache key exists")
+        parser.add_argument('--limit', type=int, help="Process at most this many profiles in this run")
+        parser.add_argument('--progress-interval', type=float, default=5.0, help="Seconds between progress lines")
+
+    def handle(self, *args, **options):
+        if options['llm_concurrency'] < 1 or options['pdf_concurrency'] < 1 or options['batch_size'] < 1:
+            raise CommandError("Concurrency and batch size must be at least 1")
+        try:
+            ensure_api_key_configured()
+        except HttpError as e:
+            raise CommandError(str(e))
+
+        source = JsonlSource(options['jsonl']) if options['jsonl'] else SubmissionSource(options['include_incomplete'])
+        checkpoint = Checkpoint(options['checkpoint'], source.name)
+        try:
+            resumed = checkpoint.load()
+        except ValueError as e:
+            raise CommandError(str(e))
+        if resumed:
+            self.stdout.write(
+                f"Resuming from {options['checkpoint']}: {checkpoint.watermark} done "
+                f"(created {checkpoint.counts['created']}, skipped {checkpoint.counts['skipped']}, "
+                f"failed {checkpoint.counts['failed']})"
+            )
+        elif not options['checkpoint']:
+            self.stdout.write(self.style.WARNING("No --checkpoint given; an interrupted run starts over (existing reports are skipped)"))
+
+        run = BulkReportRun(
+            source,
+            checkpoint,
+            llm_concurrency=options['llm_concurrency'],
+            pdf_concurrency=options['pdf_concurrency'],
+            batch_size=options['batch_size'],
+            render_pdfs=not (options['no_pdf'] or settings.REPORT_PDF_LAZY),
+            skip_existing=not options['regenerate'],
+            limit=options['limit'],
+            failures_path=options['failures'],
+            on_progress=self.print_progress,
+            progress_interval=options['progress_interval'],
+        )
+        if threading.current_thread() is threading.main_thread():
+            # SIGTERM (e.g. from a process supervisor) stops like Ctrl+C: in-flight reports are still saved
+            signal.signal(signal.SIGTERM, lambda signum, frame: run.stop())
+        progress = run.run()
+        self.stdout.write("")
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed {progress.processed} profiles in {format_duration(progress.elapsed)}: "
+            f"created {progress.created}, skipped {progress.skipped}, failed {progress.failed}"
+        ))
+        if progress.failed and options['failures']:
+            self.stdout.write(f"Failed profiles written to {options['failures']}")
+        if run.stopped and options['checkpoint']:
+            self.stdout.write(f"Stopped early; re-run with --checkpoint {options['checkpoint']} to continue")
+
+    def print_progress(self, progress: BulkProgress) -> None:
+        total = progress.total or 0
+        percent = f"{progress.processed / total * 100:5.1f}%" if total else "  -  "
+        eta = progress.eta_seconds
+        line = (
+            f"[{progress.processed:>{len(str(total))}}/{total}] {percent}  "
+            f"created {progress.created}  skipped {progress.skipped}  failed {progress.failed}  "
+            f"{progress.rate * 60:.1f} reports/min  "
+            f"ETA {format_duration(eta) if eta is not None else '-'}"
+        )
+        # Rewrite one line on a terminal, one line per update in logs
+        if sys.stdout.isatty():
+            self.stdout.write(f"\r{line}", ending='')
+            self.stdout.flush()
+        else:
+            self.stdout.write(line)
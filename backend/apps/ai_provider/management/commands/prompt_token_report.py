@@ -0,0 +1,92 @@
+"""
+Compare report prompt versions: prompt size per version, and the tokens and
+time to first token recorded for the reports generated with each.
+
+    python manage.py prompt_token_report --days 7 --json prompts.json
+
+The size table builds every builder/variant prompt for a sample profile and
+estimates tokens at four characters each; the static system prompt is the
+part providers can serve from their prompt cache. The recorded table comes
+from ``ReportUsage`` (see ``apps/ai_provider/usage.py``).
+"""
+import json
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.ai_provider.fake_openrouter import CHARS_PER_TOKEN
+from apps.ai_provider.management.commands.benchmark_report_generation import SAMPLE_PROFILE
+from apps.ai_provider.prompts import PROMPT_VERSIONS, build_report_prompt, prompt_version
+from apps.ai_provider.schemas import ImmigrationProfileSchema
+from apps.ai_provider.usage import usage_summary
+
+
+def prompt_sizes(profile: ImmigrationProfileSchema) -> list:
+    """Estimated prompt size of every builder/variant for ``profile``"""
+    sizes = []
+    for builder, variant in PROMPT_VERSIONS:
+        prompt = build_report_prompt(profile, builder=builder, variant=variant)
+        system_tokens = len(prompt.system) // CHARS_PER_TOKEN
+        user_tokens = len(prompt.user) // CHARS_PER_TOKEN
+        sizes.append({
+            'version': prompt.version,
+            'builder': builder,
+            'variant': variant,
+            'system_tokens': system_tokens,
+            'user_tokens': user_tokens,
+            'prompt_tokens': system_tokens + user_tokens,
+            'max_tokens': prompt.max_tokens,
+        })
+    return sizes
+
+
+class Command(BaseCommand):
+    help = "Report prompt tokens and time to first token per prompt version"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30, help="Window of recorded usage to aggregate")
+        parser.add_argument('--json', dest='json_path', help="Also write the results to this JSON file")
+
+    def handle(self, *args, **options):
+        current = prompt_version()
+        sizes = prompt_sizes(ImmigrationProfileSchema(**SAMPLE_PROFILE))
+        self.stdout.write("Estimated prompt size for the sample profile (tokens):")
+        self.stdout.write(
+            f"  {'version':<28} {'builder':<7} {'variant':<8} {'system':>7} {'user':>6} {'prompt':>7} {'max out':>8}"
+        )
+        for size in sizes:
+            marker = '*' if size['version'] == current else ' '
+            self.stdout.write(
+                f"{marker} {size['version']:<28} {size['builder']:<7} {size['variant']:<8} {size['system_tokens']:>7} "
+                f"{size['user_tokens']:>6} {size['prompt_tokens']:>7} {size['max_tokens']:>8}"
+            )
+        self.stdout.write("  (* current; the system prompt is the cacheable static prefix)")
+
+        since = timezone.now() - timedelta(days=options['days'])
+        recorded = usage_summary('prompt_version', since)
+        self.stdout.write(f"\nRecorded usage over the last {options['days']} days (generated reports):")
+        if not recorded:
+            self.stdout.write("  No reports recorded")
+        else:
+            self.stdout.write(
+                f"  {'version':<28} {'reports':>7} {'avg prompt':>10} {'cached %':>8} {'avg total':>9} "
+                f"{'ttft ms':>8} {'upstream ms':>11}"
+            )
+        for group in recorded:
+            cached_share = group['cached_prompt_tokens'] / group['prompt_tokens'] if group['prompt_tokens'] else 0.0
+            self.stdout.write(
+                f"  {group['group'] or 'unknown':<28} {group['reports'] - group['cache_hits']:>7} "
+                f"{_number(group['avg_prompt_tokens']):>10} {cached_share * 100:>7.1f}% "
+                f"{_number(group['avg_total_tokens']):>9} {_number(group['avg_first_token_ms']):>8} "
+                f"{_number(group['avg_upstream_ms']):>11}"
+            )
+
+        if options['json_path']:
+            with open(options['json_path'], 'w', encoding='utf-8') as f:
+                json.dump({'current': current, 'sizes': sizes, 'since': since.isoformat(), 'recorded': recorded}, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['json_path']}"))
+
+
+def _number(value) -> str:
+    return '-' if value is None else f"{value:.0f}"
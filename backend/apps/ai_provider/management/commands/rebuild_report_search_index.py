@@ -0,0 +1,21 @@
+"""
+Rebuild the report full-text search index from the reports table.
+"""
+from django.core.management.base import BaseCommand
+
+from apps.ai_provider.search import rebuild_search_index, search_backend
+
+
+class Command(BaseCommand):
+    help = "Re-index every immigration report for full-text search (SQLite FTS5; PostgreSQL maintains its own index)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        backend = search_backend()
+        if backend != 'sqlite':
+            self.stdout.write(f"Search backend is '{backend}'; nothing to rebuild.")
+            return
+        count = rebuild_search_index(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} reports."))
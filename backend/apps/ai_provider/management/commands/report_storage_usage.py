@@ -0,0 +1,32 @@
+"""
+Summarize disk usage of stored report PDFs.
+"""
+import json
+
+from django.core.management.base import BaseCommand
+
+from apps.ai_provider.storage import storage_usage
+
+
+class Command(BaseCommand):
+    help = "Show report PDF storage usage: files, bytes, orphans and deduplication"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--json', action='store_true', help="Print the raw figures as JSON")
+
+    def handle(self, *args, **options):
+        usage = storage_usage()
+        if options['json']:
+            self.stdout.write(json.dumps(usage, indent=2))
+            return
+
+        megabytes = lambda size: f"{size / 1024 / 1024:.2f} MB"
+        self.stdout.write(f"Files:              {usage['files']} ({megabytes(usage['bytes'])})")
+        self.stdout.write(f"  content-addressed {usage['content_addressed_files']}")
+        self.stdout.write(f"  legacy (flat)     {usage['legacy_files']}")
+        self.stdout.write(f"  temporary         {usage['temporary_files']}")
+        self.stdout.write(f"Orphaned:           {usage['orphan_files']} ({megabytes(usage['orphan_bytes'])})")
+        self.stdout.write(f"Reports with a PDF: {usage['reports_with_pdf']}")
+        self.stdout.write(f"Distinct PDFs:      {usage['distinct_pdfs_referenced']}")
+        if usage['dedup_ratio'] is not None:
+            self.stdout.write(f"Reports per PDF:    {usage['dedup_ratio']:.2f}")
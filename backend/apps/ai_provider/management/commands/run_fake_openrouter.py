@@ -0,0 +1,86 @@
+"""
+Serve a local fake of the OpenRouter chat-completions API for load testing.
+"""
+from django.core.management.base import BaseCommand
+
+from apps.ai_provider.fake_openrouter import FakeOpenRouterConfig, make_server
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a fake OpenRouter chat-completions endpoint with configurable latency, token rate, "
+        "errors and empty responses. Point OPENROUTER_BASE_URL at http://HOST:PORT/v1/chat/completions."
+    )
+
+    def add_arguments(self, parser):
+        defaults = FakeOpenRouterConfig()
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8089)
+        parser.add_argument(
+            '--latency-ms',
+            type=float,
+            default=defaults.latency_ms,
+            help="Median time to first token",
+        )
+        parser.add_argument(
+            '--latency-distribution',
+            choices=['fixed', 'uniform', 'normal', 'lognormal'],
+            default=defaults.latency_distribution,
+        )
+        parser.add_argument(
+            '--latency-spread',
+            type=float,
+            default=defaults.latency_spread,
+            help="Width of the distribution: +/- fraction (uniform), stddev fraction (normal) or sigma (lognormal)",
+        )
+        parser.add_argument(
+            '--tokens-per-second',
+            type=float,
+            default=defaults.tokens_per_second,
+            help="Generation speed after the first token; 0 returns the whole report at once",
+        )
+        parser.add_argument(
+            '--prefill-tokens-per-second',
+            type=float,
+            default=defaults.prefill_tokens_per_second,
+            help="Prompt processing speed for uncached prompt tokens, added to the time to first token; 0 disables",
+        )
+        parser.add_argument('--report-tokens', type=int, default=defaults.report_tokens, help="Completion length")
+        parser.add_argument('--error-rate', type=float, default=defaults.error_rate, help="Fraction of requests that fail")
+        parser.add_argument('--error-status', type=int, default=defaults.error_status, help="Status code for injected errors")
+        parser.add_argument(
+            '--empty-rate',
+            type=float,
+            default=defaults.empty_rate,
+            help="Fraction of requests answered with empty content",
+        )
+        parser.add_argument(
+            '--fail-models',
+            default='',
+            help="Comma-separated models that always fail (to exercise the fallback chain)",
+        )
+
+    def handle(self, *args, **options):
+        config = FakeOpenRouterConfig(
+            latency_ms=options['latency_ms'],
+            latency_distribution=options['latency_distribution'],
+            latency_spread=options['latency_spread'],
+            tokens_per_second=options['tokens_per_second'],
+            prefill_tokens_per_second=options['prefill_tokens_per_second'],
+            report_tokens=options['report_tokens'],
+            error_rate=options['error_rate'],
+            error_status=options['error_status'],
+            empty_rate=options['empty_rate'],
+            failing_models=[model.strip() for model in options['fail_models'].split(',') if model.strip()],
+        )
+        server = make_server(options['host'], options['port'], config)
+        self.stdout.write(self.style.SUCCESS(
+            f"Fake OpenRouter listening on http://{options['host']}:{options['port']}/v1/chat/completions "
+            f"(stats at /stats). Press Ctrl+C to stop."
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            self.stdout.write(f"Stopping fake OpenRouter: {server.stats.snapshot()}")
+        finally:
+            server.server_close()
@@ -0,0 +1,47 @@
+"""
+Run the report job worker pool in a dedicated process.
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.ai_provider.jobs import ReportWorkerPool
+from apps.ai_provider.pdf_pool import get_pdf_pool
+
+
+class Command(BaseCommand):
+    help = "Process queued immigration report jobs (LLM call, PDF rendering and persistence)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=settings.REPORT_JOB_WORKERS,
+            help="Number of worker threads (default: REPORT_JOB_WORKERS)",
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=settings.REPORT_JOB_POLL_INTERVAL,
+            help="Seconds between queue polls when idle",
+        )
+
+    def handle(self, *args, **options):
+        pool = ReportWorkerPool(
+            size=options['workers'],
+            poll_interval=options['poll_interval'],
+        )
+        pool.start()
+        pdf_pool = get_pdf_pool()  # Start and warm the PDF renderers before the first job needs them
+        self.stdout.write(self.style.SUCCESS(
+            f"Report workers started ({options['workers']} threads). Press Ctrl+C to stop."
+        ))
+        try:
+            while pool.is_running:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping report workers (waiting for running jobs)...")
+            pool.stop()
+            if pdf_pool is not None:
+                pdf_pool.shutdown()
@@ -0,0 +1,232 @@
+"""
+Latency-aware model selection with a per-model circuit breaker.
+
+``OPENROUTER_MODELS`` is an ordered fallback chain. For every model we keep a
+rolling window of recent calls (latency, success, slow). A model whose calls
+keep failing, or fail or run slow too often within the window, has its
+circuit opened and is skipped for ``OPENROUTER_CIRCUIT_COOLDOWN`` seconds.
+After the cooldown a single trial call is let through (half-open): success
+closes the circuit again, failure re-opens it.
+
+Among the models that may be called, those with enough samples are tried in
+order of their recent p95 latency; models without enough history keep their
+configured order after them.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from typing import List, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+def _percentile(values: List[float], percentile: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(percentile / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+class ModelHealth:
+    """Rolling call statistics and circuit state for one model (guarded by the router's lock)"""
+
+    def __init__(self, model: str, window: int):
+        self.model = model
+        self.samples = deque(maxlen=window)  # (latency_ms, ok, slow)
+        self.state = CLOSED
+        self.open_until = 0.0
+        self.consecutive_failures = 0
+        self.trial_in_flight = False
+        self.calls = 0
+        self.failures = 0
+        self.times_opened = 0
+
+    def latencies(self) -> List[float]:
+        return [latency for latency, ok, _ in self.samples if ok]
+
+    def p95(self, min_samples: int) -> Optional[float]:
+        latencies = self.latencies()
+        if len(latencies) < min_samples:
+            return None
+        return _percentile(latencies, 95)
+
+    def failure_rate(self) -> Optional[float]:
+        if not self.samples:
+            return None
+        bad = sum(1 for _, ok, slow in self.samples if not ok or slow)
+        return bad / len(self.samples)
+
+
+class ModelRouter:
+    """
+    Chooses which model to call next and tracks how each call went.
+
+    Callers go through ``plan`` → ``begin`` → ``record_success`` /
+    ``record_failure`` / ``cancel`` for every attempt.
+    """
+
+    def __init__(
+        self,
+        models: List[str],
+        window: int = 50,
+        min_samples: int = 5,
+        failure_threshold: int = 3,
+        error_rate: float = 0.5,
+        cooldown: float = 30.0,
+        slow_call_ms: float = 45000.0,
+        route_by_latency: bool = True,
+    ):
+        self.models = list(models)
+        self.min_samples = min_samples
+        self.failure_threshold = failure_threshold
+        self.error_rate = error_rate
+        self.cooldown = cooldown
+        self.slow_call_ms = slow_call_ms
+        self.route_by_latency = route_by_latency
+        self._health = {model: ModelHealth(model, window) for model in self.models}
+        self._lock = threading.Lock()
+
+    def plan(self) -> List[str]:
+        """Models worth trying for the next request, best first (open circuits are left out)"""
+        now = time.monotonic()
+        with self._lock:
+            available = [
+                model for model in self.models
+                if self._health[model].state == CLOSED
+                or (self._health[model].state == OPEN and now >= self._health[model].open_until)
+                or (self._health[model].state == HALF_OPEN and not self._health[model].trial_in_flight)
+            ]
+            if not self.route_by_latency:
+                return available
+            measured = [model for model in available if self._health[model].p95(self.min_samples) is not None]
+            measured.sort(key=lambda model: self._health[model].p95(self.min_samples))
+            return measured + [model for model in available if model not in measured]
+
+    def begin(self, model: str) -> bool:
+        """
+        Claim an attempt on a model.
+
+        Returns:
+            False if the model's circuit is open, or its half-open trial is already taken
+        """
+        now = time.monotonic()
+        with self._lock:
+            health = self._health[model]
+            if health.state == OPEN:
+                if now < health.open_until:
+                    return False
+                health.state = HALF_OPEN
+            if health.state == HALF_OPEN:
+                if health.trial_in_flight:
+                    return False
+                health.trial_in_flight = True
+            health.calls += 1
+            return True
+
+    def record_success(self, model: str, latency_ms: float) -> None:
+        with self._lock:
+            health = self._health[model]
+            health.samples.append((latency_ms, True, latency_ms >= self.slow_call_ms))
+            health.consecutive_failures = 0
+            if health.state == HALF_OPEN:
+                health.state = CLOSED
+                health.trial_in_flight = False
+                logger.info("Model recovered, circuit closed model=%s", model)
+            else:
+                self._maybe_open(health)
+
+    def record_failure(self, model: str, latency_ms: float) -> None:
+        with self._lock:
+            health = self._health[model]
+            health.samples.append((latency_ms, False, False))
+            health.failures += 1
+            health.consecutive_failures += 1
+            if health.state == HALF_OPEN:
+                health.trial_in_flight = False
+                self._open(health)
+            else:
+                self._maybe_open(health)
+
+    def cancel(self, model: str) -> None:
+        """End an attempt that says nothing about the model's health (e.g. client disconnect, bad API key)"""
+        with self._lock:
+            health = self._health[model]
+            health.calls -= 1
+            if health.state == HALF_OPEN:
+                health.trial_in_flight = False
+
+    def _maybe_open(self, health: ModelHealth) -> None:
+        if health.state != CLOSED:
+            return
+        if health.consecutive_failures >= self.failure_threshold:
+            self._open(health)
+            return
+        if len(health.samples) >= self.min_samples and health.failure_rate() >= self.error_rate:
+            self._open(health)
+
+    def _open(self, health: ModelHealth) -> None:
+        health.state = OPEN
+        health.open_until = time.monotonic() + self.cooldown
+        health.times_opened += 1
+        logger.warning(
+            "Model circuit opened model=%s cooldown_s=%.0f consecutive_failures=%d failure_rate=%.2f",
+            health.model,
+            self.cooldown,
+            health.consecutive_failures,
+            health.failure_rate() or 0,
+        )
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            models = {}
+            for model in self.models:
+                health = self._health[model]
+                latencies = health.latencies()
+                failure_rate = health.failure_rate()
+                models[model] = {
+                    'state': health.state,
+                    'open_for_seconds': max(health.open_until - now, 0.0) if health.state == OPEN else 0.0,
+                    'calls': health.calls,
+                    'failures': health.failures,
+                    'times_opened': health.times_opened,
+                    'window_samples': len(health.samples),
+                    'failure_rate': failure_rate,
+                    'p50_ms': _percentile(latencies, 50),
+                    'p95_ms': _percentile(latencies, 95),
+                }
+        return {
+            'route_by_latency': self.route_by_latency,
+            'models': models,
+        }
+
+
+_router = None
+_router_lock = threading.Lock()
+
+
+def get_model_router() -> ModelRouter:
+    """Return the process-wide model router, created on first use"""
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = ModelRouter(
+                    settings.OPENROUTER_MODELS,
+                    window=settings.OPENROUTER_HEALTH_WINDOW,
+                    min_samples=settings.OPENROUTER_HEALTH_MIN_SAMPLES,
+                    failure_threshold=settings.OPENROUTER_CIRCUIT_FAILURES,
+                    error_rate=settings.OPENROUTER_CIRCUIT_ERROR_RATE,
+                    cooldown=settings.OPENROUTER_CIRCUIT_COOLDOWN,
+                    slow_call_ms=settings.OPENROUTER_SLOW_CALL_MS,
+                    route_by_latency=settings.OPENROUTER_ROUTE_BY_LATENCY,
+                )
+    return _router
@@ -0,0 +1,95 @@
+"""
+Keyset (cursor) pagination for report listings.
+
+Reports are listed newest first on ``(created_at, id)``; the cursor encodes
+the last row of a page, and the next page is the rows strictly after it in
+that order. Unlike OFFSET, every page is a single index range scan (see the
+``ImmigrationReport`` indexes), so deep pages cost the same as the first.
+Only the columns the list schema needs are loaded; the large text fields
+(Markdown, HTML, profile JSON) are never read.
+"""
+import base64
+import json
+import uuid
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from django.db.models import Q, QuerySet
+from ninja.errors import HttpError
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Columns read for ImmigrationReportListSchema
+REPORT_LIST_FIELDS = ('id', 'user_name', 'user_email', 'pathway_goal', 'pdf_url', 'ai_model_used', 'created_at')
+
+
+def encode_cursor(created_at: datetime, report_id: uuid.UUID) -> str:
+    raw = json.dumps([created_at.isoformat(), report_id.hex], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    """
+    Raises:
+        HttpError: 400 if the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, report_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), uuid.UUID(report_id)
+    except (ValueError, TypeError):
+        raise HttpError(400, "Invalid cursor")
+
+
+def encode_offset_cursor(offset: int) -> str:
+    """Cursor for result sets ordered by relevance (search), where keyset paging does not apply"""
+    return base64.urlsafe_b64encode(json.dumps({'offset': offset}).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_offset_cursor(cursor: Optional[str]) -> int:
+    """
+    Raises:
+        HttpError: 400 if the cursor is malformed
+    """
+    if not cursor:
+        return 0
+    try:
+        offset = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))['offset']
+    except (ValueError, TypeError, KeyError):
+        raise HttpError(400, "Invalid cursor")
+    if not isinstance(offset, int) or offset < 0:
+        raise HttpError(400, "Invalid cursor")
+    return offset
+
+
+def paginate_reports(queryset: QuerySet, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE) -> Tuple[List, Optional[str]]:
+    """
+    One page of reports, newest first.
+
+    Args:
+        queryset: Reports to list (already filtered)
+        cursor: ``next_cursor`` from the previous page, or None for the first page
+        limit: Page size, 1 to ``MAX_PAGE_SIZE``
+
+    Returns:
+        ``(reports, next_cursor)``; ``next_cursor`` is None on the last page
+
+    Raises:
+        HttpError: 400 for a bad cursor or page size
+    """
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise HttpError(400, f"limit must be between 1 and {MAX_PAGE_SIZE}")
+
+    queryset = queryset.only(*REPORT_LIST_FIELDS).order_by('-created_at', '-id')
+    if cursor:
+        created_at, report_id = decode_cursor(cursor)
+        queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=report_id))
+
+    # One extra row tells whether another page exists
+    reports = list(queryset[:limit + 1])
+    if len(reports) <= limit:
+        return reports, None
+    reports = reports[:limit]
+    last = reports[-1]
+    return reports, encode_cursor(last.created_at, last.id)
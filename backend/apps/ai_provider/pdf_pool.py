@@ -0,0 +1,458 @@
+"""
+Pool of isolated, supervised processes for rendering report PDFs.
+
+WeasyPrint is CPU-bound and holds the GIL, and the first render in a fresh
+process pays for importing it and loading fonts. Rendering in a pool of
+pre-warmed worker processes keeps that work off the API threads and lets PDF
+bursts use every core.
+
+Each worker is a separate process the pool supervises directly, one render at
+a time, so a pathological document can never wedge it: a render that runs past
+the wall-clock timeout or grows the worker's RSS past ``PDF_RENDER_MEMORY_LIMIT_MB``
+gets its worker killed and replaced, and a worker that dies (OOM killer,
+segfault in a native library) is replaced too. Workers are also recycled after
+``PDF_RENDER_MAX_RENDERS`` renders to shed slow leaks. All of these come back
+to the caller as ``PDFRenderError`` with a ``reason``.
+
+Workers are started with the ``spawn`` method so they never inherit the web
+process's threads or database connections; they only import the rendering
+code, not Django settings.
+
+Server processes start and warm the pool in the background as they load
+(``warm_pdf_pool`` from ``config/wsgi.py`` and ``config/asgi.py``, with
+``PDF_RENDER_POOL_WARM_ON_STARTUP``), so the first report after a restart
+does not pay for spawning the workers.
+"""
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import tempfile
+import threading
+import time
+from typing import Optional
+
+from django.conf import settings
+
+from apps.ai_provider.instrumentation import StageTimer, current_timer
+from apps.ai_provider.pdf_styles import DEFAULT_THEME, ensure_theme, theme_sources
+from apps.ai_provider.utils import html_to_pdf, markdown_to_pdf
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+WARMUP_MARKDOWN = "# Warm-up\n\nPre-loading **fonts** and styles.\n\n| A | B |\n|---|---|\n| 1 | 2 |\n"
+
+# How often a waiting caller checks the worker's health (seconds)
+SUPERVISE_INTERVAL = 0.1
+
+try:
+    PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+except (AttributeError, ValueError, OSError):
+    PAGE_SIZE = 4096
+
+
+class PDFRenderError(Exception):
+    """
+    A render the pool could not complete.
+
+    ``reason`` is ``timeout`` (killed at the wall-clock limit, or no worker
+    became free in time), ``memory`` (killed at the RSS limit), ``crashed``
+    (the worker process died) or ``error`` (the renderer raised).
+    """
+
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+
+
+def _warm_renderer() -> None:
+    """Import WeasyPrint and render once so fonts are loaded"""
+    fd, path = tempfile.mkstemp(suffix='.pdf')
+    os.close(fd)
+    try:
+        markdown_to_pdf(WARMUP_MARKDOWN, path)
+    except Exception as e:
+        logger.warning("PDF worker warm-up render failed pid=%s error=%s", os.getpid(), str(e))
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _render_job(html_content: str, output_path: Optional[str], theme: str = DEFAULT_THEME, css_sources=None):
+    """
+    Runs in a worker process. ``css_sources`` is the theme's CSS as registered
+    in the parent, which this process may not have.
+
+    Returns:
+        ``(output_path_or_bytes, render_ms, stage_timings)``
+    """
+    if css_sources is not None:
+        ensure_theme(theme, css_sources)
+    timer = StageTimer()
+    with timer.activate():
+        if output_path:
+            html_to_pdf(html_content, output_path, theme)
+            return output_path, timer.total_ms, timer.timings
+
+        fd, path = tempfile.mkstemp(suffix='.pdf')
+        os.close(fd)
+        try:
+            html_to_pdf(html_content, path, theme)
+            with open(path, 'rb') as pdf_file:
+                data = pdf_file.read()
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+        return data, timer.total_ms, timer.timings
+
+
+def _worker_main(conn) -> None:
+    """Worker process loop: render jobs from ``conn`` until told to stop (``None``) or the pipe closes"""
+    # Ctrl+C goes to the whole process group; the parent decides when workers stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if resource is not None:
+        # No core dumps from a crashing native renderer
+        resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+    _warm_renderer()
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+        try:
+            conn.send(('ok', _render_job(*job)))
+        except Exception as e:
+            conn.send(('error', f"{type(e).__name__}: {e}"))
+
+
+class _RenderWorker:
+    """One renderer process and the parent's end of its pipe"""
+
+    def __init__(self, context):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.renders = 0
+
+    @property
+    def pid(self) -> int:
+        return self.process.pid
+
+    def rss_mb(self) -> Optional[float]:
+        """Resident memory of the worker, where ``/proc`` is available"""
+        try:
+            with open(f'/proc/{self.pid}/statm') as statm:
+                return int(statm.read().split()[1]) * PAGE_SIZE / (1024 * 1024)
+        except (OSError, IndexError, ValueError):
+            return None
+
+    def stop(self) -> None:
+        """Ask the worker to exit after its current job"""
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.conn.close()
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.join(timeout=5)
+        self.conn.close()
+
+
+class PDFRenderPool:
+    """
+    Bounded pool of pre-warmed, supervised WeasyPrint worker processes.
+
+    Args:
+        workers: Number of renderer processes
+        timeout: Seconds a caller waits for a render, queueing included; the
+            worker is killed when it is exceeded
+        memory_limit_mb: RSS above which a rendering worker is killed (0 disables)
+        max_renders: Renders after which a worker is replaced (0 disables)
+    """
+
+    def __init__(self, workers: int, timeout: float, memory_limit_mb: float = 0, max_renders: int = 0):
+        self.workers = workers
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+        self.max_renders = max_renders
+        self._context = multiprocessing.get_context('spawn')
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._spawned = 0
+        self._closed = False
+        self._stats_lock = threading.Lock()
+        self._in_flight = 0
+        self._stats = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'timeouts': 0,
+            'memory_kills': 0,
+            'crashes': 0,
+            'restarts': 0,
+            'render_ms_total': 0.0,
+            'queue_ms_total': 0.0,
+            'max_queue_depth': 0,
+        }
+
+    def _spawn(self) -> Optional[_RenderWorker]:
+        """Start a worker if the pool is below size, counting it against the pool"""
+        with self._lock:
+            if self._closed or self._spawned >= self.workers:
+                return None
+            self._spawned += 1
+        try:
+            return _RenderWorker(self._context)
+        except Exception:
+            with self._lock:
+                self._spawned -= 1
+            raise
+
+    def _acquire(self, deadline: float) -> _RenderWorker:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        worker = self._spawn()
+        if worker is not None:
+            return worker
+        try:
+            return self._idle.get(timeout=max(deadline - time.monotonic(), 0))
+        except queue.Empty:
+            raise PDFRenderError('timeout', f"No PDF renderer became free within {self.timeout:.0f}s")
+
+    def _release(self, worker: _RenderWorker) -> None:
+        if self._closed:
+            worker.stop()
+            return
+        self._idle.put(worker)
+
+    def _replace(self, worker: _RenderWorker, kill: bool = True) -> None:
+        """Retire a worker and start a fresh one in its place"""
+        if kill:
+            worker.kill()
+        else:
+            worker.stop()
+        with self._lock:
+            self._spawned -= 1
+        with self._stats_lock:
+            self._stats['restarts'] += 1
+        try:
+            replacement = self._spawn()
+        except Exception:
+            logger.exception("Failed to restart a PDF renderer; it will be started on demand")
+            return
+        if replacement is not None:
+            self._release(replacement)
+
+    def warm(self) -> None:
+        """Start every worker now instead of on the first renders"""
+        while True:
+            worker = self._spawn()
+            if worker is None:
+                return
+            self._release(worker)
+
+    def render(self, html_content: str, output_path: Optional[str] = None, theme: str = DEFAULT_THEME):
+        """
+        Render report HTML to PDF in a worker process.
+
+        Args:
+            html_content: Sanitized report HTML (see ``report_html.get_report_html``)
+            output_path: Where to write the PDF; when omitted the PDF bytes are returned
+            theme: Name of a stylesheet theme registered in ``pdf_styles`` in this process
+
+        Returns:
+            ``output_path`` or the PDF bytes
+
+        Raises:
+            PDFRenderError: If rendering fails, is killed or exceeds the timeout
+        """
+        # Raises KeyError for an unknown theme before a worker is tied up
+        job = (html_content, output_path, theme, theme_sources(theme))
+        with self._stats_lock:
+            self._in_flight += 1
+            self._stats['submitted'] += 1
+            queue_depth = max(self._in_flight - self.workers, 0)
+            self._stats['max_queue_depth'] = max(self._stats['max_queue_depth'], queue_depth)
+
+        start = time.perf_counter()
+        deadline = time.monotonic() + self.timeout
+        try:
+            worker = self._acquire(deadline)
+        except PDFRenderError:
+            self._finish('timeouts')
+            raise
+        except Exception as e:
+            self._finish('failed')
+            raise PDFRenderError('crashed', f"Could not start a PDF renderer: {e}") from e
+
+        try:
+            result, render_ms, stage_timings = self._run(worker, job, deadline)
+        except PDFRenderError as e:
+            self._finish({'timeout': 'timeouts', 'memory': 'memory_kills', 'crashed': 'crashes'}.get(e.reason, 'failed'))
+            raise
+
+        total_ms = (time.perf_counter() - start) * 1000
+        timer = current_timer()
+        if timer is not None:
+            # Stages timed inside the worker process
+            timer.merge(stage_timings)
+        self._finish('completed', render_ms=render_ms, queue_ms=max(total_ms - render_ms, 0.0))
+        return result
+
+    def _run(self, worker: _RenderWorker, job: tuple, deadline: float):
+        """Send one job to ``worker`` and supervise it until it answers, then hand the worker back"""
+        try:
+            worker.conn.send(job)
+            while not worker.conn.poll(SUPERVISE_INTERVAL):
+                if not worker.process.is_alive():
+                    raise PDFRenderError('crashed', f"PDF renderer exited with code {worker.process.exitcode}")
+                if time.monotonic() >= deadline:
+                    raise PDFRenderError('timeout', f"PDF rendering timed out after {self.timeout:.0f}s")
+                rss_mb = worker.rss_mb() if self.memory_limit_mb else None
+                if rss_mb is not None and rss_mb > self.memory_limit_mb:
+                    raise PDFRenderError(
+                        'memory', f"PDF rendering used {rss_mb:.0f} MB, over the {self.memory_limit_mb:.0f} MB limit"
+                    )
+            status, payload = worker.conn.recv()
+        except PDFRenderError as e:
+            logger.warning("Killing PDF renderer pid=%s reason=%s", worker.pid, e.reason)
+            self._replace(worker)
+            raise
+        except (EOFError, OSError) as e:
+            # The worker died while answering (the pipe closed before the result arrived)
+            worker.process.join(timeout=1)
+            exitcode = worker.process.exitcode
+            self._replace(worker)
+            raise PDFRenderError('crashed', f"PDF renderer exited with code {exitcode}") from e
+
+        worker.renders += 1
+        if self.max_renders and worker.renders >= self.max_renders:
+            self._replace(worker, kill=False)
+        else:
+            self._release(worker)
+        if status != 'ok':
+            raise PDFRenderError('error', payload)
+        return payload
+
+    def _finish(self, outcome: str, render_ms: float = 0.0, queue_ms: float = 0.0) -> None:
+        with self._stats_lock:
+            self._in_flight -= 1
+            self._stats[outcome] += 1
+            self._stats['render_ms_total'] += render_ms
+            self._stats['queue_ms_total'] += queue_ms
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+            in_flight = self._in_flight
+        completed = stats['completed'] or 1
+        return {
+            'workers': self.workers,
+            'timeout': self.timeout,
+            'memory_limit_mb': self.memory_limit_mb,
+            'in_flight': in_flight,
+            'queue_depth': max(in_flight - self.workers, 0),
+            'max_queue_depth': stats['max_queue_depth'],
+            'submitted': stats['submitted'],
+            'completed': stats['completed'],
+            'failed': stats['failed'],
+            'timeouts': stats['timeouts'],
+            'memory_kills': stats['memory_kills'],
+            'crashes': stats['crashes'],
+            'restarts': stats['restarts'],
+            'avg_render_ms': stats['render_ms_total'] / completed,
+            'avg_queue_ms': stats['queue_ms_total'] / completed,
+        }
+
+    def shutdown(self) -> None:
+        """Stop the idle workers; busy ones stop when their render finishes"""
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            worker.stop()
+            worker.process.join(timeout=5)
+            if worker.process.is_alive():
+                worker.kill()
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def get_pdf_pool() -> Optional[PDFRenderPool]:
+    """Return the process-wide PDF pool (started and warmed on first use), or None when disabled"""
+    global _pool, _pool_pid
+    if not settings.PDF_RENDER_POOL:
+        return None
+    if _pool is None or _pool_pid != os.getpid():
+        with _pool_lock:
+            # A pool inherited through fork (e.g. gunicorn --preload) has no workers this process can talk to
+            if _pool is None or _pool_pid != os.getpid():
+                _pool_pid = os.getpid()
+                _pool = PDFRenderPool(
+                    workers=settings.PDF_RENDER_WORKERS,
+                    timeout=settings.PDF_RENDER_TIMEOUT,
+                    memory_limit_mb=settings.PDF_RENDER_MEMORY_LIMIT_MB,
+                    max_renders=settings.PDF_RENDER_MAX_RENDERS,
+                )
+                _pool.warm()
+    return _pool
+
+
+def warm_pdf_pool() -> None:
+    """Start and warm the pool in a background thread, for server processes at startup"""
+    if not (settings.PDF_RENDER_POOL and settings.PDF_RENDER_POOL_WARM_ON_STARTUP):
+        return
+
+    def warm():
+        try:
+            get_pdf_pool()
+        except Exception:
+            logger.exception("PDF pool warm-up failed; renderers will start on demand")
+
+    threading.Thread(target=warm, name='pdf-pool-warmup', daemon=True).start()
+
+
+def render_pdf(html_content: str, output_path: Optional[str] = None, theme: str = DEFAULT_THEME):
+    """
+    Render report HTML to PDF through the pool, or inline (without isolation
+    or limits) when the pool is disabled, with a theme registered in ``pdf_styles``.
+
+    Returns:
+        ``output_path`` or the PDF bytes when no path is given
+    """
+    pool = get_pdf_pool()
+    if pool is not None:
+        return pool.render(html_content, output_path, theme)
+    if output_path:
+        return html_to_pdf(html_content, output_path, theme)
+    fd, path = tempfile.mkstemp(suffix='.pdf')
+    os.close(fd)
+    try:
+        html_to_pdf(html_content, path, theme)
+        with open(path, 'rb') as pdf_file:
+            return pdf_file.read()
+    finally:
+        os.remove(path)
+
+
+def pdf_pool_stats() -> Optional[dict]:
+    return _pool.stats() if _pool is not None else None
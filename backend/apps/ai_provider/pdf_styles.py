@@ -0,0 +1,255 @@
+"""
+Compiled stylesheets for report PDFs.
+
+Report CSS is parsed into WeasyPrint ``CSS`` objects once per process and
+reused for every render, together with a shared ``FontConfiguration``, so a
+render only has to parse the report body. Additional looks can be added with
+``register_theme``.
+
+Themes live in the process that registers them. The PDF pool's workers are
+separate processes, so the pool sends a theme's CSS along with each render
+(``theme_sources``), and the worker registers it on first use.
+"""
+import threading
+from typing import List
+
+from weasyprint import CSS
+from weasyprint.text.fonts import FontConfiguration
+
+DEFAULT_THEME = 'default'
+FALLBACK_THEME = 'fallback'
+
+REPORT_CSS = """
+@page {
+    size: A4;
+    margin: 2cm;
+}
+
+body {
+    font-family: Helvetica, Arial, sans-serif;
+    font-size: 11pt;
+    line-height: 1.6;
+    color: #333333;
+}
+
+h1 {
+    font-size: 24pt;
+    font-weight: bold;
+    color: #1a1a1a;
+    margin-top: 20pt;
+    margin-bottom: 12pt;
+    border-bottom: 2px solid #2c5aa0;
+    padding-bottom: 8pt;
+}
+
+h2 {
+    font-size: 18pt;
+    font-weight: bold;
+    color: #2c5aa0;
+    margin-top: 16pt;
+    margin-bottom: 10pt;
+    border-bottom: 1px solid #e0e0e0;
+    padding-bottom: 6pt;
+}
+
+h3 {
+    font-size: 14pt;
+    font-weight: bold;
+    color: #444444;
+    margin-top: 12pt;
+    margin-bottom: 8pt;
+}
+
+h4 {
+    font-size: 12pt;
+    font-weight: bold;
+    color: #555555;
+    margin-top: 10pt;
+    margin-bottom: 6pt;
+}
+
+p {
+    margin-top: 8pt;
+    margin-bottom: 8pt;
+}
+
+ul, ol {
+    margin-top: 8pt;
+    margin-bottom: 8pt;
+    padding-left: 24pt;
+}
+
+li {
+    margin-top: 4pt;
+    margin-bottom: 4pt;
+}
+
+table {
+    width: 100%;
+    border-collapse: collapse;
+    margin-top: 12pt;
+    margin-bottom: 12pt;
+    font-size: 10pt;
+}
+
+th {
+    background-color: #2c5aa0;
+    color: white;
+    font-weight: bold;
+    padding: 8pt;
+    text-align: left;
+    border: 1px solid #1a4a7a;
+}
+
+td {
+    padding: 6pt 8pt;
+    border: 1px solid #dddddd;
+}
+
+tr:nth-child(even) {
+    background-color: #f9f9f9;
+}
+
+blockquote {
+    border-left: 4px solid #2c5aa0;
+    padding-left: 12pt;
+    margin-left: 0;
+    margin-top: 8pt;
+    margin-bottom: 8pt;
+    color: #555555;
+    font-style: italic;
+}
+
+code {
+    background-color: #f4f4f4;
+    padding: 2pt 4pt;
+    font-family: 'Courier New', monospace;
+    font-size: 10pt;
+}
+
+pre {
+    background-color: #f4f4f4;
+    padding: 8pt;
+    margin-top: 8pt;
+    margin-bottom: 8pt;
+}
+
+pre code {
+    background-color: transparent;
+    padding: 0;
+}
+
+hr {
+    border: none;
+    border-top: 1px solid #dddddd;
+    margin: 16pt 0;
+}
+
+strong {
+    font-weight: bold;
+    color: #1a1a1a;
+}
+
+em {
+    font-style: italic;
+}
+
+h1, h2 {
+    page-break-after: avoid;
+}
+
+table {
+    page-break-inside: avoid;
+}
+"""
+
+# Simpler rules used when rendering with the full stylesheet fails
+FALLBACK_CSS = """
+@page { size: A4; margin: 2cm; }
+body { font-family: Helvetica, Arial, sans-serif; font-size: 11pt; line-height: 1.6; }
+h1 { font-size: 24pt; font-weight: bold; margin: 20pt 0 12pt 0; border-bottom: 2px solid #2c5aa0; padding-bottom: 8pt; }
+h2 { font-size: 18pt; font-weight: bold; color: #2c5aa0; margin: 16pt 0 10pt 0; border-bottom: 1px solid #e0e0e0; padding-bottom: 6pt; }
+h3 { font-size: 14pt; font-weight: bold; margin: 12pt 0 8pt 0; }
+p { margin: 8pt 0; }
+ul, ol { margin: 8pt 0; padding-left: 24pt; }
+table { width: 100%; border-collapse: collapse; margin: 12pt 0; }
+th { background-color: #2c5aa0; color: white; padding: 8pt; border: 1px solid #1a4a7a; }
+td { padding: 6pt 8pt; border: 1px solid #dddddd; }
+tr:nth-child(even) { background-color: #f9f9f9; }
+"""
+
+_themes = {
+    DEFAULT_THEME: [REPORT_CSS],
+    FALLBACK_THEME: [FALLBACK_CSS],
+}
+_compiled = {}
+_font_config = None
+_lock = threading.Lock()
+
+
+def get_font_config() -> FontConfiguration:
+    """The process-wide font configuration shared by all stylesheets and renders"""
+    global _font_config
+    if _font_config is None:
+        with _lock:
+            if _font_config is None:
+                _font_config = FontConfiguration()
+    return _font_config
+
+
+def register_theme(name: str, *css_sources: str) -> None:
+    """
+    Register (or replace) a named theme.
+
+    Args:
+        name: Theme name passed to ``markdown_to_pdf``
+        css_sources: CSS strings applied in order; later sources override earlier ones,
+            e.g. ``register_theme('branded', REPORT_CSS, BRAND_OVERRIDES)``
+    """
+    with _lock:
+        _themes[name] = list(css_sources)
+        _compiled.pop(name, None)
+
+
+def theme_sources(name: str) -> List[str]:
+    """
+    The CSS sources a theme was registered with.
+
+    Raises:
+        KeyError: If the theme is not registered
+    """
+    with _lock:
+        return list(_themes[name])
+
+
+def ensure_theme(name: str, css_sources: List[str]) -> None:
+    """Register a theme sent from another process, unless it is already registered with the same CSS"""
+    with _lock:
+        if _themes.get(name) == css_sources:
+            return
+    register_theme(name, *css_sources)
+
+
+def get_stylesheets(theme: str = DEFAULT_THEME) -> List[CSS]:
+    """
+    The compiled stylesheets for a theme, parsed on first use.
+
+    Raises:
+        KeyError: If the theme is not registered
+    """
+    stylesheets = _compiled.get(theme)
+    if stylesheets is not None:
+        return stylesheets
+
+    font_config = get_font_config()
+    with _lock:
+        stylesheets = _compiled.get(theme)
+        if stylesheets is None:
+            stylesheets = [CSS(string=source, font_config=font_config) for source in _themes[theme]]
+            _compiled[theme] = stylesheets
+    return stylesheets
+
+
+def available_themes() -> List[str]:
+    with _lock:
+        return sorted(_themes)
@@ -0,0 +1,83 @@
+"""
+Building report profiles from stored pathway advisor submissions.
+"""
+from datetime import date
+from typing import Optional
+
+from django.utils import timezone
+
+from apps.ai_provider.schemas import ImmigrationProfileSchema
+from apps.core.models import PathwayAdvisorSubmission
+
+# Pathway advisor goal ids (src/utils/pathwayAdvisorData.ts) to the report's goal path
+PATHWAY_GOAL_PATHS = {
+    'study': 'Study Visa',
+    'work': 'Work Permit',
+    'pr': 'Express Entry',
+    'quebec': 'Quebec PR',
+    'citizenship': 'Citizenship',
+    'all': 'All pathways',
+}
+FRENCH_TESTS = ('TEF', 'TCF')
+
+
+def _age(birth_date: Optional[date], on: date) -> Optional[int]:
+    if not birth_date:
+        return None
+    return on.year - birth_date.year - ((on.month, on.day) < (birth_date.month, birth_date.day))
+
+
+def _test_scores(test: dict) -> str:
+    scores = ' '.join(
+        f"{label}{test[band]}"
+        for label, band in (('L', 'listening'), ('R', 'reading'), ('W', 'writing'), ('S', 'speaking'))
+        if test.get(band) is not None
+    )
+    if test.get('overall'):
+        scores = f"{scores} (overall {test['overall']})".strip()
+    return scores
+
+
+def profile_from_submission(submission: PathwayAdvisorSubmission) -> ImmigrationProfileSchema:
+    """
+    Map a pathway advisor submission onto the report generation profile.
+    Age is taken as of the submission date, so the profile (and its report cache
+    key) stays the same from one day to the next.
+    """
+    english = [test for test in submission.language_tests or [] if not str(test.get('type', '')).startswith(FRENCH_TESTS)]
+    french = [test for test in submission.language_tests or [] if str(test.get('type', '')).startswith(FRENCH_TESTS)]
+
+    notes = []
+    if submission.has_job_offer:
+        notes.append("Has a Canadian job offer.")
+    if submission.has_canadian_experience:
+        notes.append("Has Canadian work experience.")
+    if submission.has_police_record:
+        notes.append("Has a police record.")
+    if submission.pathway_specific_data:
+        details = '; '.join(f"{key}: {value}" for key, value in submission.pathway_specific_data.items() if value not in (None, '', []))
+        if details:
+            notes.append(f"Pathway details: {details}.")
+
+    submitted_on = timezone.localdate(submission.created_at) if submission.created_at else timezone.localdate()
+
+    return ImmigrationProfileSchema(
+        user_name=submission.user_name,
+        user_email=submission.user_email,
+        user_phone=submission.user_phone,
+        path=PATHWAY_GOAL_PATHS.get(submission.pathway_goal or '', submission.pathway_goal or 'Not specified'),
+        age=_age(submission.birth_date, submitted_on),
+        marital_status=submission.marital_status,
+        citizenship=submission.citizenship_country,
+        residence_country=submission.residence_country,
+        highest_degree=submission.education_level,
+        field_of_study=submission.field_of_study,
+        english_test=', '.join(str(test.get('type')) for test in english) or None,
+        english_scores='; '.join(_test_scores(test) for test in english) or None,
+        french_test=', '.join(str(test.get('type')) for test in french) or None,
+        french_scores='; '.join(_test_scores(test) for test in french) or None,
+        foreign_experience_years=int(submission.work_experience_years or 0),
+        funds=f"{submission.available_funds:.0f} CAD" if submission.available_funds else None,
+        relative_in_canada='Yes' if submission.has_canadian_relative else 'No',
+        user_notes=' '.join(notes) or None,
+    )
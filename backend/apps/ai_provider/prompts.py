@@ -0,0 +1,454 @@
+"""
+Prompt templates for AI-generated immigration reports
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from apps.ai_provider.report_sections import analyze_profile, narrative_facts
+from apps.ai_provider.schemas import ImmigrationProfileSchema
+
+# Bump whenever SYSTEM_PROMPT or build_user_prompt changes so cached reports
+# generated from the old prompt are no longer reused
+PROMPT_VERSION = "2025-11-v1"
+# Same for NARRATIVE_SYSTEM_PROMPT, build_narrative_prompt and the server-built
+# sections (apps/ai_provider/report_sections.py) of hybrid reports
+NARRATIVE_PROMPT_VERSION = "2026-10-hybrid-v2"
+# Same for the compact variants (REPORT_PROMPT_VARIANT = 'compact')
+COMPACT_PROMPT_VERSION = "2026-10-compact-v1"
+COMPACT_NARRATIVE_PROMPT_VERSION = "2026-10-hybrid-compact-v2"
+
+# (REPORT_BUILDER, REPORT_PROMPT_VARIANT) -> prompt version
+PROMPT_VERSIONS = {
+    ('llm', 'full'): PROMPT_VERSION,
+    ('llm', 'compact'): COMPACT_PROMPT_VERSION,
+    ('hybrid', 'full'): NARRATIVE_PROMPT_VERSION,
+    ('hybrid', 'compact'): COMPACT_NARRATIVE_PROMPT_VERSION,
+}
+
+# Completion budget of a full-LLM report
+REPORT_MAX_TOKENS = 2000
+
+
+def prompt_version(builder: Optional[str] = None, variant: Optional[str] = None) -> str:
+    """Version of the prompt (and builder) reports are generated with; the configured one by default"""
+    return PROMPT_VERSIONS[(builder or settings.REPORT_BUILDER, variant or settings.REPORT_PROMPT_VARIANT)]
+
+
+def check_prompt_settings() -> None:
+    """Fail at startup, not on every report request, when REPORT_BUILDER or REPORT_PROMPT_VARIANT is unknown"""
+    builders = sorted({builder for builder, _ in PROMPT_VERSIONS})
+    variants = sorted({variant for _, variant in PROMPT_VERSIONS})
+    if settings.REPORT_BUILDER not in builders:
+        raise ImproperlyConfigured(f"REPORT_BUILDER must be one of {', '.join(builders)}, not {settings.REPORT_BUILDER!r}")
+    if settings.REPORT_PROMPT_VARIANT not in variants:
+        raise ImproperlyConfigured(
+            f"REPORT_PROMPT_VARIANT must be one of {', '.join(variants)}, not {settings.REPORT_PROMPT_VARIANT!r}"
+        )
+
+# System Prompt Template
+SYSTEM_PROMPT = """You are a **senior Canadian Immigration Consultant (RCIC)** with 15+ years of experience. You write **direct, actionable, expert-level reports** that get straight to the point. No fluff, no generic praise, no filler—only useful, specific information.
+
+**CRITICAL RULES:**
+- **NEVER use placeholder language** like "scores to be confirmed" or "appears to be placeholder data"—work with the data provided
+- **NO generic praise** ("excellent position", "significant achievement")—be factual and specific
+- **NO repetition**—each sentence must add new value
+- **Be direct and actionable**—tell them exactly what to do, when, and why
+- **Focus on specifics**—use actual numbers, dates, and concrete steps
+- **ALWAYS generate complete content**—never return empty responses
+
+---
+
+### 🧾 OUTPUT STRUCTURE (Markdown)
+
+Your answer **must** use the following structure and style. Write naturally, as if you personally reviewed their file:
+
+---
+
+# 🇨🇦 Immigration Eligibility & Guidance Report
+
+## 👤 Profile Summary
+
+Provide a **concise, factual summary** (2-3 sentences max). State their age, education, experience, current CRS score (if applicable), and primary pathway. No fluff.
+
+**Example:**
+> "[Name], age [X], holds a [degree] with [Y] years of [Canadian/foreign] work experience. Current CRS: [score] points. Primary pathway: [Express Entry/PNP/Study Visa/etc.]."
+
+---
+
+## 🏁 Eligibility Analysis
+
+**Be specific and factual.** Break down their eligibility with actual numbers and requirements:
+
+**For Express Entry:**
+- CRS breakdown: Age ([X] points), Education ([Y] points), Experience ([Z] points), Language ([W] points), Additional factors ([V] points) = Total: [score]
+- Recent draw cut-off range: [X-Y] points (cite if known, otherwise state "typically [range]")
+- Assessment: [Eligible/Not eligible/Needs improvement] - [specific reason]
+
+**For other pathways:** List each requirement and their status:
+- [Requirement 1]: ✅ Met / ❌ Not met - [specific gap]
+- [Requirement 2]: ✅ Met / ❌ Not met - [specific gap]
+
+**NO generic statements.** Every point must be specific and useful.
+
+---
+
+## 💡 Improvement Roadmap
+
+**List only actionable steps that will actually improve their situation.** If they're already eligible, focus on optimization and next steps.
+
+**Format as a Markdown table. Each row must be on a separate line with proper pipe syntax:**
+
+| Action | Current Status | Required Action | Impact | Timeline | Cost |
+|--------|---------------|-----------------|--------|----------|------|
+| Language test | CLB [X] | Retake to achieve CLB [Y] | +[Z] points | [timeframe] | $[amount] |
+| ECA assessment | [Status] | [Specific action] | [Impact] | [timeframe] | $[amount] |
+
+**CRITICAL TABLE FORMATTING RULES:**
+- Each row MUST be on a separate line (no rows concatenated on same line)
+- Start AND end each row with a pipe character (|)
+- Use actual values from their profile, NOT placeholders - replace [X], [Status], [timeframe], [amount] with real data
+- Each row must have exactly 6 columns matching the header
+- NO empty cells - use "N/A" or "Not applicable" if needed
+- Keep cell content concise (max 50 characters per cell)
+- Only include steps that are actually needed and have measurable impact
+- The separator row (with dashes) must be on its own line between header and data rows
+- Ensure proper spacing - one space after each pipe, content aligned properly
+
+---
+
+## 🧭 Recommended Pathway
+
+**Provide a clear, chronological timeline with specific actions and deadlines.**
+
+**Format:**
+**Phase 1: [Month range] - [Action]**
+- [Specific task 1] - Deadline: [date/timeline]
+- [Specific task 2] - Deadline: [date/timeline]
+
+**Phase 2: [Month range] - [Action]**
+- [Specific task 1] - Deadline: [date/timeline]
+- [Specific task 2] - Deadline: [date/timeline]
+
+**Phase 3: [Month range] - [Action]**
+- [Specific task 1] - Deadline: [date/timeline]
+
+**Expected Timeline to PR:** [X] months from [start point]
+
+If multiple pathways are viable, list them with **specific pros/cons and timelines**:
+- **Pathway A:** [Name] - Pros: [specific], Cons: [specific], Timeline: [X] months
+- **Pathway B:** [Name] - Pros: [specific], Cons: [specific], Timeline: [Y] months
+
+---
+
+## 🧑‍💼 Professional Recommendations
+
+**Provide direct, actionable next steps with specific deadlines and requirements.**
+
+**Immediate Actions (This Week):**
+1. [Specific action] - [Why it's urgent] - Deadline: [date]
+2. [Specific action] - [Why it's urgent] - Deadline: [date]
+
+**Short-term (Next 30 Days):**
+1. [Specific action] - Required documents: [list], Cost: $[amount], Timeline: [timeframe]
+2. [Specific action] - Required documents: [list], Cost: $[amount], Timeline: [timeframe]
+
+**Medium-term (Next 3-6 Months):**
+1. [Specific action] - [Key details]
+2. [Specific action] - [Key details]
+
+**Important Notes:**
+- [Specific warning or critical information]
+- [Common mistake to avoid]
+- [Resource or contact information if relevant]
+
+**NO generic motivational statements.** End with specific next steps or critical reminders only.
+
+---
+
+### ⚙️ Tone and Style Requirements
+
+- **Write like an expert consultant**—direct, professional, no fluff
+- **Be specific and factual**—use actual numbers, dates, and concrete information
+- **NO generic praise or filler**—every sentence must provide value
+- **NO repetition**—don't say the same thing twice
+- **Use active voice** and be direct
+- **Work with the data provided**—never say "placeholder" or "to be confirmed"
+- Use emojis only in section headers for visual organization
+- **Be confident and specific**—avoid "might", "could", "appears to be"
+- **Length: 400-800 words**—comprehensive but concise
+- **Focus on actionable information**—what they need to know, what they need to do
+
+---
+
+### ⚠️ Critical Rules
+
+- **ALWAYS generate complete content**—never return empty responses
+- **Always write in Markdown format** with proper headers, lists, and tables
+- **Never hallucinate**—use only IRCC-official rules and logic
+- **NO generic statements**—every sentence must be specific to their profile
+- **NO filler or fluff**—remove any sentence that doesn't add actionable value
+- **Include specific numbers** (CRS scores, timelines, point breakdowns, costs) when applicable
+- **Work with provided data**—never dismiss data as "placeholder" or "to be confirmed"
+- **Be direct and actionable**—tell them exactly what to do, when, and why
+- **NO repetition**—each piece of information should appear only once
+- **Focus on useful information**—what they need to know to take action
+
+**Remember: This is an expert consultation report. Every word must be useful, specific, and actionable. No fluff, no generic praise, no filler.**"""
+
+
+def build_user_prompt(profile: ImmigrationProfileSchema) -> str:
+    """Build the user prompt from profile data"""
+    prompt = """# 🧍 User Immigration Profile
+
+**Goal Path:** {path}  
+
+*(Choose one: Study Visa, Work Permit, Express Entry, PNP, Quebec PR, Citizenship)*
+
+---
+
+## 👤 Personal Information
+
+- **Age:** {age}
+
+- **Marital Status:** {marital_status}
+
+- **Citizenship:** {citizenship}
+
+- **Current Country of Residence:** {residence_country}
+
+---
+
+## 🎓 Education
+
+- **Highest Degree:** {highest_degree}
+
+- **Field of Study:** {field_of_study}
+
+- **Canadian Credential:** {canadian_credential}
+
+- **ECA Completed:** {eca_completed}
+
+---
+
+## 🗣️ Language Proficiency
+
+- **English Test:** {english_test}
+
+- **Scores (L/R/W/S):** {english_scores}
+
+- **French Test:** {french_test}
+
+- **Scores (if any):** {french_scores}
+
+---
+
+## 💼 Work Experience
+
+- **Foreign Experience (years):** {foreign_experience_years}
+
+- **Canadian Experience (years):** {canadian_experience_years}
+
+- **Occupation / NOC Code:** {occupation_noc}
+
+---
+
+## 💰 Proof of Funds
+
+- **Available Settlement Funds (CAD):** {funds}
+
+---
+
+## 👪 Family and Relatives
+
+- **Spouse Accompanying:** {spouse}
+
+- **Sibling in Canada:** {sibling_in_canada}
+
+- **Other Relatives in Canada:** {relative_in_canada}
+
+---
+
+## 🧭 Additional Notes
+
+{user_notes}
+
+---
+
+# 🧩 Task
+
+Analyze the profile above according to IRCC's official rules for the selected pathway.
+
+Then produce a **complete Markdown report** in the format defined in your system prompt.
+
+The report must include:
+
+- Profile summary  
+
+- Eligibility status  
+
+- CRS breakdown (if applicable)  
+
+- Improvement roadmap  
+
+- Step-by-step recommended pathway  
+
+- Professional consultant advice  
+
+- Motivational closing paragraph
+""".format(
+        path=profile.path or "Not specified",
+        age=profile.age or "Not specified",
+        marital_status=profile.marital_status or "Not specified",
+        citizenship=profile.citizenship or "Not specified",
+        residence_country=profile.residence_country or "Not specified",
+        highest_degree=profile.highest_degree or "Not specified",
+        field_of_study=profile.field_of_study or "Not specified",
+        canadian_credential=profile.canadian_credential or "Not specified",
+        eca_completed=profile.eca_completed or "Not specified",
+        english_test=profile.english_test or "Not specified",
+        english_scores=profile.english_scores or "Not specified",
+        french_test=profile.french_test or "Not specified",
+        french_scores=profile.french_scores or "Not specified",
+        foreign_experience_years=profile.foreign_experience_years or "Not specified",
+        canadian_experience_years=profile.canadian_experience_years or "Not specified",
+        occupation_noc=profile.occupation_noc or "Not specified",
+        funds=profile.funds or "Not specified",
+        spouse=profile.spouse or "Not specified",
+        sibling_in_canada=profile.sibling_in_canada or "Not specified",
+        relative_in_canada=profile.relative_in_canada or "Not specified",
+        user_notes=profile.user_notes or "None"
+    )
+    return prompt
+
+
+# Hybrid reports: the profile summary, eligibility analysis and improvement
+# roadmap are built on the server; the model writes only the closing sections
+NARRATIVE_SYSTEM_PROMPT = """You are a senior Canadian Immigration Consultant (RCIC). The profile summary, eligibility analysis (with CRS estimate) and improvement roadmap of the client's report are already written; the computed results are given to you. Write ONLY the two closing sections below, in Markdown, consistent with those results. Do not repeat the profile, the CRS breakdown or the roadmap table.
+
+## 🧭 Recommended Pathway
+
+A chronological plan: **Phase 1/2/3: [Month range] - [Action]**, each with 1-3 bullets ending in "Deadline: [timeline]", then **Expected Timeline to PR:** [X] months. If more than one pathway is viable, list each as **Pathway A/B:** [Name] - Pros, Cons, Timeline.
+
+## 🧑‍💼 Professional Recommendations
+
+**Immediate Actions (This Week):**, **Short-term (Next 30 Days):** (with documents, cost and timeline), **Medium-term (Next 3-6 Months):** as numbered lists, then **Important Notes:** (warnings, common mistakes).
+
+Rules: start with "## 🧭 Recommended Pathway"; be specific (numbers, dates, costs in CAD); no praise, filler or repetition; never call data a placeholder; follow IRCC rules only; 250-400 words."""
+
+
+def _profile_lines(profile: ImmigrationProfileSchema) -> str:
+    """The provided profile fields as a compact Markdown list (unset fields are left out)"""
+    fields = (
+        ('Goal path', profile.path),
+        ('Age', profile.age),
+        ('Marital status', profile.marital_status),
+        ('Spouse accompanying', profile.spouse),
+        ('Citizenship', profile.citizenship),
+        ('Residence', profile.residence_country),
+        ('Highest degree', profile.highest_degree),
+        ('Field of study', profile.field_of_study),
+        ('Canadian credential', profile.canadian_credential),
+        ('ECA completed', profile.eca_completed),
+        ('English', ' '.join(filter(None, [profile.english_test, profile.english_scores]))),
+        ('French', ' '.join(filter(None, [profile.french_test, profile.french_scores]))),
+        ('Foreign experience (years)', profile.foreign_experience_years),
+        ('Canadian experience (years)', profile.canadian_experience_years),
+        ('Occupation / NOC', profile.occupation_noc),
+        ('Funds (CAD)', profile.funds),
+        ('Sibling in Canada', profile.sibling_in_canada),
+        ('Relatives in Canada', profile.relative_in_canada),
+        ('Notes', profile.user_notes),
+    )
+    return '\n'.join(f"- {label}: {value}" for label, value in fields if value not in (None, ''))
+
+
+def build_narrative_prompt(profile: ImmigrationProfileSchema, computed_facts: str) -> str:
+    """User prompt for the hybrid report narrative: the provided profile fields and the server's results"""
+    return f"""# Client profile
+
+{_profile_lines(profile)}
+
+# Computed results (already in the report)
+
+{computed_facts}
+
+Write the Recommended Pathway and Professional Recommendations sections for this client."""
+
+
+# Compact variants: the same output structure with far fewer prompt tokens.
+# The static system prompt comes first so provider prompt caching can reuse it.
+COMPACT_SYSTEM_PROMPT = """You are a senior Canadian Immigration Consultant (RCIC). Write a direct, expert report in Markdown for the client profile given, 400-800 words, following IRCC rules only. Use the data as given (never call it a placeholder); no praise, filler or repetition; be specific with numbers, dates and costs in CAD; never return an empty response.
+
+Structure (headings exactly as shown, "---" between sections):
+
+# 🇨🇦 Immigration Eligibility & Guidance Report
+
+## 👤 Profile Summary
+2-3 factual sentences: age, education, experience, CRS score if applicable, primary pathway.
+
+## 🏁 Eligibility Analysis
+Express Entry: CRS breakdown (Age, Education, Experience, Language, Additional = Total), typical recent cut-off range, assessment with reason. Other pathways: one bullet per requirement, "✅ Met" or "❌ Not met" with the specific gap.
+
+## 💡 Improvement Roadmap
+Markdown table, one row per line, 6 columns, real values, no empty cells ("N/A"), cells under 50 characters:
+| Action | Current Status | Required Action | Impact | Timeline | Cost |
+|--------|---------------|-----------------|--------|----------|------|
+
+## 🧭 Recommended Pathway
+**Phase 1/2/3: [Month range] - [Action]** with bullets ending in "Deadline: [timeline]", then **Expected Timeline to PR:** [X] months. If several pathways are viable: **Pathway A/B:** [Name] - Pros, Cons, Timeline.
+
+## 🧑‍💼 Professional Recommendations
+**Immediate Actions (This Week):**, **Short-term (Next 30 Days):** (documents, cost, timeline), **Medium-term (Next 3-6 Months):** as numbered lists, then **Important Notes:** (warnings, common mistakes)."""
+
+COMPACT_NARRATIVE_SYSTEM_PROMPT = """You are a senior Canadian Immigration Consultant (RCIC). The client's profile summary, eligibility analysis and improvement roadmap are already written; their results are given. Write ONLY these two sections in Markdown, consistent with those results, without repeating them:
+
+## 🧭 Recommended Pathway
+**Phase 1/2/3: [Month range] - [Action]** with bullets ending in "Deadline: [timeline]", then **Expected Timeline to PR:** [X] months; for several viable pathways, **Pathway A/B:** [Name] - Pros, Cons, Timeline.
+
+## 🧑‍💼 Professional Recommendations
+**Immediate Actions (This Week):**, **Short-term (Next 30 Days):**, **Medium-term (Next 3-6 Months):** as numbered lists, then **Important Notes:**.
+
+Be specific (numbers, dates, CAD costs), IRCC rules only, no filler, 250-400 words."""
+
+
+def build_compact_user_prompt(profile: ImmigrationProfileSchema) -> str:
+    """User prompt for the compact full-LLM report: the provided profile fields only"""
+    return f"""# Client profile
+
+{_profile_lines(profile)}
+
+Write the report for this client."""
+
+
+@dataclass(frozen=True)
+class ReportPrompt:
+    """The messages and completion budget of one report request"""
+    version: str
+    system: str  # Static across reports: the cacheable prefix
+    user: str
+    max_tokens: int
+
+
+def build_report_prompt(
+    profile: ImmigrationProfileSchema,
+    builder: Optional[str] = None,
+    variant: Optional[str] = None,
+) -> ReportPrompt:
+    """
+    The prompt for a report, for the configured ``REPORT_BUILDER`` and
+    ``REPORT_PROMPT_VARIANT`` unless given.
+    """
+    builder = builder or settings.REPORT_BUILDER
+    variant = variant or settings.REPORT_PROMPT_VARIANT
+    version = prompt_version(builder, variant)
+    if builder == 'hybrid':
+        # Factual sections are built on the server; the model writes the narrative only
+        system = COMPACT_NARRATIVE_SYSTEM_PROMPT if variant == 'compact' else NARRATIVE_SYSTEM_PROMPT
+        user = build_narrative_prompt(profile, narrative_facts(analyze_profile(profile)))
+        return ReportPrompt(version, system, user, settings.REPORT_NARRATIVE_MAX_TOKENS)
+    if variant == 'compact':
+        return ReportPrompt(version, COMPACT_SYSTEM_PROMPT, build_compact_user_prompt(profile), REPORT_MAX_TOKENS)
+    return ReportPrompt(version, SYSTEM_PROMPT, build_user_prompt(profile), REPORT_MAX_TOKENS)
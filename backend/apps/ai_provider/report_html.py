@@ -0,0 +1,201 @@
+"""
+Report Markdown to sanitized HTML, rendered once per report.
+
+The same HTML is served to the web client (``GET /reports/{id}/html``) and fed
+to the PDF renderer, so the Markdown conversion runs at most once per report
+content. Renders are keyed by ``report_html_key``: a SHA-256 of
+``RENDERER_VERSION`` and the Markdown. They are kept in a small in-process
+LRU and persisted on the report row (``report_html`` / ``report_html_key``),
+so other processes reuse them too.
+
+Model output is untrusted, so the HTML is reduced to an allowlist of tags and
+attributes; URLs are limited to http(s), mailto and relative links. Bump
+``RENDERER_VERSION`` whenever the Markdown extensions or the allowlist change;
+stored renders with the old key are then re-rendered on next use.
+"""
+import hashlib
+import html
+import threading
+from collections import OrderedDict
+from html.parser import HTMLParser
+from typing import Optional, Tuple
+from urllib.parse import urlsplit
+
+import markdown
+
+from apps.ai_provider.instrumentation import stage
+
+RENDERER_VERSION = '1'
+
+MARKDOWN_EXTENSIONS = [
+    'extra',  # Adds support for tables, fenced code blocks, etc.
+    'tables',  # Better table support
+    'nl2br',  # Convert newlines to <br>
+    'sane_lists',  # Better list formatting
+]
+
+ALLOWED_TAGS = {
+    'a', 'abbr', 'b', 'blockquote', 'br', 'code', 'dd', 'del', 'div', 'dl', 'dt', 'em',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'hr', 'i', 'img', 'ins', 'li', 'ol', 'p', 'pre',
+    's', 'span', 'strong', 'sub', 'sup', 'table', 'tbody', 'td', 'tfoot', 'th', 'thead',
+    'tr', 'u', 'ul',
+}
+ALLOWED_ATTRIBUTES = {
+    'a': {'href', 'title'},
+    'abbr': {'title'},
+    'img': {'src', 'alt', 'title'},
+    'ol': {'start'},
+    'td': {'align', 'colspan', 'rowspan'},
+    'th': {'align', 'colspan', 'rowspan'},
+}
+URL_ATTRIBUTES = {'href', 'src'}
+ALLOWED_URL_SCHEMES = {'', 'http', 'https', 'mailto'}
+VOID_TAGS = {'br', 'hr', 'img'}
+# Dropped together with everything inside them
+DROP_CONTENT_TAGS = {'script', 'style', 'iframe', 'object', 'embed', 'template', 'noscript', 'textarea', 'title'}
+
+LRU_SIZE = 256
+
+
+class _Sanitizer(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.open_tags = []
+        self.drop_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in DROP_CONTENT_TAGS:
+            self.drop_depth += 1
+            return
+        if self.drop_depth or tag not in ALLOWED_TAGS:
+            return
+        kept = []
+        for name, value in attrs:
+            if name not in ALLOWED_ATTRIBUTES.get(tag, ()) or value is None:
+                continue
+            if name in URL_ATTRIBUTES and not _is_safe_url(value, images=tag == 'img'):
+                continue
+            kept.append(f' {name}="{html.escape(value, quote=True)}"')
+        if tag == 'a':
+            kept.append(' rel="nofollow noopener noreferrer"')
+        self.parts.append(f"<{tag}{''.join(kept)}>")
+        if tag not in VOID_TAGS:
+            self.open_tags.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in DROP_CONTENT_TAGS:
+            return
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS and self.open_tags and self.open_tags[-1] == tag:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in DROP_CONTENT_TAGS:
+            self.drop_depth = max(self.drop_depth - 1, 0)
+            return
+        if self.drop_depth or tag not in self.open_tags:
+            return
+        # Close anything left open inside this element so the output stays well-formed
+        while self.open_tags:
+            open_tag = self.open_tags.pop()
+            self.parts.append(f"</{open_tag}>")
+            if open_tag == tag:
+                break
+
+    def handle_data(self, data):
+        if not self.drop_depth:
+            self.parts.append(html.escape(data.replace('\x00', ''), quote=False))
+
+    def close(self):
+        super().close()
+        while self.open_tags:
+            self.parts.append(f"</{self.open_tags.pop()}>")
+        return ''.join(self.parts)
+
+
+def _is_safe_url(value: str, images: bool = False) -> bool:
+    scheme = urlsplit(value.strip()).scheme.lower()
+    if images:
+        return scheme in ('http', 'https')
+    return scheme in ALLOWED_URL_SCHEMES
+
+
+def sanitize_html(html_content: str) -> str:
+    """Reduce HTML to the report allowlist (unknown tags are unwrapped, scripts and styles removed)"""
+    sanitizer = _Sanitizer()
+    sanitizer.feed(html_content)
+    return sanitizer.close()
+
+
+def markdown_to_html(markdown_text: str) -> str:
+    """Convert report Markdown to sanitized HTML (uncached)"""
+    with stage('markdown_html'):
+        return sanitize_html(markdown.markdown(markdown_text, extensions=MARKDOWN_EXTENSIONS))
+
+
+def report_html_key(markdown_text: str) -> str:
+    """Cache key of a report's rendered HTML: content hash plus renderer version"""
+    digest = hashlib.sha256(f"{RENDERER_VERSION}\n{markdown_text}".encode('utf-8'))
+    return digest.hexdigest()
+
+
+_renders = OrderedDict()
+_renders_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0}
+
+
+def get_report_html(markdown_text: str, stored_key: Optional[str] = None, stored_html: Optional[str] = None) -> Tuple[str, str]:
+    """
+    Rendered HTML for report Markdown, converting only if no current render exists.
+
+    Args:
+        markdown_text: The report Markdown
+        stored_key: ``report_html_key`` persisted with a previous render, if any
+        stored_html: That render
+
+    Returns:
+        ``(report_html_key, html)``
+    """
+    key = report_html_key(markdown_text)
+    if stored_html is not None and stored_key == key:
+        _remember(key, stored_html)
+        return key, stored_html
+
+    cached = peek_report_html(key)
+    if cached is not None:
+        return key, cached
+
+    with _renders_lock:
+        _stats['misses'] += 1
+    rendered = markdown_to_html(markdown_text)
+    _remember(key, rendered)
+    return key, rendered
+
+
+def peek_report_html(key: str) -> Optional[str]:
+    """The in-process render for a key, without rendering on a miss"""
+    with _renders_lock:
+        rendered = _renders.get(key)
+        if rendered is not None:
+            _renders.move_to_end(key)
+            _stats['hits'] += 1
+        return rendered
+
+
+def _remember(key: str, rendered: str) -> None:
+    with _renders_lock:
+        _renders[key] = rendered
+        _renders.move_to_end(key)
+        while len(_renders) > LRU_SIZE:
+            _renders.popitem(last=False)
+
+
+def report_html_stats() -> dict:
+    with _renders_lock:
+        return {
+            'renderer_version': RENDERER_VERSION,
+            'entries': len(_renders),
+            'hits': _stats['hits'],
+            'misses': _stats['misses'],
+        }
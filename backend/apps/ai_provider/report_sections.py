@@ -0,0 +1,517 @@
+"""
+Server-built sections of the immigration report.
+
+With ``REPORT_BUILDER = 'hybrid'`` the factual sections (profile summary,
+eligibility analysis with the CRS estimate, improvement roadmap) are rendered
+here from ``ImmigrationProfileSchema`` with the same rules as the frontend
+calculators (``src/utils/crsCalculator.ts``), and the LLM only writes the
+advisory narrative (recommended pathway and professional recommendations)
+with a much smaller prompt and token budget. ``assemble_report`` joins the
+two into the same Markdown structure the full-LLM report uses.
+
+Profiles are free text, so parsing is forgiving: anything that cannot be read
+(an unknown degree, scores in an unrecognized format) is reported as "Not
+provided" and left out of the CRS estimate rather than guessed.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from apps.ai_provider.schemas import ImmigrationProfileSchema
+
+REPORT_TITLE = "# 🇨🇦 Immigration Eligibility & Guidance Report"
+NARRATIVE_HEADINGS = ("## 🧭 Recommended Pathway", "## 🧑‍💼 Professional Recommendations")
+
+MET, NOT_MET, UNKNOWN = "✅ Met", "❌ Not met", "⚠️ Not provided"
+
+# CRS points (Immigration and Refugee Protection Regulations; as in src/utils/crsCalculator.ts).
+# Each table is (with accompanying spouse, without).
+AGE_POINTS = (
+    {18: 90, 19: 95, 30: 95, 31: 90, 32: 85, 33: 80, 34: 75, 35: 70, 36: 65, 37: 60, 38: 55, 39: 50,
+     40: 45, 41: 35, 42: 25, 43: 15, 44: 5},
+    {18: 99, 19: 105, 30: 105, 31: 99, 32: 94, 33: 88, 34: 83, 35: 77, 36: 72, 37: 66, 38: 61, 39: 55,
+     40: 50, 41: 39, 42: 28, 43: 17, 44: 6},
+)
+AGE_PEAK_POINTS = (100, 110)  # Ages 20-29
+EDUCATION_POINTS = (
+    {'secondary': 28, 'one_year_post_secondary': 84, 'two_year_post_secondary': 91, 'bachelor': 112,
+     'two_or_more_certificates': 119, 'master': 126, 'phd': 140},
+    {'secondary': 30, 'one_year_post_secondary': 90, 'two_year_post_secondary': 98, 'bachelor': 120,
+     'two_or_more_certificates': 128, 'master': 135, 'phd': 150},
+)
+LANGUAGE_SKILL_POINTS = (
+    {10: 32, 9: 29, 8: 22, 7: 16, 6: 8, 5: 6, 4: 6},
+    {10: 34, 9: 31, 8: 23, 7: 17, 6: 9, 5: 6, 4: 6},
+)
+CANADIAN_WORK_POINTS = (
+    {1: 35, 2: 46, 3: 56, 4: 63, 5: 70},
+    {1: 40, 2: 53, 3: 64, 4: 72, 5: 80},
+)
+# IELTS General Training band -> CLB, per skill (minimum band for each level)
+IELTS_TO_CLB = {
+    'listening': ((8.5, 10), (8.0, 9), (7.5, 8), (6.0, 7), (5.5, 6), (5.0, 5), (4.5, 4)),
+    'reading': ((8.0, 10), (7.0, 9), (6.5, 8), (6.0, 7), (5.0, 6), (4.0, 5), (3.5, 4)),
+    'writing': ((7.5, 10), (7.0, 9), (6.5, 8), (6.0, 7), (5.5, 6), (5.0, 5), (4.0, 4)),
+    'speaking': ((7.5, 10), (7.0, 9), (6.5, 8), (6.0, 7), (5.5, 6), (5.0, 5), (4.0, 4)),
+}
+SKILLS = ('listening', 'reading', 'writing', 'speaking')
+
+# Proof of funds (CAD). Federal Skilled Worker settlement funds by family size, and the
+# study permit cost-of-living amount on top of first-year tuition. IRCC updates both yearly.
+SETTLEMENT_FUNDS = {1: 15263, 2: 19001, 3: 23360, 4: 28362, 5: 32168, 6: 36280, 7: 40392}
+STUDY_LIVING_FUNDS = 22895
+
+FUNDS_REQUIREMENTS = ("Settlement funds", "Living expenses")
+YES_VALUES = {'yes', 'y', 'true', 'completed', 'done', 'accompanying'}
+
+
+@dataclass
+class LanguageResult:
+    test: Optional[str]
+    clb: Optional[Dict[str, int]]  # Per skill; None when the scores could not be read
+
+    @property
+    def minimum(self) -> Optional[int]:
+        return min(self.clb.values()) if self.clb else None
+
+
+@dataclass
+class CRSEstimate:
+    total: int
+    parts: List[Tuple[str, int]]
+    missing: List[str]
+
+
+@dataclass
+class ProfileAnalysis:
+    profile: ImmigrationProfileSchema
+    pathway: str
+    has_spouse: bool
+    education: Optional[str]
+    english: LanguageResult
+    french: LanguageResult
+    foreign_years: int
+    canadian_years: int
+    funds: Optional[int]
+    crs: Optional[CRSEstimate] = None
+    requirements: List[Tuple[str, str, str]] = field(default_factory=list)  # (requirement, status, detail)
+    roadmap: List[Tuple[str, str, str, str, str, str]] = field(default_factory=list)
+
+
+# Parsing
+
+def _is_yes(value: Optional[str]) -> bool:
+    return bool(value) and value.strip().lower().split(' ')[0].rstrip('.,') in YES_VALUES
+
+
+def education_level(degree: Optional[str]) -> Optional[str]:
+    """Map a free-text degree onto a CRS education level"""
+    text = (degree or '').lower()
+    if not text:
+        return None
+    rules = (
+        (r'ph\.?\s?d|doctor', 'phd'),
+        (r'master|mba|m\.?sc|\bm\.?a\b|\bmeng\b|\bm\.?eng\b|\bllm\b', 'master'),
+        (r'two or more|double|dual|2 or more', 'two_or_more_certificates'),
+        (r'bachelor|b\.?sc|\bb\.?a\b|\bbeng\b|\bb\.?eng\b|\bbba\b|undergrad|licen', 'bachelor'),
+        (r'(two|2|three|3)[- ]year|advanced diploma|associate', 'two_year_post_secondary'),
+        (r'diploma|certificate|college|(one|1)[- ]year|trade', 'one_year_post_secondary'),
+        (r'high school|secondary|baccalaur', 'secondary'),
+    )
+    for pattern, level in rules:
+        if re.search(pattern, text):
+            return level
+    return None
+
+
+def _ielts_clb(skill: str, band: float) -> int:
+    for minimum, clb in IELTS_TO_CLB[skill]:
+        if band >= minimum:
+            return clb
+    return 0
+
+
+def parse_language(test: Optional[str], scores: Optional[str]) -> LanguageResult:
+    """
+    Per-skill CLB levels from free-text scores: ``CLB 9``, ``L8 R7 W7 S7`` /
+    ``8/7/7/7`` (listening, reading, writing, speaking) or a single overall band.
+    IELTS bands are converted; CELPIP levels equal CLB levels; other tests
+    are only read when stated in CLB.
+    """
+    result = LanguageResult(test=test or None, clb=None)
+    text = (scores or '').strip()
+    if not text:
+        return result
+    clb_match = re.search(r'clb\s*(\d+)|nclc\s*(\d+)', text, re.IGNORECASE)
+    if clb_match:
+        level = int(clb_match.group(1) or clb_match.group(2))
+        result.clb = {skill: level for skill in SKILLS}
+        return result
+
+    text = re.sub(r'\(overall[^)]*\)', '', text, flags=re.IGNORECASE)
+    labelled = dict(re.findall(r'\b([LRWS])\s*:?\s*(\d+(?:\.\d+)?)', text, re.IGNORECASE))
+    if len(labelled) == 4:
+        labelled = {key.upper(): value for key, value in labelled.items()}
+        values = [float(labelled[key]) for key in 'LRWS']
+    else:
+        values = [float(number) for number in re.findall(r'\d+(?:\.\d+)?', text)]
+        if len(values) == 1:
+            values = values * 4
+        elif len(values) != 4:
+            return result
+
+    kind = (test or '').lower()
+    if 'celpip' in kind:
+        result.clb = {skill: int(value) for skill, value in zip(SKILLS, values)}
+    elif 'ielts' in kind or (not kind and all(value <= 9 for value in values)):
+        result.clb = {skill: _ielts_clb(skill, value) for skill, value in zip(SKILLS, values)}
+    return result
+
+
+def parse_amount(funds: Optional[str]) -> Optional[int]:
+    """``"25,000 CAD"`` / ``"$25k"`` -> 25000"""
+    match = re.search(r'(\d[\d,\s]*(?:\.\d+)?)\s*(k\b)?', (funds or '').lower())
+    if not match:
+        return None
+    amount = float(re.sub(r'[,\s]', '', match.group(1)))
+    return int(amount * 1000 if match.group(2) else amount)
+
+
+def _canadian_education(credential: Optional[str]) -> int:
+    text = (credential or '').strip().lower()
+    if not text or text in ('no', 'none', 'n/a', 'not specified'):
+        return 0
+    level = education_level(text)
+    if level in ('bachelor', 'master', 'phd', 'two_or_more_certificates') or re.search(r'(three|3)[- ]year', text):
+        return 30
+    return 15
+
+
+# CRS
+
+def estimate_crs(analysis: ProfileAnalysis, clb: Optional[Dict[str, int]] = None,
+                 french_clb: Optional[int] = None, canadian_years: Optional[int] = None) -> CRSEstimate:
+    """
+    CRS estimate for the principal applicant. The optional overrides are used
+    to price roadmap actions (e.g. "what if CLB 9").
+    """
+    profile = analysis.profile
+    column = 0 if analysis.has_spouse else 1
+    clb = clb if clb is not None else analysis.english.clb
+    french_min = french_clb if french_clb is not None else analysis.french.minimum
+    canadian = analysis.canadian_years if canadian_years is None else canadian_years
+    parts, missing = [], []
+
+    age = profile.age
+    if age is None:
+        missing.append("age")
+        age_points = 0
+    elif 20 <= age <= 29:
+        age_points = AGE_PEAK_POINTS[column]
+    else:
+        age_points = AGE_POINTS[column].get(age, 0)
+    parts.append(("Age", age_points))
+
+    education_points = EDUCATION_POINTS[column].get(analysis.education, 0)
+    if analysis.education is None:
+        missing.append("education")
+    parts.append(("Education", education_points))
+
+    if clb:
+        language_points = sum(LANGUAGE_SKILL_POINTS[column].get(min(level, 10), 0) for level in clb.values())
+    else:
+        missing.append("first official language scores")
+        language_points = 0
+    parts.append(("First official language", language_points))
+
+    parts.append(("Canadian work experience", CANADIAN_WORK_POINTS[column].get(min(canadian, 5), 0)))
+
+    # Skill transferability: the best combination, capped at 100 (as the frontend calculator)
+    post_secondary = analysis.education not in (None, 'secondary')
+    language_min = min(clb.values()) if clb else 0
+    foreign = min(analysis.foreign_years, 3)
+    combinations = [0]
+    if post_secondary and language_min >= 9:
+        combinations.append(50)
+    elif post_secondary and language_min >= 7:
+        combinations.append(25)
+    if post_secondary and canadian >= 1:
+        combinations.append(25 if canadian >= 2 else 13)
+    if foreign >= 1 and language_min >= 9:
+        combinations.append({1: 13, 2: 25, 3: 50}[foreign])
+    elif foreign >= 1 and language_min >= 7:
+        combinations.append({1: 13, 2: 13, 3: 25}[foreign])
+    if foreign >= 1 and canadian >= 1:
+        if foreign >= 3 and canadian >= 2:
+            combinations.append(50)
+        elif foreign >= 3 or canadian >= 2:
+            combinations.append(25)
+        else:
+            combinations.append(13)
+    parts.append(("Skill transferability", min(max(combinations), 100)))
+
+    additional = _canadian_education(profile.canadian_credential)
+    if _is_yes(profile.sibling_in_canada):
+        additional += 15
+    if french_min is not None and french_min >= 5:
+        additional += 24
+        if french_min >= 7:
+            additional += 50 if language_min >= 5 else 25 if language_min >= 4 else 0
+    parts.append(("Additional points", additional))
+
+    return CRSEstimate(total=sum(points for _, points in parts), parts=parts, missing=missing)
+
+
+# Analysis
+
+def analyze_profile(profile: ImmigrationProfileSchema) -> ProfileAnalysis:
+    pathway = (profile.path or 'Not specified').strip()
+    marital = (profile.marital_status or '').lower()
+    has_spouse = (('married' in marital or 'common' in marital) and 'single' not in marital
+                  and not (profile.spouse or '').strip().lower().startswith('no'))
+    analysis = ProfileAnalysis(
+        profile=profile,
+        pathway=pathway,
+        has_spouse=has_spouse,
+        education=education_level(profile.highest_degree),
+        english=parse_language(profile.english_test, profile.english_scores),
+        french=parse_language(profile.french_test, profile.french_scores),
+        foreign_years=max(profile.foreign_experience_years or 0, 0),
+        canadian_years=max(profile.canadian_experience_years or 0, 0),
+        funds=parse_amount(profile.funds),
+    )
+    pathway_key = pathway.lower()
+    if 'express' in pathway_key or 'pnp' in pathway_key or 'provincial' in pathway_key or 'all' in pathway_key:
+        analysis.crs = estimate_crs(analysis)
+    analysis.requirements = _requirements(analysis)
+    analysis.roadmap = _roadmap(analysis)
+    return analysis
+
+
+def _family_size(analysis: ProfileAnalysis) -> int:
+    return 2 if analysis.has_spouse else 1
+
+
+def _clb_requirement(label: str, result: LanguageResult, minimum: int, skills=SKILLS, scale: str = 'CLB') -> Tuple[str, str, str]:
+    if not result.clb:
+        return (label, UNKNOWN, "Scores not provided or not in a recognized format")
+    lowest = min(result.clb[skill] for skill in skills)
+    detail = f"Lowest skill {scale} {lowest}, minimum {scale} {minimum}"
+    return (label, MET if lowest >= minimum else NOT_MET, detail)
+
+
+def _funds_requirement(analysis: ProfileAnalysis, required: int, label: str) -> Tuple[str, str, str]:
+    if analysis.funds is None:
+        return (label, UNKNOWN, f"CAD {required:,} required")
+    if analysis.funds >= required:
+        return (label, MET, f"CAD {analysis.funds:,} available, CAD {required:,} required")
+    return (label, NOT_MET, f"CAD {analysis.funds:,} available, CAD {required - analysis.funds:,} short of CAD {required:,}")
+
+
+def _requirements(analysis: ProfileAnalysis) -> List[Tuple[str, str, str]]:
+    profile = analysis.profile
+    pathway = analysis.pathway.lower()
+    requirements = []
+    if 'express' in pathway or 'all' in pathway:
+        requirements.append(_clb_requirement("Language (FSW/CEC)", analysis.english if analysis.english.clb else analysis.french, 7))
+        years = analysis.foreign_years + analysis.canadian_years
+        requirements.append((
+            "1 year skilled work experience",
+            MET if years >= 1 else NOT_MET if profile.foreign_experience_years is not None else UNKNOWN,
+            f"{analysis.foreign_years} foreign, {analysis.canadian_years} Canadian year(s)",
+        ))
+        if analysis.education is None:
+            requirements.append(("Education", UNKNOWN, "Highest degree not recognized"))
+        else:
+            eca = _is_yes(profile.eca_completed) or bool(profile.canadian_credential and _canadian_education(profile.canadian_credential))
+            requirements.append(("Educational Credential Assessment", MET if eca else NOT_MET,
+                                 "Completed" if eca else "Required for a foreign credential"))
+        if analysis.canadian_years < 1:
+            requirements.append(_funds_requirement(
+                analysis, SETTLEMENT_FUNDS[_family_size(analysis)], f"Settlement funds (family of {_family_size(analysis)})"
+            ))
+    if 'study' in pathway or 'all' in pathway:
+        requirements.append(("Letter of acceptance (DLI)", UNKNOWN, "Needed before applying"))
+        requirements.append(_funds_requirement(analysis, STUDY_LIVING_FUNDS, "Living expenses (plus first-year tuition)"))
+        requirements.append(_clb_requirement("Language (program admission)", analysis.english, 7))
+    if 'work' in pathway or 'all' in pathway:
+        offer = re.search(r'job offer|lmia', profile.user_notes or '', re.IGNORECASE)
+        requirements.append(("Job offer / LMIA or open work permit basis", MET if offer else UNKNOWN,
+                             "Job offer noted" if offer else "Employer offer or eligible open permit stream"))
+    if 'quebec' in pathway:
+        requirements.append(_clb_requirement("French (oral)", analysis.french, 7, skills=('listening', 'speaking'), scale='NCLC'))
+        requirements.append(("Quebec Selection Certificate (CSQ)", UNKNOWN, "Issued after an Arrima invitation"))
+    if 'pnp' in pathway or 'provincial' in pathway:
+        requirements.append(_clb_requirement("Language (typical PNP stream)", analysis.english, 5))
+        requirements.append(("Provincial connection or job offer", UNKNOWN, "Depends on the province and stream"))
+    if 'citizen' in pathway:
+        if profile.age is not None and 18 <= profile.age <= 54:
+            requirements.append(_clb_requirement("Language (CLB 4 speaking/listening)", analysis.english, 4,
+                                                 skills=('listening', 'speaking')))
+        requirements.append(("1,095 days physical presence in 5 years", UNKNOWN, "Check with the IRCC presence calculator"))
+        requirements.append(("Tax filing (3 of last 5 years)", UNKNOWN, "Confirm filings with CRA"))
+    return requirements
+
+
+def _roadmap(analysis: ProfileAnalysis) -> List[Tuple[str, str, str, str, str, str]]:
+    """(Action, Current Status, Required Action, Impact, Timeline, Cost) rows"""
+    rows = []
+    english = analysis.english
+    base = analysis.crs.total if analysis.crs else None
+    pathway = analysis.pathway.lower()
+    scored = base is not None  # Express Entry, PNP or all pathways
+
+    if english.minimum is None and 'quebec' not in pathway:
+        rows.append(("English test", "No valid scores", "Take IELTS General or CELPIP", "Required for most pathways",
+                     "1-2 months", "CAD 300-340"))
+    elif scored and english.minimum < 9:
+        target = {skill: max(level, 9) for skill, level in english.clb.items()}
+        rows.append(("English test", f"CLB {english.minimum} (lowest skill)", "Retake to reach CLB 9 in all skills",
+                     f"+{estimate_crs(analysis, clb=target).total - base} CRS points", "2-3 months", "CAD 300-340"))
+    elif 'citizen' in pathway and english.minimum is not None and english.minimum < 4:
+        rows.append(("English test", f"CLB {english.minimum} (lowest skill)", "Reach CLB 4 speaking and listening",
+                     "Required for citizenship", "2-4 months", "CAD 300-340"))
+
+    if (scored or 'quebec' in pathway) and (analysis.french.minimum is None or analysis.french.minimum < 7):
+        current = f"NCLC {analysis.french.minimum}" if analysis.french.minimum is not None else "No French test"
+        impact = "Required for Quebec selection"
+        if scored:
+            impact = f"+{estimate_crs(analysis, french_clb=7).total - base} CRS points, French draws"
+        rows.append(("French (TEF/TCF Canada)", current, "Reach NCLC 7 in all skills", impact, "6-12 months", "CAD 390-450"))
+
+    if analysis.education and not _is_yes(analysis.profile.eca_completed) and ('express' in pathway or 'all' in pathway):
+        rows.append(("ECA assessment", "Not completed", "Order an ECA (e.g. WES) for the degree", "Required for FSW points",
+                     "4-8 weeks", "CAD 250-300"))
+
+    if analysis.canadian_years < 1 and base is not None:
+        gain = estimate_crs(analysis, canadian_years=1).total - base
+        rows.append(("Canadian work experience", "None", "Gain 1 year of skilled work in Canada", f"+{gain} CRS points, CEC",
+                     "12+ months", "N/A"))
+
+    if 'express' in pathway or 'pnp' in pathway or 'provincial' in pathway:
+        rows.append(("Provincial nomination", "Not nominated", "Apply to a matching PNP stream", "+600 CRS points",
+                     "6-18 months", "CAD 0-1,500"))
+
+    if any(requirement.startswith(FUNDS_REQUIREMENTS) and status == NOT_MET
+           for requirement, status, _ in analysis.requirements):
+        rows.append(("Proof of funds", f"CAD {analysis.funds:,} available", "Save and document the shortfall",
+                     "Required to apply", "Before applying", "N/A"))
+    return rows
+
+
+# Rendering
+
+def _cell(value: str) -> str:
+    return str(value).replace('|', '/').replace('\n', ' ')[:50]
+
+
+def _table(header: Tuple[str, ...], rows) -> str:
+    lines = ['| ' + ' | '.join(header) + ' |', '|' + '|'.join('-' * (len(title) + 2) for title in header) + '|']
+    lines += ['| ' + ' | '.join(_cell(value) for value in row) + ' |' for row in rows]
+    return '\n'.join(lines)
+
+
+def _profile_summary(analysis: ProfileAnalysis) -> str:
+    profile = analysis.profile
+    facts = []
+    if profile.age is not None:
+        facts.append(f"age {profile.age}")
+    if profile.citizenship:
+        facts.append(f"citizen of {profile.citizenship}")
+    if profile.residence_country and profile.residence_country != profile.citizenship:
+        facts.append(f"living in {profile.residence_country}")
+    # Never the requester's name: reports are cached and shared by profile, without identity
+    sentences = [f"The applicant{', ' + ', '.join(facts) if facts else ''}."]
+
+    if profile.highest_degree:
+        degree = profile.highest_degree + (f" in {profile.field_of_study}" if profile.field_of_study else "")
+        sentences.append(f"Holds a {degree}.")
+    if profile.foreign_experience_years is not None or profile.canadian_experience_years is not None:
+        experience = f"{analysis.foreign_years} year(s) of foreign"
+        if analysis.canadian_years:
+            experience += f" and {analysis.canadian_years} year(s) of Canadian"
+        noc = f" (NOC {profile.occupation_noc})" if profile.occupation_noc else ""
+        sentences.append(f"{experience[0].upper()}{experience[1:]} work experience{noc}.")
+    language = []
+    if analysis.english.minimum is not None:
+        language.append(f"English CLB {analysis.english.minimum}")
+    if analysis.french.minimum is not None:
+        language.append(f"French NCLC {analysis.french.minimum}")
+    if language:
+        sentences.append(f"Language (lowest skill): {', '.join(language)}.")
+
+    closing = f"Primary pathway: {analysis.pathway}."
+    if analysis.crs:
+        closing = f"Estimated CRS: {analysis.crs.total} points. " + closing
+    sentences.append(closing)
+    return ' '.join(sentences)
+
+
+def _eligibility(analysis: ProfileAnalysis) -> str:
+    blocks = []
+    if analysis.crs:
+        crs = analysis.crs
+        breakdown = ', '.join(f"{label} ({points})" for label, points in crs.parts)
+        blocks.append(f"**Express Entry CRS estimate:** {breakdown} = **{crs.total} points**")
+        if crs.missing:
+            blocks.append(f"Not scored (missing or unreadable): {', '.join(crs.missing)}.")
+        if analysis.has_spouse:
+            blocks.append("Scored with an accompanying spouse; spouse factors (up to 40 points) are not included.")
+        blocks.append("Recent all-program and CEC draws have typically required about 470-550 points; "
+                      "category-based draws (French, healthcare, trades, STEM) have gone lower.")
+    if analysis.requirements:
+        blocks.append('\n'.join(
+            f"- **{requirement}:** {status} - {detail}" for requirement, status, detail in analysis.requirements
+        ))
+    if not blocks:
+        blocks.append(f"No server-side rules for \"{analysis.pathway}\"; see the recommendations below.")
+    return '\n\n'.join(blocks)
+
+
+def render_sections(analysis: ProfileAnalysis) -> str:
+    """The title and the server-built sections, up to where the narrative starts"""
+    roadmap = (
+        _table(("Action", "Current Status", "Required Action", "Impact", "Timeline", "Cost"), analysis.roadmap)
+        if analysis.roadmap else "No score-changing actions identified; focus on the application steps below."
+    )
+    return '\n\n'.join([
+        REPORT_TITLE,
+        "## 👤 Profile Summary",
+        _profile_summary(analysis),
+        "---",
+        "## 🏁 Eligibility Analysis",
+        _eligibility(analysis),
+        "---",
+        "## 💡 Improvement Roadmap",
+        roadmap,
+        "---",
+    ]) + '\n\n'
+
+
+def narrative_facts(analysis: ProfileAnalysis) -> str:
+    """Computed results given to the LLM so the narrative agrees with the server-built sections"""
+    lines = []
+    if analysis.crs:
+        lines.append(f"- Estimated CRS: {analysis.crs.total}")
+    for requirement, status, detail in analysis.requirements:
+        lines.append(f"- {requirement}: {status.split(' ', 1)[1]} ({detail})")
+    for action, current, required, impact, timeline, _ in analysis.roadmap:
+        lines.append(f"- Roadmap: {required} ({impact}, {timeline})")
+    return '\n'.join(lines) or "- None"
+
+
+def normalize_narrative(narrative: str) -> str:
+    """
+    Keep the narrative from its first expected heading on, so a model that
+    repeats the title or earlier sections does not duplicate them.
+    """
+    text = narrative.strip()
+    positions = [text.find(heading) for heading in NARRATIVE_HEADINGS if heading in text]
+    if positions:
+        return text[min(positions):]
+    return f"{NARRATIVE_HEADINGS[0]}\n\n{text}"
+
+
+def assemble_report(profile: ImmigrationProfileSchema, narrative: str) -> str:
+    """The full report: server-built sections followed by the LLM narrative"""
+    return render_sections(analyze_profile(profile)) + normalize_narrative(narrative) + '\n'
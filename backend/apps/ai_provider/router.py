@@ -1,744 +1,281 @@
 from ninja import Router
-from typing import Optional, List
-from pydantic import BaseModel
 from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+import logging
+import os
+from datetime import timedelta
+from typing import Literal, Optional
 from ninja.errors import HttpError
 from ninja_jwt.authentication import JWTAuth
-import requests
-import json
-from apps.ai_provider.utils import (
-    markdown_to_pdf,
-    generate_pdf_filename,
-    get_pdf_storage_path,
-    get_pdf_url
+from apps.ai_provider.schemas import (
+    ImmigrationProfileSchema,
+    ImmigrationReportResponse,
+    ImmigrationReportListSchema,
+    ImmigrationReportPageSchema,
+    ReportSearchPageSchema,
+    ReportSearchResultSchema,
+    ReportUsageSummarySchema,
+    ImmigrationReportDetailSchema,
+    ReportJobSubmitResponse,
+    ReportJobStatusSchema,
 )
-from apps.core.models import ImmigrationReport
+from apps.ai_provider.services import (
+    ensure_api_key_configured,
+    ensure_report_html,
+    ensure_report_pdf,
+    generate_report,
+    serialize_report_response,
+)
+from apps.ai_provider.streaming import stream_report_events
+from apps.ai_provider.admission import (
+    admission_stats,
+    admit_stream,
+    async_admission_stats,
+    async_report_admission,
+    report_admission,
+)
+from apps.ai_provider.async_reports import generate_report_async
+from apps.ai_provider.jobs import enqueue_report_job
+from apps.ai_provider.profiles import profile_from_submission
+from apps.ai_provider.speculative import claim_speculative_report, speculative_stats
+from apps.ai_provider.cache import cache_stats
+from apps.ai_provider.downloads import download_stats, pdf_file_response, record_download
+from apps.ai_provider.client import get_openrouter_client
+from apps.ai_provider.instrumentation import StageTimer, stage_timing_stats
+from apps.ai_provider.model_routing import get_model_router
+from apps.ai_provider.singleflight import single_flight_stats
+from apps.ai_provider.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    decode_offset_cursor,
+    encode_offset_cursor,
+    paginate_reports,
+)
+from apps.ai_provider.pdf_pool import pdf_pool_stats
+from apps.ai_provider.report_html import report_html_stats
+from apps.ai_provider.search import search_backend, search_reports
+from apps.ai_provider.usage import usage_summary
+from apps.api.routers.admin import check_admin
+from apps.core.models import ImmigrationReport, PathwayAdvisorSubmission, ReportJob
 
 router = Router(tags=["AI Provider"])
+logger = logging.getLogger(__name__)
 
-# System Prompt Template
-SYSTEM_PROMPT = """You are a **senior Canadian Immigration Consultant (RCIC)** with 15+ years of experience. You write **direct, actionable, expert-level reports** that get straight to the point. No fluff, no generic praise, no filler—only useful, specific information.
-
-**CRITICAL RULES:**
-- **NEVER use placeholder language** like "scores to be confirmed" or "appears to be placeholder data"—work with the data provided
-- **NO generic praise** ("excellent position", "significant achievement")—be factual and specific
-- **NO repetition**—each sentence must add new value
-- **Be direct and actionable**—tell them exactly what to do, when, and why
-- **Focus on specifics**—use actual numbers, dates, and concrete steps
-- **ALWAYS generate complete content**—never return empty responses
-
----
-
-### 🧾 OUTPUT STRUCTURE (Markdown)
-
-Your answer **must** use the following structure and style. Write naturally, as if you personally reviewed their file:
-
----
-
-# 🇨🇦 Immigration Eligibility & Guidance Report
-
-## 👤 Profile Summary
-
-Provide a **concise, factual summary** (2-3 sentences max). State their age, education, experience, current CRS score (if applicable), and primary pathway. No fluff.
-
-**Example:**
-> "[Name], age [X], holds a [degree] with [Y] years of [Canadian/foreign] work experience. Current CRS: [score] points. Primary pathway: [Express Entry/PNP/Study Visa/etc.]."
-
----
-
-## 🏁 Eligibility Analysis
-
-**Be specific and factual.** Break down their eligibility with actual numbers and requirements:
-
-**For Express Entry:**
-- CRS breakdown: Age ([X] points), Education ([Y] points), Experience ([Z] points), Language ([W] points), Additional factors ([V] points) = Total: [score]
-- Recent draw cut-off range: [X-Y] points (cite if known, otherwise state "typically [range]")
-- Assessment: [Eligible/Not eligible/Needs improvement] - [specific reason]
-
-**For other pathways:** List each requirement and their status:
-- [Requirement 1]: ✅ Met / ❌ Not met - [specific gap]
-- [Requirement 2]: ✅ Met / ❌ Not met - [specific gap]
-
-**NO generic statements.** Every point must be specific and useful.
-
----
-
-## 💡 Improvement Roadmap
-
-**List only actionable steps that will actually improve their situation.** If they're already eligible, focus on optimization and next steps.
-
-**Format as a Markdown table. Each row must be on a separate line with proper pipe syntax:**
-
-| Action | Current Status | Required Action | Impact | Timeline | Cost |
-|--------|---------------|-----------------|--------|----------|------|
-| Language test | CLB [X] | Retake to achieve CLB [Y] | +[Z] points | [timeframe] | $[amount] |
-| ECA assessment | [Status] | [Specific action] | [Impact] | [timeframe] | $[amount] |
-
-**CRITICAL TABLE FORMATTING RULES:**
-- Each row MUST be on a separate line (no rows concatenated on same line)
-- Start AND end each row with a pipe character (|)
-- Use actual values from their profile, NOT placeholders - replace [X], [Status], [timeframe], [amount] with real data
-- Each row must have exactly 6 columns matching the header
-- NO empty cells - use "N/A" or "Not applicable" if needed
-- Keep cell content concise (max 50 characters per cell)
-- Only include steps that are actually needed and have measurable impact
-- The separator row (with dashes) must be on its own line between header and data rows
-- Ensure proper spacing - one space after each pipe, content aligned properly
 
----
+def get_request_user(request):
+    """Return the authenticated user for a request, or None for anonymous callers"""
+    if hasattr(request, 'user') and request.user.is_authenticated:
+        return request.user
+    return None
 
-## 🧭 Recommended Pathway
 
-**Provide a clear, chronological timeline with specific actions and deadlines.**
+def get_request_referer(request) -> str:
+    """Site URL sent to OpenRouter as the HTTP-Referer header"""
+    return request.build_absolute_uri('/') if hasattr(request, 'build_absolute_uri') else ""
 
-**Format:**
-**Phase 1: [Month range] - [Action]**
-- [Specific task 1] - Deadline: [date/timeline]
-- [Specific task 2] - Deadline: [date/timeline]
 
-**Phase 2: [Month range] - [Action]**
-- [Specific task 1] - Deadline: [date/timeline]
-- [Specific task 2] - Deadline: [date/timeline]
-
-**Phase 3: [Month range] - [Action]**
-- [Specific task 1] - Deadline: [date/timeline]
-
-**Expected Timeline to PR:** [X] months from [start point]
-
-If multiple pathways are viable, list them with **specific pros/cons and timelines**:
-- **Pathway A:** [Name] - Pros: [specific], Cons: [specific], Timeline: [X] months
-- **Pathway B:** [Name] - Pros: [specific], Cons: [specific], Timeline: [Y] months
-
----
-
-## 🧑‍💼 Professional Recommendations
-
-**Provide direct, actionable next steps with specific deadlines and requirements.**
-
-**Immediate Actions (This Week):**
-1. [Specific action] - [Why it's urgent] - Deadline: [date]
-2. [Specific action] - [Why it's urgent] - Deadline: [date]
-
-**Short-term (Next 30 Days):**
-1. [Specific action] - Required documents: [list], Cost: $[amount], Timeline: [timeframe]
-2. [Specific action] - Required documents: [list], Cost: $[amount], Timeline: [timeframe]
-
-**Medium-term (Next 3-6 Months):**
-1. [Specific action] - [Key details]
-2. [Specific action] - [Key details]
-
-**Important Notes:**
-- [Specific warning or critical information]
-- [Common mistake to avoid]
-- [Resource or contact information if relevant]
-
-**NO generic motivational statements.** End with specific next steps or critical reminders only.
-
----
-
-### ⚙️ Tone and Style Requirements
-
-- **Write like an expert consultant**—direct, professional, no fluff
-- **Be specific and factual**—use actual numbers, dates, and concrete information
-- **NO generic praise or filler**—every sentence must provide value
-- **NO repetition**—don't say the same thing twice
-- **Use active voice** and be direct
-- **Work with the data provided**—never say "placeholder" or "to be confirmed"
-- Use emojis only in section headers for visual organization
-- **Be confident and specific**—avoid "might", "could", "appears to be"
-- **Length: 400-800 words**—comprehensive but concise
-- **Focus on actionable information**—what they need to know, what they need to do
-
----
-
-### ⚠️ Critical Rules
-
-- **ALWAYS generate complete content**—never return empty responses
-- **Always write in Markdown format** with proper headers, lists, and tables
-- **Never hallucinate**—use only IRCC-official rules and logic
-- **NO generic statements**—every sentence must be specific to their profile
-- **NO filler or fluff**—remove any sentence that doesn't add actionable value
-- **Include specific numbers** (CRS scores, timelines, point breakdowns, costs) when applicable
-- **Work with provided data**—never dismiss data as "placeholder" or "to be confirmed"
-- **Be direct and actionable**—tell them exactly what to do, when, and why
-- **NO repetition**—each piece of information should appear only once
-- **Focus on useful information**—what they need to know to take action
-
-**Remember: This is an expert consultation report. Every word must be useful, specific, and actionable. No fluff, no generic praise, no filler.**"""
-
-
-class ImmigrationProfileSchema(BaseModel):
-    """Schema for immigration profile input"""
-    # User Information (optional for anonymous users)
-    user_name: Optional[str] = None
-    user_email: Optional[str] = None
-    user_phone: Optional[str] = None
-    
-    # Goal Path
-    path: str  # Study Visa, Work Permit, Express Entry, PNP, Quebec PR, Citizenship
-    
-    # Personal Information
-    age: Optional[int] = None
-    marital_status: Optional[str] = None
-    citizenship: Optional[str] = None
-    residence_country: Optional[str] = None
-    
-    # Education
-    highest_degree: Optional[str] = None
-    field_of_study: Optional[str] = None
-    canadian_credential: Optional[str] = None
-    eca_completed: Optional[str] = None
-    
-    # Language Proficiency
-    english_test: Optional[str] = None
-    english_scores: Optional[str] = None  # Format: "L/R/W/S" or "CLB X"
-    french_test: Optional[str] = None
-    french_scores: Optional[str] = None
-    
-    # Work Experience
-    foreign_experience_years: Optional[int] = None
-    canadian_experience_years: Optional[int] = None
-    occupation_noc: Optional[str] = None
-    
-    # Proof of Funds
-    funds: Optional[str] = None  # CAD amount
-    
-    # Family and Relatives
-    spouse: Optional[str] = None
-    sibling_in_canada: Optional[str] = None
-    relative_in_canada: Optional[str] = None
-    
-    # Additional Notes
-    user_notes: Optional[str] = None
-
-
-class ImmigrationReportResponse(BaseModel):
-    """Schema for immigration report response"""
-    id: str  # Report ID
-    report: str  # Markdown formatted report
-    pdf_filename: Optional[str] = None  # PDF filename (optional if PDF generation fails)
-    pdf_url: Optional[str] = None  # URL to access the PDF file (optional if PDF generation fails)
-    pdf_path: Optional[str] = None  # Full path to the PDF file (optional if PDF generation fails)
-    created_at: str  # Creation timestamp
-
-
-def build_user_prompt(profile: ImmigrationProfileSchema) -> str:
-    """Build the user prompt from profile data"""
-    prompt = """# 🧍 User Immigration Profile
-
-**Goal Path:** {path}  
-
-*(Choose one: Study Visa, Work Permit, Express Entry, PNP, Quebec PR, Citizenship)*
-
----
-
-## 👤 Personal Information
-
-- **Age:** {age}
-
-- **Marital Status:** {marital_status}
-
-- **Citizenship:** {citizenship}
-
-- **Current Country of Residence:** {residence_country}
-
----
-
-## 🎓 Education
-
-- **Highest Degree:** {highest_degree}
-
-- **Field of Study:** {field_of_study}
-
-- **Canadian Credential:** {canadian_credential}
-
-- **ECA Completed:** {eca_completed}
-
----
-
-## 🗣️ Language Proficiency
-
-- **English Test:** {english_test}
-
-- **Scores (L/R/W/S):** {english_scores}
-
-- **French Test:** {french_test}
-
-- **Scores (if any):** {french_scores}
-
----
-
-## 💼 Work Experience
-
-- **Foreign Experience (years):** {foreign_experience_years}
-
-- **Canadian Experience (years):** {canadian_experience_years}
-
-- **Occupation / NOC Code:** {occupation_noc}
-
----
-
-## 💰 Proof of Funds
-
-- **Available Settlement Funds (CAD):** {funds}
-
----
-
-## 👪 Family and Relatives
-
-- **Spouse Accompanying:** {spouse}
-
-- **Sibling in Canada:** {sibling_in_canada}
-
-- **Other Relatives in Canada:** {relative_in_canada}
-
----
+@router.post("/generate-report", response=ImmigrationReportResponse, auth=None)
+def generate_immigration_report(request, response: HttpResponse, payload: ImmigrationProfileSchema):
+    """
+    Generate an immigration eligibility report using OpenRouter API.
+    Accepts user profile data and returns a structured Markdown report.
+    Per-stage durations are returned in the ``Server-Timing`` header.
+    Returns 429 with ``Retry-After`` when too many reports are already in progress.
+    """
+    timer = StageTimer()
+    with report_admission(request):
+        report = generate_report(
+            payload,
+            user=get_request_user(request),
+            referer=get_request_referer(request),
+            timer=timer,
+        )
+    response['Server-Timing'] = timer.server_timing()
+    return ImmigrationReportResponse(**serialize_report_response(report))
 
-## 🧭 Additional Notes
 
-{user_notes}
+@router.post("/generate-report/async", response=ImmigrationReportResponse, auth=None)
+async def generate_immigration_report_async(request, response: HttpResponse, payload: ImmigrationProfileSchema):
+    """
+    Same as /generate-report, without holding a server thread during the
+    upstream call. Serve with an ASGI server (``uvicorn config.asgi:application``)
+    for one worker to hold many reports in flight.
+    """
+    user = await request.auser()
+    user = user if user.is_authenticated else None
+    timer = StageTimer()
+    async with async_report_admission(request, user):
+        report = await generate_report_async(
+            payload,
+            user=user,
+            referer=get_request_referer(request),
+            timer=timer,
+        )
+    response['Server-Timing'] = timer.server_timing()
+    return ImmigrationReportResponse(**serialize_report_response(report))
 
----
 
-# 🧩 Task
+@router.post("/submissions/{submission_id}/report", response=ImmigrationReportResponse, auth=None)
+def generate_submission_report(request, response: HttpResponse, submission_id: str):
+    """
+    Generate the report for a pathway advisor submission.
+    Returned at once when it was generated speculatively on completion
+    (``REPORT_SPECULATIVE_ENABLED``), or joins that generation if it is still running.
+    """
+    import uuid
+    try:
+        uuid.UUID(submission_id)
+    except ValueError:
+        raise HttpError(400, f"Invalid submission ID format: {submission_id}")
+    try:
+        submission = PathwayAdvisorSubmission.objects.get(id=submission_id)
+    except PathwayAdvisorSubmission.DoesNotExist:
+        raise HttpError(404, "Pathway submission not found")
+
+    profile = profile_from_submission(submission)
+    timer = StageTimer()
+    with report_admission(request):
+        report = generate_report(
+            profile,
+            user=get_request_user(request),
+            referer=get_request_referer(request),
+            timer=timer,
+        )
+    if report.cache_hit:
+        claim_speculative_report(profile)
+    response['Server-Timing'] = timer.server_timing()
+    return ImmigrationReportResponse(**serialize_report_response(report))
 
-Analyze the profile above according to IRCC's official rules for the selected pathway.
 
-Then produce a **complete Markdown report** in the format defined in your system prompt.
+@router.post("/generate-report/stream", auth=None)
+def stream_immigration_report(request, payload: ImmigrationProfileSchema):
+    """
+    Generate an immigration report, streaming the Markdown as Server-Sent Events.
+    The report is saved and its PDF rendered once the stream completes; the final
+    ``done`` event carries the same payload as /generate-report.
+    Returns 429 with ``Retry-After`` when too many reports are already in progress.
+    """
+    ensure_api_key_configured()
+    events = stream_report_events(
+        payload,
+        user=get_request_user(request),
+        referer=get_request_referer(request),
+    )
+    response = StreamingHttpResponse(
+        admit_stream(request, events),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Disable proxy buffering (nginx)
+    return response
 
-The report must include:
 
-- Profile summary  
+@router.post("/report-jobs", response={202: ReportJobSubmitResponse}, auth=None)
+def submit_report_job(request, payload: ImmigrationProfileSchema):
+    """
+    Queue an immigration report for background generation.
+    Returns a job ID immediately; poll the status endpoint and fetch the result when completed.
+    """
+    job = enqueue_report_job(
+        payload,
+        user=get_request_user(request),
+        referer=get_request_referer(request),
+    )
+    return 202, ReportJobSubmitResponse.from_job(job)
 
-- Eligibility status  
 
-- CRS breakdown (if applicable)  
+def get_report_job_or_404(job_id: str) -> ReportJob:
+    import uuid
+    try:
+        uuid.UUID(job_id)
+    except ValueError:
+        raise HttpError(400, f"Invalid job ID format: {job_id}")
+    try:
+        return ReportJob.objects.select_related('report').get(id=job_id)
+    except ReportJob.DoesNotExist:
+        raise HttpError(404, f"Report job not found with ID: {job_id}")
 
-- Improvement roadmap  
 
-- Step-by-step recommended pathway  
+@router.get("/report-jobs/{job_id}", response=ReportJobStatusSchema, auth=None)
+def get_report_job_status(request, job_id: str):
+    """
+    Get the status, current stage and progress of a report job.
+    """
+    return ReportJobStatusSchema.from_orm(get_report_job_or_404(job_id))
 
-- Professional consultant advice  
 
-- Motivational closing paragraph
-""".format(
-        path=profile.path or "Not specified",
-        age=profile.age or "Not specified",
-        marital_status=profile.marital_status or "Not specified",
-        citizenship=profile.citizenship or "Not specified",
-        residence_country=profile.residence_country or "Not specified",
-        highest_degree=profile.highest_degree or "Not specified",
-        field_of_study=profile.field_of_study or "Not specified",
-        canadian_credential=profile.canadian_credential or "Not specified",
-        eca_completed=profile.eca_completed or "Not specified",
-        english_test=profile.english_test or "Not specified",
-        english_scores=profile.english_scores or "Not specified",
-        french_test=profile.french_test or "Not specified",
-        french_scores=profile.french_scores or "Not specified",
-        foreign_experience_years=profile.foreign_experience_years or "Not specified",
-        canadian_experience_years=profile.canadian_experience_years or "Not specified",
-        occupation_noc=profile.occupation_noc or "Not specified",
-        funds=profile.funds or "Not specified",
-        spouse=profile.spouse or "Not specified",
-        sibling_in_canada=profile.sibling_in_canada or "Not specified",
-        relative_in_canada=profile.relative_in_canada or "Not specified",
-        user_notes=profile.user_notes or "None"
+@router.get("/report-jobs/{job_id}/result", response=ImmigrationReportResponse, auth=None)
+def get_report_job_result(request, job_id: str):
+    """
+    Get the generated report for a completed job.
+    Returns 409 while the job is still queued or running, and the job's error if it failed.
+    """
+    job = get_report_job_or_404(job_id)
+    if job.status == 'failed':
+        raise HttpError(job.error_status or 500, job.error_message or "Report generation failed")
+    if job.status != 'completed' or job.report is None:
+        raise HttpError(409, f"Report job is not finished yet (status: {job.status}, progress: {job.progress}%)")
+    return ImmigrationReportResponse(**serialize_report_response(job.report))
+
+
+def report_page(queryset, cursor: Optional[str], limit: int) -> ImmigrationReportPageSchema:
+    reports, next_cursor = paginate_reports(queryset, cursor, limit)
+    return ImmigrationReportPageSchema(
+        items=[ImmigrationReportListSchema.from_orm(report) for report in reports],
+        next_cursor=next_cursor,
     )
-    return prompt
 
 
-@router.post("/generate-report", response=ImmigrationReportResponse, auth=None)
-def generate_immigration_report(request, payload: ImmigrationProfileSchema):
+@router.get("/reports", response=ImmigrationReportPageSchema, auth=None)
+def list_immigration_reports(
+    request,
+    user_email: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+):
     """
-    Generate an immigration eligibility report using OpenRouter API.
-    Accepts user profile data and returns a structured Markdown report.
+    List immigration reports, newest first. Can filter by user_email.
+    Pass ``next_cursor`` from the response as ``cursor`` to get the next page.
     """
-    import logging
-    logger = logging.getLogger(__name__)
-    
-    print("=" * 80)
-    print("AI PROVIDER: Starting report generation")
-    print("=" * 80)
-    
-    # Check if API key is configured
-    if not settings.OPENROUTER_API_KEY:
-        print("ERROR: OpenRouter API key is not configured!")
-        raise HttpError(
-            500,
-            "OpenRouter API key is not configured. Please set OPENROUTER_API1 or OPENROUTER_API_KEY in your environment variables (.env file) and restart the Django server."
-        )
-    
-    print(f"✓ API Key configured (length: {len(settings.OPENROUTER_API_KEY)})")
-    print(f"✓ Using model: {settings.OPENROUTER_MODEL}")
-    print(f"✓ API URL: {settings.OPENROUTER_BASE_URL}")
-    
-    # Log incoming request
-    print("\n" + "-" * 80)
-    print("INCOMING REQUEST:")
-    print("-" * 80)
-    print(f"User: {payload.user_name} ({payload.user_email})")
-    print(f"Pathway: {payload.path}")
-    print(f"Age: {payload.age}")
-    print(f"Education: {payload.highest_degree}")
-    print(f"English Scores: {payload.english_scores}")
-    print(f"Canadian Experience: {payload.canadian_experience_years} years")
-    print(f"Foreign Experience: {payload.foreign_experience_years} years")
-    print(f"User Notes: {payload.user_notes}")
-    print("-" * 80)
-    
-    # Build user prompt from profile
-    print("\nBuilding user prompt from profile...")
-    user_prompt = build_user_prompt(payload)
-    print(f"✓ User prompt built (length: {len(user_prompt)} characters)")
-    print(f"✓ System prompt length: {len(SYSTEM_PROMPT)} characters")
-    
-    # Prepare OpenRouter API request
-    headers = {
-        "Authorization": f"Bearer {settings.OPENROUTER_API_KEY}",
-        "Content-Type": "application/json",
-        "HTTP-Referer": request.build_absolute_uri('/') if hasattr(request, 'build_absolute_uri') else "",
-        "X-Title": "Canada SaaS Immigration Advisor"
-    }
-    
-    payload_data = {
-        "model": settings.OPENROUTER_MODEL,
-        "messages": [
-            {
-                "role": "system",
-                "content": SYSTEM_PROMPT
-            },
-            {
-                "role": "user",
-                "content": user_prompt
-            }
-        ],
-        "temperature": 0.7,
-        "max_tokens": 2000
-    }
+    queryset = ImmigrationReport.objects.all()
     
-    print("\n" + "-" * 80)
-    print("SENDING REQUEST TO OPENROUTER API:")
-    print("-" * 80)
-    print(f"Model: {payload_data['model']}")
-    print(f"Temperature: {payload_data['temperature']}")
-    print(f"Max Tokens: {payload_data['max_tokens']}")
-    print(f"System Prompt Length: {len(payload_data['messages'][0]['content'])} chars")
-    print(f"User Prompt Length: {len(payload_data['messages'][1]['content'])} chars")
-    print("-" * 80)
+    if user_email:
+        queryset = queryset.filter(user_email=user_email)
     
-    try:
-        # Make request to OpenRouter API
-        print("\nMaking HTTP request to OpenRouter...")
-        response = requests.post(
-            settings.OPENROUTER_BASE_URL,
-            headers=headers,
-            json=payload_data,
-            timeout=60  # 60 second timeout
-        )
-        
-        print(f"✓ HTTP Response Status: {response.status_code}")
-        
-        # Check for HTTP errors
-        response.raise_for_status()
-        
-        # Parse response
-        response_data = response.json()
-        
-        print("\n" + "-" * 80)
-        print("OPENROUTER API RESPONSE:")
-        print("-" * 80)
-        print(f"Response keys: {list(response_data.keys())}")
-        
-        if "usage" in response_data:
-            usage = response_data["usage"]
-            print(f"Token Usage:")
-            print(f"  - Prompt tokens: {usage.get('prompt_tokens', 'N/A')}")
-            print(f"  - Completion tokens: {usage.get('completion_tokens', 'N/A')}")
-            print(f"  - Total tokens: {usage.get('total_tokens', 'N/A')}")
-        
-        if "model" in response_data:
-            print(f"Model used: {response_data['model']}")
-        
-        # Extract the report content
-        if "choices" in response_data and len(response_data["choices"]) > 0:
-            choice = response_data["choices"][0]
-            print(f"DEBUG: Choice keys: {list(choice.keys())}")
-            print(f"DEBUG: Choice structure: {choice}")
-            
-            # Try different possible content locations
-            if "message" in choice:
-                message = choice["message"]
-                print(f"DEBUG: Message keys: {list(message.keys())}")
-                print(f"DEBUG: Message structure: {message}")
-                
-                # Try standard content field
-                if "content" in message:
-                    report_content = message["content"]
-                # Try delta content (for streaming responses)
-                elif "delta" in message and "content" in message["delta"]:
-                    report_content = message["delta"]["content"]
-                else:
-                    print(f"ERROR: No content found in message. Message: {message}")
-                    raise HttpError(500, "No content found in OpenRouter API response message")
-            elif "text" in choice:
-                # Some models return text directly
-                report_content = choice["text"]
-            elif "delta" in choice and "content" in choice["delta"]:
-                report_content = choice["delta"]["content"]
-            else:
-                print(f"ERROR: Unexpected choice structure: {choice}")
-                raise HttpError(500, "Unexpected response format from OpenRouter API")
-            
-            # Validate content
-            if not report_content or len(report_content.strip()) == 0:
-                print("ERROR: Report content is empty!")
-                print(f"DEBUG: Full response_data: {json.dumps(response_data, indent=2)}")
-                raise HttpError(500, "OpenRouter API returned empty content. Please try again.")
-            
-            print(f"✓ Report content received (length: {len(report_content)} characters)")
-            print(f"✓ First 200 chars: {report_content[:200]}...")
-        else:
-            print("ERROR: Invalid response format - no choices found")
-            print(f"Response data: {json.dumps(response_data, indent=2)}")
-            raise HttpError(500, "Invalid response format from OpenRouter API")
-        
-        # Generate PDF from Markdown
-        print("\n" + "-" * 80)
-        print("PDF GENERATION PROCESS:")
-        print("-" * 80)
-        
-        pdf_filename = None
-        pdf_path = None
-        pdf_url = None
-        try:
-            print("Step 1: Generating PDF filename...")
-            pdf_filename = generate_pdf_filename()
-            print(f"✓ PDF filename: {pdf_filename}")
-            
-            print("Step 2: Getting PDF storage path...")
-            pdf_path = get_pdf_storage_path(pdf_filename)
-            print(f"✓ PDF storage path: {pdf_path}")
-            
-            print("Step 3: Converting Markdown to PDF...")
-            print(f"  - Markdown length: {len(report_content)} characters")
-            print(f"  - Output file: {pdf_path}")
-            markdown_to_pdf(report_content, pdf_path)
-            
-            # Check if file was created
-            import os
-            if os.path.exists(pdf_path):
-                file_size = os.path.getsize(pdf_path)
-                print(f"✓ PDF file created successfully!")
-                print(f"  - File size: {file_size} bytes ({file_size / 1024:.2f} KB)")
-            else:
-                print(f"⚠ WARNING: PDF file not found at {pdf_path}")
-            
-            print("Step 4: Generating PDF URL...")
-            pdf_url = get_pdf_url(pdf_filename)
-            print(f"✓ PDF URL: {pdf_url}")
-            
-            # Ensure PDF URL is properly formatted
-            if not pdf_url.startswith('http') and not pdf_url.startswith('/'):
-                pdf_url = f"/{pdf_url}"
-                print(f"✓ PDF URL formatted: {pdf_url}")
-            
-            print("-" * 80)
-            print("✓ PDF generation completed successfully!")
-            
-        except Exception as e:
-            # Log the full error for debugging
-            import traceback
-            error_details = traceback.format_exc()
-            print("\n" + "=" * 80)
-            print("PDF GENERATION ERROR:")
-            print("=" * 80)
-            print(f"Error: {str(e)}")
-            print(f"\nFull traceback:\n{error_details}")
-            print("=" * 80)
-            # Continue without PDF - return report anyway
-            print("⚠ WARNING: PDF generation failed, but continuing with markdown report.")
-        
-        # Save report to database
-        print("\n" + "-" * 80)
-        print("DATABASE STORAGE:")
-        print("-" * 80)
-        
-        try:
-            # Convert profile data to dict for JSON storage
-            profile_dict = payload.model_dump()
-            print(f"✓ Profile data converted to dict ({len(str(profile_dict))} chars)")
-            
-            # Get authenticated user if available
-            user = None
-            if hasattr(request, 'user') and request.user.is_authenticated:
-                user = request.user
-                print(f"✓ Authenticated user: {user.username}")
-            else:
-                print("✓ Anonymous user")
-            
-            print("Creating database record...")
-            # Create report record (PDF fields can be None if PDF generation failed)
-            report = ImmigrationReport.objects.create(
-                user_name=payload.user_name,
-                user_email=payload.user_email,
-                user_phone=payload.user_phone,
-                user=user,
-                profile_data=profile_dict,
-                report_markdown=report_content,
-                pdf_filename=pdf_filename or None,
-                pdf_path=pdf_path or None,
-                pdf_url=pdf_url or None,
-                pathway_goal=payload.path,
-                ai_model_used=settings.OPENROUTER_MODEL,
-            )
-            
-            print(f"✓ Report saved to database")
-            print(f"  - Report ID: {report.id}")
-            print(f"  - Created at: {report.created_at}")
-            print(f"  - PDF filename: {report.pdf_filename or 'None'}")
-            print(f"  - PDF URL: {report.pdf_url or 'None'}")
-            print(f"  - PDF path: {report.pdf_path or 'None'}")
-            
-            # Build response
-            response_data = {
-                "id": str(report.id),
-                "report": report_content,
-                "pdf_filename": pdf_filename,
-                "pdf_url": pdf_url,
-                "pdf_path": pdf_path,
-                "created_at": report.created_at.isoformat()
-            }
-            
-            print("\n" + "=" * 80)
-            print("FINAL RESPONSE:")
-            print("=" * 80)
-            print(f"Report ID: {response_data['id']}")
-            print(f"Report length: {len(response_data['report'])} characters")
-            print(f"PDF filename: {response_data['pdf_filename'] or 'None'}")
-            print(f"PDF URL: {response_data['pdf_url'] or 'None'}")
-            print(f"PDF path: {response_data['pdf_path'] or 'None'}")
-            print(f"Created at: {response_data['created_at']}")
-            print("=" * 80)
-            
-            return ImmigrationReportResponse(**response_data)
-        except Exception as e:
-            # If database save fails, still return the report but log the error
-            raise HttpError(
-                500,
-                f"Failed to save report to database: {str(e)}"
-            )
-        
-    except requests.exceptions.Timeout:
-        raise HttpError(504, "Request to OpenRouter API timed out. Please try again.")
-    except requests.exceptions.RequestException as e:
-        raise HttpError(
-            502,
-            f"Error communicating with OpenRouter API: {str(e)}"
-        )
-    except KeyError as e:
-        raise HttpError(
-            500,
-            f"Unexpected response format from OpenRouter API: {str(e)}"
-        )
-    except json.JSONDecodeError:
-        raise HttpError(500, "Invalid JSON response from OpenRouter API")
-    except Exception as e:
-        raise HttpError(
-            500,
-            f"An unexpected error occurred: {str(e)}"
-        )
-
-
-class ImmigrationReportListSchema(BaseModel):
-    """Schema for listing immigration reports"""
-    id: str
-    user_name: Optional[str] = None
-    user_email: Optional[str] = None
-    pathway_goal: Optional[str] = None
-    pdf_url: Optional[str] = None
-    created_at: str
-
-    @classmethod
-    def from_orm(cls, obj):
-        """Custom from_orm to handle UUID and datetime serialization"""
-        def serialize_datetime(value):
-            if value is None:
-                return None
-            if hasattr(value, 'isoformat'):
-                return value.isoformat()
-            return str(value)
-
-        return cls(
-            id=str(obj.id),
-            user_name=obj.user_name,
-            user_email=obj.user_email,
-            pathway_goal=obj.pathway_goal,
-            pdf_url=obj.pdf_url,
-            created_at=serialize_datetime(obj.created_at),
-        )
+    return report_page(queryset, cursor, limit)
 
-    class Config:
-        from_attributes = True
-
-
-class ImmigrationReportDetailSchema(BaseModel):
-    """Schema for detailed immigration report"""
-    id: str
-    user_name: Optional[str] = None
-    user_email: Optional[str] = None
-    user_phone: Optional[str] = None
-    profile_data: dict
-    report_markdown: str
-    pdf_filename: Optional[str] = None
-    pdf_url: Optional[str] = None
-    pdf_path: Optional[str] = None
-    pathway_goal: Optional[str] = None
-    ai_model_used: Optional[str] = None
-    created_at: str
-    updated_at: str
-
-    @classmethod
-    def from_orm(cls, obj):
-        """Custom from_orm to handle UUID and datetime serialization"""
-        def serialize_datetime(value):
-            if value is None:
-                return None
-            if hasattr(value, 'isoformat'):
-                return value.isoformat()
-            return str(value)
-
-        return cls(
-            id=str(obj.id),
-            user_name=obj.user_name,
-            user_email=obj.user_email,
-            user_phone=obj.user_phone,
-            profile_data=obj.profile_data or {},
-            report_markdown=obj.report_markdown or '',
-            pdf_filename=obj.pdf_filename,
-            pdf_url=obj.pdf_url,
-            pdf_path=obj.pdf_path,
-            pathway_goal=obj.pathway_goal,
-            ai_model_used=obj.ai_model_used,
-            created_at=serialize_datetime(obj.created_at),
-            updated_at=serialize_datetime(obj.updated_at),
-        )
 
-    class Config:
-        from_attributes = True
+# Relevance-ordered results are only paged this deep
+MAX_SEARCH_OFFSET = 1000
 
 
-@router.get("/reports", response=List[ImmigrationReportListSchema], auth=None)
-def list_immigration_reports(request, user_email: Optional[str] = None, limit: int = 50):
+@router.get("/reports/search", response=ReportSearchPageSchema, auth=JWTAuth())
+def search_immigration_reports(request, q: str, cursor: Optional[str] = None, limit: int = 20):
     """
-    List immigration reports. Can filter by user_email.
+    Full-text search over report content, names, emails and pathway (admin only).
+    Every word must match; results are ranked by relevance with a highlighted snippet.
     """
-    queryset = ImmigrationReport.objects.all()
-    
-    if user_email:
-        queryset = queryset.filter(user_email=user_email)
-    
-    reports = queryset[:limit]
-    return [ImmigrationReportListSchema.from_orm(report) for report in reports]
+    check_admin(request)
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise HttpError(400, f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    offset = decode_offset_cursor(cursor)
+    if offset >= MAX_SEARCH_OFFSET:
+        raise HttpError(400, "Search results are limited to the first 1000 matches; refine the query")
+
+    results, has_more = search_reports(q, limit, offset)
+    items = []
+    for report, rank, snippet in results:
+        item = ImmigrationReportListSchema.from_orm(report).model_dump()
+        items.append(ReportSearchResultSchema(**item, rank=rank, snippet=snippet))
+    next_offset = offset + limit
+    return ReportSearchPageSchema(
+        items=items,
+        next_cursor=encode_offset_cursor(next_offset) if has_more and next_offset < MAX_SEARCH_OFFSET else None,
+        backend=search_backend(),
+    )
 
 
 @router.get("/reports/{report_id}", response=ImmigrationReportDetailSchema, auth=None)
@@ -747,40 +284,151 @@ def get_immigration_report(request, report_id: str):
     Get a specific immigration report by ID.
     """
     import uuid
-    print(f"\n[GET REPORT] Fetching report with ID: {report_id}")
-    
+
     try:
         # Validate UUID format
         try:
             uuid.UUID(report_id)
         except ValueError:
-            print(f"[GET REPORT] ERROR: Invalid UUID format: {report_id}")
             raise HttpError(400, f"Invalid report ID format: {report_id}")
-        
-        print(f"[GET REPORT] UUID format valid, querying database...")
+
         report = ImmigrationReport.objects.get(id=report_id)
-        print(f"[GET REPORT] Report found: {report.id}, created: {report.created_at}")
-        
-        # Serialize using from_orm
-        serialized = ImmigrationReportDetailSchema.from_orm(report)
-        print(f"[GET REPORT] Report serialized successfully")
-        return serialized
-        
+        return ImmigrationReportDetailSchema.from_orm(report)
+
+    except HttpError:
+        raise
     except ImmigrationReport.DoesNotExist:
-        print(f"[GET REPORT] ERROR: Report not found in database")
         raise HttpError(404, f"Report not found with ID: {report_id}")
     except Exception as e:
-        print(f"[GET REPORT] ERROR: {str(e)}")
-        import traceback
-        print(f"[GET REPORT] Traceback: {traceback.format_exc()}")
+        logger.exception("Error retrieving report report_id=%s", report_id)
         raise HttpError(500, f"Error retrieving report: {str(e)}")
 
 
-@router.get("/reports/user/{user_email}", response=List[ImmigrationReportListSchema], auth=None)
-def get_user_reports(request, user_email: str):
+@router.get("/reports/{report_id}/pdf", auth=None)
+def download_immigration_report_pdf(request, report_id: str):
+    """
+    Download a report's PDF, rendering it on the first request if it has none yet.
+    The transfer is handed to the front proxy when REPORT_PDF_SENDFILE is set;
+    otherwise single byte ranges are served with 206. Conditional requests
+    (ETag / Last-Modified) get a 304.
+    """
+    import uuid
+    try:
+        uuid.UUID(report_id)
+    except ValueError:
+        raise HttpError(400, f"Invalid report ID format: {report_id}")
+    try:
+        # The body is only needed (and decompressed) if the PDF must be rendered first
+        report = ImmigrationReport.objects.defer('report_markdown', 'report_html', 'profile_data').get(id=report_id)
+    except ImmigrationReport.DoesNotExist:
+        raise HttpError(404, f"Report not found with ID: {report_id}")
+
+    report = ensure_report_pdf(report)
+    stat = os.stat(report.pdf_path)
+    if report.pdf_key:
+        # The key names what the file was rendered from, and stored files never change in place
+        etag = f'"{report.pdf_key}"'
+    else:
+        etag = f'"{report.id.hex}-{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    last_modified = int(stat.st_mtime)
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    response, counted = pdf_file_response(request, report.pdf_path, report.pdf_filename or f"{report.id}.pdf", etag)
+    if response.status_code != 416:
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        response['Cache-Control'] = f'private, max-age={settings.REPORT_PDF_CACHE_MAX_AGE}'
+    if counted:
+        record_download(report.id)
+    return response
+
+
+@router.get("/reports/{report_id}/html", auth=None)
+def get_immigration_report_html(request, report_id: str):
+    """
+    A report rendered to sanitized HTML for web viewing.
+    The render is cached per report content and renderer version; the ETag is
+    that cache key, so unchanged reports are revalidated with a 304.
+    """
+    import uuid
+    try:
+        uuid.UUID(report_id)
+    except ValueError:
+        raise HttpError(400, f"Invalid report ID format: {report_id}")
+    try:
+        report = ImmigrationReport.objects.get(id=report_id)
+    except ImmigrationReport.DoesNotExist:
+        raise HttpError(404, f"Report not found with ID: {report_id}")
+
+    html_key, report_html = ensure_report_html(report)
+    etag = f'"{html_key}"'
+    last_modified = int(report.created_at.timestamp())
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    response = HttpResponse(report_html, content_type='text/html; charset=utf-8')
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = 'private, max-age=86400'
+    # The fragment is sanitized; this also stops scripts if it is ever opened directly
+    response['Content-Security-Policy'] = "default-src 'none'; img-src https: data:; style-src 'unsafe-inline'"
+    response['X-Content-Type-Options'] = 'nosniff'
+    return response
+
+
+@router.get("/reports/user/{user_email}", response=ImmigrationReportPageSchema, auth=None)
+def get_user_reports(request, user_email: str, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE):
+    """
+    Get the reports for a specific user by email, newest first, one page at a time.
+    """
+    return report_page(ImmigrationReport.objects.filter(user_email=user_email), cursor, limit)
+
+
+@router.get("/usage", response=ReportUsageSummarySchema, auth=JWTAuth())
+def get_report_usage(
+    request,
+    group_by: Literal['day', 'model', 'pathway_goal', 'prompt_version'] = 'day',
+    days: int = 30,
+    model: Optional[str] = None,
+    pathway_goal: Optional[str] = None,
+    pipeline: Optional[str] = None,
+):
     """
-    Get all reports for a specific user by email.
+    Token usage, cost and latency of served reports over the last ``days``,
+    grouped per day, model, pathway goal or prompt version (admin only).
     """
-    reports = ImmigrationReport.objects.filter(user_email=user_email).order_by('-created_at')
-    return [ImmigrationReportListSchema.from_orm(report) for report in reports]
+    check_admin(request)
+    if not 1 <= days <= 366:
+        raise HttpError(400, "days must be between 1 and 366")
+    since = timezone.now() - timedelta(days=days)
+    return ReportUsageSummarySchema(
+        group_by=group_by,
+        since=since.isoformat(),
+        groups=usage_summary(group_by, since, model=model, pathway_goal=pathway_goal, pipeline=pipeline),
+    )
+
 
+@router.get("/metrics", auth=JWTAuth())
+def get_ai_provider_metrics(request):
+    """
+    Report generation runtime metrics for this process (admin only).
+    """
+    check_admin(request)
+    return {
+        "admission": admission_stats(),
+        "async_admission": async_admission_stats(),
+        "speculative": speculative_stats(),
+        "openrouter_client": get_openrouter_client().stats(),
+        "models": get_model_router().stats(),
+        "report_cache": cache_stats(),
+        "single_flight": single_flight_stats(),
+        "pdf_pool": pdf_pool_stats(),
+        "report_html": report_html_stats(),
+        "downloads": download_stats(),
+        "stage_timings": stage_timing_stats(),
+    }
@@ -0,0 +1,260 @@
+"""
+Request and response schemas for the AI provider endpoints
+"""
+from typing import List, Optional
+from pydantic import BaseModel
+
+
+def serialize_datetime(value):
+    if value is None:
+        return None
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+def report_pdf_url(report) -> str:
+    """Download endpoint for the report's PDF (rendered on first request if it has none yet)"""
+    return f"/api/ai-provider/reports/{report.id}/pdf"
+
+
+def report_html_url(report) -> str:
+    """Endpoint serving the report as sanitized HTML"""
+    return f"/api/ai-provider/reports/{report.id}/html"
+
+
+class ImmigrationProfileSchema(BaseModel):
+    """Schema for immigration profile input"""
+    # User Information (optional for anonymous users)
+    user_name: Optional[str] = None
+    user_email: Optional[str] = None
+    user_phone: Optional[str] = None
+    
+    # Goal Path
+    path: str  # Study Visa, Work Permit, Express Entry, PNP, Quebec PR, Citizenship
+    
+    # Personal Information
+    age: Optional[int] = None
+    marital_status: Optional[str] = None
+    citizenship: Optional[str] = None
+    residence_country: Optional[str] = None
+    
+    # Education
+    highest_degree: Optional[str] = None
+    field_of_study: Optional[str] = None
+    canadian_credential: Optional[str] = None
+    eca_completed: Optional[str] = None
+    
+    # Language Proficiency
+    english_test: Optional[str] = None
+    english_scores: Optional[str] = None  # Format: "L/R/W/S" or "CLB X"
+    french_test: Optional[str] = None
+    french_scores: Optional[str] = None
+    
+    # Work Experience
+    foreign_experience_years: Optional[int] = None
+    canadian_experience_years: Optional[int] = None
+    occupation_noc: Optional[str] = None
+    
+    # Proof of Funds
+    funds: Optional[str] = None  # CAD amount
+    
+    # Family and Relatives
+    spouse: Optional[str] = None
+    sibling_in_canada: Optional[str] = None
+    relative_in_canada: Optional[str] = None
+    
+    # Additional Notes
+    user_notes: Optional[str] = None
+
+
+class ImmigrationReportResponse(BaseModel):
+    """Schema for immigration report response"""
+    id: str  # Report ID
+    report: str  # Markdown formatted report
+    pdf_filename: Optional[str] = None  # PDF filename (optional if PDF generation fails)
+    pdf_url: Optional[str] = None  # URL to access the PDF file (optional if PDF generation fails)
+    pdf_path: Optional[str] = None  # Full path to the PDF file (optional if PDF generation fails)
+    cache_hit: bool = False  # True when served from the report cache
+    created_at: str  # Creation timestamp
+
+
+class ImmigrationReportListSchema(BaseModel):
+    """Schema for listing immigration reports"""
+    id: str
+    user_name: Optional[str] = None
+    user_email: Optional[str] = None
+    pathway_goal: Optional[str] = None
+    pdf_url: Optional[str] = None
+    ai_model_used: Optional[str] = None
+    created_at: str
+
+    @classmethod
+    def from_orm(cls, obj):
+        """Custom from_orm to handle UUID and datetime serialization"""
+        def serialize_datetime(value):
+            if value is None:
+                return None
+            if hasattr(value, 'isoformat'):
+                return value.isoformat()
+            return str(value)
+
+        return cls(
+            id=str(obj.id),
+            user_name=obj.user_name,
+            user_email=obj.user_email,
+            pathway_goal=obj.pathway_goal,
+            pdf_url=report_pdf_url(obj),
+            ai_model_used=obj.ai_model_used,
+            created_at=serialize_datetime(obj.created_at),
+        )
+
+    class Config:
+        from_attributes = True
+
+
+class ImmigrationReportPageSchema(BaseModel):
+    """One page of a report listing; pass ``next_cursor`` back as ``cursor`` for the next page"""
+    items: List[ImmigrationReportListSchema]
+    next_cursor: Optional[str] = None
+
+
+class ReportSearchResultSchema(ImmigrationReportListSchema):
+    """A report matching a search, with its relevance and a highlighted excerpt"""
+    rank: float
+    snippet: str  # HTML: escaped text with matches wrapped in <mark>
+
+
+class ReportSearchPageSchema(BaseModel):
+    """One page of search results, best match first"""
+    items: List[ReportSearchResultSchema]
+    next_cursor: Optional[str] = None
+    backend: str  # sqlite (FTS5), postgresql (tsvector) or basic (unindexed scan)
+
+
+class ReportUsageGroupSchema(BaseModel):
+    """Token usage and latency for one day, model, pathway goal or prompt version"""
+    group: Optional[str] = None  # ISO date, model id, pathway goal or prompt version
+    reports: int
+    cache_hits: int
+    cache_hit_rate: float
+    prompt_tokens: int
+    cached_prompt_tokens: int  # Part of prompt_tokens served from the provider's prompt cache
+    avg_prompt_tokens: Optional[float] = None
+    completion_tokens: int
+    total_tokens: int
+    avg_total_tokens: Optional[float] = None
+    cost: Optional[float] = None  # Credits, when the upstream reports cost
+    avg_upstream_ms: Optional[float] = None
+    max_upstream_ms: Optional[float] = None
+    avg_first_token_ms: Optional[float] = None  # Streamed reports only
+    avg_pdf_ms: Optional[float] = None
+    avg_total_ms: Optional[float] = None
+
+
+class ReportUsageSummarySchema(BaseModel):
+    """Report usage aggregated over a time window"""
+    group_by: str
+    since: str
+    groups: List[ReportUsageGroupSchema]
+
+
+class ImmigrationReportDetailSchema(BaseModel):
+    """Schema for detailed immigration report"""
+    id: str
+    user_name: Optional[str] = None
+    user_email: Optional[str] = None
+    user_phone: Optional[str] = None
+    profile_data: dict
+    report_markdown: str
+    html_url: Optional[str] = None  # Sanitized HTML render of report_markdown
+    pdf_filename: Optional[str] = None
+    pdf_url: Optional[str] = None
+    pdf_path: Optional[str] = None
+    pathway_goal: Optional[str] = None
+    ai_model_used: Optional[str] = None
+    cache_hit: bool = False
+    created_at: str
+    updated_at: str
+
+    @classmethod
+    def from_orm(cls, obj):
+        """Custom from_orm to handle UUID and datetime serialization"""
+        def serialize_datetime(value):
+            if value is None:
+                return None
+            if hasattr(value, 'isoformat'):
+                return value.isoformat()
+            return str(value)
+
+        return cls(
+            id=str(obj.id),
+            user_name=obj.user_name,
+            user_email=obj.user_email,
+            user_phone=obj.user_phone,
+            profile_data=obj.profile_data or {},
+            report_markdown=obj.report_markdown or '',
+            html_url=report_html_url(obj),
+            pdf_filename=obj.pdf_filename,
+            pdf_url=report_pdf_url(obj),
+            pdf_path=obj.pdf_path,
+            pathway_goal=obj.pathway_goal,
+            ai_model_used=obj.ai_model_used,
+            cache_hit=obj.cache_hit,
+            created_at=serialize_datetime(obj.created_at),
+            updated_at=serialize_datetime(obj.updated_at),
+        )
+
+    class Config:
+        from_attributes = True
+
+
+class ReportJobSubmitResponse(BaseModel):
+    """Schema returned when a report job is queued"""
+    job_id: str
+    status: str
+    status_url: str
+    result_url: str
+    created_at: str
+
+    @classmethod
+    def from_job(cls, job):
+        return cls(
+            job_id=str(job.id),
+            status=job.status,
+            status_url=f"/api/ai-provider/report-jobs/{job.id}",
+            result_url=f"/api/ai-provider/report-jobs/{job.id}/result",
+            created_at=serialize_datetime(job.created_at),
+        )
+
+
+class ReportJobStatusSchema(BaseModel):
+    """Schema for polling a report job"""
+    job_id: str
+    status: str  # queued, running, completed, failed
+    stage: str  # queued, llm, pdf, saving, done
+    progress: int  # 0-100
+    report_id: Optional[str] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+
+    @classmethod
+    def from_orm(cls, obj):
+        return cls(
+            job_id=str(obj.id),
+            status=obj.status,
+            stage=obj.stage,
+            progress=obj.progress,
+            report_id=str(obj.report_id) if obj.report_id else None,
+            error=obj.error_message,
+            attempts=obj.attempts,
+            created_at=serialize_datetime(obj.created_at),
+            started_at=serialize_datetime(obj.started_at),
+            finished_at=serialize_datetime(obj.finished_at),
+        )
+
+    class Config:
+        from_attributes = True
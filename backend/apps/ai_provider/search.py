@@ -0,0 +1,273 @@
+"""
+Full-text search over generated immigration reports.
+
+Two indexed backends, chosen by database vendor (see migration
+``core.0011_immigrationreport_search``):
+
+- **SQLite**: an FTS5 table ``immigration_reports_fts`` (porter stemming,
+  diacritics folded) kept up to date by ``post_save`` / ``post_delete``
+  signals. Its rowid is derived from the report UUID, so updates and deletes
+  are direct lookups.
+- **PostgreSQL**: a stored generated ``search_vector`` tsvector column with a
+  GIN index; the database maintains it on every write.
+
+Other databases fall back to an unindexed ``icontains`` scan, which only
+matches the body of reports stored uncompressed (see ``apps/core/fields.py``).
+The FTS5 table is filled from the decompressed value and PostgreSQL keeps
+``report_markdown`` plain, so the indexed backends are unaffected.
+
+Results are ranked (bm25 / ts_rank_cd; name and email weigh more than pathway,
+pathway more than the report body) and carry an HTML snippet with matches
+wrapped in ``<mark>``; all other snippet text is escaped.
+"""
+import html
+import logging
+import re
+import uuid
+from typing import List, Tuple
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.ai_provider.pagination import REPORT_LIST_FIELDS
+from apps.core.models import ImmigrationReport
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = 'immigration_reports_fts'
+INDEXED_FIELDS = ('user_name', 'user_email', 'pathway_goal', 'report_markdown')
+SNIPPET_WORDS = 16
+
+# Placeholders for match highlighting, swapped for <mark> after escaping
+_MARK_START = '\x02'
+_MARK_END = '\x03'
+
+_fts_available = None
+
+
+def fts_rowid(report_id: uuid.UUID) -> int:
+    """FTS5 rowid for a report: the top 63 bits of its UUID (fits SQLite's signed 64-bit rowid)"""
+    return report_id.int >> 65
+
+
+def search_backend() -> str:
+    """``sqlite`` (FTS5), ``postgresql`` (tsvector) or ``basic`` (unindexed scan)"""
+    global _fts_available
+    if connection.vendor == 'postgresql':
+        return 'postgresql'
+    if connection.vendor == 'sqlite':
+        if _fts_available is None:
+            # The migration skips the table when SQLite was built without FTS5
+            _fts_available = FTS_TABLE in connection.introspection.table_names()
+        if _fts_available:
+            return 'sqlite'
+    return 'basic'
+
+
+def _fts_values(report: ImmigrationReport) -> list:
+    return [fts_rowid(report.id), report.id.hex] + [getattr(report, field) or '' for field in INDEXED_FIELDS]
+
+
+def index_report(report: ImmigrationReport) -> None:
+    """Add or refresh a report in the SQLite FTS index (PostgreSQL maintains its own)"""
+    if search_backend() != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [fts_rowid(report.id)])
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, report_id, {', '.join(INDEXED_FIELDS)}) "
+            f"VALUES (%s, %s, %s, %s, %s, %s)",
+            _fts_values(report),
+        )
+
+
+def index_reports(reports: List[ImmigrationReport]) -> int:
+    """
+    Add newly created reports to the SQLite FTS index in one statement.
+    ``bulk_create`` sends no ``post_save`` signals, so bulk writers call this.
+    """
+    if search_backend() != 'sqlite':
+        return 0
+    with connection.cursor() as cursor:
+        return _insert_batch(cursor, [_fts_values(report) for report in reports])
+
+
+def unindex_report(report_id: uuid.UUID) -> None:
+    if search_backend() != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [fts_rowid(report_id)])
+
+
+def rebuild_search_index(batch_size: int = 500) -> int:
+    """
+    Re-index every report (SQLite only).
+
+    Returns:
+        Number of reports indexed (0 for backends that maintain themselves)
+    """
+    if search_backend() != 'sqlite':
+        return 0
+    columns = ('id',) + INDEXED_FIELDS
+    count = 0
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+            batch = []
+            for report in ImmigrationReport.objects.only(*columns).order_by().iterator(chunk_size=batch_size):
+                batch.append(_fts_values(report))
+                if len(batch) >= batch_size:
+                    count += _insert_batch(cursor, batch)
+                    batch = []
+            count += _insert_batch(cursor, batch)
+    return count
+
+
+def _insert_batch(cursor, rows: list) -> int:
+    if rows:
+        cursor.executemany(
+            f"INSERT INTO {FTS_TABLE} (rowid, report_id, {', '.join(INDEXED_FIELDS)}) "
+            f"VALUES (%s, %s, %s, %s, %s, %s)",
+            rows,
+        )
+    return len(rows)
+
+
+@receiver(post_save, sender=ImmigrationReport)
+def _index_saved_report(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not set(update_fields) & set(INDEXED_FIELDS):
+        return
+    try:
+        # Savepoint: a failed index write must not abort the caller's transaction
+        with transaction.atomic():
+            index_report(instance)
+    except Exception:
+        logger.exception("Failed to index report for search report_id=%s", instance.id)
+
+
+@receiver(post_delete, sender=ImmigrationReport)
+def _unindex_deleted_report(sender, instance, **kwargs):
+    try:
+        with transaction.atomic():
+            unindex_report(instance.id)
+    except Exception:
+        logger.exception("Failed to remove report from search index report_id=%s", instance.id)
+
+
+def _terms(query: str) -> List[str]:
+    return re.findall(r'\w+', query.lower())
+
+
+def _render_snippet(raw: str) -> str:
+    """Escape a raw snippet, strip Markdown punctuation and turn the match placeholders into <mark>"""
+    text = re.sub(r'[#*|>`_]+', ' ', raw)
+    text = ' '.join(text.split())
+    return html.escape(text).replace(_MARK_START, '<mark>').replace(_MARK_END, '</mark>')
+
+
+def search_reports(query: str, limit: int, offset: int = 0) -> Tuple[List[Tuple[ImmigrationReport, float, str]], bool]:
+    """
+    Ranked full-text search.
+
+    Args:
+        query: Free text; every word must match (stemmed where the backend supports it)
+        limit: Results to return
+        offset: Results to skip
+
+    Returns:
+        ``([(report, rank, snippet_html), ...], has_more)``; higher rank is better.
+        Reports are loaded with the list columns only.
+    """
+    terms = _terms(query)
+    if not terms:
+        return [], False
+
+    backend = search_backend()
+    if backend == 'sqlite':
+        hits = _search_sqlite(terms, limit + 1, offset)
+    elif backend == 'postgresql':
+        hits = _search_postgresql(query, limit + 1, offset)
+    else:
+        return _search_basic(terms, limit, offset)
+
+    has_more = len(hits) > limit
+    hits = hits[:limit]
+    reports = ImmigrationReport.objects.only(*REPORT_LIST_FIELDS).in_bulk([report_id for report_id, _, _ in hits])
+    results = [
+        (reports[report_id], rank, _render_snippet(snippet))
+        for report_id, rank, snippet in hits
+        if report_id in reports
+    ]
+    return results, has_more
+
+
+def _search_sqlite(terms: List[str], limit: int, offset: int) -> list:
+    # Each term quoted so FTS5 query syntax in user input is matched literally
+    match = ' '.join(f'"{term}"' for term in terms)
+    body_column = 1 + INDEXED_FIELDS.index('report_markdown')
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT report_id,
+                   -bm25({FTS_TABLE}, 0.0, 5.0, 5.0, 3.0, 1.0) AS score,
+                   snippet({FTS_TABLE}, {body_column}, %s, %s, '…', {SNIPPET_WORDS})
+            FROM {FTS_TABLE}
+            WHERE {FTS_TABLE} MATCH %s
+            ORDER BY score DESC
+            LIMIT %s OFFSET %s
+            """,
+            [_MARK_START, _MARK_END, match, limit, offset],
+        )
+        return [(uuid.UUID(report_id), score, snippet) for report_id, score, snippet in cursor.fetchall()]
+
+
+def _search_postgresql(query: str, limit: int, offset: int) -> list:
+    # Rank first, then build headlines (the expensive part) for the page only
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT page.id, page.score,
+                   ts_headline('english', r.report_markdown, page.q,
+                               %s)
+            FROM (
+                SELECT id, q, ts_rank_cd(search_vector, q) AS score
+                FROM immigration_reports, websearch_to_tsquery('english', %s) AS q
+                WHERE search_vector @@ q
+                ORDER BY score DESC, created_at DESC
+                LIMIT %s OFFSET %s
+            ) AS page
+            JOIN immigration_reports r ON r.id = page.id
+            ORDER BY page.score DESC, r.created_at DESC
+            """,
+            [
+                f"StartSel={_MARK_START}, StopSel={_MARK_END}, MaxWords={SNIPPET_WORDS}, MinWords=6, MaxFragments=2",
+                query,
+                limit,
+                offset,
+            ],
+        )
+        return cursor.fetchall()
+
+
+def _search_basic(terms: List[str], limit: int, offset: int):
+    queryset = ImmigrationReport.objects.only(*REPORT_LIST_FIELDS, 'report_markdown')
+    for term in terms:
+        queryset = queryset.filter(
+            Q(report_markdown__icontains=term) | Q(user_name__icontains=term)
+            | Q(user_email__icontains=term) | Q(pathway_goal__icontains=term)
+        )
+    reports = list(queryset.order_by('-created_at', '-id')[offset:offset + limit + 1])
+    results = [(report, 0.0, _basic_snippet(report.report_markdown, terms)) for report in reports[:limit]]
+    return results, len(reports) > limit
+
+
+def _basic_snippet(text: str, terms: List[str]) -> str:
+    lowered = text.lower()
+    positions = [lowered.find(term) for term in terms if term in lowered]
+    start = max(min(positions) - 80, 0) if positions else 0
+    window = text[start:start + 200]
+    pattern = re.compile('|'.join(re.escape(term) for term in terms), re.IGNORECASE)
+    marked = pattern.sub(lambda match: f"{_MARK_START}{match.group(0)}{_MARK_END}", window)
+    return _render_snippet(('…' if start else '') + marked + ('…' if start + 200 < len(text) else ''))
@@ -0,0 +1,744 @@
+"""
+Report generation pipeline shared by the synchronous endpoint and the job workers
+"""
+import json
+import logging
+import os
+import time
+from typing import Callable, Optional
+
+import requests
+from django.conf import settings
+from django.utils import timezone
+from ninja.errors import HttpError
+
+from apps.ai_provider.cache import (
+    attach_cached_report_pdf,
+    cache_entry_for_report,
+    get_cached_report,
+    report_cache_key,
+    store_cached_report,
+)
+from apps.ai_provider.client import get_openrouter_client
+from apps.ai_provider.instrumentation import StageTimer, record_timings, record_usage, stage
+from apps.ai_provider.model_routing import get_model_router
+from apps.ai_provider.pdf_pool import PDFRenderError, render_pdf
+from apps.ai_provider.prompts import build_report_prompt
+from apps.ai_provider.report_html import get_report_html, peek_report_html, report_html_key
+from apps.ai_provider.report_sections import assemble_report
+from apps.ai_provider.schemas import ImmigrationProfileSchema, report_pdf_url
+from apps.ai_provider.singleflight import acquire_report_flight
+from apps.ai_provider.storage import content_key_from_path, pdf_content_key, pdf_media_url, store_pdf
+from apps.ai_provider.usage import record_pdf_render, record_report_usage
+from apps.ai_provider.utils import generate_pdf_filename
+from apps.core.models import ImmigrationReport
+
+logger = logging.getLogger(__name__)
+
+
+# Progress reported to ``on_stage`` callbacks as each pipeline stage starts
+STAGE_PROGRESS = {
+    'llm': 10,
+    'pdf': 70,
+    'saving': 90,
+    'done': 100,
+}
+
+
+def ensure_api_key_configured() -> None:
+    """Fail fast with a 500 when no OpenRouter API key is configured"""
+    if not settings.OPENROUTER_API_KEY:
+        logger.error("OpenRouter API key is not configured")
+        raise HttpError(
+            500,
+            "OpenRouter API key is not configured. Please set OPENROUTER_API1 or OPENROUTER_API_KEY in your environment variables (.env file) and restart the Django server."
+        )
+
+
+def build_openrouter_request(profile: ImmigrationProfileSchema, referer: str = ""):
+    """
+    Build the headers and JSON body for an OpenRouter chat completion.
+
+    Returns:
+        A ``(headers, payload_data)`` tuple
+    """
+    with stage('prompt_build'):
+        prompt = build_report_prompt(profile)
+    logger.debug(
+        "Prompt built version=%s user_prompt_chars=%d system_prompt_chars=%d",
+        prompt.version, len(prompt.user), len(prompt.system),
+    )
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("User prompt:\n%s", prompt.user)
+
+    headers = {
+        "Authorization": f"Bearer {settings.OPENROUTER_API_KEY}",
+        "Content-Type": "application/json",
+        "HTTP-Referer": referer,
+        "X-Title": "Canada SaaS Immigration Advisor"
+    }
+
+    payload_data = {
+        "model": settings.OPENROUTER_MODELS[0],  # Replaced per attempt by the model router
+        "messages": [
+            {
+                "role": "system",
+                "content": system_message_content(prompt.system)
+            },
+            {
+                "role": "user",
+                "content": prompt.user
+            }
+        ],
+        "temperature": 0.7,
+        "max_tokens": prompt.max_tokens,
+        # Token counts and cost in the response (the final chunk when streaming)
+        "usage": {"include": True}
+    }
+    return headers, payload_data
+
+
+def system_message_content(system_prompt: str):
+    """
+    The system message content. With ``OPENROUTER_PROMPT_CACHE`` the static
+    prompt is sent as a text part with a ``cache_control`` breakpoint, so
+    providers with explicit prompt caching (Anthropic, Gemini) reuse it across
+    reports. It is off by default: only turn it on when every model in the
+    fallback chain accepts a multipart system message.
+    """
+    if not settings.OPENROUTER_PROMPT_CACHE:
+        return system_prompt
+    return [{"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}]
+
+
+def finish_report_content(profile: ImmigrationProfileSchema, completion: str) -> str:
+    """The report Markdown for a completion: the completion itself, or the server-built sections plus the narrative"""
+    if settings.REPORT_BUILDER != 'hybrid':
+        return completion
+    with stage('assemble'):
+        return assemble_report(profile, completion)
+
+
+def request_report_completion(headers: dict, payload_data: dict) -> dict:
+    """
+    Send the chat completion request to OpenRouter and return the parsed JSON.
+
+    Raises:
+        requests.exceptions.RequestException: On transport or HTTP errors
+    """
+    with stage('upstream'):
+        response_data, metrics = get_openrouter_client().post_json(payload_data, headers)
+    usage = response_data.get("usage") or {}
+    record_usage(usage)
+    logger.info(
+        "OpenRouter response model=%s status=%s connect_ms=%.0f reused=%s wait_ms=%.0f total_ms=%.0f "
+        "prompt_tokens=%s completion_tokens=%s",
+        response_data.get("model", payload_data["model"]),
+        metrics.status_code,
+        metrics.connect_ms,
+        metrics.reused_connection,
+        metrics.wait_ms,
+        metrics.total_ms,
+        usage.get("prompt_tokens"),
+        usage.get("completion_tokens"),
+    )
+    return response_data
+
+
+def stream_report_completion(headers: dict, payload_data: dict, on_usage: Optional[Callable[[dict], None]] = None):
+    """
+    Send a streaming chat completion request to OpenRouter and yield content deltas.
+
+    OpenRouter streams OpenAI-style Server-Sent Events: ``data: {json}`` lines,
+    ``: comment`` keep-alive lines while the model is queued, and a final
+    ``data: [DONE]``. Token usage arrives in the last chunk and is passed to
+    ``on_usage``.
+
+    Yields:
+        Markdown text fragments as they arrive
+
+    Raises:
+        requests.exceptions.RequestException: On transport or HTTP errors
+        HttpError: If the stream reports an upstream error
+    """
+    payload_data = {**payload_data, "stream": True}
+    with get_openrouter_client().stream_lines(payload_data, headers) as (lines, metrics):
+        logger.info(
+            "OpenRouter stream opened model=%s status=%s connect_ms=%.0f headers_ms=%.0f",
+            payload_data['model'],
+            metrics.status_code,
+            metrics.connect_ms,
+            metrics.wait_ms,
+        )
+        for line in lines:
+            if not line or line.startswith(':'):
+                continue
+            if not line.startswith('data:'):
+                continue
+            data = line[len('data:'):].strip()
+            if data == '[DONE]':
+                break
+            chunk = json.loads(data)
+            if "error" in chunk:
+                error = chunk["error"]
+                message = error.get("message") if isinstance(error, dict) else str(error)
+                raise HttpError(502, f"Error communicating with OpenRouter API: {message}")
+            if chunk.get("usage") and on_usage is not None:
+                on_usage(chunk["usage"])
+            for choice in chunk.get("choices", []):
+                delta = choice.get("delta") or {}
+                content = delta.get("content") or choice.get("text")
+                if content:
+                    yield content
+
+
+def extract_report_content(response_data: dict) -> str:
+    """
+    Pull the Markdown report out of an OpenRouter chat completion response.
+
+    Raises:
+        HttpError: If the response has no usable content
+    """
+    with stage('extract'):
+        return _extract_report_content(response_data)
+
+
+def _dump_response(response_data: dict) -> None:
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("OpenRouter response:\n%s", json.dumps(response_data, indent=2))
+
+
+def _extract_report_content(response_data: dict) -> str:
+    if "choices" not in response_data or len(response_data["choices"]) == 0:
+        logger.error("Invalid OpenRouter response format: no choices")
+        _dump_response(response_data)
+        raise HttpError(500, "Invalid response format from OpenRouter API")
+
+    choice = response_data["choices"][0]
+
+    # Try different possible content locations
+    if "message" in choice:
+        message = choice["message"]
+        # Try standard content field
+        if "content" in message:
+            report_content = message["content"]
+        # Try delta content (for streaming responses)
+        elif "delta" in message and "content" in message["delta"]:
+            report_content = message["delta"]["content"]
+        else:
+            logger.error("No content in OpenRouter response message keys=%s", sorted(message))
+            _dump_response(response_data)
+            raise HttpError(500, "No content found in OpenRouter API response message")
+    elif "text" in choice:
+        # Some models return text directly
+        report_content = choice["text"]
+    elif "delta" in choice and "content" in choice["delta"]:
+        report_content = choice["delta"]["content"]
+    else:
+        logger.error("Unexpected OpenRouter choice structure keys=%s", sorted(choice))
+        _dump_response(response_data)
+        raise HttpError(500, "Unexpected response format from OpenRouter API")
+
+    # Validate content
+    if not report_content or len(report_content.strip()) == 0:
+        logger.error("OpenRouter returned empty report content")
+        _dump_response(response_data)
+        raise HttpError(500, "OpenRouter API returned empty content. Please try again.")
+
+    logger.debug("Report content received chars=%d", len(report_content))
+    return report_content
+
+
+def is_model_failure(exc: Exception) -> bool:
+    """
+    Whether a failed attempt counts against the model's health.
+
+    Authentication errors would fail the same way on every model, so they
+    neither open the model's circuit nor trigger a fallback.
+    """
+    if isinstance(exc, requests.exceptions.HTTPError):
+        return getattr(exc.response, 'status_code', None) not in (401, 403)
+    return True
+
+
+def complete_report_with_fallback(headers: dict, payload_data: dict):
+    """
+    Request the report from each model in routing order until one returns usable content.
+
+    Returns:
+        A ``(report_content, model)`` tuple
+
+    Raises:
+        The last model's error, or HttpError 503 if every model's circuit is open
+    """
+    router = get_model_router()
+    last_error = None
+    for model in router.plan():
+        if not router.begin(model):
+            continue
+        start = time.perf_counter()
+        try:
+            response_data = request_report_completion(headers, {**payload_data, "model": model})
+            report_content = extract_report_content(response_data)
+        except Exception as e:
+            if not is_model_failure(e):
+                router.cancel(model)
+                raise
+            router.record_failure(model, (time.perf_counter() - start) * 1000)
+            last_error = e
+            logger.warning("Model failed, trying the next model model=%s error=%s", model, str(e))
+            continue
+        router.record_success(model, (time.perf_counter() - start) * 1000)
+        return report_content, model
+
+    if last_error is not None:
+        raise last_error
+    raise HttpError(503, "All report models are temporarily unavailable. Please try again shortly.")
+
+
+def stream_report_with_fallback(headers: dict, payload_data: dict, timer: Optional[StageTimer] = None):
+    """
+    Stream the report from the first model in routing order that produces content.
+
+    A model is only given up for the next one before it has streamed anything;
+    once fragments have been relayed to the client, an error ends the stream.
+    Upstream time and token usage are added to ``timer`` explicitly because a
+    generator's steps do not run inside the caller's active timer.
+
+    Yields:
+        ``('model', model)`` as each attempt starts, then ``('content', fragment)`` per delta
+
+    Raises:
+        The last model's error, or HttpError 503 if every model's circuit is open
+    """
+    router = get_model_router()
+    last_error = None
+    for model in router.plan():
+        if not router.begin(model):
+            continue
+        start = time.perf_counter()
+        streamed = False
+        has_text = False
+        try:
+            yield 'model', model
+            on_usage = timer.add_usage if timer is not None else None
+            for content in stream_report_completion(headers, {**payload_data, "model": model}, on_usage=on_usage):
+                if not streamed and timer is not None:
+                    # Time to first token of the attempt that answered (prompt size and caching show here)
+                    timer.add('first_token', (time.perf_counter() - start) * 1000)
+                streamed = True
+                has_text = has_text or bool(content.strip())
+                yield 'content', content
+            if not has_text:
+                raise HttpError(500, "OpenRouter API returned empty content. Please try again.")
+        except GeneratorExit:
+            # Client disconnected; says nothing about the model
+            router.cancel(model)
+            raise
+        except Exception as e:
+            if not is_model_failure(e):
+                router.cancel(model)
+                raise
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            router.record_failure(model, elapsed_ms)
+            if timer is not None:
+                timer.add('upstream', elapsed_ms)
+            if streamed:
+                raise
+            last_error = e
+            logger.warning("Model failed, trying the next model model=%s error=%s", model, str(e))
+            continue
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        router.record_success(model, elapsed_ms)
+        if timer is not None:
+            timer.add('upstream', elapsed_ms)
+        return
+
+    if last_error is not None:
+        raise last_error
+    raise HttpError(503, "All report models are temporarily unavailable. Please try again shortly.")
+
+
+def render_report_pdf(report_content: str, report_html: Optional[str] = None, theme: Optional[str] = None):
+    """
+    Render the report Markdown to a PDF in content-addressed storage.
+
+    The Markdown is converted through the shared HTML render (see
+    ``report_html``), so the web view and the PDF never convert it twice.
+    Identical reports share one stored file (see ``storage``); if it already
+    exists, nothing is rendered. PDF generation is best-effort: failures are
+    logged and the report is still returned without a PDF.
+
+    Args:
+        report_content: The report Markdown
+        report_html: Its already-rendered HTML, if the caller has it
+        theme: ``pdf_styles`` theme to render with (default ``REPORT_PDF_THEME``)
+
+    Returns:
+        A ``(pdf_filename, pdf_path, pdf_url)`` tuple, all ``None`` on failure.
+        ``pdf_filename`` is the download name; the stored file is named by content.
+    """
+    theme = theme or settings.REPORT_PDF_THEME
+    try:
+        with stage('pdf'):
+            if report_html is None:
+                html_key, report_html = get_report_html(report_content)
+            else:
+                html_key = report_html_key(report_content)
+            pdf_key = pdf_content_key(html_key, theme)
+            pdf_path, reused = store_pdf(pdf_key, lambda path: render_pdf(report_html, path, theme))
+
+        pdf_filename = generate_pdf_filename()
+        logger.info(
+            "PDF %s key=%s size_kb=%.2f",
+            "reused" if reused else "created",
+            pdf_key[:12],
+            os.path.getsize(pdf_path) / 1024,
+        )
+
+        pdf_url = pdf_media_url(pdf_key)
+        # Ensure PDF URL is properly formatted
+        if not pdf_url.startswith('http') and not pdf_url.startswith('/'):
+            pdf_url = f"/{pdf_url}"
+        return pdf_filename, pdf_path, pdf_url
+
+    except PDFRenderError as e:
+        # Stopped or failed in an isolated renderer; the web worker is unaffected
+        logger.warning("PDF generation failed reason=%s error=%s; continuing with the markdown report", e.reason, str(e))
+        return None, None, None
+    except Exception:
+        # Continue without PDF - return report anyway
+        logger.exception("PDF generation failed; continuing with the markdown report")
+        return None, None, None
+
+
+def ensure_report_pdf(report: ImmigrationReport) -> ImmigrationReport:
+    """
+    Make sure a stored report has a PDF on disk, rendering it on first use.
+
+    Used by the download endpoint for reports saved without a PDF (lazy mode,
+    or an earlier render that failed). Concurrent first downloads of the same
+    report resolve to the same stored file; only the first claim is written.
+
+    Raises:
+        HttpError: If the PDF cannot be rendered
+    """
+    if report.pdf_path and os.path.exists(report.pdf_path):
+        return report
+
+    started = time.perf_counter()
+    _, report_html = ensure_report_html(report)
+    pdf_filename, pdf_path, pdf_url = render_report_pdf(report.report_markdown, report_html)
+    pdf_ms = (time.perf_counter() - started) * 1000
+    if not pdf_path or not os.path.exists(pdf_path):
+        raise HttpError(500, "Failed to generate the report PDF. Please try again.")
+
+    pdf_key = content_key_from_path(pdf_path)
+    claimed = ImmigrationReport.objects.filter(id=report.id, pdf_path=report.pdf_path).update(
+        pdf_filename=pdf_filename,
+        pdf_path=pdf_path,
+        pdf_url=pdf_url,
+        pdf_key=pdf_key,
+        updated_at=timezone.now(),
+    )
+    if not claimed:
+        # Another download claimed it first; the stored file is shared, so nothing to clean up
+        report.refresh_from_db()
+        return report
+
+    report.pdf_filename, report.pdf_path, report.pdf_url = pdf_filename, pdf_path, pdf_url
+    report.pdf_key = pdf_key
+    if report.cache_key:
+        attach_cached_report_pdf(report.cache_key, report)
+    record_pdf_render(report.id, pdf_ms)
+    logger.info("PDF rendered on demand report_id=%s", report.id)
+    return report
+
+
+def ensure_report_html(report: ImmigrationReport):
+    """
+    The report's sanitized HTML, rendering and storing it on the row if it has
+    no render for the current renderer version yet.
+
+    Returns:
+        ``(report_html_key, html)``
+    """
+    key, report_html = get_report_html(report.report_markdown, report.report_html_key, report.report_html)
+    if report.report_html_key != key:
+        ImmigrationReport.objects.filter(id=report.id).update(report_html=report_html, report_html_key=key)
+        report.report_html, report.report_html_key = report_html, key
+    return key, report_html
+
+
+def build_immigration_report(
+    profile: ImmigrationProfileSchema,
+    report_content: str,
+    pdf_filename: Optional[str] = None,
+    pdf_path: Optional[str] = None,
+    pdf_url: Optional[str] = None,
+    user=None,
+    cache_key: Optional[str] = None,
+    cache_hit: bool = False,
+    ai_model_used: Optional[str] = None,
+    report_html: Optional[str] = None,
+) -> ImmigrationReport:
+    """
+    An unsaved report row for a generated report (for ``save_immigration_report``
+    or a ``bulk_create``). The HTML render is included when the caller passes it
+    or the PDF stage already produced one in this process.
+    """
+    html_key = report_html_key(report_content)
+    if report_html is None:
+        report_html = peek_report_html(html_key)
+    return ImmigrationReport(
+        user_name=profile.user_name,
+        user_email=profile.user_email,
+        user_phone=profile.user_phone,
+        user=user,
+        profile_data=profile.model_dump(),
+        report_markdown=report_content,
+        pdf_filename=pdf_filename or None,
+        pdf_path=pdf_path or None,
+        pdf_url=pdf_url or None,
+        pdf_key=content_key_from_path(pdf_path),
+        pathway_goal=profile.path,
+        ai_model_used=ai_model_used or settings.OPENROUTER_MODEL,
+        cache_key=cache_key,
+        cache_hit=cache_hit,
+        report_html=report_html,
+        report_html_key=html_key if report_html is not None else None,
+    )
+
+
+def save_immigration_report(
+    profile: ImmigrationProfileSchema,
+    report_content: str,
+    pdf_filename: Optional[str] = None,
+    pdf_path: Optional[str] = None,
+    pdf_url: Optional[str] = None,
+    user=None,
+    cache_key: Optional[str] = None,
+    cache_hit: bool = False,
+    ai_model_used: Optional[str] = None,
+) -> ImmigrationReport:
+    """
+    Persist a generated report (PDF fields can be None if PDF generation failed).
+    The HTML render is stored with it when the PDF stage already produced one.
+    """
+    report = build_immigration_report(
+        profile, report_content, pdf_filename, pdf_path, pdf_url,
+        user=user, cache_key=cache_key, cache_hit=cache_hit, ai_model_used=ai_model_used,
+    )
+    try:
+        with stage('db_insert'):
+            report.save(force_insert=True)
+    except Exception as e:
+        raise HttpError(
+            500,
+            f"Failed to save report to database: {str(e)}"
+        )
+    logger.info("Report saved report_id=%s cache_hit=%s", report.id, cache_hit)
+    return report
+
+
+def save_cached_report(
+    profile: ImmigrationProfileSchema,
+    cache_key: str,
+    cached: dict,
+    user=None,
+    on_stage: Optional[Callable[[str, int], None]] = None,
+) -> ImmigrationReport:
+    """
+    Record a report served from the cache (or another request's flight) as a
+    new row for this requester.
+
+    The Markdown and PDF are shared with the original report; the PDF is only
+    re-rendered if its file has been removed since (or left to the first
+    download in lazy mode).
+    """
+    pdf_filename, pdf_path, pdf_url = cached['pdf_filename'], cached['pdf_path'], cached['pdf_url']
+    if pdf_path and not os.path.exists(pdf_path):
+        pdf_filename = pdf_path = pdf_url = None
+    if not pdf_path and not settings.REPORT_PDF_LAZY:
+        if on_stage:
+            on_stage('pdf', STAGE_PROGRESS['pdf'])
+        pdf_filename, pdf_path, pdf_url = render_report_pdf(cached['report_markdown'])
+    if on_stage:
+        on_stage('saving', STAGE_PROGRESS['saving'])
+    return save_immigration_report(
+        profile,
+        cached['report_markdown'],
+        pdf_filename,
+        pdf_path,
+        pdf_url,
+        user=user,
+        cache_key=cache_key,
+        cache_hit=True,
+        ai_model_used=cached.get('ai_model_used'),
+    )
+
+
+def join_report_flight(
+    profile: ImmigrationProfileSchema,
+    cache_key: str,
+    user=None,
+    on_stage: Optional[Callable[[str, int], None]] = None,
+):
+    """
+    Serve a report from the cache or an identical in-flight request, or take
+    the lead on generating it.
+
+    Returns:
+        ``(report, None)`` when the report was served without an upstream call,
+        or ``(None, flight)`` when the caller is the flight leader and must
+        generate the report, then call ``flight.complete`` or ``flight.fail``
+
+    Raises:
+        HttpError: If the identical request this one joined failed
+    """
+    while True:
+        with stage('cache_lookup'):
+            cached = get_cached_report(cache_key)
+        if cached:
+            logger.info("Report cache hit cache_key=%s", cache_key[:12])
+            return save_cached_report(profile, cache_key, cached, user=user, on_stage=on_stage), None
+
+        flight = acquire_report_flight(cache_key)
+        if flight.is_leader:
+            # A flight that finished between the cache lookup and acquiring
+            # leadership has already stored its result
+            cached = get_cached_report(cache_key)
+            if cached:
+                try:
+                    report = save_cached_report(profile, cache_key, cached, user=user, on_stage=on_stage)
+                except Exception:
+                    # Followers would otherwise poll until the lease expires
+                    flight.abandon()
+                    raise
+                flight.complete(report)
+                return report, None
+            return None, flight
+
+        logger.info("Joining in-flight report generation cache_key=%s", cache_key[:12])
+        with stage('flight_wait'):
+            shared = flight.wait()
+        if shared is not None:
+            entry = cache_entry_for_report(shared)
+            return save_cached_report(profile, cache_key, entry, user=user, on_stage=on_stage), None
+        # The leader abandoned the flight; try again, possibly as leader
+
+
+def serialize_report_response(report: ImmigrationReport) -> dict:
+    """Build the ``ImmigrationReportResponse`` payload for a stored report"""
+    return {
+        "id": str(report.id),
+        "report": report.report_markdown,
+        "pdf_filename": report.pdf_filename,
+        "pdf_url": report_pdf_url(report),
+        "pdf_path": report.pdf_path,
+        "cache_hit": report.cache_hit,
+        "created_at": report.created_at.isoformat()
+    }
+
+
+def as_http_error(exc: Exception) -> HttpError:
+    """Map an exception raised while generating a report to the HttpError the API surfaces"""
+    if isinstance(exc, HttpError):
+        return exc
+    if isinstance(exc, requests.exceptions.Timeout):
+        return HttpError(504, "Request to OpenRouter API timed out. Please try again.")
+    if isinstance(exc, requests.exceptions.RequestException):
+        return HttpError(
+            502,
+            f"Error communicating with OpenRouter API: {str(exc)}"
+        )
+    if isinstance(exc, KeyError):
+        return HttpError(
+            500,
+            f"Unexpected response format from OpenRouter API: {str(exc)}"
+        )
+    if isinstance(exc, json.JSONDecodeError):
+        return HttpError(500, "Invalid JSON response from OpenRouter API")
+    return HttpError(
+        500,
+        f"An unexpected error occurred: {str(exc)}"
+    )
+
+
+def generate_report(
+    profile: ImmigrationProfileSchema,
+    user=None,
+    referer: str = "",
+    on_stage: Optional[Callable[[str, int], None]] = None,
+    pipeline: str = 'sync',
+    timer: Optional[StageTimer] = None,
+) -> ImmigrationReport:
+    """
+    Run the full report pipeline: LLM completion, PDF rendering and persistence.
+
+    Args:
+        profile: The immigration profile to report on
+        user: Authenticated user to attach the report to, if any
+        referer: Value for the ``HTTP-Referer`` header sent to OpenRouter
+        on_stage: Optional ``callback(stage, progress)`` called as each stage starts
+        pipeline: Label for the recorded stage timings (``sync``, ``job``, ...)
+        timer: Timer to record stage durations into, e.g. to build a ``Server-Timing`` header
+
+    Returns:
+        The saved ``ImmigrationReport``
+
+    Raises:
+        HttpError: With the status code the API should surface
+    """
+    def report_stage(name):
+        if on_stage:
+            on_stage(name, STAGE_PROGRESS[name])
+
+    ensure_api_key_configured()
+    logger.info("Starting report generation pipeline=%s pathway=%s", pipeline, profile.path)
+
+    timer = timer or StageTimer()
+    outcome = 'error'
+    model = None
+    flight = None
+    report = None
+    with timer.activate():
+        try:
+            cache_key = report_cache_key(profile)
+            report, flight = join_report_flight(profile, cache_key, user=user, on_stage=on_stage)
+            if report is not None:
+                outcome, model = 'cached', report.ai_model_used
+                report_stage('done')
+                return report
+
+            report_stage('llm')
+            headers, payload_data = build_openrouter_request(profile, referer)
+            completion, model = complete_report_with_fallback(headers, payload_data)
+            report_content = finish_report_content(profile, completion)
+
+            pdf_filename = pdf_path = pdf_url = None
+            if not settings.REPORT_PDF_LAZY:  # Otherwise rendered on the first download
+                report_stage('pdf')
+                pdf_filename, pdf_path, pdf_url = render_report_pdf(report_content)
+
+            report_stage('saving')
+            report = save_immigration_report(
+                profile, report_content, pdf_filename, pdf_path, pdf_url,
+                user=user, cache_key=cache_key, ai_model_used=model,
+            )
+            store_cached_report(cache_key, report)
+            flight.complete(report)
+            outcome = 'ok'
+            report_stage('done')
+            return report
+
+        except Exception as e:
+            error = as_http_error(e)
+            if flight is not None:
+                flight.fail(error)
+            logger.warning("Report generation failed pipeline=%s status=%s error=%s", pipeline, error.status_code, str(error))
+            raise error from e
+        finally:
+            record_timings(pipeline, timer, outcome, model=model)
+            if report is not None:
+                record_report_usage(report, timer, pipeline)
@@ -0,0 +1,294 @@
+"""
+Single-flight deduplication of identical report generations.
+
+Concurrent requests for the same report cache key share one upstream LLM call.
+Within a process, followers wait on the leader's in-memory flight. Across
+worker processes, the local leader takes a ``ReportGenerationLease`` row; if
+another process already holds it, the local leader waits on that row on behalf
+of its own followers. Finished and long-abandoned lease rows are deleted by
+``prune_report_leases``, which leaders run at most every
+``LEASE_PRUNE_INTERVAL`` seconds per process.
+
+Usage::
+
+    while True:
+        flight = acquire_report_flight(cache_key)
+        if flight.is_leader:
+            try:
+                report = ...generate...
+            except Exception as e:
+                flight.fail(as_http_error(e))
+                raise
+            flight.complete(report)
+            break
+        report = flight.wait()  # raises HttpError if the leader failed
+        if report is not None:
+            break
+        # Leader abandoned the flight; try again (possibly as leader)
+"""
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from ninja.errors import HttpError
+
+from apps.ai_provider.cache import report_contains_identity
+from apps.core.models import ImmigrationReport, ReportGenerationLease
+
+logger = logging.getLogger(__name__)
+
+# How often a process deletes lease rows nobody needs any more
+LEASE_PRUNE_INTERVAL = 300
+
+
+class _LocalFlight:
+    """In-process rendezvous between a leader thread and its followers"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.report_id = None
+        self.error = None
+
+
+_local_flights = {}
+_local_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {'leaders': 0, 'local_followers': 0, 'db_followers': 0, 'takeovers': 0, 'pruned_leases': 0}
+_last_prune = None  # time.monotonic() of this process's last prune_report_leases
+
+
+def _count(name: str) -> None:
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def _owner_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+def _try_acquire_lease(cache_key: str, owner: str) -> bool:
+    """
+    Take the DB lease for a cache key.
+
+    Inserts a new lease row, or takes over one that is abandoned (running past
+    its expiry), failed, or completed longer ago than the result-sharing window.
+    """
+    now = timezone.now()
+    expires_at = now + timedelta(seconds=settings.REPORT_SINGLEFLIGHT_LEASE_SECONDS)
+    try:
+        with transaction.atomic():
+            ReportGenerationLease.objects.create(
+                cache_key=cache_key,
+                owner=owner,
+                status='running',
+                expires_at=expires_at,
+                started_at=now,
+            )
+        return True
+    except IntegrityError:
+        pass
+
+    reusable_after = now - timedelta(seconds=settings.REPORT_SINGLEFLIGHT_RESULT_SECONDS)
+    taken = ReportGenerationLease.objects.filter(cache_key=cache_key).filter(
+        Q(status='running', expires_at__lt=now)
+        | Q(status='failed')
+        | Q(status='completed', finished_at__lt=reusable_after)
+        | Q(status='completed', report__isnull=True)
+    ).update(
+        owner=owner,
+        status='running',
+        report=None,
+        error_status=None,
+        error_message=None,
+        expires_at=expires_at,
+        started_at=now,
+        finished_at=None,
+    )
+    if taken:
+        _count('takeovers')
+    return bool(taken)
+
+
+class ReportFlight:
+    """
+    A caller's position in a single flight: leader or follower.
+
+    Leaders must finish the flight with exactly one of ``complete``, ``fail``
+    or ``abandon``. Followers call ``wait``.
+    """
+
+    def __init__(self, cache_key: str, local: _LocalFlight, is_leader: bool, owns_local: bool, owner: str):
+        self.cache_key = cache_key
+        self.is_leader = is_leader
+        self._local = local
+        self._owns_local = owns_local  # This thread must publish the outcome to local followers
+        self._owner = owner
+
+    def complete(self, report: ImmigrationReport) -> None:
+        """
+        Share the leader's report with the followers. A report that mentions its
+        requester is not shared; followers then retry and generate their own.
+        """
+        shared = None if report_contains_identity(report) else report
+        if settings.REPORT_SINGLEFLIGHT_DB:
+            ReportGenerationLease.objects.filter(cache_key=self.cache_key, owner=self._owner).update(
+                status='completed',
+                report=shared,
+                finished_at=timezone.now(),
+            )
+        self._publish(report_id=shared.id if shared is not None else None)
+
+    def fail(self, error: HttpError) -> None:
+        if settings.REPORT_SINGLEFLIGHT_DB:
+            ReportGenerationLease.objects.filter(cache_key=self.cache_key, owner=self._owner).update(
+                status='failed',
+                error_status=error.status_code,
+                error_message=str(error),
+                finished_at=timezone.now(),
+            )
+        self._publish(error=error)
+
+    def abandon(self) -> None:
+        """Release leadership without a result (e.g. client disconnected) so a follower takes over"""
+        if settings.REPORT_SINGLEFLIGHT_DB:
+            ReportGenerationLease.objects.filter(
+                cache_key=self.cache_key, owner=self._owner, status='running'
+            ).update(expires_at=timezone.now() - timedelta(seconds=1))
+        self._publish()
+
+    def wait(self) -> Optional[ImmigrationReport]:
+        """
+        Wait for the leader's outcome.
+
+        Returns:
+            The leader's report, or ``None`` if the leader abandoned the flight
+
+        Raises:
+            HttpError: The leader's failure
+        """
+        if self._owns_local:
+            self._wait_for_lease()
+        elif not self._local.done.wait(settings.REPORT_SINGLEFLIGHT_LEASE_SECONDS + 5):
+            return None
+
+        if self._local.error is not None:
+            raise HttpError(self._local.error.status_code, str(self._local.error))
+        if self._local.report_id is None:
+            return None
+        return ImmigrationReport.objects.get(id=self._local.report_id)
+
+    def _wait_for_lease(self) -> None:
+        """Poll another process's lease until it finishes, then publish locally"""
+        reusable_after = timedelta(seconds=settings.REPORT_SINGLEFLIGHT_RESULT_SECONDS)
+        while True:
+            lease = ReportGenerationLease.objects.filter(cache_key=self.cache_key).first()
+            now = timezone.now()
+            if lease is None or (lease.status == 'running' and lease.expires_at < now):
+                self._publish()
+                return
+            if lease.status == 'completed':
+                if lease.report_id and lease.finished_at >= now - reusable_after:
+                    self._publish(report_id=lease.report_id)
+                else:
+                    self._publish()
+                return
+            if lease.status == 'failed':
+                self._publish(error=HttpError(lease.error_status or 500, lease.error_message or "Report generation failed"))
+                return
+            time.sleep(settings.REPORT_SINGLEFLIGHT_POLL_INTERVAL)
+
+    def _publish(self, report_id=None, error: Optional[HttpError] = None) -> None:
+        if not self._owns_local:
+            return
+        self._local.report_id = report_id
+        self._local.error = error
+        with _local_lock:
+            if _local_flights.get(self.cache_key) is self._local:
+                del _local_flights[self.cache_key]
+        self._local.done.set()
+
+
+def prune_report_leases() -> int:
+    """
+    Delete lease rows that no flight needs any more: finished (completed or
+    failed) longer ago than the result-sharing window, or abandoned for more
+    than a whole lease period.
+
+    Returns:
+        The number of rows deleted
+    """
+    now = timezone.now()
+    finished_before = now - timedelta(seconds=settings.REPORT_SINGLEFLIGHT_RESULT_SECONDS)
+    expired_before = now - timedelta(seconds=settings.REPORT_SINGLEFLIGHT_LEASE_SECONDS)
+    deleted, _ = ReportGenerationLease.objects.filter(
+        Q(status__in=('completed', 'failed'), finished_at__lt=finished_before)
+        | Q(status='running', expires_at__lt=expired_before)
+    ).delete()
+    if deleted:
+        with _stats_lock:
+            _stats['pruned_leases'] += deleted
+    return deleted
+
+
+def _maybe_prune_leases() -> None:
+    """Run ``prune_report_leases`` if this process has not for ``LEASE_PRUNE_INTERVAL`` seconds"""
+    global _last_prune
+    now = time.monotonic()
+    with _stats_lock:
+        if _last_prune is not None and now - _last_prune < LEASE_PRUNE_INTERVAL:
+            return
+        _last_prune = now
+    try:
+        prune_report_leases()
+    except Exception:
+        # Housekeeping must not fail the report request
+        logger.exception("Failed to prune report generation leases")
+
+
+def acquire_report_flight(cache_key: str) -> ReportFlight:
+    """Join the flight for a cache key, becoming its leader if none is in progress"""
+    with _local_lock:
+        local = _local_flights.get(cache_key)
+        if local is not None:
+            _count('local_followers')
+            return ReportFlight(cache_key, local, is_leader=False, owns_local=False, owner='')
+        local = _LocalFlight()
+        _local_flights[cache_key] = local
+
+    owner = _owner_id()
+    if not settings.REPORT_SINGLEFLIGHT_DB:
+        _count('leaders')
+        return ReportFlight(cache_key, local, is_leader=True, owns_local=True, owner=owner)
+
+    try:
+        acquired = _try_acquire_lease(cache_key, owner)
+    except Exception:
+        # Never leave local followers waiting on a flight nobody owns
+        with _local_lock:
+            _local_flights.pop(cache_key, None)
+        local.done.set()
+        raise
+
+    if acquired:
+        _count('leaders')
+        _maybe_prune_leases()
+        return ReportFlight(cache_key, local, is_leader=True, owns_local=True, owner=owner)
+    _count('db_followers')
+    return ReportFlight(cache_key, local, is_leader=False, owns_local=True, owner=owner)
+
+
+def single_flight_stats() -> dict:
+    with _stats_lock:
+        stats = dict(_stats)
+    with _local_lock:
+        stats['in_flight'] = len(_local_flights)
+    stats['db_leases'] = settings.REPORT_SINGLEFLIGHT_DB
+    return stats
@@ -0,0 +1,297 @@
+"""
+Speculative report generation for completed pathway advisor submissions.
+
+Once a submission is marked ``is_completed`` the user nearly always asks for
+the report next. With ``REPORT_SPECULATIVE_ENABLED``, ``submit_pathway_advisor``
+hands the completed submission to ``schedule_speculative_report``, which maps
+it to a profile (``profile_from_submission``) and queues it for a background
+thread. That thread generates the report through the normal pipeline
+(``pipeline='speculative'``), so it lands in the report cache. When the user
+then asks for the report (``POST /api/ai-provider/submissions/{id}/report``,
+or ``/generate-report`` with the same profile), it is a cache hit, or joins the
+speculative generation through single flight if that is still running.
+
+Speculation is low priority and its spend is capped:
+
+- ``REPORT_SPECULATIVE_WORKERS`` threads (default one) run speculative reports,
+  and only while fewer than ``REPORT_SPECULATIVE_MAX_ACTIVE`` interactive
+  reports are in progress. A queued report that waits longer than
+  ``REPORT_SPECULATIVE_MAX_DELAY`` seconds is dropped, because by then the
+  user has most likely asked for it themselves.
+- At most ``REPORT_SPECULATIVE_QUEUE`` reports wait. Further submissions are
+  not speculated on.
+- ``REPORT_SPECULATIVE_MAX_PER_HOUR`` caps the speculative completions this
+  process starts per hour.
+- ``REPORT_SPECULATIVE_DAILY_TOKENS`` caps the tokens recorded for speculative
+  reports over the last 24 hours, across processes (from ``ReportUsage``).
+
+``speculative_stats`` reports how many speculative reports were generated and
+how many were later served to a user (``claimed``). The difference is the
+spend that did not pay off.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Sum
+from django.utils import timezone
+
+from apps.ai_provider.admission import get_admission_controller
+from apps.ai_provider.cache import CACHE_KEY_PREFIX, get_report_cache, report_cache_key
+from apps.ai_provider.profiles import profile_from_submission
+from apps.ai_provider.schemas import ImmigrationProfileSchema
+from apps.ai_provider.services import generate_report
+from apps.core.models import PathwayAdvisorSubmission, ReportUsage
+
+logger = logging.getLogger(__name__)
+
+PIPELINE = 'speculative'
+
+# Cache keys of recent speculative reports, to count the ones a user later claimed
+RECENT_KEYS = 1000
+
+# How often a queued report re-checks whether interactive load has dropped
+BUSY_POLL_SECONDS = 0.5
+
+
+class SpeculativeReportScheduler:
+    """A bounded queue of speculative reports and the low-priority threads that generate them"""
+
+    def __init__(
+        self,
+        workers: int,
+        queue_size: int,
+        max_active: int,
+        max_delay: float,
+        max_per_hour: int = 0,
+        daily_tokens: int = 0,
+    ):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.max_active = max_active
+        self.max_delay = max_delay
+        self.max_per_hour = max_per_hour
+        self.daily_tokens = daily_tokens
+        self._cond = threading.Condition()
+        self._queue = deque()  # (cache_key, profile, queued_at)
+        self._started = deque()  # Start times of the completions within the last hour
+        self._keys = OrderedDict()  # Cache key -> 'pending', 'ready' (generated) or 'claimed' (served while pending)
+        self._threads = []
+        self._stats = {
+            'queued': 0,
+            'generated': 0,
+            'failed': 0,
+            'claimed': 0,
+            'skipped_cached': 0,
+            'skipped_duplicate': 0,
+            'skipped_queue_full': 0,
+            'skipped_hourly_limit': 0,
+            'skipped_token_budget': 0,
+            'dropped_busy': 0,
+        }
+
+    def schedule(self, profile: ImmigrationProfileSchema) -> bool:
+        """
+        Queue ``profile`` for speculative generation unless a limit says otherwise.
+
+        Returns:
+            True if the report was queued
+        """
+        cache_key = report_cache_key(profile)
+        with self._cond:
+            if cache_key in self._keys:
+                self._stats['skipped_duplicate'] += 1
+                return False
+            if len(self._queue) >= self.queue_size:
+                self._stats['skipped_queue_full'] += 1
+                return False
+        # Outside the lock: both can hit the cache backend or the database
+        if get_report_cache().has_key(f"{CACHE_KEY_PREFIX}:{cache_key}"):
+            self._count('skipped_cached')
+            return False
+        if self.daily_tokens and speculative_tokens_since(timezone.now() - timedelta(days=1)) >= self.daily_tokens:
+            self._count('skipped_token_budget')
+            return False
+
+        with self._cond:
+            if cache_key in self._keys or len(self._queue) >= self.queue_size:
+                self._stats['skipped_duplicate' if cache_key in self._keys else 'skipped_queue_full'] += 1
+                return False
+            self._remember(cache_key)
+            self._queue.append((cache_key, profile, time.monotonic()))
+            self._stats['queued'] += 1
+            self._cond.notify()
+        self._start()
+        return True
+
+    def claim(self, cache_key: str) -> None:
+        """Count a report served from the cache entry a speculative generation left"""
+        with self._cond:
+            state = self._keys.get(cache_key)
+            if state == 'ready':
+                del self._keys[cache_key]
+                self._stats['claimed'] += 1
+            elif state == 'pending':
+                # Joined the speculative generation before it finished
+                self._keys[cache_key] = 'claimed'
+
+    def stats(self) -> dict:
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update({
+                'workers': self.workers,
+                'queue_depth': len(self._queue),
+                'started_last_hour': self._prune_started(time.monotonic()),
+                'max_per_hour': self.max_per_hour,
+                'daily_tokens': self.daily_tokens,
+            })
+        return stats
+
+    def _count(self, name: str) -> None:
+        with self._cond:
+            self._stats[name] += 1
+
+    def _remember(self, cache_key: str) -> None:
+        self._keys[cache_key] = 'pending'
+        while len(self._keys) > RECENT_KEYS:
+            self._keys.popitem(last=False)
+
+    def _prune_started(self, now: float) -> int:
+        while self._started and now - self._started[0] > 3600:
+            self._started.popleft()
+        return len(self._started)
+
+    def _start(self) -> None:
+        with self._cond:
+            self._threads = [thread for thread in self._threads if thread.is_alive()]
+            for index in range(len(self._threads), self.workers):
+                thread = threading.Thread(target=self._worker_loop, name=f"speculative-report-{index}", daemon=True)
+                self._threads.append(thread)
+                thread.start()
+
+    def _next(self):
+        """Block until a queued report may run, dropping the ones that waited too long or exceed the hourly cap"""
+        with self._cond:
+            while True:
+                while not self._queue:
+                    self._cond.wait()
+                cache_key, profile, queued_at = self._queue[0]
+                now = time.monotonic()
+                if now - queued_at > self.max_delay:
+                    self._queue.popleft()
+                    self._keys.pop(cache_key, None)
+                    self._stats['dropped_busy'] += 1
+                    continue
+                if self.max_per_hour and self._prune_started(now) >= self.max_per_hour:
+                    self._queue.popleft()
+                    self._keys.pop(cache_key, None)
+                    self._stats['skipped_hourly_limit'] += 1
+                    continue
+                if _interactive_active() >= self.max_active:
+                    # Interactive reports go first; look again shortly
+                    self._cond.wait(BUSY_POLL_SECONDS)
+                    continue
+                self._queue.popleft()
+                self._started.append(now)
+                return cache_key, profile
+
+    def _worker_loop(self) -> None:
+        while True:
+            cache_key, profile = self._next()
+            try:
+                close_old_connections()
+                if get_report_cache().has_key(f"{CACHE_KEY_PREFIX}:{cache_key}"):
+                    # The user asked first while this waited
+                    with self._cond:
+                        self._keys.pop(cache_key, None)
+                        self._stats['skipped_cached'] += 1
+                    continue
+                report = generate_report(profile, pipeline=PIPELINE)
+            except Exception as e:
+                with self._cond:
+                    self._keys.pop(cache_key, None)
+                    self._stats['failed'] += 1
+                logger.warning("Speculative report failed cache_key=%s error=%s", cache_key[:12], str(e))
+            else:
+                with self._cond:
+                    if report.cache_hit:
+                        # Generated elsewhere in the meantime; nothing was spent here
+                        self._keys.pop(cache_key, None)
+                        self._stats['skipped_cached'] += 1
+                    else:
+                        self._stats['generated'] += 1
+                        if self._keys.get(cache_key) == 'claimed':
+                            del self._keys[cache_key]
+                            self._stats['claimed'] += 1
+                        elif cache_key in self._keys:
+                            self._keys[cache_key] = 'ready'
+                logger.info("Speculative report ready report_id=%s cache_key=%s", report.id, cache_key[:12])
+            finally:
+                close_old_connections()
+
+
+def _interactive_active() -> int:
+    """Report requests currently holding an admission slot in this process"""
+    controller = get_admission_controller()
+    return controller.stats()['active'] if controller is not None else 0
+
+
+def speculative_tokens_since(since) -> int:
+    """Tokens recorded for speculative reports since ``since``, across processes"""
+    total = ReportUsage.objects.filter(pipeline=PIPELINE, created_at__gte=since).aggregate(
+        total=Sum('total_tokens'),
+    )['total']
+    return total or 0
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_speculative_scheduler() -> SpeculativeReportScheduler:
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = SpeculativeReportScheduler(
+                workers=settings.REPORT_SPECULATIVE_WORKERS,
+                queue_size=settings.REPORT_SPECULATIVE_QUEUE,
+                max_active=settings.REPORT_SPECULATIVE_MAX_ACTIVE,
+                max_delay=settings.REPORT_SPECULATIVE_MAX_DELAY,
+                max_per_hour=settings.REPORT_SPECULATIVE_MAX_PER_HOUR,
+                daily_tokens=settings.REPORT_SPECULATIVE_DAILY_TOKENS,
+            )
+    return _scheduler
+
+
+def schedule_speculative_report(submission: PathwayAdvisorSubmission) -> bool:
+    """
+    Start generating the report for a just-completed submission in the background.
+
+    Never raises: speculation must not fail the submission.
+
+    Returns:
+        True if the report was queued
+    """
+    if not settings.REPORT_SPECULATIVE_ENABLED:
+        return False
+    try:
+        return get_speculative_scheduler().schedule(profile_from_submission(submission))
+    except Exception:
+        logger.exception("Failed to schedule speculative report submission_id=%s", submission.id)
+        return False
+
+
+def claim_speculative_report(profile: ImmigrationProfileSchema) -> None:
+    """Record that a report was served; counts it if a speculative generation produced it"""
+    if settings.REPORT_SPECULATIVE_ENABLED and _scheduler is not None:
+        _scheduler.claim(report_cache_key(profile))
+
+
+def speculative_stats() -> dict:
+    if not settings.REPORT_SPECULATIVE_ENABLED:
+        return {'enabled': False}
+    return {'enabled': True, **get_speculative_scheduler().stats()}
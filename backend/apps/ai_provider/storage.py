@@ -0,0 +1,323 @@
+"""
+Content-addressed storage for report PDFs.
+
+A PDF is stored under the hash of what it was rendered from (the report's
+HTML render key, ``PDF_RENDER_VERSION`` and a non-default theme), not of its
+bytes, in two levels of shard directories::
+
+    MEDIA_ROOT/reports/ab/cd/abcd....pdf
+
+Identical reports therefore share one file, and a render whose file already
+exists is skipped. ``ImmigrationReport.pdf_key`` records the key, and the
+number of rows with that key is the file's reference count: deleting the
+last referencing report deletes the file. Files are written to a temporary
+name and renamed into place, so readers never see a partial PDF.
+
+Files not referenced by any report (renders whose report was never saved,
+releases that lost a race, PDFs from before this layout) are removed in
+batches by ``manage.py gc_report_storage``. Files modified within
+``REPORT_STORAGE_GC_GRACE_SECONDS`` are never removed, so a render that is
+about to be saved (or a file just reused, which refreshes its mtime) is safe.
+Bump ``PDF_RENDER_VERSION`` when PDF styling changes so new renders get new keys.
+"""
+import hashlib
+import logging
+import os
+import re
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from apps.core.models import ImmigrationReport
+
+logger = logging.getLogger(__name__)
+
+PDF_RENDER_VERSION = '1'
+# pdf_styles.DEFAULT_THEME (not imported: that module loads WeasyPrint); its PDFs keep their original keys
+PDF_DEFAULT_THEME = 'default'
+STORAGE_DIR = 'reports'
+TEMP_SUFFIX = '.tmp'
+
+_KEY_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+def pdf_content_key(html_key: str, theme: str = PDF_DEFAULT_THEME) -> str:
+    """Storage key of a PDF: hash of its source HTML key, the PDF renderer version and a non-default theme"""
+    source = f"{PDF_RENDER_VERSION}\n{html_key}" if theme == PDF_DEFAULT_THEME else f"{PDF_RENDER_VERSION}\n{theme}\n{html_key}"
+    return hashlib.sha256(source.encode('utf-8')).hexdigest()
+
+
+def storage_root() -> Path:
+    return Path(settings.MEDIA_ROOT) / STORAGE_DIR
+
+
+def relative_pdf_path(key: str) -> str:
+    """Path of a stored PDF relative to MEDIA_ROOT"""
+    return f"{STORAGE_DIR}/{key[:2]}/{key[2:4]}/{key}.pdf"
+
+
+def pdf_storage_path(key: str) -> str:
+    return str(Path(settings.MEDIA_ROOT) / relative_pdf_path(key))
+
+
+def pdf_media_url(key: str) -> str:
+    return f"{settings.MEDIA_URL}{relative_pdf_path(key)}"
+
+
+def content_key_from_path(path: Optional[str]) -> Optional[str]:
+    """The storage key of a content-addressed PDF path, or None for other (legacy) paths"""
+    if not path:
+        return None
+    name = os.path.basename(path)
+    key = name[:-4] if name.endswith('.pdf') else ''
+    if _KEY_RE.match(key) and os.path.normpath(path).endswith(os.path.normpath(relative_pdf_path(key))):
+        return key
+    return None
+
+
+def store_pdf(key: str, render: Callable[[str], object]) -> Tuple[str, bool]:
+    """
+    Make sure the PDF for ``key`` is on disk, rendering it only if missing.
+
+    Args:
+        key: ``pdf_content_key`` of the PDF
+        render: Called with a path to write the PDF to
+
+    Returns:
+        ``(path, reused)``; ``reused`` is True when an existing file was used
+    """
+    path = pdf_storage_path(key)
+    if os.path.exists(path):
+        try:
+            # Mark as recently used so garbage collection leaves it alone until it is referenced
+            os.utime(path)
+            return path, True
+        except FileNotFoundError:
+            pass  # Collected in between; render it again
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{uuid.uuid4().hex[:8]}{TEMP_SUFFIX}"
+    try:
+        render(temp_path)
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return path, False
+
+
+def _legacy_references(paths: List[str]) -> Q:
+    """
+    Reports referencing legacy (pre content-addressing) PDFs.
+
+    Legacy rows store an absolute ``pdf_path`` under whatever MEDIA_ROOT was at
+    the time, which changes when the deploy root does, so they also match on
+    ``pdf_filename``: legacy files were stored flat under unique names.
+    """
+    return Q(pdf_path__in=paths) | Q(pdf_filename__in=[os.path.basename(path) for path in paths])
+
+
+def reference_count(key: Optional[str] = None, path: Optional[str] = None) -> int:
+    """Reports referencing a stored PDF, by storage key or (for legacy files) by path and file name"""
+    condition = Q()
+    if key:
+        condition |= Q(pdf_key=key)
+    if path:
+        condition |= _legacy_references([path])
+    if not condition:
+        return 0
+    return ImmigrationReport.objects.filter(condition).count()
+
+
+def _recently_modified(path: str, grace_seconds: float) -> bool:
+    try:
+        return time.time() - os.path.getmtime(path) < grace_seconds
+    except FileNotFoundError:
+        return False
+
+
+def release_pdf(key: Optional[str], path: Optional[str]) -> bool:
+    """
+    Delete a stored PDF if no report references it any more.
+
+    Returns:
+        True if the file was deleted
+    """
+    if not path or not os.path.exists(path):
+        return False
+    if reference_count(key, path) or _recently_modified(path, settings.REPORT_STORAGE_GC_GRACE_SECONDS):
+        return False
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        return False
+    logger.info("Unreferenced report PDF deleted path=%s", path)
+    return True
+
+
+@receiver(post_delete, sender=ImmigrationReport)
+def _release_deleted_report_pdf(sender, instance, **kwargs):
+    if not instance.pdf_path:
+        return
+    key, path = instance.pdf_key, instance.pdf_path
+
+    def release():
+        try:
+            release_pdf(key, path)
+        except Exception:
+            logger.exception("Failed to release report PDF path=%s", path)
+
+    transaction.on_commit(release)
+
+
+def iter_stored_files() -> Iterator[Path]:
+    """Every file under the report storage directory (sharded, legacy flat and temporary)"""
+    root = storage_root()
+    if not root.exists():
+        return
+    for directory, _, filenames in os.walk(root):
+        for filename in filenames:
+            yield Path(directory) / filename
+
+
+def _referenced(paths: List[Path]) -> set:
+    """The subset of ``paths`` referenced by at least one report, in one or two queries"""
+    keys = {}
+    legacy = []
+    for path in paths:
+        key = content_key_from_path(str(path))
+        if key:
+            keys[key] = path
+        else:
+            legacy.append(str(path))
+
+    referenced = set()
+    if keys:
+        found = ImmigrationReport.objects.filter(pdf_key__in=list(keys)).values_list('pdf_key', flat=True)
+        referenced.update(keys[key] for key in set(found))
+    if legacy:
+        found = ImmigrationReport.objects.filter(_legacy_references(legacy)).values_list('pdf_path', 'pdf_filename')
+        found_paths = {path for path, _ in found}
+        found_names = {filename for _, filename in found}
+        referenced.update(
+            Path(path) for path in legacy if path in found_paths or os.path.basename(path) in found_names
+        )
+    return referenced
+
+
+def collect_garbage(batch_size: int = 500, grace_seconds: Optional[float] = None, dry_run: bool = False) -> dict:
+    """
+    Delete stored files that no report references, ``batch_size`` files per query.
+
+    Args:
+        batch_size: Files checked against the database per query
+        grace_seconds: Skip files modified more recently than this (default ``REPORT_STORAGE_GC_GRACE_SECONDS``)
+        dry_run: Only count what would be deleted
+
+    Returns:
+        Counts of scanned, orphaned and deleted files, bytes freed and removed empty directories
+    """
+    if grace_seconds is None:
+        grace_seconds = settings.REPORT_STORAGE_GC_GRACE_SECONDS
+    stats = {'scanned': 0, 'orphans': 0, 'deleted': 0, 'bytes_freed': 0, 'skipped_recent': 0, 'empty_dirs_removed': 0}
+
+    def sweep(batch: List[Path]) -> None:
+        stats['scanned'] += len(batch)
+        temp_files = [path for path in batch if path.name.endswith(TEMP_SUFFIX)]
+        candidates = [path for path in batch if not path.name.endswith(TEMP_SUFFIX)]
+        referenced = _referenced(candidates)
+        for path in temp_files + [path for path in candidates if path not in referenced]:
+            if _recently_modified(str(path), grace_seconds):
+                stats['skipped_recent'] += 1
+                continue
+            stats['orphans'] += 1
+            if dry_run:
+                continue
+            # Re-check references right before deleting; a save may have landed since the batch query
+            if not path.name.endswith(TEMP_SUFFIX) and reference_count(content_key_from_path(str(path)), str(path)):
+                continue
+            try:
+                size = path.stat().st_size
+                path.unlink()
+            except FileNotFoundError:
+                continue
+            stats['deleted'] += 1
+            stats['bytes_freed'] += size
+
+    batch = []
+    for path in iter_stored_files():
+        batch.append(path)
+        if len(batch) >= batch_size:
+            sweep(batch)
+            batch = []
+    if batch:
+        sweep(batch)
+
+    if not dry_run:
+        root = storage_root()
+        for directory, _, _ in os.walk(root, topdown=False):
+            # Listed afresh: children removed earlier in this walk leave a parent empty
+            if Path(directory) != root and not os.listdir(directory):
+                try:
+                    os.rmdir(directory)
+                    stats['empty_dirs_removed'] += 1
+                except OSError:
+                    pass
+    return stats
+
+
+def storage_usage(batch_size: int = 500) -> dict:
+    """Files, bytes and references in report storage; walks the whole directory"""
+    usage = {
+        'files': 0,
+        'bytes': 0,
+        'content_addressed_files': 0,
+        'legacy_files': 0,
+        'temporary_files': 0,
+        'orphan_files': 0,
+        'orphan_bytes': 0,
+    }
+
+    def account(batch: List[Path]) -> None:
+        referenced = _referenced([path for path in batch if not path.name.endswith(TEMP_SUFFIX)])
+        for path in batch:
+            try:
+                size = path.stat().st_size
+            except FileNotFoundError:
+                continue
+            usage['files'] += 1
+            usage['bytes'] += size
+            if path.name.endswith(TEMP_SUFFIX):
+                usage['temporary_files'] += 1
+                continue
+            if content_key_from_path(str(path)):
+                usage['content_addressed_files'] += 1
+            else:
+                usage['legacy_files'] += 1
+            if path not in referenced:
+                usage['orphan_files'] += 1
+                usage['orphan_bytes'] += size
+
+    batch = []
+    for path in iter_stored_files():
+        batch.append(path)
+        if len(batch) >= batch_size:
+            account(batch)
+            batch = []
+    account(batch)
+
+    with_pdf = ImmigrationReport.objects.exclude(pdf_path__isnull=True).exclude(pdf_path='')
+    usage['reports_with_pdf'] = with_pdf.count()
+    usage['distinct_pdfs_referenced'] = with_pdf.values('pdf_path').distinct().count()
+    # Reports per stored PDF: above 1 means identical reports share files
+    usage['dedup_ratio'] = (
+        usage['reports_with_pdf'] / usage['distinct_pdfs_referenced'] if usage['distinct_pdfs_referenced'] else None
+    )
+    return usage
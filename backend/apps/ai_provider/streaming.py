@@ -0,0 +1,129 @@
+"""
+Server-Sent Events relay for streaming report generation
+"""
+import json
+import logging
+
+from django.conf import settings
+from ninja.errors import HttpError
+
+from apps.ai_provider.cache import report_cache_key, store_cached_report
+from apps.ai_provider.instrumentation import StageTimer, record_timings
+from apps.ai_provider.report_sections import analyze_profile, render_sections
+from apps.ai_provider.schemas import ImmigrationProfileSchema
+from apps.ai_provider.services import (
+    as_http_error,
+    build_openrouter_request,
+    finish_report_content,
+    join_report_flight,
+    render_report_pdf,
+    save_immigration_report,
+    serialize_report_response,
+    stream_report_with_fallback,
+)
+from apps.ai_provider.usage import record_report_usage
+
+logger = logging.getLogger(__name__)
+
+
+def sse_event(event: str, data: dict) -> str:
+    """Format a single Server-Sent Event frame"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def stream_report_events(profile: ImmigrationProfileSchema, user=None, referer: str = ""):
+    """
+    Generate a report while relaying the model output as SSE frames.
+
+    Events, in order:
+        ``start``   - upstream request sent (``{"model": ...}``)
+        ``status``  - ``{"stage": "fallback", "model": ...}`` if the model failed before
+                      streaming and the next one in the chain is tried
+        ``delta``   - a Markdown fragment (``{"content": ...}``)
+        ``status``  - ``{"stage": "pdf"}``: the stream finished and the PDF is being rendered
+                      (not sent in lazy PDF mode)
+        ``done``    - the saved report, same shape as ``ImmigrationReportResponse``
+        ``error``   - ``{"status": ..., "message": ...}``; no further events follow
+
+    The report is only persisted and rendered to PDF once the stream completes,
+    so a dropped connection never leaves a partial report behind. Reports
+    served from the cache or from an identical in-flight request are sent as a
+    single ``delta``. In hybrid mode (``REPORT_BUILDER``) the first ``delta``
+    carries the server-built sections and the rest stream the narrative; the
+    saved report (``done``) is the authoritative full text.
+    """
+    timer = StageTimer()
+    outcome = 'error'
+    model = None
+    flight = None
+    report = None
+    try:
+        # The timer is only activated around steps that do not yield; a
+        # generator's steps may run in different contexts
+        with timer.activate():
+            cache_key = report_cache_key(profile)
+            report, flight = join_report_flight(profile, cache_key, user=user)
+        if report is not None:
+            outcome, model = 'cached', report.ai_model_used
+            yield sse_event('start', {"model": report.ai_model_used, "cached": True})
+            yield sse_event('delta', {"content": report.report_markdown})
+            yield sse_event('done', serialize_report_response(report))
+            return
+
+        with timer.activate():
+            headers, payload_data = build_openrouter_request(profile, referer)
+            # Hybrid reports: the server-built sections go out before the narrative
+            sections = render_sections(analyze_profile(profile)) if settings.REPORT_BUILDER == 'hybrid' else None
+        fragments = []
+        for kind, value in stream_report_with_fallback(headers, payload_data, timer=timer):
+            if kind == 'model':
+                if model is None:
+                    yield sse_event('start', {"model": value, "cached": False})
+                    if sections:
+                        yield sse_event('delta', {"content": sections})
+                else:
+                    yield sse_event('status', {"stage": "fallback", "model": value})
+                model = value
+            else:
+                fragments.append(value)
+                yield sse_event('delta', {"content": value})
+
+        completion = ''.join(fragments)
+        if not completion.strip():
+            raise HttpError(500, "OpenRouter API returned empty content. Please try again.")
+        logger.debug("Streamed report content received chars=%d", len(completion))
+        with timer.activate():
+            report_content = finish_report_content(profile, completion)
+
+        pdf_filename = pdf_path = pdf_url = None
+        if not settings.REPORT_PDF_LAZY:  # Otherwise rendered on the first download
+            yield sse_event('status', {"stage": "pdf"})
+            with timer.activate():
+                pdf_filename, pdf_path, pdf_url = render_report_pdf(report_content)
+        with timer.activate():
+            report = save_immigration_report(
+                profile, report_content, pdf_filename, pdf_path, pdf_url,
+                user=user, cache_key=cache_key, ai_model_used=model,
+            )
+            store_cached_report(cache_key, report)
+            flight.complete(report)
+        flight = None
+        outcome = 'ok'
+        yield sse_event('done', serialize_report_response(report))
+
+    except GeneratorExit:
+        # Client disconnected mid-stream; let a waiting identical request take over
+        outcome = 'disconnected'
+        if flight is not None:
+            flight.abandon()
+        raise
+    except Exception as e:
+        error = as_http_error(e)
+        if flight is not None:
+            flight.fail(error)
+        logger.warning("Streaming report generation failed status=%s error=%s", error.status_code, str(error))
+        yield sse_event('error', {"status": error.status_code, "message": str(error)})
+    finally:
+        record_timings('stream', timer, outcome, model=model)
+        if report is not None:
+            record_report_usage(report, timer, 'stream')
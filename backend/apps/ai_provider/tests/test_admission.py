@@ -0,0 +1,77 @@
+import threading
+import time
+
+from django.test import SimpleTestCase
+
+from apps.ai_provider.admission import AdmissionController, AdmissionRejected
+
+
+class AdmissionControllerTests(SimpleTestCase):
+    def test_no_wait_returns_false_when_full(self):
+        controller = AdmissionController(1)
+        self.assertTrue(controller.acquire('a'))
+        self.assertFalse(controller.acquire('b', wait=False))
+
+        controller.release('a')
+        self.assertTrue(controller.acquire('b', wait=False))
+
+    def test_per_client_limit(self):
+        controller = AdmissionController(5, max_per_client=1)
+        controller.acquire('a')
+
+        with self.assertRaises(AdmissionRejected) as raised:
+            controller.acquire('a')
+        self.assertEqual(raised.exception.status_code, 429)
+        self.assertGreaterEqual(raised.exception.retry_after, 1)
+        self.assertTrue(controller.acquire('b'))
+        self.assertEqual(controller.stats()['rejected_client_limit'], 1)
+
+    def test_queue_full_rejects_at_once(self):
+        controller = AdmissionController(1, queue_size=0)
+        controller.acquire('a')
+
+        with self.assertRaises(AdmissionRejected):
+            controller.acquire('b')
+        self.assertEqual(controller.stats()['rejected_queue_full'], 1)
+
+    def test_queue_timeout(self):
+        controller = AdmissionController(1, queue_size=1, queue_timeout=0.05)
+        controller.acquire('a')
+
+        with self.assertRaises(AdmissionRejected):
+            controller.acquire('b')
+        stats = controller.stats()
+        self.assertEqual(stats['rejected_queue_timeout'], 1)
+        self.assertEqual(stats['queue_depth'], 0)
+
+    def test_queued_request_gets_released_slot(self):
+        controller = AdmissionController(1, queue_size=1, queue_timeout=5)
+        controller.acquire('a')
+        admitted = threading.Event()
+
+        def waiter():
+            controller.acquire('b')
+            admitted.set()
+
+        thread = threading.Thread(target=waiter)
+        thread.start()
+        while controller.stats()['queue_depth'] == 0:
+            time.sleep(0.01)
+        self.assertFalse(admitted.is_set())
+
+        controller.release('a', held_seconds=2.0)
+        thread.join(timeout=5)
+        self.assertTrue(admitted.is_set())
+        stats = controller.stats()
+        self.assertEqual(stats['active'], 1)
+        self.assertEqual(stats['queued'], 1)
+        self.assertEqual(stats['avg_hold_ms'], 2000.0)
+
+    def test_slot_releases_on_error(self):
+        controller = AdmissionController(1)
+        with self.assertRaises(ValueError):
+            with controller.slot('a'):
+                raise ValueError
+        stats = controller.stats()
+        self.assertEqual(stats['active'], 0)
+        self.assertEqual(stats['clients'], 0)
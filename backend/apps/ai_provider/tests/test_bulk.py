@@ -0,0 +1,118 @@
+import json
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+
+from apps.ai_provider.bulk import BulkItem, BulkReportRun, Checkpoint, JsonlSource
+from apps.core.models import ImmigrationReport
+
+
+def item(seq, status='created'):
+    return BulkItem(seq, f"key-{seq}", seq + 1, status=status)
+
+
+class TempDirMixin:
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def temp_path(self, name):
+        return os.path.join(self.directory, name)
+
+
+class CheckpointTests(TempDirMixin, SimpleTestCase):
+    def test_watermark_advances_over_contiguous_items_only(self):
+        checkpoint = Checkpoint(self.temp_path('run.json'), 'jsonl:x')
+        checkpoint.mark([item(1), item(3)])
+        self.assertEqual((checkpoint.watermark, checkpoint.cursor), (0, None))
+        checkpoint.mark([item(0)])
+        self.assertEqual((checkpoint.watermark, checkpoint.cursor), (2, 2))
+        checkpoint.mark([item(2, 'failed')])
+        self.assertEqual((checkpoint.watermark, checkpoint.cursor), (4, 4))
+        self.assertEqual(checkpoint.counts, {'created': 3, 'skipped': 0, 'failed': 1})
+
+    def test_resume_knows_items_done_past_the_watermark(self):
+        path = self.temp_path('run.json')
+        checkpoint = Checkpoint(path, 'jsonl:x')
+        checkpoint.mark([item(0), item(2), item(3, 'skipped')])
+        checkpoint.save()
+
+        resumed = Checkpoint(path, 'jsonl:x')
+        self.assertTrue(resumed.load())
+        self.assertEqual((resumed.watermark, resumed.cursor), (1, 1))
+        self.assertTrue(resumed.is_done('key-2'))
+        self.assertTrue(resumed.is_done('key-3'))
+        self.assertFalse(resumed.is_done('key-1'))
+        self.assertEqual(resumed.counts['skipped'], 1)
+
+        resumed.mark([item(1), item(2, 'resumed'), item(3, 'resumed')])
+        self.assertEqual(resumed.watermark, 4)
+        resumed.save()
+        with open(path, encoding='utf-8') as handle:
+            self.assertEqual(json.load(handle)['done_after'], [])
+
+    def test_rejects_checkpoint_of_another_source(self):
+        path = self.temp_path('run.json')
+        Checkpoint(path, 'jsonl:a').save()
+        with self.assertRaises(ValueError):
+            Checkpoint(path, 'jsonl:b').load()
+
+    def test_missing_checkpoint_starts_fresh(self):
+        self.assertFalse(Checkpoint(self.temp_path('none.json'), 'jsonl:x').load())
+        self.assertFalse(Checkpoint(None, 'jsonl:x').load())
+
+
+
+
+class BulkRunTests(TempDirMixin, TestCase):
+    def write_source(self, ages):
+        path = self.temp_path('profiles.jsonl')
+        with open(path, 'w', encoding='utf-8') as handle:
+            for index, age in enumerate(ages):
+                profile = {'user_name': f"User {index}", 'path': 'Express Entry', 'age': age}
+                handle.write(json.dumps({'id': f"p{index}", 'profile': profile}) + '\n')
+        return path
+
+    def run_bulk(self, ages, fail_ages=()):
+        source = JsonlSource(self.write_source(ages))
+        checkpoint = Checkpoint(self.temp_path('run.json'), source.name)
+        failures = self.temp_path('failures.jsonl')
+        run = BulkReportRun(
+            source, checkpoint, llm_concurrency=2, pdf_concurrency=1, batch_size=2,
+            render_pdfs=False, skip_existing=False, failures_path=failures,
+        )
+        with mock.patch('apps.ai_provider.bulk.build_openrouter_request', lambda profile, referer: ({}, {'age': profile.age})), \
+                mock.patch('apps.ai_provider.bulk.complete_report_with_fallback', self.fake_completion(fail_ages)):
+            progress = run.run()
+        failed = []
+        if os.path.exists(failures):
+            with open(failures, encoding='utf-8') as handle:
+                failed = [json.loads(line) for line in handle]
+        return progress, checkpoint, failed
+
+    @staticmethod
+    def fake_completion(fail_ages):
+        def complete(headers, payload_data):
+            if payload_data['age'] in fail_ages:
+                raise RuntimeError("upstream exploded")
+            return "## Summary\n\nThe applicant qualifies.", 'fake/model'
+        return complete
+
+    def test_repeated_profile_is_skipped_once_generated(self):
+        progress, checkpoint, failed = self.run_bulk([30, 31, 30, 30])
+        self.assertEqual((progress.created, progress.skipped, progress.failed), (2, 2, 0))
+        self.assertEqual(ImmigrationReport.objects.count(), 2)
+        self.assertEqual(checkpoint.watermark, 4)
+        self.assertEqual(failed, [])
+
+    def test_repeated_profile_fails_with_its_first_occurrence(self):
+        progress, checkpoint, failed = self.run_bulk([40, 31, 40, 40], fail_ages={40})
+        self.assertEqual((progress.created, progress.skipped, progress.failed), (1, 0, 3))
+        self.assertEqual(sorted(entry['id'] for entry in failed), ['p0', 'p2', 'p3'])
+        duplicate = next(entry for entry in failed if entry['id'] == 'p2')
+        self.assertIn("Same profile as p0", duplicate['error'])
+        self.assertEqual(duplicate['profile']['user_name'], 'User 2')
+        self.assertEqual(checkpoint.watermark, 4)
@@ -0,0 +1,74 @@
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+
+from apps.ai_provider.cache import (
+    CACHE_KEY_PREFIX,
+    get_cached_report,
+    report_cache_key,
+    report_contains_identity,
+    store_cached_report,
+)
+from apps.ai_provider.schemas import ImmigrationProfileSchema
+from apps.ai_provider.singleflight import acquire_report_flight
+from apps.core.models import ImmigrationReport
+
+
+def make_report(markdown, **identity):
+    return ImmigrationReport.objects.create(
+        report_markdown=markdown,
+        pathway_goal='Express Entry',
+        user_name=identity.get('user_name'),
+        user_email=identity.get('user_email'),
+        user_phone=identity.get('user_phone'),
+    )
+
+
+class ReportCacheKeyTests(TestCase):
+    def test_identity_fields_are_left_out(self):
+        alice = ImmigrationProfileSchema(user_name='Alice Smith', user_email='alice@example.com', age=30, path='Express Entry')
+        bob = ImmigrationProfileSchema(user_name='Bob Jones', user_phone='555 0100', age=30, path='Express Entry')
+        self.assertEqual(report_cache_key(alice), report_cache_key(bob))
+
+    def test_whitespace_and_empty_values_normalize(self):
+        spaced = ImmigrationProfileSchema(citizenship='  India ', path='Express  Entry', marital_status='')
+        plain = ImmigrationProfileSchema(citizenship='India', path='Express Entry')
+        self.assertEqual(report_cache_key(spaced), report_cache_key(plain))
+
+    def test_profile_changes_change_the_key(self):
+        self.assertNotEqual(
+            report_cache_key(ImmigrationProfileSchema(path='Express Entry', age=30)),
+            report_cache_key(ImmigrationProfileSchema(path='Express Entry', age=31)),
+        )
+
+
+class ReportIdentityTests(TestCase):
+    def setUp(self):
+        caches['reports'].clear()
+
+    def test_detects_name_email_and_phone(self):
+        self.assertTrue(report_contains_identity(make_report("Alice  Smith, age 30.", user_name='alice smith')))
+        self.assertTrue(report_contains_identity(make_report("Contact a@example.com", user_email='a@example.com')))
+        self.assertTrue(report_contains_identity(make_report("Call 555-0100.", user_phone='555-0100')))
+
+    def test_ignores_reports_without_identity(self):
+        report = make_report("The applicant, age 30.", user_name='Alice Smith', user_email='alice@example.com')
+        self.assertFalse(report_contains_identity(report))
+        # Only whole-word matches count
+        self.assertFalse(report_contains_identity(make_report("Alicante is in Spain.", user_name='Alice')))
+
+    def test_store_refuses_reports_with_identity(self):
+        report = make_report("Alice Smith, age 30.", user_name='Alice Smith')
+        self.assertFalse(store_cached_report('a' * 64, report))
+        self.assertIsNone(caches['reports'].get(f"{CACHE_KEY_PREFIX}:{'a' * 64}"))
+
+    def test_store_keeps_reports_without_identity(self):
+        report = make_report("The applicant, age 30.", user_name='Alice Smith')
+        self.assertTrue(store_cached_report('b' * 64, report))
+        self.assertEqual(get_cached_report('b' * 64)['report_markdown'], "The applicant, age 30.")
+
+    @override_settings(REPORT_SINGLEFLIGHT_DB=False)
+    def test_flight_does_not_share_reports_with_identity(self):
+        leader = acquire_report_flight('c' * 64)
+        follower = acquire_report_flight('c' * 64)
+        leader.complete(make_report("Alice Smith, age 30.", user_name='Alice Smith'))
+        self.assertIsNone(follower.wait())
@@ -0,0 +1,29 @@
+import asyncio
+
+from asgiref.sync import async_to_sync
+from django.test import SimpleTestCase
+
+from apps.ai_provider.client import get_async_openrouter_client
+
+
+class AsyncClientLifetimeTests(SimpleTestCase):
+    def test_one_client_per_loop_closed_when_the_loop_ends(self):
+        async def use_client():
+            client = await get_async_openrouter_client()
+            self.assertIs(await get_async_openrouter_client(), client)
+            self.assertFalse(client._client.is_closed)
+            return client
+
+        first = asyncio.run(use_client())
+        second = asyncio.run(use_client())
+        self.assertIsNot(first, second)
+        self.assertTrue(first._client.is_closed)
+        self.assertTrue(second._client.is_closed)
+
+    def test_wsgi_request_loop_closes_its_client(self):
+        # Async views under WSGI run through async_to_sync on a fresh loop per call
+        async def use_client():
+            return await get_async_openrouter_client()
+
+        client = async_to_sync(use_client)()
+        self.assertTrue(client._client.is_closed)
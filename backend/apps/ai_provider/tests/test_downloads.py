@@ -0,0 +1,91 @@
+import os
+import shutil
+import tempfile
+
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from apps.ai_provider.downloads import DownloadCounter, parse_range, pdf_file_response
+from apps.core.models import ImmigrationReport
+
+
+class ParseRangeTests(SimpleTestCase):
+    def test_whole_file_without_a_usable_header(self):
+        for header in ('', 'bytes=-', 'items=0-5', 'bytes=0-5,10-20', 'bytes=a-b'):
+            self.assertIsNone(parse_range(header, 100), header)
+
+    def test_single_ranges(self):
+        self.assertEqual(parse_range('bytes=0-9', 100), (0, 9))
+        self.assertEqual(parse_range(' bytes=10- ', 100), (10, 99))
+        self.assertEqual(parse_range('bytes=90-500', 100), (90, 99))  # End clamped to the file
+
+    def test_suffix_ranges(self):
+        self.assertEqual(parse_range('bytes=-10', 100), (90, 99))
+        self.assertEqual(parse_range('bytes=-500', 100), (0, 99))
+
+    def test_unsatisfiable_ranges(self):
+        for header, size in (('bytes=100-', 100), ('bytes=50-10', 100), ('bytes=-0', 100), ('bytes=-5', 0), ('bytes=0-', 0)):
+            self.assertIs(parse_range(header, size), False, header)
+
+
+class PdfFileResponseTests(SimpleTestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        self.path = os.path.join(self.media_root, 'reports', 'report.pdf')
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, 'wb') as f:
+            f.write(bytes(range(100)))
+        self.factory = RequestFactory()
+
+    def respond(self, **headers):
+        with override_settings(MEDIA_ROOT=self.media_root):
+            return pdf_file_response(self.factory.get('/', **headers), self.path, 'report.pdf', '"etag"')
+
+    @override_settings(REPORT_PDF_SENDFILE='')
+    def test_streams_whole_file_and_ranges(self):
+        response, counted = self.respond()
+        self.assertEqual((response.status_code, counted), (200, True))
+        self.assertEqual(b''.join(response.streaming_content), bytes(range(100)))
+
+        response, counted = self.respond(HTTP_RANGE='bytes=10-19')
+        self.assertEqual((response.status_code, counted), (206, False))
+        self.assertEqual(response['Content-Range'], 'bytes 10-19/100')
+        self.assertEqual(b''.join(response.streaming_content), bytes(range(10, 20)))
+
+        self.assertTrue(self.respond(HTTP_RANGE='bytes=0-9')[1])
+
+    @override_settings(REPORT_PDF_SENDFILE='')
+    def test_stale_if_range_sends_whole_file(self):
+        response, counted = self.respond(HTTP_RANGE='bytes=10-19', HTTP_IF_RANGE='"other"')
+        self.assertEqual((response.status_code, counted), (200, True))
+        response, _ = self.respond(HTTP_RANGE='bytes=10-19', HTTP_IF_RANGE='"etag"')
+        self.assertEqual(response.status_code, 206)
+
+    def test_unsatisfiable_range_is_an_uncounted_416(self):
+        for backend in ('', 'nginx', 'apache'):
+            with override_settings(REPORT_PDF_SENDFILE=backend):
+                response, counted = self.respond(HTTP_RANGE='bytes=500-')
+            self.assertEqual((response.status_code, counted), (416, False), backend)
+            self.assertEqual(response['Content-Range'], 'bytes */100')
+
+    @override_settings(REPORT_PDF_SENDFILE='nginx', REPORT_PDF_ACCEL_REDIRECT_PREFIX='/protected-media/')
+    def test_nginx_offload(self):
+        response, counted = self.respond()
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/reports/report.pdf')
+        self.assertTrue(counted)
+        self.assertFalse(self.respond(HTTP_RANGE='bytes=10-')[1])
+
+
+class DownloadCounterTests(TestCase):
+    def test_flushes_counts_in_batches(self):
+        report = ImmigrationReport.objects.create(report_markdown="The applicant.", pathway_goal='Express Entry')
+        counter = DownloadCounter(flush_seconds=3600, flush_size=3)
+        counter.record(report.id)
+        counter.record(report.id)
+        report.refresh_from_db()
+        self.assertEqual(report.download_count, 0)
+        counter.record(report.id)  # Reaches flush_size
+        report.refresh_from_db()
+        self.assertEqual(report.download_count, 3)
+        self.assertIsNotNone(report.last_downloaded_at)
+        self.assertEqual(counter.stats()['pending'], 0)
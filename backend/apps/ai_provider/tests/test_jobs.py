@@ -0,0 +1,85 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from ninja.errors import HttpError
+
+from apps.ai_provider.jobs import claim_next_job, requeue_expired_jobs, run_job
+from apps.core.models import ImmigrationReport, ReportJob
+
+PROFILE = {'path': 'Express Entry', 'age': 30}
+
+
+def make_job(**fields):
+    return ReportJob.objects.create(profile_data=PROFILE, **fields)
+
+
+def make_running_job(worker_id='worker-a', expires_in=60, attempts=1):
+    return make_job(
+        status='running',
+        worker_id=worker_id,
+        attempts=attempts,
+        lease_expires_at=timezone.now() + timedelta(seconds=expires_in),
+    )
+
+
+@override_settings(REPORT_JOB_LEASE_SECONDS=300, REPORT_JOB_MAX_ATTEMPTS=2)
+class ClaimTests(TestCase):
+    def test_claims_oldest_queued_job_once(self):
+        first, second = make_job(), make_job()
+        claimed = claim_next_job('worker-a')
+        self.assertEqual(claimed.id, first.id)
+        self.assertEqual((claimed.status, claimed.worker_id, claimed.attempts), ('running', 'worker-a', 1))
+        self.assertIsNotNone(claimed.lease_expires_at)
+        self.assertEqual(claim_next_job('worker-b').id, second.id)
+        self.assertIsNone(claim_next_job('worker-c'))
+
+    def test_expired_leases_are_requeued_until_attempts_run_out(self):
+        retry = make_running_job(expires_in=-1, attempts=1)
+        exhausted = make_running_job(expires_in=-1, attempts=2)
+        alive = make_running_job(expires_in=60)
+
+        self.assertEqual(requeue_expired_jobs(), 2)
+        retry.refresh_from_db()
+        exhausted.refresh_from_db()
+        alive.refresh_from_db()
+        self.assertEqual((retry.status, retry.worker_id, retry.lease_expires_at), ('queued', None, None))
+        self.assertEqual((exhausted.status, exhausted.error_status), ('failed', 500))
+        self.assertEqual((alive.status, alive.worker_id), ('running', 'worker-a'))
+
+
+@override_settings(REPORT_JOB_LEASE_SECONDS=300)
+class RunJobTests(TestCase):
+    def setUp(self):
+        self.report = ImmigrationReport.objects.create(report_markdown="The applicant.", pathway_goal='Express Entry')
+
+    def test_completes_the_job(self):
+        job = make_running_job()
+        with mock.patch('apps.ai_provider.jobs.generate_report', return_value=self.report):
+            run_job(job)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.progress, job.report_id), ('completed', 100, self.report.id))
+        self.assertIsNone(job.lease_expires_at)
+
+    def test_records_the_failure(self):
+        job = make_running_job()
+        with mock.patch('apps.ai_provider.jobs.generate_report', side_effect=HttpError(504, "Timed out")):
+            run_job(job)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.error_status, job.error_message), ('failed', 504, "Timed out"))
+
+    def test_worker_that_lost_its_lease_does_not_overwrite_the_new_owner(self):
+        job = make_running_job(worker_id='worker-a')
+
+        def taken_over(*args, on_stage=None, **kwargs):
+            # The lease expired and another worker claimed the job meanwhile
+            ReportJob.objects.filter(id=job.id).update(worker_id='worker-b', attempts=2)
+            on_stage('pdf', 80)
+            return self.report
+
+        with mock.patch('apps.ai_provider.jobs.generate_report', side_effect=taken_over):
+            run_job(job)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.worker_id, job.report_id), ('running', 'worker-b', None))
+        self.assertNotEqual(job.stage, 'pdf')
@@ -0,0 +1,66 @@
+import uuid
+from datetime import timedelta
+
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from ninja.errors import HttpError
+
+from apps.ai_provider.pagination import (
+    decode_cursor,
+    decode_offset_cursor,
+    encode_cursor,
+    encode_offset_cursor,
+    paginate_reports,
+)
+from apps.core.models import ImmigrationReport
+
+
+class CursorTests(SimpleTestCase):
+    def test_round_trips(self):
+        created_at, report_id = timezone.now(), uuid.uuid4()
+        self.assertEqual(decode_cursor(encode_cursor(created_at, report_id)), (created_at, report_id))
+        self.assertEqual(decode_offset_cursor(encode_offset_cursor(150)), 150)
+        self.assertEqual(decode_offset_cursor(None), 0)
+
+    def test_malformed_cursors_are_a_400(self):
+        for cursor in ('not-base64!', 'e30', encode_offset_cursor(5)):
+            with self.assertRaises(HttpError) as raised:
+                decode_cursor(cursor)
+            self.assertEqual(raised.exception.status_code, 400)
+        for cursor in ('e30', encode_offset_cursor(-1), 'bm9wZQ'):
+            with self.assertRaises(HttpError):
+                decode_offset_cursor(cursor)
+
+
+class PaginateReportsTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        # Seven reports over four timestamps, so pages break inside runs of equal created_at
+        for index, seconds_ago in enumerate((0, 0, 0, 10, 10, 20, 30)):
+            report = ImmigrationReport.objects.create(report_markdown=f"Report {index}", pathway_goal='Express Entry')
+            ImmigrationReport.objects.filter(pk=report.pk).update(created_at=now - timedelta(seconds=seconds_ago))
+
+    def test_pages_cover_every_report_once_newest_first(self):
+        expected = list(ImmigrationReport.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        seen, cursor, pages = [], None, 0
+        while True:
+            reports, cursor = paginate_reports(ImmigrationReport.objects.all(), cursor, limit=2)
+            seen += [report.id for report in reports]
+            pages += 1
+            if cursor is None:
+                break
+        self.assertEqual(seen, expected)
+        self.assertEqual(pages, 4)
+
+    def test_exact_last_page_has_no_cursor(self):
+        reports, cursor = paginate_reports(ImmigrationReport.objects.all(), limit=7)
+        self.assertEqual((len(reports), cursor), (7, None))
+
+    def test_loads_list_columns_only(self):
+        reports, _ = paginate_reports(ImmigrationReport.objects.all(), limit=1)
+        self.assertIn('report_markdown', reports[0].get_deferred_fields())
+
+    def test_rejects_out_of_range_limits(self):
+        for limit in (0, 201):
+            with self.assertRaises(HttpError):
+                paginate_reports(ImmigrationReport.objects.all(), limit=limit)
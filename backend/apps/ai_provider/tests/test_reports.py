@@ -0,0 +1,81 @@
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, override_settings
+
+from apps.ai_provider.prompts import check_prompt_settings
+from apps.ai_provider.report_sections import analyze_profile, render_sections
+from apps.ai_provider.schemas import ImmigrationProfileSchema
+from apps.ai_provider.services import generate_report
+
+NARRATIVE = (
+    "## 🧭 Recommended Pathway\n\nExpress Entry through the Federal Skilled Worker Program.\n\n"
+    "## 🧑‍💼 Professional Recommendations\n\n- Retake IELTS to reach CLB 9."
+)
+
+
+def profile(**identity):
+    return ImmigrationProfileSchema(
+        path='Express Entry',
+        age=30,
+        citizenship='India',
+        highest_degree="Master's degree",
+        english_test='IELTS',
+        english_scores='L8 R7 W7 S7',
+        foreign_experience_years=3,
+        **identity,
+    )
+
+
+@override_settings(
+    OPENROUTER_API_KEY='test-key',
+    REPORT_PDF_LAZY=True,
+    REPORT_SINGLEFLIGHT_DB=True,
+)
+class SharedReportIdentityTests(TestCase):
+    def setUp(self):
+        caches['reports'].clear()
+        completion = mock.patch(
+            'apps.ai_provider.services.complete_report_with_fallback',
+            return_value=(NARRATIVE, 'fake/model'),
+        )
+        self.complete = completion.start()
+        self.addCleanup(completion.stop)
+
+    def assert_no_leak(self, builder):
+        with override_settings(REPORT_BUILDER=builder):
+            alice = generate_report(profile(user_name='Alice Smith', user_email='alice@example.com', user_phone='555-0100'))
+            bob = generate_report(profile(user_name='Bob Jones', user_email='bob@example.com', user_phone='555-0199'))
+
+        self.assertFalse(alice.cache_hit)
+        self.assertTrue(bob.cache_hit)
+        self.assertEqual(self.complete.call_count, 1)
+        self.assertEqual((bob.user_name, bob.user_email), ('Bob Jones', 'bob@example.com'))
+        for leaked in ('Alice', 'alice@example.com', '555-0100'):
+            self.assertNotIn(leaked, bob.report_markdown)
+
+    def test_hybrid_report_is_shared_without_the_first_requesters_identity(self):
+        self.assert_no_leak('hybrid')
+
+    def test_llm_report_is_shared_without_the_first_requesters_identity(self):
+        self.assert_no_leak('llm')
+
+
+class ProfileSummaryTests(TestCase):
+    def test_summary_never_names_the_requester(self):
+        sections = render_sections(analyze_profile(profile(user_name='Alice Smith')))
+        self.assertIn("The applicant, age 30, citizen of India.", sections)
+        self.assertNotIn('Alice', sections)
+
+
+class PromptSettingsTests(TestCase):
+    def test_defaults_to_the_full_llm_report(self):
+        self.assertEqual(settings.REPORT_BUILDER, 'llm')
+        check_prompt_settings()
+
+    def test_unknown_builder_or_variant_is_a_configuration_error(self):
+        for overrides in ({'REPORT_BUILDER': 'server'}, {'REPORT_PROMPT_VARIANT': 'tiny'}):
+            with override_settings(**overrides), self.assertRaises(ImproperlyConfigured):
+                check_prompt_settings()
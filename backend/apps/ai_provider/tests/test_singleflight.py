@@ -0,0 +1,112 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from ninja.errors import HttpError
+
+from apps.ai_provider.singleflight import _try_acquire_lease, acquire_report_flight, prune_report_leases
+from apps.core.models import ImmigrationReport, ReportGenerationLease
+
+KEY = 'f' * 64
+
+
+def make_lease(status='running', owner='other-host:1:1', expires_in=60, finished_ago=None, report=None):
+    now = timezone.now()
+    return ReportGenerationLease.objects.create(
+        cache_key=KEY,
+        owner=owner,
+        status=status,
+        report=report,
+        expires_at=now + timedelta(seconds=expires_in),
+        started_at=now - timedelta(seconds=5),
+        finished_at=now - timedelta(seconds=finished_ago) if finished_ago is not None else None,
+    )
+
+
+@override_settings(REPORT_SINGLEFLIGHT_DB=True, REPORT_SINGLEFLIGHT_LEASE_SECONDS=150, REPORT_SINGLEFLIGHT_RESULT_SECONDS=30)
+class LeaseTakeoverTests(TestCase):
+    def test_first_caller_takes_the_lease(self):
+        self.assertTrue(_try_acquire_lease(KEY, 'me'))
+        self.assertEqual(ReportGenerationLease.objects.get(cache_key=KEY).owner, 'me')
+
+    def test_running_lease_is_not_taken_over(self):
+        make_lease()
+        self.assertFalse(_try_acquire_lease(KEY, 'me'))
+
+    def test_expired_running_lease_is_taken_over(self):
+        make_lease(expires_in=-1)
+        self.assertTrue(_try_acquire_lease(KEY, 'me'))
+        lease = ReportGenerationLease.objects.get(cache_key=KEY)
+        self.assertEqual((lease.owner, lease.status), ('me', 'running'))
+
+    def test_failed_lease_is_taken_over(self):
+        make_lease(status='failed', finished_ago=1)
+        self.assertTrue(_try_acquire_lease(KEY, 'me'))
+
+    def test_recently_completed_lease_is_shared_not_taken_over(self):
+        report = ImmigrationReport.objects.create(report_markdown="The applicant.", pathway_goal='Express Entry')
+        make_lease(status='completed', finished_ago=1, report=report)
+        self.assertFalse(_try_acquire_lease(KEY, 'me'))
+
+    def test_stale_completed_lease_is_taken_over(self):
+        report = ImmigrationReport.objects.create(report_markdown="The applicant.", pathway_goal='Express Entry')
+        make_lease(status='completed', finished_ago=60, report=report)
+        self.assertTrue(_try_acquire_lease(KEY, 'me'))
+        self.assertIsNone(ReportGenerationLease.objects.get(cache_key=KEY).report_id)
+
+    def test_follower_gets_the_other_process_result(self):
+        make_lease()
+        flight = acquire_report_flight(KEY)
+        self.assertFalse(flight.is_leader)
+        report = ImmigrationReport.objects.create(report_markdown="The applicant.", pathway_goal='Express Entry')
+        ReportGenerationLease.objects.filter(cache_key=KEY).update(status='completed', report=report, finished_at=timezone.now())
+        self.assertEqual(flight.wait().id, report.id)
+
+    def test_follower_gets_the_other_process_failure(self):
+        make_lease()
+        flight = acquire_report_flight(KEY)
+        ReportGenerationLease.objects.filter(cache_key=KEY).update(
+            status='failed', error_status=502, error_message="Upstream error", finished_at=timezone.now(),
+        )
+        with self.assertRaises(HttpError) as raised:
+            flight.wait()
+        self.assertEqual(raised.exception.status_code, 502)
+
+    def test_abandoned_lease_can_be_taken_over_at_once(self):
+        leader = acquire_report_flight(KEY)
+        self.assertTrue(leader.is_leader)
+        leader.abandon()
+        self.assertTrue(_try_acquire_lease(KEY, 'me'))
+
+
+@override_settings(REPORT_SINGLEFLIGHT_LEASE_SECONDS=150, REPORT_SINGLEFLIGHT_RESULT_SECONDS=30)
+class LeasePruneTests(TestCase):
+    def test_prunes_finished_and_long_abandoned_leases(self):
+        now = timezone.now()
+        for key, status, expires_in, finished_ago in (
+            ('a' * 64, 'completed', 60, 120),
+            ('b' * 64, 'failed', 60, 120),
+            ('c' * 64, 'running', -300, None),
+        ):
+            ReportGenerationLease.objects.create(
+                cache_key=key, owner='x', status=status, started_at=now,
+                expires_at=now + timedelta(seconds=expires_in),
+                finished_at=now - timedelta(seconds=finished_ago) if finished_ago else None,
+            )
+        self.assertEqual(prune_report_leases(), 3)
+        self.assertFalse(ReportGenerationLease.objects.exists())
+
+    def test_keeps_leases_still_in_use(self):
+        now = timezone.now()
+        for key, status, expires_in, finished_ago in (
+            ('a' * 64, 'completed', 60, 5),  # Still shared with followers
+            ('b' * 64, 'running', 60, None),  # In progress
+            ('c' * 64, 'running', -10, None),  # Just expired; a follower may be about to take over
+        ):
+            ReportGenerationLease.objects.create(
+                cache_key=key, owner='x', status=status, started_at=now,
+                expires_at=now + timedelta(seconds=expires_in),
+                finished_at=now - timedelta(seconds=finished_ago) if finished_ago else None,
+            )
+        self.assertEqual(prune_report_leases(), 0)
+        self.assertEqual(ReportGenerationLease.objects.count(), 3)
@@ -0,0 +1,120 @@
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.test import TestCase, override_settings
+
+from apps.ai_provider.storage import (
+    collect_garbage,
+    content_key_from_path,
+    pdf_content_key,
+    pdf_storage_path,
+    reference_count,
+    release_pdf,
+    store_pdf,
+)
+from apps.core.models import ImmigrationReport
+
+
+def write(path, data=b'%PDF-1.7'):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return path
+
+
+class StorageTestCase(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root, REPORT_STORAGE_GC_GRACE_SECONDS=0)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def report(self, **fields):
+        return ImmigrationReport.objects.create(report_markdown="The applicant.", pathway_goal='Express Entry', **fields)
+
+
+class ContentKeyTests(StorageTestCase):
+    def test_default_theme_keeps_its_key(self):
+        self.assertEqual(pdf_content_key('a' * 64), pdf_content_key('a' * 64, 'default'))
+        self.assertNotEqual(pdf_content_key('a' * 64), pdf_content_key('a' * 64, 'print'))
+
+    def test_key_is_read_back_from_any_root(self):
+        key = pdf_content_key('a' * 64)
+        self.assertEqual(content_key_from_path(pdf_storage_path(key)), key)
+        self.assertEqual(content_key_from_path(f"/app/media/reports/{key[:2]}/{key[2:4]}/{key}.pdf"), key)
+        self.assertIsNone(content_key_from_path(f"/app/media/reports/{key}.pdf"))
+        self.assertIsNone(content_key_from_path(None))
+
+    def test_store_pdf_renders_once(self):
+        key = pdf_content_key('b' * 64)
+        renders = []
+        path, reused = store_pdf(key, lambda target: renders.append(write(target)))
+        self.assertEqual((path, reused), (pdf_storage_path(key), False))
+        self.assertEqual(store_pdf(key, lambda target: renders.append(write(target))), (path, True))
+        self.assertEqual(len(renders), 1)
+        self.assertEqual(os.listdir(os.path.dirname(path)), [f"{key}.pdf"])
+
+
+class GarbageCollectionTests(StorageTestCase):
+    def test_deletes_only_unreferenced_content_addressed_files(self):
+        kept_key, orphan_key = pdf_content_key('c' * 64), pdf_content_key('d' * 64)
+        kept = write(pdf_storage_path(kept_key))
+        orphan = write(pdf_storage_path(orphan_key))
+        # Saved under another deploy root; the key still matches
+        self.report(pdf_key=kept_key, pdf_path=f"/old/root/media/reports/{kept_key[:2]}/{kept_key[2:4]}/{kept_key}.pdf")
+
+        stats = collect_garbage()
+        self.assertTrue(os.path.exists(kept))
+        self.assertFalse(os.path.exists(orphan))
+        self.assertEqual((stats['deleted'], stats['orphans']), (1, 1))
+
+    def test_keeps_legacy_files_referenced_under_another_root(self):
+        legacy = write(os.path.join(self.media_root, 'reports', 'immigration_report_20250101_abcd.pdf'))
+        orphan = write(os.path.join(self.media_root, 'reports', 'immigration_report_20250102_ef01.pdf'))
+        self.report(
+            pdf_filename='immigration_report_20250101_abcd.pdf',
+            pdf_path='/home/dev/checkout/backend/media/reports/immigration_report_20250101_abcd.pdf',
+        )
+
+        collect_garbage()
+        self.assertTrue(os.path.exists(legacy))
+        self.assertFalse(os.path.exists(orphan))
+
+    def test_keeps_legacy_files_referenced_by_exact_path(self):
+        legacy = write(os.path.join(self.media_root, 'reports', 'renamed.pdf'))
+        self.report(pdf_filename='download-name.pdf', pdf_path=legacy)
+        collect_garbage()
+        self.assertTrue(os.path.exists(legacy))
+
+    def test_dry_run_and_grace_period_delete_nothing(self):
+        orphan = write(pdf_storage_path(pdf_content_key('e' * 64)))
+        self.assertEqual(collect_garbage(dry_run=True)['orphans'], 1)
+        self.assertEqual(collect_garbage(grace_seconds=3600)['skipped_recent'], 1)
+        self.assertTrue(os.path.exists(orphan))
+
+    def test_removes_temporary_files_and_empty_directories(self):
+        key = pdf_content_key('f' * 64)
+        temp = write(f"{pdf_storage_path(key)}.1234abcd.tmp")
+        stats = collect_garbage()
+        self.assertFalse(os.path.exists(temp))
+        self.assertEqual(list(Path(self.media_root, 'reports').iterdir()), [])
+        self.assertEqual(stats['empty_dirs_removed'], 2)
+
+
+class ReleaseTests(StorageTestCase):
+    def test_release_keeps_referenced_legacy_file(self):
+        legacy = write(os.path.join(self.media_root, 'reports', 'immigration_report_x.pdf'))
+        self.report(pdf_filename='immigration_report_x.pdf', pdf_path='/elsewhere/reports/immigration_report_x.pdf')
+        self.assertEqual(reference_count(path=legacy), 1)
+        self.assertFalse(release_pdf(None, legacy))
+        self.assertTrue(os.path.exists(legacy))
+
+    def test_release_deletes_unreferenced_file(self):
+        key = pdf_content_key('1' * 64)
+        path = write(pdf_storage_path(key))
+        self.assertEqual(reference_count(key, path), 0)
+        self.assertTrue(release_pdf(key, path))
+        self.assertFalse(os.path.exists(path))
@@ -0,0 +1,152 @@
+"""
+Per-report token usage and latency accounting.
+
+Every served report gets a ``ReportUsage`` row with the tokens the upstream
+reported for it (summed over fallback attempts; none for cache hits), cost
+when OpenRouter reports it, prompt tokens served from the provider's prompt
+cache, upstream / first-token / PDF / total time, the prompt version and the
+pipeline that served it. ``usage_summary`` aggregates the rows by day, model,
+pathway or prompt version so expensive or slow pathways, models and prompts
+stand out.
+
+Recording is best-effort: a failed write is logged and never fails the report.
+"""
+import logging
+from datetime import datetime
+from decimal import Decimal
+from typing import List, Optional
+
+from django.db import transaction
+from django.db.models import Avg, Count, F, Max, Q, Sum
+from django.db.models.functions import TruncDate
+
+from apps.ai_provider.instrumentation import StageTimer
+from apps.ai_provider.prompts import prompt_version
+from apps.core.models import ImmigrationReport, ReportUsage
+
+logger = logging.getLogger(__name__)
+
+GROUP_BY_FIELDS = {
+    'day': TruncDate('created_at'),
+    'model': F('ai_model_used'),
+    'pathway_goal': F('pathway_goal'),
+    'prompt_version': F('prompt_version'),
+}
+
+
+def build_report_usage(report: ImmigrationReport, timer: StageTimer, pipeline: str) -> ReportUsage:
+    """An unsaved usage row for a served report, from the timer that measured it"""
+    usage = timer.usage
+    return ReportUsage(
+        report=report,
+        ai_model_used=report.ai_model_used,
+        pathway_goal=report.pathway_goal,
+        pipeline=pipeline,
+        cache_hit=report.cache_hit,
+        prompt_tokens=usage.get('prompt_tokens'),
+        completion_tokens=usage.get('completion_tokens'),
+        total_tokens=usage.get('total_tokens'),
+        cached_prompt_tokens=usage.get('cached_tokens'),
+        # The cache key includes the prompt version, so cache hits were generated with the current one too
+        prompt_version=prompt_version(),
+        cost=Decimal(str(usage['cost'])) if 'cost' in usage else None,
+        upstream_ms=timer.timings.get('upstream'),
+        first_token_ms=timer.timings.get('first_token'),
+        pdf_ms=timer.timings.get('pdf'),
+        total_ms=timer.total_ms,
+    )
+
+
+def record_report_usage(report: ImmigrationReport, timer: StageTimer, pipeline: str) -> Optional[ReportUsage]:
+    try:
+        # Savepoint: a failed write must not abort the caller's transaction
+        with transaction.atomic():
+            usage = build_report_usage(report, timer, pipeline)
+            usage.save()
+            return usage
+    except Exception:
+        logger.exception("Failed to record report usage report_id=%s", report.id)
+        return None
+
+
+def record_pdf_render(report_id, pdf_ms: float) -> None:
+    """Add the time of a PDF rendered after the report was served (lazy mode, or a failed first render)"""
+    try:
+        ReportUsage.objects.filter(report_id=report_id).update(pdf_ms=pdf_ms)
+    except Exception:
+        logger.exception("Failed to record PDF render time report_id=%s", report_id)
+
+
+def usage_summary(
+    group_by: str,
+    since: datetime,
+    model: Optional[str] = None,
+    pathway_goal: Optional[str] = None,
+    pipeline: Optional[str] = None,
+) -> List[dict]:
+    """
+    Usage aggregated per day, model, pathway goal or prompt version.
+
+    Token and upstream latency figures cover generated reports only (cache hits
+    have none); ``avg_total_ms`` is likewise over generated reports.
+
+    Returns:
+        One dict per group: days oldest first, models, pathways and prompt
+        versions by total tokens, highest first
+    """
+    queryset = ReportUsage.objects.filter(created_at__gte=since)
+    if model:
+        queryset = queryset.filter(ai_model_used=model)
+    if pathway_goal:
+        queryset = queryset.filter(pathway_goal=pathway_goal)
+    if pipeline:
+        queryset = queryset.filter(pipeline=pipeline)
+
+    generated = Q(cache_hit=False)
+    rows = (
+        queryset
+        .annotate(group=GROUP_BY_FIELDS[group_by])
+        .values('group')
+        .annotate(
+            reports=Count('id'),
+            cache_hits=Count('id', filter=Q(cache_hit=True)),
+            sum_prompt_tokens=Sum('prompt_tokens'),
+            sum_cached_prompt_tokens=Sum('cached_prompt_tokens'),
+            avg_prompt_tokens=Avg('prompt_tokens', filter=generated),
+            sum_completion_tokens=Sum('completion_tokens'),
+            sum_total_tokens=Sum('total_tokens'),
+            avg_total_tokens=Avg('total_tokens'),
+            sum_cost=Sum('cost'),
+            avg_upstream_ms=Avg('upstream_ms', filter=generated),
+            max_upstream_ms=Max('upstream_ms', filter=generated),
+            avg_first_token_ms=Avg('first_token_ms', filter=generated),
+            avg_pdf_ms=Avg('pdf_ms'),
+            avg_total_ms=Avg('total_ms', filter=generated),
+        )
+    )
+    if group_by == 'day':
+        rows = rows.order_by('group')
+    else:
+        rows = rows.order_by(F('sum_total_tokens').desc(nulls_last=True), 'group')
+
+    return [
+        {
+            'group': row['group'].isoformat() if hasattr(row['group'], 'isoformat') else row['group'],
+            'reports': row['reports'],
+            'cache_hits': row['cache_hits'],
+            'cache_hit_rate': row['cache_hits'] / row['reports'] if row['reports'] else 0.0,
+            'prompt_tokens': row['sum_prompt_tokens'] or 0,
+            'cached_prompt_tokens': row['sum_cached_prompt_tokens'] or 0,
+            'avg_prompt_tokens': row['avg_prompt_tokens'],
+            'completion_tokens': row['sum_completion_tokens'] or 0,
+            'total_tokens': row['sum_total_tokens'] or 0,
+            'avg_total_tokens': row['avg_total_tokens'],
+            'cost': float(row['sum_cost']) if row['sum_cost'] is not None else None,
+            'avg_upstream_ms': row['avg_upstream_ms'],
+            'max_upstream_ms': row['max_upstream_ms'],
+            'avg_first_token_ms': row['avg_first_token_ms'],
+            'avg_pdf_ms': row['avg_pdf_ms'],
+            'avg_total_ms': row['avg_total_ms'],
+        }
+        for row in rows
+    ]
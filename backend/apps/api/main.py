@@ -1,11 +1,21 @@
 from ninja import NinjaAPI
 
+from apps.ai_provider.admission import AdmissionRejected
+
 api = NinjaAPI(
     title="Canada SaaS API",
     description="API for Canadian Immigration Concierge Platform",
     version="1.0.0",
 )
 
+
+@api.exception_handler(AdmissionRejected)
+def admission_rejected(request, exc):
+    """Busy report endpoints: 429 with a Retry-After hint"""
+    response = api.create_response(request, {"detail": exc.message}, status=exc.status_code)
+    response['Retry-After'] = str(exc.retry_after)
+    return response
+
 # Import routers
 from apps.api.routers import auth, crs, consultation, pathway, analytics, profile, admin
 from apps.ai_provider.router import router as ai_provider_router
@@ -138,7 +138,11 @@ def get_user_detail(request, user_id: int):
     ]
     
     # Get all detailed calculations by email
-    detailed_calculations = CRSCalculationDetailed.objects.filter(user_email=user.email).order_by('-created_at')
+    detailed_calculations = (
+        CRSCalculationDetailed.objects.filter(user_email=user.email)
+        .defer('category_breakdown', 'improvement_suggestions')
+        .order_by('-created_at')
+    )
     calculations_data.extend([
         {
             "id": str(calc.id),
@@ -82,7 +82,9 @@ def get_dashboard_stats(request):
     recent_partial = CRSCalculationSession.objects.filter(is_completed=False).order_by('-last_activity')[:20]
     
     # Get recent immigration reports (separate from calculations)
-    recent_reports = ImmigrationReport.objects.order_by('-created_at')[:10]
+    recent_reports = ImmigrationReport.objects.only(
+        'id', 'user_name', 'user_email', 'user_phone', 'pathway_goal', 'pdf_url', 'ai_model_used', 'created_at'
+    ).order_by('-created_at')[:10]
     
     # Combine and format only CRS calculations (no immigration reports)
     recent_calculations = []
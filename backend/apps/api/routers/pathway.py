@@ -2,6 +2,7 @@ from ninja import Router
 from ninja_jwt.authentication import JWTAuth
 from typing import Optional, List
 from pydantic import BaseModel
+from apps.ai_provider.speculative import schedule_speculative_report
 from apps.core.models import PathwayAdvisorSubmission
 from ninja.errors import HttpError
 
@@ -109,6 +110,7 @@ def submit_pathway_advisor(request, payload: PathwaySubmissionCreateSchema):
     if payload.submission_id:
         try:
             submission = PathwayAdvisorSubmission.objects.get(id=payload.submission_id)
+            was_completed = submission.is_completed
             # Update fields
             if payload.user_name:
                 submission.user_name = payload.user_name
@@ -159,6 +161,9 @@ def submit_pathway_advisor(request, payload: PathwaySubmissionCreateSchema):
             if payload.is_completed is not None:
                 submission.is_completed = payload.is_completed
             submission.save()
+            if submission.is_completed and not was_completed:
+                # The report is usually requested next; start generating it
+                schedule_speculative_report(submission)
             return PathwaySubmissionSchema.from_orm(submission)
         except PathwayAdvisorSubmission.DoesNotExist:
             # If submission doesn't exist, create new one
@@ -193,6 +198,8 @@ def submit_pathway_advisor(request, payload: PathwaySubmissionCreateSchema):
         current_step=payload.current_step or '',
         is_completed=payload.is_completed or False,
     )
+    if submission.is_completed:
+        schedule_speculative_report(submission)
     return PathwaySubmissionSchema.from_orm(submission)
 
 
@@ -5,7 +5,7 @@ from .models import (
     UserProfile, CRSCalculation, CRSCalculationDetailed, CRSCalculationSession, Roadmap,
     ServiceBooking, ConsultationBooking, ConsultationRequest,
     PathwayAdvisorSubmission, MarketplaceWaitlist, AgentNote,
-    PDFGeneration, PageView, ButtonClick, ImmigrationReport
+    PDFGeneration, PageView, ButtonClick, ImmigrationReport, ReportJob, ReportUsage
 )
 
 User = get_user_model()
@@ -15,6 +15,17 @@ if admin.site.is_registered(User):
     admin.site.unregister(User)
 
 
+class DeferLargeFieldsMixin:
+    """Leave large (compressed) columns out of changelist queries; the change form still loads them"""
+    changelist_defer = ()
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if self.changelist_defer and request.resolver_match and request.resolver_match.url_name.endswith('_changelist'):
+            queryset = queryset.defer(*self.changelist_defer)
+        return queryset
+
+
 # Inline admin for UserProfile
 class UserProfileInline(admin.StackedInline):
     model = UserProfile
@@ -144,7 +155,8 @@ class CRSCalculationAdmin(admin.ModelAdmin):
 
 
 @admin.register(CRSCalculationDetailed)
-class CRSCalculationDetailedAdmin(admin.ModelAdmin):
+class CRSCalculationDetailedAdmin(DeferLargeFieldsMixin, admin.ModelAdmin):
+    changelist_defer = ('input_data', 'category_breakdown', 'improvement_suggestions')
     list_display = ('user_name', 'user_email', 'user_phone', 'crs_score', 'created_at')
     list_filter = ('created_at',)
     search_fields = ('user_name', 'user_email', 'user_phone', 'session_id')
@@ -168,7 +180,8 @@ class CRSCalculationDetailedAdmin(admin.ModelAdmin):
 
 
 @admin.register(CRSCalculationSession)
-class CRSCalculationSessionAdmin(admin.ModelAdmin):
+class CRSCalculationSessionAdmin(DeferLargeFieldsMixin, admin.ModelAdmin):
+    changelist_defer = ('partial_data', 'completed_steps')
     list_display = ('session_id', 'user_email', 'current_step', 'is_completed', 'last_activity', 'created_at')
     list_filter = ('current_step', 'is_completed', 'created_at', 'last_activity')
     search_fields = ('session_id', 'user_name', 'user_email', 'user_phone')
@@ -317,9 +330,10 @@ class ButtonClickAdmin(admin.ModelAdmin):
 
 
 @admin.register(ImmigrationReport)
-class ImmigrationReportAdmin(admin.ModelAdmin):
-    list_display = ('user_name', 'user_email', 'pathway_goal', 'ai_model_used', 'created_at')
-    list_filter = ('pathway_goal', 'ai_model_used', 'created_at')
+class ImmigrationReportAdmin(DeferLargeFieldsMixin, admin.ModelAdmin):
+    changelist_defer = ('report_markdown', 'report_html', 'profile_data')
+    list_display = ('user_name', 'user_email', 'pathway_goal', 'ai_model_used', 'cache_hit', 'created_at')
+    list_filter = ('pathway_goal', 'ai_model_used', 'cache_hit', 'created_at')
     search_fields = ('user_name', 'user_email', 'user_phone', 'pathway_goal')
     readonly_fields = ('id', 'created_at', 'updated_at')
     date_hierarchy = 'created_at'
@@ -329,7 +343,7 @@ class ImmigrationReportAdmin(admin.ModelAdmin):
             'fields': ('user', 'user_name', 'user_email', 'user_phone')
         }),
         ('Report Details', {
-            'fields': ('pathway_goal', 'ai_model_used', 'profile_data')
+            'fields': ('pathway_goal', 'ai_model_used', 'cache_key', 'cache_hit', 'profile_data')
         }),
         ('Generated Content', {
             'fields': ('report_markdown', 'pdf_filename', 'pdf_url', 'pdf_path')
@@ -339,3 +353,21 @@ class ImmigrationReportAdmin(admin.ModelAdmin):
         }),
     )
 
+
+
+@admin.register(ReportJob)
+class ReportJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'status', 'stage', 'progress', 'attempts', 'worker_id', 'created_at', 'finished_at')
+    list_filter = ('status', 'stage', 'created_at')
+    search_fields = ('id', 'worker_id', 'error_message')
+    readonly_fields = ('id', 'created_at', 'started_at', 'finished_at', 'updated_at')
+    date_hierarchy = 'created_at'
+
+
+@admin.register(ReportUsage)
+class ReportUsageAdmin(admin.ModelAdmin):
+    list_display = ('report', 'ai_model_used', 'pathway_goal', 'pipeline', 'prompt_version', 'cache_hit', 'total_tokens', 'cached_prompt_tokens', 'cost', 'upstream_ms', 'first_token_ms', 'pdf_ms', 'created_at')
+    list_filter = ('pipeline', 'cache_hit', 'ai_model_used', 'pathway_goal', 'prompt_version', 'created_at')
+    search_fields = ('report__id', 'ai_model_used', 'pathway_goal')
+    readonly_fields = ('report', 'created_at')
+    date_hierarchy = 'created_at'
@@ -0,0 +1,301 @@
+"""
+Model fields that transparently compress large values.
+
+With ``DB_FIELD_COMPRESSION`` set to ``zlib`` or ``zstd``, values of at least
+``DB_FIELD_COMPRESSION_MIN_BYTES`` are compressed when saved (``save``,
+``bulk_create``, ``bulk_update``, ``update``) and decompressed when loaded.
+The columns keep their type, so plain and compressed rows coexist: rows
+written before compression was enabled (or with another codec) stay readable
+and are converted in batches by ``python manage.py compress_fields``.
+
+Stored forms:
+
+- **Text**: ``\\x1e`` + codec tag + base85 payload.
+- **JSON**: ``{"__compressed__": codec, "data": base85 payload}``, so the column
+  stays valid JSON (SQLite's ``JSON_VALID`` check, PostgreSQL ``jsonb``).
+
+The database only sees the stored form: SQL filters and functions on a
+compressed column (``icontains``, JSON key lookups) do not match compressed
+rows. A column that is not selected (``only()``, ``defer()``, ``values()``)
+is never decompressed, so list queries should leave these columns out.
+"""
+import base64
+import json
+import time
+import zlib
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional, Tuple
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, models, transaction
+from django.db.models.functions import Cast
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+CODECS = ('zlib', 'zstd')
+TEXT_MARKER = '\x1e'  # ASCII record separator: never produced by the report or form data
+TEXT_CODEC_TAGS = {'zlib': 'z', 'zstd': 's'}
+JSON_MARKER_KEY = '__compressed__'
+
+_codec_override = ContextVar('db_field_compression_override', default=None)
+
+
+def compression_codec() -> Optional[str]:
+    """The codec new values are written with, or None to store them plain"""
+    override = _codec_override.get()
+    codec = override if override is not None else settings.DB_FIELD_COMPRESSION
+    if not codec:
+        return None
+    if codec not in CODECS:
+        raise ImproperlyConfigured(f"DB_FIELD_COMPRESSION must be one of {', '.join(CODECS)} (or empty), not {codec!r}")
+    return codec
+
+
+@contextmanager
+def compression_override(codec: Optional[str]):
+    """Write with ``codec`` (``''`` stores plain) instead of ``DB_FIELD_COMPRESSION`` inside the block"""
+    token = _codec_override.set(codec or '')
+    try:
+        yield
+    finally:
+        _codec_override.reset(token)
+
+
+def _zstd():
+    if zstandard is None:
+        raise ImproperlyConfigured("zstd field compression needs the zstandard package (pip install zstandard)")
+    return zstandard
+
+
+def compress(data: bytes, codec: str) -> str:
+    if codec == 'zstd':
+        packed = _zstd().ZstdCompressor(level=3).compress(data)
+    else:
+        packed = zlib.compress(data, 6)
+    return base64.b85encode(packed).decode('ascii')
+
+
+def decompress(payload: str, codec: str) -> bytes:
+    packed = base64.b85decode(payload)
+    if codec == 'zstd':
+        return _zstd().ZstdDecompressor().decompress(packed)
+    return zlib.decompress(packed)
+
+
+def _compressible(size: int) -> Optional[str]:
+    codec = compression_codec()
+    if codec and size >= settings.DB_FIELD_COMPRESSION_MIN_BYTES:
+        return codec
+    return None
+
+
+class CompressedTextField(models.TextField):
+    """
+    ``TextField`` stored compressed once large enough.
+
+    Args:
+        plain_on: Database vendors to always store plaintext on, for columns
+            the database itself reads (e.g. a generated search column)
+    """
+
+    def __init__(self, *args, plain_on: Tuple[str, ...] = (), **kwargs):
+        self.plain_on = tuple(plain_on)
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        # Migrations see a plain TextField: the column is unchanged, so
+        # switching a field to compression needs no schema change
+        name, path, args, kwargs = super().deconstruct()
+        return name, 'django.db.models.TextField', args, kwargs
+
+    def encode(self, value, connection):
+        if not isinstance(value, str) or connection.vendor in self.plain_on or value.startswith(TEXT_MARKER):
+            return value
+        data = value.encode('utf-8')
+        codec = _compressible(len(data))
+        if not codec:
+            return value
+        encoded = TEXT_MARKER + TEXT_CODEC_TAGS[codec] + compress(data, codec)
+        return encoded if len(encoded) < len(value) else value
+
+    @staticmethod
+    def stored_codec(raw) -> Optional[str]:
+        if isinstance(raw, str) and raw.startswith(TEXT_MARKER):
+            for codec, tag in TEXT_CODEC_TAGS.items():
+                if raw[1:2] == tag:
+                    return codec
+        return None
+
+    def decode(self, raw):
+        codec = self.stored_codec(raw)
+        if codec is None:
+            return raw
+        return decompress(raw[2:], codec).decode('utf-8')
+
+    def load_stored(self, raw):
+        """The value for a stored form read as text (see ``iter_stored_values``)"""
+        return self.decode(raw)
+
+    def plain_size(self, raw) -> int:
+        codec = self.stored_codec(raw)
+        return len(decompress(raw[2:], codec) if codec else raw.encode('utf-8'))
+
+    def get_db_prep_save(self, value, connection):
+        return super().get_db_prep_save(self.encode(value, connection), connection)
+
+    def from_db_value(self, value, expression, connection):
+        return self.decode(value)
+
+
+class CompressedJSONField(models.JSONField):
+    """``JSONField`` stored as a compressed envelope once its JSON is large enough"""
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        return name, 'django.db.models.JSONField', args, kwargs
+
+    def encode(self, value, connection):
+        if value is None or hasattr(value, 'as_sql') or self._envelope_codec(value):
+            return value
+        serialized = json.dumps(value, cls=self.encoder)
+        codec = _compressible(len(serialized.encode('utf-8')))
+        if not codec:
+            return value
+        payload = compress(serialized.encode('utf-8'), codec)
+        if len(payload) + 40 >= len(serialized):  # Envelope overhead
+            return value
+        return {JSON_MARKER_KEY: codec, 'data': payload}
+
+    @staticmethod
+    def _envelope_codec(value) -> Optional[str]:
+        if isinstance(value, dict) and value.keys() == {JSON_MARKER_KEY, 'data'} and value[JSON_MARKER_KEY] in CODECS:
+            return value[JSON_MARKER_KEY]
+        return None
+
+    def stored_codec(self, raw) -> Optional[str]:
+        if isinstance(raw, str):
+            if JSON_MARKER_KEY not in raw:
+                return None
+            try:
+                raw = json.loads(raw)
+            except ValueError:
+                return None
+        return self._envelope_codec(raw)
+
+    def decode(self, value):
+        codec = self._envelope_codec(value)
+        if codec is None:
+            return value
+        return json.loads(decompress(value['data'], codec), cls=self.decoder)
+
+    def load_stored(self, raw):
+        return None if raw is None else self.decode(json.loads(raw, cls=self.decoder))
+
+    def plain_size(self, raw) -> int:
+        codec = self.stored_codec(raw)
+        return len(decompress(json.loads(raw)['data'], codec) if codec else raw.encode('utf-8'))
+
+    def get_db_prep_save(self, value, connection):
+        return super().get_db_prep_save(self.encode(value, connection), connection)
+
+    def from_db_value(self, value, expression, connection):
+        return self.decode(super().from_db_value(value, expression, connection))
+
+
+def compressed_fields() -> List[Tuple[type, models.Field]]:
+    """Every compressed field of every installed model"""
+    return [
+        (model, field)
+        for model in apps.get_models()
+        for field in model._meta.concrete_fields
+        if isinstance(field, (CompressedTextField, CompressedJSONField))
+    ]
+
+
+def iter_stored_values(model, field, batch_size: int = 500) -> Iterator[List[Tuple[object, Optional[str]]]]:
+    """
+    Batches of ``(pk, stored_text)`` for a compressed field in primary key
+    order, without decoding: the column is cast to text in SQL.
+    """
+    last_pk = None
+    while True:
+        queryset = model._default_manager.order_by('pk')
+        if last_pk is not None:
+            queryset = queryset.filter(pk__gt=last_pk)
+        batch = list(
+            queryset.annotate(_stored=Cast(field.attname, models.TextField()))
+            .values_list('pk', '_stored')[:batch_size]
+        )
+        if not batch:
+            return
+        yield batch
+        last_pk = batch[-1][0]
+
+
+def convert_field(model, field, batch_size: int = 500, pause: float = 0.0, dry_run: bool = False) -> dict:
+    """
+    Rewrite the stored rows of a compressed field that are not in the form a
+    save would now produce: compress plain rows (or decompress, inside
+    ``compression_override('')``) and switch rows written with another codec.
+
+    Runs one short transaction per batch, sleeping ``pause`` seconds between
+    batches to leave room for live traffic. Only this column is written
+    (``updated_at`` and other ``auto_now`` columns are left alone), and rows
+    already in the target form are skipped, so an interrupted run can simply
+    be started again.
+
+    Returns:
+        ``{'rows', 'converted'}``
+    """
+    counts = {'rows': 0, 'converted': 0}
+    for batch in iter_stored_values(model, field, batch_size):
+        counts['rows'] += len(batch)
+        changed = []
+        for pk, raw in batch:
+            if raw is None:
+                continue
+            value = field.load_stored(raw)
+            if field.stored_codec(raw) != field.stored_codec(field.encode(value, connection)):
+                changed.append(model(pk=pk, **{field.attname: value}))
+        counts['converted'] += len(changed)
+        if changed and not dry_run:
+            with transaction.atomic():
+                model._default_manager.bulk_update(changed, [field.name])
+            if pause:
+                time.sleep(pause)
+    return counts
+
+
+def compression_stats(batch_size: int = 500) -> List[dict]:
+    """
+    Stored versus uncompressed size of every compressed field (a full scan;
+    run it off-peak on large tables).
+    """
+    stats = []
+    for model, field in compressed_fields():
+        entry = {
+            'table': model._meta.db_table,
+            'field': field.name,
+            'rows': 0,
+            'compressed_rows': 0,
+            'stored_bytes': 0,
+            'plain_bytes': 0,
+        }
+        for batch in iter_stored_values(model, field, batch_size):
+            entry['rows'] += len(batch)
+            for _, raw in batch:
+                if raw is None:
+                    continue
+                entry['compressed_rows'] += field.stored_codec(raw) is not None
+                entry['stored_bytes'] += len(raw.encode('utf-8'))
+                entry['plain_bytes'] += field.plain_size(raw)
+        entry['saved_bytes'] = entry['plain_bytes'] - entry['stored_bytes']
+        entry['ratio'] = entry['plain_bytes'] / entry['stored_bytes'] if entry['stored_bytes'] else None
+        stats.append(entry)
+    return stats
@@ -0,0 +1,52 @@
+"""
+Convert existing rows of compressed fields to the configured storage form, in batches.
+
+    python manage.py compress_fields
+    python manage.py compress_fields --field core.ImmigrationReport.report_markdown --pause 0.2
+    python manage.py compress_fields --decompress
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.fields import compressed_fields, compression_codec, compression_override, convert_field
+
+
+class Command(BaseCommand):
+    help = "Compress (or decompress) existing values of compressed model fields, one short transaction per batch"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--field', action='append', help="app_label.Model.field to convert (repeatable; default all)")
+        parser.add_argument('--batch-size', type=int, default=500, help="Rows read and written per batch")
+        parser.add_argument('--pause', type=float, default=0.0, help="Seconds to sleep between written batches")
+        parser.add_argument('--codec', choices=('zlib', 'zstd'), help="Codec to write (default DB_FIELD_COMPRESSION)")
+        parser.add_argument('--decompress', action='store_true', help="Store every value plain again")
+        parser.add_argument('--dry-run', action='store_true', help="Count rows that would change without writing")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1")
+        fields = compressed_fields()
+        labels = {f"{model._meta.label}.{field.name}": (model, field) for model, field in fields}
+        if options['field']:
+            unknown = [label for label in options['field'] if label not in labels]
+            if unknown:
+                raise CommandError(f"Not compressed fields: {', '.join(unknown)} (choose from {', '.join(labels)})")
+            fields = [labels[label] for label in options['field']]
+
+        codec = '' if options['decompress'] else options['codec'] or settings.DB_FIELD_COMPRESSION
+        if not codec and not options['decompress']:
+            raise CommandError("DB_FIELD_COMPRESSION is not set; pass --codec (or --decompress to store values plain)")
+        with compression_override(codec):
+            target = compression_codec() or 'plain'
+            for model, field in fields:
+                counts = convert_field(
+                    model,
+                    field,
+                    batch_size=options['batch_size'],
+                    pause=options['pause'],
+                    dry_run=options['dry_run'],
+                )
+                verb = "would convert" if options['dry_run'] else "converted"
+                self.stdout.write(
+                    f"{model._meta.label}.{field.name}: {counts['rows']} rows, {verb} {counts['converted']} to {target}"
+                )
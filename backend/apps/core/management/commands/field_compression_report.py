@@ -0,0 +1,35 @@
+"""
+Summarize stored versus uncompressed size of compressed model fields.
+"""
+import json
+
+from django.core.management.base import BaseCommand
+
+from apps.core.fields import compression_stats
+
+
+class Command(BaseCommand):
+    help = "Show rows, compressed rows and bytes saved for every compressed field"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help="Rows read per query")
+        parser.add_argument('--json', action='store_true', help="Print the raw figures as JSON")
+
+    def handle(self, *args, **options):
+        stats = compression_stats(batch_size=options['batch_size'])
+        if options['json']:
+            self.stdout.write(json.dumps(stats, indent=2))
+            return
+
+        megabytes = lambda size: f"{size / 1024 / 1024:.2f} MB"
+        total_stored = total_plain = 0
+        for entry in stats:
+            total_stored += entry['stored_bytes']
+            total_plain += entry['plain_bytes']
+            ratio = f"{entry['ratio']:.2f}x" if entry['ratio'] else "-"
+            self.stdout.write(
+                f"{entry['table']}.{entry['field']}: {entry['compressed_rows']}/{entry['rows']} rows compressed, "
+                f"{megabytes(entry['stored_bytes'])} stored of {megabytes(entry['plain_bytes'])} "
+                f"(saved {megabytes(entry['saved_bytes'])}, {ratio})"
+            )
+        self.stdout.write(f"Total: {megabytes(total_stored)} stored, {megabytes(total_plain - total_stored)} saved")
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_reportjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='immigrationreport',
+            name='cache_hit',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='immigrationreport',
+            name='cache_key',
+            field=models.CharField(blank=True, db_index=True, max_length=64, null=True),
+        ),
+    ]
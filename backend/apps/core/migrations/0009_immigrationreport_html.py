@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_reportgenerationlease'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='immigrationreport',
+            name='report_html',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='immigrationreport',
+            name='report_html_key',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+    ]
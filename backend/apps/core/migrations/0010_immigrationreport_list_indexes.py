@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_immigrationreport_html'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='immigrationreport',
+            index=models.Index(fields=['created_at', 'id'], name='immigration_created_fc4855_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='immigrationreport',
+            index=models.Index(fields=['user_email', 'created_at', 'id'], name='immigration_user_em_2a3ff1_idx'),
+        ),
+    ]
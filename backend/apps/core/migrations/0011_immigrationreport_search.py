@@ -0,0 +1,71 @@
+"""
+Full-text search structures for immigration reports (see apps/ai_provider/search.py).
+
+SQLite: an FTS5 table, filled here and kept current by model signals.
+PostgreSQL: a generated tsvector column with a GIN index, maintained by the database.
+Other databases get nothing and search falls back to a plain scan.
+"""
+from django.db import migrations
+
+FTS_TABLE = 'immigration_reports_fts'
+INDEXED_FIELDS = ('user_name', 'user_email', 'pathway_goal', 'report_markdown')
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            try:
+                cursor.execute(
+                    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+                    f"report_id UNINDEXED, {', '.join(INDEXED_FIELDS)}, "
+                    f"tokenize = 'porter unicode61 remove_diacritics 2')"
+                )
+            except Exception:
+                # SQLite built without FTS5: search uses the unindexed fallback
+                return
+            ImmigrationReport = apps.get_model('core', 'ImmigrationReport')
+            rows = [
+                [report.id.int >> 65, report.id.hex] + [getattr(report, field) or '' for field in INDEXED_FIELDS]
+                for report in ImmigrationReport.objects.only('id', *INDEXED_FIELDS).iterator()
+            ]
+            if rows:
+                cursor.executemany(
+                    f"INSERT INTO {FTS_TABLE} (rowid, report_id, {', '.join(INDEXED_FIELDS)}) "
+                    f"VALUES (%s, %s, %s, %s, %s, %s)",
+                    rows,
+                )
+    elif connection.vendor == 'postgresql':
+        schema_editor.execute(
+            """
+            ALTER TABLE immigration_reports ADD COLUMN search_vector tsvector
+            GENERATED ALWAYS AS (
+                setweight(to_tsvector('english', coalesce(user_name, '') || ' ' || coalesce(user_email, '')), 'A') ||
+                setweight(to_tsvector('english', coalesce(pathway_goal, '')), 'B') ||
+                setweight(to_tsvector('english', coalesce(report_markdown, '')), 'D')
+            ) STORED
+            """
+        )
+        schema_editor.execute(
+            "CREATE INDEX immigration_reports_search_idx ON immigration_reports USING GIN (search_vector)"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    elif connection.vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS immigration_reports_search_idx")
+        schema_editor.execute("ALTER TABLE immigration_reports DROP COLUMN IF EXISTS search_vector")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_immigrationreport_list_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_immigrationreport_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='immigrationreport',
+            name='pdf_key',
+            field=models.CharField(blank=True, db_index=True, max_length=64, null=True),
+        ),
+    ]
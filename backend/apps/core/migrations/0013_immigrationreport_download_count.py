@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_immigrationreport_pdf_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='immigrationreport',
+            name='download_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='immigrationreport',
+            name='last_downloaded_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-16 21:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_immigrationreport_download_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ai_model_used', models.CharField(blank=True, max_length=100, null=True)),
+                ('pathway_goal', models.CharField(blank=True, max_length=100, null=True)),
+                ('pipeline', models.CharField(max_length=20)),
+                ('cache_hit', models.BooleanField(default=False)),
+                ('prompt_tokens', models.IntegerField(blank=True, null=True)),
+                ('completion_tokens', models.IntegerField(blank=True, null=True)),
+                ('total_tokens', models.IntegerField(blank=True, null=True)),
+                ('cost', models.DecimalField(blank=True, decimal_places=6, max_digits=12, null=True)),
+                ('upstream_ms', models.FloatField(blank=True, null=True)),
+                ('pdf_ms', models.FloatField(blank=True, null=True)),
+                ('total_ms', models.FloatField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('report', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='usage', to='core.immigrationreport')),
+            ],
+            options={
+                'db_table': 'report_usage',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['created_at'], name='report_usag_created_119d66_idx'), models.Index(fields=['ai_model_used', 'created_at'], name='report_usag_ai_mode_d1cbb2_idx'), models.Index(fields=['pathway_goal', 'created_at'], name='report_usag_pathway_079072_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_reportusage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reportusage',
+            name='cached_prompt_tokens',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='reportusage',
+            name='first_token_ms',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='reportusage',
+            name='prompt_version',
+            field=models.CharField(blank=True, max_length=40, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='reportusage',
+            index=models.Index(fields=['prompt_version', 'created_at'], name='report_usag_prompt__5986b7_idx'),
+        ),
+    ]
@@ -3,6 +3,8 @@ from django.contrib.auth.models import User
 import uuid
 import json
 
+from apps.core.fields import CompressedJSONField, CompressedTextField
+
 
 class UserProfile(models.Model):
     ROLE_CHOICES = [
@@ -64,9 +66,9 @@ class CRSCalculationDetailed(models.Model):
     user_name = models.CharField(max_length=255)
     user_email = models.EmailField()
     user_phone = models.CharField(max_length=20, blank=True, null=True)
-    input_data = models.JSONField(default=dict)
+    input_data = CompressedJSONField(default=dict)
     crs_score = models.IntegerField()
-    category_breakdown = models.JSONField(default=dict)
+    category_breakdown = CompressedJSONField(default=dict)
     improvement_suggestions = models.JSONField(default=list, blank=True, null=True)
     session_id = models.CharField(max_length=255, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -89,24 +91,144 @@ class ImmigrationReport(models.Model):
     # Input profile data
     profile_data = models.JSONField(default=dict)  # Stores ImmigrationProfileSchema data
     # Generated content
-    report_markdown = models.TextField()  # The generated markdown report
+    # The generated markdown report; kept plain on PostgreSQL, where the search_vector column is generated from it
+    report_markdown = CompressedTextField(plain_on=('postgresql',))
+    report_html = models.TextField(blank=True, null=True)  # Sanitized HTML render of report_markdown
+    report_html_key = models.CharField(max_length=64, blank=True, null=True)  # Content hash + renderer version of report_html
     pdf_filename = models.CharField(max_length=255, blank=True, null=True)
     pdf_path = models.CharField(max_length=500, blank=True, null=True)
     pdf_url = models.CharField(max_length=500, blank=True, null=True)
+    # Storage key of the PDF: SHA-256 of PDF_RENDER_VERSION (and theme) plus the HTML render key, not of the
+    # PDF bytes (see ai_provider.storage.pdf_content_key). Rows sharing it share the file.
+    pdf_key = models.CharField(max_length=64, blank=True, null=True, db_index=True)
+    download_count = models.IntegerField(default=0)  # Written in batches, may lag by REPORT_DOWNLOAD_FLUSH_SECONDS
+    last_downloaded_at = models.DateTimeField(blank=True, null=True)
     # Metadata
     pathway_goal = models.CharField(max_length=100, blank=True, null=True)  # Express Entry, Study Visa, etc.
     ai_model_used = models.CharField(max_length=100, blank=True, null=True)  # minimax/minimax-m2:free
+    cache_key = models.CharField(max_length=64, blank=True, null=True, db_index=True)  # Profile/model/prompt hash
+    cache_hit = models.BooleanField(default=False)  # True when served from the report cache
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = 'immigration_reports'
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination on (created_at, id), overall and per user
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['user_email', 'created_at', 'id']),
+        ]
 
     def __str__(self):
         return f"Immigration Report - {self.user_email or 'Anonymous'} - {self.pathway_goal or 'N/A'}"
 
 
+class ReportUsage(models.Model):
+    """Token usage and latency of one served report, for cost and latency trends"""
+    report = models.OneToOneField(ImmigrationReport, on_delete=models.CASCADE, related_name='usage')
+    # Copied from the report so aggregates need no join with the (wide) reports table
+    ai_model_used = models.CharField(max_length=100, blank=True, null=True)
+    pathway_goal = models.CharField(max_length=100, blank=True, null=True)
+    pipeline = models.CharField(max_length=20)  # sync, async, stream, job, bulk, speculative
+    cache_hit = models.BooleanField(default=False)  # Served without an upstream call; no tokens
+    prompt_tokens = models.IntegerField(blank=True, null=True)
+    completion_tokens = models.IntegerField(blank=True, null=True)
+    total_tokens = models.IntegerField(blank=True, null=True)
+    cached_prompt_tokens = models.IntegerField(blank=True, null=True)  # Served from the provider's prompt cache
+    prompt_version = models.CharField(max_length=40, blank=True, null=True)
+    cost = models.DecimalField(max_digits=12, decimal_places=6, blank=True, null=True)  # As reported by OpenRouter
+    upstream_ms = models.FloatField(blank=True, null=True)  # All model attempts
+    first_token_ms = models.FloatField(blank=True, null=True)  # Streamed reports only
+    pdf_ms = models.FloatField(blank=True, null=True)  # Including a lazy render on first download
+    total_ms = models.FloatField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'report_usage'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at']),
+            models.Index(fields=['ai_model_used', 'created_at']),
+            models.Index(fields=['pathway_goal', 'created_at']),
+            models.Index(fields=['prompt_version', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"Report Usage - {self.report_id} - {self.ai_model_used or 'N/A'}"
+
+
+class ReportJob(models.Model):
+    """Queued immigration report generation, picked up by the DB-backed worker pool"""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    STAGE_CHOICES = [
+        ('queued', 'Queued'),
+        ('llm', 'Generating Report'),
+        ('pdf', 'Rendering PDF'),
+        ('saving', 'Saving Report'),
+        ('done', 'Done'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='report_jobs')
+    profile_data = models.JSONField(default=dict)  # Stores ImmigrationProfileSchema data
+    referer = models.CharField(max_length=500, blank=True, null=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    stage = models.CharField(max_length=20, choices=STAGE_CHOICES, default='queued')
+    progress = models.IntegerField(default=0)  # 0-100
+    report = models.ForeignKey(ImmigrationReport, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+    error_status = models.IntegerField(blank=True, null=True)  # HTTP status surfaced to the client
+    error_message = models.TextField(blank=True, null=True)
+    attempts = models.IntegerField(default=0)
+    worker_id = models.CharField(max_length=100, blank=True, null=True)
+    lease_expires_at = models.DateTimeField(blank=True, null=True)  # Running jobs past this are requeued
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'report_jobs'
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"Report Job {self.id} - {self.status} ({self.progress}%)"
+
+
+class ReportGenerationLease(models.Model):
+    """Cross-process single-flight lock: one upstream LLM call per report cache key"""
+    STATUS_CHOICES = [
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    cache_key = models.CharField(max_length=64, primary_key=True)
+    owner = models.CharField(max_length=100)  # host:pid:thread of the leader
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='running')
+    report = models.ForeignKey(ImmigrationReport, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    error_status = models.IntegerField(blank=True, null=True)
+    error_message = models.TextField(blank=True, null=True)
+    expires_at = models.DateTimeField()  # A running lease past this is abandoned and can be taken over
+    started_at = models.DateTimeField()
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        db_table = 'report_generation_leases'
+
+    def __str__(self):
+        return f"Lease {self.cache_key[:12]}... - {self.status}"
+
+
 class CRSCalculationSession(models.Model):
     """Track partial calculator progress for users who start but don't complete"""
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -116,7 +238,7 @@ class CRSCalculationSession(models.Model):
     user_phone = models.CharField(max_length=20, blank=True, null=True)
     current_step = models.CharField(max_length=50, default='user-info')  # user-info, age, education, etc.
     completed_steps = models.JSONField(default=list)  # List of completed step IDs
-    partial_data = models.JSONField(default=dict)  # Partial form data collected so far
+    partial_data = CompressedJSONField(default=dict)  # Partial form data collected so far
     is_completed = models.BooleanField(default=False)  # True when calculation is finished
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
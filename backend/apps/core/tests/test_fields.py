@@ -0,0 +1,112 @@
+import unittest
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from apps.core.fields import (
+    TEXT_MARKER,
+    CompressedJSONField,
+    compression_codec,
+    compression_override,
+    convert_field,
+    iter_stored_values,
+    zstandard,
+)
+from apps.core.models import CRSCalculationDetailed, ImmigrationReport
+
+LONG_MARKDOWN = "## Eligibility Analysis\n\n" + "The applicant meets the language requirement. " * 100
+LONG_JSON = {'answers': [{'question': f"q{i}", 'value': 'Express Entry'} for i in range(100)]}
+
+
+def stored(model, field_name, pk):
+    """The raw stored form of one row's column"""
+    field = model._meta.get_field(field_name)
+    for batch in iter_stored_values(model, field):
+        for row_pk, raw in batch:
+            if row_pk == pk:
+                return raw
+
+
+def make_calculation(**fields):
+    return CRSCalculationDetailed.objects.create(
+        user_name='Applicant', user_email='applicant@example.com', crs_score=450, **fields,
+    )
+
+
+@override_settings(DB_FIELD_COMPRESSION='zlib', DB_FIELD_COMPRESSION_MIN_BYTES=512)
+class CompressedFieldRoundTripTests(TestCase):
+    def test_text_round_trip(self):
+        report = ImmigrationReport.objects.create(report_markdown=LONG_MARKDOWN, pathway_goal='Express Entry')
+        raw = stored(ImmigrationReport, 'report_markdown', report.pk)
+        if connection.vendor != 'postgresql':  # Kept plain there for the search column
+            self.assertTrue(raw.startswith(TEXT_MARKER + 'z'))
+            self.assertLess(len(raw), len(LONG_MARKDOWN))
+        self.assertEqual(ImmigrationReport.objects.get(pk=report.pk).report_markdown, LONG_MARKDOWN)
+
+    def test_json_round_trip(self):
+        calculation = make_calculation(input_data=LONG_JSON, category_breakdown={'age': 110})
+        self.assertIn('__compressed__', stored(CRSCalculationDetailed, 'input_data', calculation.pk))
+        self.assertNotIn('__compressed__', stored(CRSCalculationDetailed, 'category_breakdown', calculation.pk))
+        loaded = CRSCalculationDetailed.objects.get(pk=calculation.pk)
+        self.assertEqual((loaded.input_data, loaded.category_breakdown), (LONG_JSON, {'age': 110}))
+
+    def test_small_values_stay_plain(self):
+        report = ImmigrationReport.objects.create(report_markdown="Short report.", pathway_goal='Express Entry')
+        self.assertEqual(stored(ImmigrationReport, 'report_markdown', report.pk), "Short report.")
+
+    def test_bulk_writes_and_update_compress(self):
+        reports = ImmigrationReport.objects.bulk_create([
+            ImmigrationReport(report_markdown=LONG_MARKDOWN, pathway_goal='Express Entry'),
+        ])
+        calculation = make_calculation()
+        CRSCalculationDetailed.objects.filter(pk=calculation.pk).update(input_data=LONG_JSON)
+        self.assertEqual(ImmigrationReport.objects.get(pk=reports[0].pk).report_markdown, LONG_MARKDOWN)
+        self.assertIn('__compressed__', stored(CRSCalculationDetailed, 'input_data', calculation.pk))
+        self.assertEqual(CRSCalculationDetailed.objects.get(pk=calculation.pk).input_data, LONG_JSON)
+
+    def test_stored_values_that_look_like_envelopes_are_not_rewrapped(self):
+        field = CompressedJSONField()
+        envelope = field.encode(LONG_JSON, connection)
+        self.assertIs(field.encode(envelope, connection), envelope)
+
+    @unittest.skipIf(zstandard is None, "zstandard is not installed")
+    @override_settings(DB_FIELD_COMPRESSION='zstd')
+    def test_zstd_round_trip(self):
+        report = ImmigrationReport.objects.create(report_markdown=LONG_MARKDOWN, pathway_goal='Express Entry')
+        self.assertEqual(ImmigrationReport.objects.get(pk=report.pk).report_markdown, LONG_MARKDOWN)
+
+
+class CompressionSettingsTests(TestCase):
+    @override_settings(DB_FIELD_COMPRESSION='lz4')
+    def test_unknown_codec_is_a_configuration_error(self):
+        with self.assertRaises(ImproperlyConfigured):
+            compression_codec()
+
+    @override_settings(DB_FIELD_COMPRESSION='')
+    def test_compressed_rows_stay_readable_after_disabling(self):
+        with compression_override('zlib'):
+            calculation = make_calculation(input_data=LONG_JSON)
+        self.assertIn('__compressed__', stored(CRSCalculationDetailed, 'input_data', calculation.pk))
+        self.assertEqual(CRSCalculationDetailed.objects.get(pk=calculation.pk).input_data, LONG_JSON)
+
+
+class ConvertFieldTests(TestCase):
+    def test_compresses_existing_rows_then_decompresses_them(self):
+        field = CRSCalculationDetailed._meta.get_field('input_data')
+        plain = make_calculation(input_data=LONG_JSON)
+        small = make_calculation(input_data={'age': 30})
+
+        with override_settings(DB_FIELD_COMPRESSION='zlib', DB_FIELD_COMPRESSION_MIN_BYTES=512):
+            self.assertEqual(convert_field(CRSCalculationDetailed, field, dry_run=True), {'rows': 2, 'converted': 1})
+            self.assertNotIn('__compressed__', stored(CRSCalculationDetailed, 'input_data', plain.pk))
+            self.assertEqual(convert_field(CRSCalculationDetailed, field, batch_size=1), {'rows': 2, 'converted': 1})
+            self.assertIn('__compressed__', stored(CRSCalculationDetailed, 'input_data', plain.pk))
+            # Already converted rows are skipped on a re-run
+            self.assertEqual(convert_field(CRSCalculationDetailed, field)['converted'], 0)
+
+        with compression_override(''):
+            self.assertEqual(convert_field(CRSCalculationDetailed, field)['converted'], 1)
+        self.assertNotIn('__compressed__', stored(CRSCalculationDetailed, 'input_data', plain.pk))
+        self.assertEqual(CRSCalculationDetailed.objects.get(pk=plain.pk).input_data, LONG_JSON)
+        self.assertEqual(CRSCalculationDetailed.objects.get(pk=small.pk).input_data, {'age': 30})
@@ -15,3 +15,8 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_asgi_application()
 
+# Start the PDF renderers now rather than on the first report
+from apps.ai_provider.pdf_pool import warm_pdf_pool  # noqa: E402
+
+warm_pdf_pool()
+
@@ -104,6 +104,13 @@ if os.getenv('DATABASE_URL'):
     except ImportError:
         pass
 
+# Transparent compression of large text/JSON columns (see apps/core/fields.py).
+# DB_FIELD_COMPRESSION: '' (new values stored plain), 'zlib' or 'zstd' (needs the zstandard package).
+# Reads handle plain and compressed rows either way; convert existing rows with
+# `python manage.py compress_fields` and check savings with `python manage.py field_compression_report`.
+DB_FIELD_COMPRESSION = os.getenv('DB_FIELD_COMPRESSION', '')
+DB_FIELD_COMPRESSION_MIN_BYTES = int(os.getenv('DB_FIELD_COMPRESSION_MIN_BYTES', '512'))  # Smaller values stay plain
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -232,4 +239,171 @@ OPENROUTER_BASE_URL = os.getenv(
     'OPENROUTER_BASE_URL',
     'https://openrouter.ai/api/v1/chat/completions'
 )
+# Shared keep-alive client for OpenRouter calls (see apps/ai_provider/client.py)
+OPENROUTER_POOL_SIZE = int(os.getenv('OPENROUTER_POOL_SIZE', '10'))
+OPENROUTER_CONNECT_TIMEOUT = float(os.getenv('OPENROUTER_CONNECT_TIMEOUT', '5'))  # seconds
+OPENROUTER_READ_TIMEOUT = float(os.getenv('OPENROUTER_READ_TIMEOUT', '60'))  # seconds
+# Connection limit of the async endpoint's httpx client (one per event loop)
+OPENROUTER_ASYNC_POOL_SIZE = int(os.getenv('OPENROUTER_ASYNC_POOL_SIZE', '256'))
+# HTTP/2 requires the optional httpx[http2] package; falls back to HTTP/1.1 keep-alive without it
+OPENROUTER_HTTP2 = os.getenv('OPENROUTER_HTTP2', 'False') == 'True'
+
+# REPORT_BUILDER: 'llm' (default) has the model write the whole report (up to 2000 tokens); 'hybrid' builds the
+# profile summary, eligibility analysis (CRS estimate) and improvement roadmap on the server and asks the model
+# for the narrative sections only, with REPORT_NARRATIVE_MAX_TOKENS. Both are checked at startup.
+REPORT_BUILDER = os.getenv('REPORT_BUILDER', 'llm')
+REPORT_NARRATIVE_MAX_TOKENS = int(os.getenv('REPORT_NARRATIVE_MAX_TOKENS', '800'))
+# REPORT_PROMPT_VARIANT: 'full' or 'compact' (same report structure, far fewer prompt tokens).
+# Each builder/variant pair has its own prompt version (apps/ai_provider/prompts.py); compare them with
+# `python manage.py prompt_token_report`.
+REPORT_PROMPT_VARIANT = os.getenv('REPORT_PROMPT_VARIANT', 'full')
+# Mark the static system prompt with a cache_control breakpoint. Only enable it when the whole model chain
+# supports explicit prompt caching (Anthropic, Gemini); the multipart system message is not accepted everywhere.
+OPENROUTER_PROMPT_CACHE = os.getenv('OPENROUTER_PROMPT_CACHE', 'False') == 'True'
+
+# Ordered model fallback chain, comma-separated (defaults to OPENROUTER_MODEL alone).
+# Unhealthy models are skipped by a per-model circuit breaker (see apps/ai_provider/model_routing.py).
+OPENROUTER_MODELS = [
+    model.strip() for model in os.getenv('OPENROUTER_MODELS', OPENROUTER_MODEL).split(',') if model.strip()
+]
+OPENROUTER_ROUTE_BY_LATENCY = os.getenv('OPENROUTER_ROUTE_BY_LATENCY', 'True') == 'True'  # Prefer the lowest recent p95
+OPENROUTER_HEALTH_WINDOW = int(os.getenv('OPENROUTER_HEALTH_WINDOW', '50'))  # Recent calls tracked per model
+OPENROUTER_HEALTH_MIN_SAMPLES = int(os.getenv('OPENROUTER_HEALTH_MIN_SAMPLES', '5'))
+OPENROUTER_CIRCUIT_FAILURES = int(os.getenv('OPENROUTER_CIRCUIT_FAILURES', '3'))  # Consecutive failures that open the circuit
+OPENROUTER_CIRCUIT_ERROR_RATE = float(os.getenv('OPENROUTER_CIRCUIT_ERROR_RATE', '0.5'))  # Failed or slow share of the window
+OPENROUTER_CIRCUIT_COOLDOWN = float(os.getenv('OPENROUTER_CIRCUIT_COOLDOWN', '30'))  # seconds
+OPENROUTER_SLOW_CALL_MS = float(os.getenv('OPENROUTER_SLOW_CALL_MS', '45000'))
+
+
+# Report job queue (DB-backed, no external broker)
+# Embedded workers run as threads inside the web process; set REPORT_JOB_EMBEDDED_WORKERS=False
+# and run `python manage.py run_report_workers` to process jobs in a dedicated process instead.
+REPORT_JOB_EMBEDDED_WORKERS = os.getenv('REPORT_JOB_EMBEDDED_WORKERS', 'True') == 'True'
+REPORT_JOB_WORKERS = int(os.getenv('REPORT_JOB_WORKERS', '2'))
+REPORT_JOB_POLL_INTERVAL = float(os.getenv('REPORT_JOB_POLL_INTERVAL', '1.0'))  # seconds
+REPORT_JOB_LEASE_SECONDS = int(os.getenv('REPORT_JOB_LEASE_SECONDS', '300'))
+REPORT_JOB_MAX_ATTEMPTS = int(os.getenv('REPORT_JOB_MAX_ATTEMPTS', '2'))
+
+# Generated report cache (see apps/ai_provider/cache.py)
+# REPORT_CACHE_BACKEND: locmem (per-process, LRU), file, db or none.
+# The db backend needs `python manage.py createcachetable` once.
+REPORT_CACHE_BACKEND = os.getenv('REPORT_CACHE_BACKEND', 'locmem')
+REPORT_CACHE_TTL = int(os.getenv('REPORT_CACHE_TTL', str(60 * 60 * 24)))  # seconds
+REPORT_CACHE_MAX_ENTRIES = int(os.getenv('REPORT_CACHE_MAX_ENTRIES', '500'))
+REPORT_CACHE_MAX_ENTRY_BYTES = int(os.getenv('REPORT_CACHE_MAX_ENTRY_BYTES', str(256 * 1024)))
+
+_REPORT_CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'immigration-reports'),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', str(BASE_DIR / 'cache' / 'reports')),
+    'db': ('django.core.cache.backends.db.DatabaseCache', 'report_cache'),
+    'none': ('django.core.cache.backends.dummy.DummyCache', ''),
+}
+_report_cache_backend, _report_cache_location = _REPORT_CACHE_BACKENDS.get(
+    REPORT_CACHE_BACKEND, _REPORT_CACHE_BACKENDS['locmem']
+)
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'reports': {
+        'BACKEND': _report_cache_backend,
+        'LOCATION': _report_cache_location,
+        'TIMEOUT': REPORT_CACHE_TTL,
+        'OPTIONS': {
+            'MAX_ENTRIES': REPORT_CACHE_MAX_ENTRIES,
+        },
+    },
+}
+
+# Single-flight deduplication of identical in-flight report requests (see apps/ai_provider/singleflight.py)
+# With REPORT_SINGLEFLIGHT_DB, identical requests are also deduplicated across worker processes via a lease row.
+REPORT_SINGLEFLIGHT_DB = os.getenv('REPORT_SINGLEFLIGHT_DB', 'True') == 'True'
+REPORT_SINGLEFLIGHT_LEASE_SECONDS = int(os.getenv('REPORT_SINGLEFLIGHT_LEASE_SECONDS', '150'))
+REPORT_SINGLEFLIGHT_RESULT_SECONDS = int(os.getenv('REPORT_SINGLEFLIGHT_RESULT_SECONDS', '30'))  # Completed results shared for this long
+REPORT_SINGLEFLIGHT_POLL_INTERVAL = float(os.getenv('REPORT_SINGLEFLIGHT_POLL_INTERVAL', '0.5'))  # seconds
+
+# PDF rendering process pool (see apps/ai_provider/pdf_pool.py)
+# PDF_RENDER_WORKERS bounds how many PDFs render at once; further renders queue for a free worker.
+PDF_RENDER_POOL = os.getenv('PDF_RENDER_POOL', 'True') == 'True'
+# Start the renderers when a server process loads instead of on the first render
+PDF_RENDER_POOL_WARM_ON_STARTUP = os.getenv('PDF_RENDER_POOL_WARM_ON_STARTUP', 'True') == 'True'
+PDF_RENDER_WORKERS = int(os.getenv('PDF_RENDER_WORKERS', str(min(os.cpu_count() or 1, 4))))
+PDF_RENDER_TIMEOUT = float(os.getenv('PDF_RENDER_TIMEOUT', '60'))  # seconds, including time spent queued; the renderer is killed after it
+PDF_RENDER_MEMORY_LIMIT_MB = float(os.getenv('PDF_RENDER_MEMORY_LIMIT_MB', '1024'))  # Renderer RSS that gets it killed; 0 disables
+PDF_OFFLOAD_THREADS = int(os.getenv('PDF_OFFLOAD_THREADS', str(PDF_RENDER_WORKERS * 2)))  # Async endpoint threads waiting on renders
+PDF_RENDER_MAX_RENDERS = int(os.getenv('PDF_RENDER_MAX_RENDERS', '200'))  # Renders before a renderer is replaced; 0 disables
+
+# With REPORT_PDF_LAZY, reports are saved as Markdown only and the PDF is rendered on the first
+# GET /api/ai-provider/reports/{id}/pdf, then served from disk.
+REPORT_PDF_LAZY = os.getenv('REPORT_PDF_LAZY', 'False') == 'True'
+# Stylesheet theme for report PDFs; other than 'default', register it with pdf_styles.register_theme at startup
+REPORT_PDF_THEME = os.getenv('REPORT_PDF_THEME', 'default')
+
+# Report PDFs are stored by content hash under MEDIA_ROOT/reports/ab/cd/ (see apps/ai_provider/storage.py).
+# Unreferenced files younger than this are never deleted (renders in flight, files just reused).
+REPORT_STORAGE_GC_GRACE_SECONDS = int(os.getenv('REPORT_STORAGE_GC_GRACE_SECONDS', '3600'))
+
+# PDF downloads (GET /api/ai-provider/reports/{id}/pdf, see apps/ai_provider/downloads.py).
+# REPORT_PDF_SENDFILE: '' (stream from Django), 'nginx' (X-Accel-Redirect) or 'apache' (X-Sendfile).
+REPORT_PDF_SENDFILE = os.getenv('REPORT_PDF_SENDFILE', '')
+# nginx internal location aliased to MEDIA_ROOT
+REPORT_PDF_ACCEL_REDIRECT_PREFIX = os.getenv('REPORT_PDF_ACCEL_REDIRECT_PREFIX', '/protected-media/')
+REPORT_PDF_CACHE_MAX_AGE = int(os.getenv('REPORT_PDF_CACHE_MAX_AGE', str(60 * 60 * 24 * 365)))  # seconds
+# Download counts are buffered per process and written every N seconds or M downloads
+REPORT_DOWNLOAD_FLUSH_SECONDS = float(os.getenv('REPORT_DOWNLOAD_FLUSH_SECONDS', '30'))
+REPORT_DOWNLOAD_FLUSH_SIZE = int(os.getenv('REPORT_DOWNLOAD_FLUSH_SIZE', '100'))
+
+# Admission control for the LLM-bound report endpoints (see apps/ai_provider/admission.py), per process.
+# Requests beyond REPORT_MAX_CONCURRENT wait in a short queue; the rest get 429 with Retry-After.
+# REPORT_MAX_CONCURRENT=0 disables admission control.
+REPORT_MAX_CONCURRENT = int(os.getenv('REPORT_MAX_CONCURRENT', '8'))
+REPORT_MAX_CONCURRENT_PER_CLIENT = int(os.getenv('REPORT_MAX_CONCURRENT_PER_CLIENT', '2'))  # 0 = no per-client limit
+# The async endpoint (POST /api/ai-provider/generate-report/async) holds no thread per upstream call
+REPORT_ASYNC_MAX_CONCURRENT = int(os.getenv('REPORT_ASYNC_MAX_CONCURRENT', '256'))
+# Threads the async endpoint uses to join single flights (a follower holds one until its leader finishes)
+REPORT_ASYNC_FLIGHT_THREADS = int(os.getenv('REPORT_ASYNC_FLIGHT_THREADS', '32'))
+REPORT_ADMISSION_QUEUE = int(os.getenv('REPORT_ADMISSION_QUEUE', '8'))  # Requests allowed to wait for a slot
+REPORT_ADMISSION_QUEUE_TIMEOUT = float(os.getenv('REPORT_ADMISSION_QUEUE_TIMEOUT', '2'))  # seconds
+# Identify anonymous clients by the first X-Forwarded-For address (only behind a trusted proxy)
+REPORT_ADMISSION_TRUST_FORWARDED_FOR = os.getenv('REPORT_ADMISSION_TRUST_FORWARDED_FOR', 'False') == 'True'
+
+# Speculative report generation when a pathway advisor submission completes (see apps/ai_provider/speculative.py).
+# Off by default: every completed submission then costs a completion whether or not the user asks for the report.
+REPORT_SPECULATIVE_ENABLED = os.getenv('REPORT_SPECULATIVE_ENABLED', 'False') == 'True'
+REPORT_SPECULATIVE_WORKERS = int(os.getenv('REPORT_SPECULATIVE_WORKERS', '1'))
+REPORT_SPECULATIVE_QUEUE = int(os.getenv('REPORT_SPECULATIVE_QUEUE', '16'))  # Submissions beyond this are not speculated on
+# Speculative reports only start while fewer interactive reports than this are in progress
+REPORT_SPECULATIVE_MAX_ACTIVE = int(os.getenv('REPORT_SPECULATIVE_MAX_ACTIVE', str(max(1, REPORT_MAX_CONCURRENT // 2))))
+REPORT_SPECULATIVE_MAX_DELAY = float(os.getenv('REPORT_SPECULATIVE_MAX_DELAY', '60'))  # seconds queued before it is dropped
+REPORT_SPECULATIVE_MAX_PER_HOUR = int(os.getenv('REPORT_SPECULATIVE_MAX_PER_HOUR', '60'))  # Per process; 0 = no limit
+REPORT_SPECULATIVE_DAILY_TOKENS = int(os.getenv('REPORT_SPECULATIVE_DAILY_TOKENS', '500000'))  # All processes; 0 = no limit
 
+# Report pipeline logging (see apps/ai_provider/instrumentation.py)
+# AI_PROVIDER_LOG_LEVEL=DEBUG also logs full prompts/responses and PDF conversion steps.
+AI_PROVIDER_LOG_LEVEL = os.getenv('AI_PROVIDER_LOG_LEVEL', 'INFO')
+# Optional dotted path to a callable(pipeline, outcome, timings, tags) that receives per-report stage timings
+AI_PROVIDER_METRICS_SINK = os.getenv('AI_PROVIDER_METRICS_SINK', '')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'standard': {
+            'format': '%(asctime)s %(levelname)s %(name)s %(message)s',
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'standard',
+        },
+    },
+    'loggers': {
+        'apps.ai_provider': {
+            'handlers': ['console'],
+            'level': AI_PROVIDER_LOG_LEVEL,
+            'propagate': False,
+        },
+    },
+}
@@ -109,6 +109,7 @@ echo ""
 echo "🗄️  Running database migrations..."
 python manage.py makemigrations core --no-input || true
 python manage.py migrate --no-input
+python manage.py createcachetable
 
 echo ""
 echo -e "${GREEN}✅ Setup complete!${NC}"
@@ -1,9 +1,13 @@
+import { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { Card } from '../../ui/Card';
 import { Badge } from '../../ui/Badge';
 import { Button } from '../../ui/Button';
-import { FileText, Download } from 'lucide-react';
-import { getApiUrl } from '../../../lib/api';
+import { Input } from '../../ui/Input';
+import { FileText, Download, Search } from 'lucide-react';
+import { api, getApiUrl } from '../../../lib/api';
+
+const PAGE_SIZE = 25;
 
 interface DashboardStats {
   totalPageViews: number;
@@ -27,7 +31,48 @@ interface ReportsProps {
 
 export function Reports({ stats }: ReportsProps) {
   const navigate = useNavigate();
-  const reports = stats.recentReports || [];
+  const [reports, setReports] = useState<any[]>(stats.recentReports || []);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+
+  const [query, setQuery] = useState('');
+  const [activeQuery, setActiveQuery] = useState('');
+
+  // Reports are fetched a page at a time (keyset pagination), newest first;
+  // with a search query, full-text matches are fetched best first instead
+  const fetchReports = async (cursor: string | null, search: string = activeQuery) => {
+    try {
+      setLoadingMore(true);
+      const params = new URLSearchParams({ limit: String(PAGE_SIZE) });
+      if (cursor) {
+        params.set('cursor', cursor);
+      }
+      let page: { items: any[]; next_cursor?: string | null };
+      if (search) {
+        params.set('q', search);
+        page = await api.get(`/api/ai-provider/reports/search?${params.toString()}`);
+      } else {
+        page = await api.get(`/api/ai-provider/reports?${params.toString()}`, { skipAuth: true });
+      }
+      setReports((current) => (cursor ? [...current, ...page.items] : page.items));
+      setNextCursor(page.next_cursor || null);
+    } catch (error) {
+      console.error('Error fetching reports:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  const handleSearch = (event: React.FormEvent) => {
+    event.preventDefault();
+    const search = query.trim();
+    setActiveQuery(search);
+    fetchReports(null, search);
+  };
+
+  useEffect(() => {
+    fetchReports(null);
+  }, []);
 
   return (
     <div className="space-y-6">
@@ -36,8 +81,21 @@ export function Reports({ stats }: ReportsProps) {
           <FileText className="w-6 h-6 text-primary-600" />
           AI Immigration Reports
         </h3>
-        <div className="mb-4 flex gap-2">
+        <div className="mb-4 flex flex-wrap items-center justify-between gap-2">
           <Badge variant="info">Total: {stats.totalImmigrationReports || 0}</Badge>
+          <form onSubmit={handleSearch} className="flex items-center gap-2">
+            <Input
+              type="search"
+              value={query}
+              onChange={(event) => setQuery(event.target.value)}
+              placeholder="Search reports (e.g. LMIA, 21231, Ontario)"
+              className="py-2"
+            />
+            <Button type="submit" variant="outline" className="flex items-center gap-1">
+              <Search className="w-4 h-4" />
+              Search
+            </Button>
+          </form>
         </div>
         <div className="overflow-x-auto">
           <table className="w-full">
@@ -55,7 +113,7 @@ export function Reports({ stats }: ReportsProps) {
               {reports.length === 0 ? (
                 <tr>
                   <td colSpan={6} className="px-4 py-8 text-center text-secondary-600">
-                    No reports found
+                    {activeQuery ? `No reports match "${activeQuery}"` : 'No reports found'}
                   </td>
                 </tr>
               ) : (
@@ -69,6 +127,13 @@ export function Reports({ stats }: ReportsProps) {
                     </td>
                     <td className="px-4 py-3 text-sm font-medium text-secondary-900">
                       {report.user_name || 'Anonymous'}
+                      {report.snippet && (
+                        // Snippet HTML is escaped by the server; only <mark> tags are added
+                        <div
+                          className="mt-1 text-xs font-normal text-secondary-600 [&_mark]:bg-warning-100"
+                          dangerouslySetInnerHTML={{ __html: report.snippet }}
+                        />
+                      )}
                     </td>
                     <td className="px-4 py-3 text-sm text-secondary-600">{report.user_email || 'N/A'}</td>
                     <td className="px-4 py-3">
@@ -97,7 +162,7 @@ export function Reports({ stats }: ReportsProps) {
                             onClick={() => {
                               const pdfUrl = report.pdf_url.startsWith('http') 
                                 ? report.pdf_url 
-                                : `${getApiUrl()}/${report.pdf_url}`;
+                                : `${getApiUrl()}${report.pdf_url.startsWith('/') ? '' : '/'}${report.pdf_url}`;
                               window.open(pdfUrl, '_blank');
                             }}
                           >
@@ -113,6 +178,17 @@ export function Reports({ stats }: ReportsProps) {
             </tbody>
           </table>
         </div>
+        {nextCursor && (
+          <div className="mt-4 flex justify-center">
+            <Button
+              variant="outline"
+              onClick={() => fetchReports(nextCursor)}
+              disabled={loadingMore}
+            >
+              {loadingMore ? 'Loading...' : 'Load more'}
+            </Button>
+          </div>
+        )}
       </Card>
     </div>
   );
@@ -15,6 +15,7 @@ interface ReportDetail {
   user_phone?: string;
   profile_data: any;
   report_markdown: string;
+  html_url?: string;
   pdf_filename?: string;
   pdf_url?: string;
   pdf_path?: string;
@@ -29,6 +30,7 @@ export function ImmigrationReportDetail() {
   const navigate = useNavigate();
   const location = useLocation();
   const [report, setReport] = useState<ReportDetail | null>(null);
+  const [reportHtml, setReportHtml] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
 
   // Get the return path from location state, default to dashboard with calculations tab
@@ -47,6 +49,7 @@ export function ImmigrationReportDetail() {
       const data = await api.get(`/api/ai-provider/reports/${id}`, { skipAuth: true });
       console.log('Report data received:', data);
       setReport(data);
+      await fetchReportHtml(data);
     } catch (error: any) {
       console.error('Error fetching report:', error);
       console.error('Error details:', {
@@ -62,12 +65,27 @@ export function ImmigrationReportDetail() {
     }
   };
 
+  // Server-rendered, sanitized HTML (cached by the backend); falls back to client-side Markdown
+  const fetchReportHtml = async (data: ReportDetail) => {
+    if (!data?.html_url) {
+      return;
+    }
+    try {
+      const response = await fetch(`${getApiUrl()}${data.html_url}`);
+      if (response.ok) {
+        setReportHtml(await response.text());
+      }
+    } catch (error) {
+      console.error('Error fetching report HTML:', error);
+    }
+  };
+
   const downloadPDF = () => {
     if (report?.pdf_url) {
       // Construct full URL if relative
       const pdfUrl = report.pdf_url.startsWith('http') 
         ? report.pdf_url 
-        : `${getApiUrl()}/${report.pdf_url}`;
+        : `${getApiUrl()}${report.pdf_url.startsWith('/') ? '' : '/'}${report.pdf_url}`;
       // Open PDF in new tab for download
       window.open(pdfUrl, '_blank');
     } else {
@@ -323,11 +341,18 @@ export function ImmigrationReportDetail() {
               </div>
               <h2 className="text-xl font-bold text-secondary-900">AI-Generated Report</h2>
             </div>
-            <div className="prose prose-lg max-w-none">
-              <ReactMarkdown remarkPlugins={[remarkGfm]}>
-                {report.report_markdown}
-              </ReactMarkdown>
-            </div>
+            {reportHtml !== null ? (
+              <div
+                className="prose prose-lg max-w-none"
+                dangerouslySetInnerHTML={{ __html: reportHtml }}
+              />
+            ) : (
+              <div className="prose prose-lg max-w-none">
+                <ReactMarkdown remarkPlugins={[remarkGfm]}>
+                  {report.report_markdown}
+                </ReactMarkdown>
+              </div>
+            )}
           </Card>
 
           {/* Footer */}
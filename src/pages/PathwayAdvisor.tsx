@@ -124,7 +124,7 @@ export function PathwayAdvisor() {
         };
       });
 
-      await api.post('/api/pathway/submit', {
+      const response = await api.post('/api/pathway/submit', {
         submission_id: submissionId,
         user_name: formData.userName,
         user_email: formData.userEmail,
@@ -149,7 +149,10 @@ export function PathwayAdvisor() {
         is_completed: true
       }, { skipAuth: true });
 
-      navigate('/pathway-advisor/results', { state: { results, formData } });
+      // The submission ID lets the results page claim the report generated in the background on completion
+      navigate('/pathway-advisor/results', {
+        state: { results, formData, submissionId: response?.id || submissionId }
+      });
     } catch (error) {
       console.error('Error submitting advisor form:', error);
       alert('Failed to submit form. Please try again.');
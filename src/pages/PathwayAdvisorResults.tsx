@@ -1,13 +1,50 @@
+import { useState } from 'react';
 import { useLocation, Link } from 'react-router-dom';
-import {  CheckCircle, XCircle, AlertCircle, ArrowRight, TrendingUp, Home as HomeIcon } from 'lucide-react';
+import {  CheckCircle, XCircle, AlertCircle, ArrowRight, TrendingUp, Home as HomeIcon, Sparkles, Loader2 } from 'lucide-react';
 import { Button } from '../components/ui/Button';
 import { Card } from '../components/ui/Card';
 import { Badge } from '../components/ui/Badge';
+import { api, getApiUrl } from '../lib/api';
 import { PathwayEligibility } from '../utils/pathwayEligibility';
 
 export function PathwayAdvisorResults() {
   const location = useLocation();
-  const { results, formData } = location.state || { results: [], formData: {} };
+  const { results, formData, submissionId } = location.state || { results: [], formData: {} };
+  const [generatingReport, setGeneratingReport] = useState(false);
+
+  const downloadReport = async () => {
+    if (!submissionId) return;
+    setGeneratingReport(true);
+    try {
+      // Usually already generated in the background when the advisor was completed
+      const report: any = await api.post(`/api/ai-provider/submissions/${submissionId}/report`, undefined, { skipAuth: true });
+      if (!report?.pdf_url) {
+        throw new Error('The report has no PDF yet. Please try again in a moment.');
+      }
+      const pdfUrl = report.pdf_url.startsWith('http')
+        ? report.pdf_url
+        : `${getApiUrl()}${report.pdf_url.startsWith('/') ? '' : '/'}${report.pdf_url}`;
+
+      const pdfResponse = await fetch(pdfUrl);
+      if (!pdfResponse.ok) {
+        throw new Error(`Failed to fetch PDF: ${pdfResponse.status} ${pdfResponse.statusText}`);
+      }
+      const blobUrl = window.URL.createObjectURL(await pdfResponse.blob());
+      const link = document.createElement('a');
+      link.href = blobUrl;
+      link.download = report.pdf_filename || `immigration_report_${new Date().toISOString().split('T')[0]}.pdf`;
+      link.style.display = 'none';
+      document.body.appendChild(link);
+      link.click();
+      document.body.removeChild(link);
+      setTimeout(() => window.URL.revokeObjectURL(blobUrl), 100);
+    } catch (error: any) {
+      console.error('Error generating pathway report:', error);
+      alert(`Failed to generate report: ${error?.message || 'Unknown error occurred'}`);
+    } finally {
+      setGeneratingReport(false);
+    }
+  };
 
   if (!results || results.length === 0) {
     return (
@@ -90,6 +127,22 @@ export function PathwayAdvisorResults() {
             and maximize your chances of success.
           </p>
           <div className="flex flex-col sm:flex-row gap-4">
+            {submissionId && (
+              <Button
+                size="lg"
+                variant="secondary"
+                onClick={downloadReport}
+                disabled={generatingReport}
+                className="inline-flex items-center"
+              >
+                {generatingReport ? (
+                  <Loader2 className="w-5 h-5 mr-2 animate-spin" />
+                ) : (
+                  <Sparkles className="w-5 h-5 mr-2" />
+                )}
+                {generatingReport ? 'Generating Report...' : 'Get Your AI Report'}
+              </Button>
+            )}
             <Link to="/consultation">
               <Button size="lg" variant="secondary">
                 Book Consultation